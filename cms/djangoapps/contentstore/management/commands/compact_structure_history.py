@@ -0,0 +1,85 @@
+"""
+Script for storing the history of split modulestore courses as deltas
+"""
+
+
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.split_mongo.structure_deltas import (
+    DEFAULT_SNAPSHOT_INTERVAL,
+    compact_structure_history,
+    get_head_structure_ids
+)
+
+# To run from command line: ./manage.py cms compact_structure_history course-v1:org+course+run --commit
+
+
+class Command(BaseCommand):
+    """Store the structures of the history of split courses as deltas"""
+    help = '''
+    Store the structures of the history of split modulestore courses and libraries, which aren't
+    the head of any branch, as deltas against periodic full snapshots. Takes these arguments:
+    <course_id>...: the ids of the courses or libraries whose history to compact, all of them if none
+    --snapshot-interval: the number of consecutive versions stored as deltas against the same snapshot
+    --commit: do the compaction
+
+    If you do not specify '--commit', the command will print out how many structures would be compacted.
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_ids', nargs='*', help="IDs of the courses or libraries to compact")
+        parser.add_argument(
+            '--snapshot-interval', type=int, default=DEFAULT_SNAPSHOT_INTERVAL,
+            help="Number of consecutive versions stored as deltas against the same full snapshot",
+        )
+        parser.add_argument('--commit', action='store_true', help="Store the structures as deltas")
+
+    def handle(self, *args, **options):
+        """Execute the command"""
+        try:
+            course_keys = [CourseKey.from_string(course_id) for course_id in options['course_ids']]
+        except InvalidKeyError:
+            raise CommandError("Invalid course key.")  # lint-amnesty, pylint: disable=raise-missing-from
+
+        if options['snapshot_interval'] < 1:
+            raise CommandError("The snapshot interval must be at least 1.")
+
+        # pylint: disable=protected-access
+        split_store = modulestore()._get_modulestore_by_type(ModuleStoreEnum.Type.split)
+        if split_store is None:
+            raise CommandError("The split modulestore isn't configured.")
+        db_connection = split_store.db_connection
+
+        # Structures may be shared by several courses, so the heads of all courses must stay full structures.
+        head_ids = get_head_structure_ids(db_connection)
+        if course_keys:
+            course_indexes = list(db_connection.find_matching_course_indexes(course_keys=course_keys))
+            if len(course_indexes) != len(course_keys):
+                raise CommandError("Course not found.")
+            structure_ids = [
+                version for course_index in course_indexes for version in course_index['versions'].values()
+            ]
+        else:
+            structure_ids = list(head_ids)
+        original_versions = db_connection.structures.distinct('original_version', {'_id': {'$in': structure_ids}})
+
+        total_deltas = total_saved_bytes = 0
+        for original_version in original_versions:
+            num_deltas, saved_bytes = compact_structure_history(
+                db_connection, original_version, head_ids,
+                snapshot_interval=options['snapshot_interval'], dry_run=not options['commit'],
+            )
+            total_deltas += num_deltas
+            total_saved_bytes += saved_bytes
+
+        if options['commit']:
+            print(f"Success! Stored {total_deltas} structures as deltas, saving {total_saved_bytes} bytes.")
+        else:
+            print(
+                f"Dry run. {total_deltas} structures would have been stored as deltas, "
+                f"saving {total_saved_bytes} bytes."
+            )
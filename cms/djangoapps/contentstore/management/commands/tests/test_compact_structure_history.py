@@ -0,0 +1,111 @@
+"""
+Tests for the compact_structure_history management command
+"""
+
+
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.split_mongo.structure_deltas import is_delta
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+
+class TestCompactStructureHistory(ModuleStoreTestCase):
+    """
+    Tests for the compact_structure_history management command
+    """
+    def setUp(self):
+        super().setUp()
+        self.course = CourseFactory.create(default_store=ModuleStoreEnum.Type.split)
+        with self.store.bulk_operations(self.course.id):
+            chapter = ItemFactory.create(category='chapter', parent_location=self.course.location)
+            sequential = ItemFactory.create(category='sequential', parent_location=chapter.location)
+            vertical = ItemFactory.create(category='vertical', parent_location=sequential.location)
+            html_blocks = [
+                ItemFactory.create(category='html', parent_location=vertical.location, display_name=f'Html {index}')
+                for index in range(10)
+            ]
+        # Each edit of a single block stores a new version of the course's draft structure.
+        self.edited_versions = []
+        with self.store.branch_setting(ModuleStoreEnum.Branch.draft_preferred, self.course.id):
+            for index, html_block in enumerate(html_blocks[:4]):
+                html_block.display_name = f'Edit {index}'
+                self.store.update_item(html_block, self.user.id)
+                self.edited_versions.append(self._get_index()['versions'][ModuleStoreEnum.BranchName.draft])
+        self.head_ids = set(self._get_index()['versions'].values())
+        self.structures = self._read_structures(self.edited_versions)
+
+    @property
+    def db_connection(self):
+        """
+        Returns the connection of the split modulestore.
+        """
+        return self.store._get_modulestore_by_type(ModuleStoreEnum.Type.split).db_connection  # pylint: disable=protected-access
+
+    def _get_index(self):
+        """
+        Returns the index of the test course.
+        """
+        return self.db_connection.get_course_index(self.course.id)
+
+    def _read_structures(self, structure_ids):
+        """
+        Returns the blocks of the structures of the given ids, applying deltas.
+        """
+        return {
+            structure['_id']: structure['blocks']
+            for structure in self.db_connection.find_structures_by_id(structure_ids)
+        }
+
+    def _delta_ids(self, structure_ids):
+        """
+        Returns the ids, among the given ones, of the structures stored as deltas.
+        """
+        return {
+            doc['_id'] for doc in self.db_connection.structures.find({'_id': {'$in': list(structure_ids)}})
+            if is_delta(doc)
+        }
+
+    def _call_command(self, *args):
+        """
+        Calls the command with the given arguments, returning what it printed.
+        """
+        with mock.patch('sys.stdout', new_callable=StringIO) as mock_stdout:
+            call_command('compact_structure_history', *args)
+        return mock_stdout.getvalue()
+
+    def test_invalid_course_key(self):
+        with self.assertRaisesRegex(CommandError, 'Invalid course key.'):
+            call_command('compact_structure_history', 'TestX/TS01')
+
+    def test_course_not_found(self):
+        with self.assertRaisesRegex(CommandError, 'Course not found.'):
+            call_command('compact_structure_history', 'course-v1:org+course+run')
+
+    def test_invalid_snapshot_interval(self):
+        with self.assertRaisesRegex(CommandError, 'The snapshot interval must be at least 1.'):
+            call_command('compact_structure_history', str(self.course.id), '--snapshot-interval', '0')
+
+    def test_dry_run(self):
+        output = self._call_command(str(self.course.id))
+        assert output.startswith('Dry run.')
+        assert not output.startswith('Dry run. 0 ')
+        assert not self._delta_ids(self.edited_versions)
+
+    def test_commit(self):
+        output = self._call_command(str(self.course.id), '--commit')
+        assert output.startswith('Success!')
+
+        # The versions before the head are stored as deltas, and still read as the same structures.
+        assert self._delta_ids(self.edited_versions) == set(self.edited_versions[:3])
+        assert not self._delta_ids(self.head_ids)
+        assert self._read_structures(self.edited_versions) == self.structures
+        assert self.store.get_course(self.course.id) is not None
+
+        # Compacting again finds nothing more to store as deltas.
+        output = self._call_command('--commit')
+        assert output.startswith('Success! Stored 0 structures as deltas')
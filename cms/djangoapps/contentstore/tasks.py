@@ -8,7 +8,7 @@ import os
 import shutil  # lint-amnesty, pylint: disable=wrong-import-order
 import tarfile  # lint-amnesty, pylint: disable=wrong-import-order
 from datetime import datetime  # lint-amnesty, pylint: disable=wrong-import-order
-from tempfile import NamedTemporaryFile, mkdtemp  # lint-amnesty, pylint: disable=wrong-import-order
+from tempfile import NamedTemporaryFile  # lint-amnesty, pylint: disable=wrong-import-order
 
 import olxcleaner
 import pkg_resources
@@ -60,7 +60,7 @@ from xmodule.exceptions import SerializationError
 from xmodule.modulestore import COURSE_ROOT, LIBRARY_ROOT
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import DuplicateCourseError, InvalidProctoringProvider, ItemNotFoundError
-from xmodule.modulestore.xml_exporter import export_course_to_xml, export_library_to_xml
+from xmodule.modulestore.xml_exporter import export_course_to_tarball, export_library_to_tarball
 from xmodule.modulestore.xml_importer import import_course_from_xml, import_library_from_xml
 
 from .exceptions import CourseImportException
@@ -337,20 +337,20 @@ def create_export_tarball(course_module, course_key, context, status=None):
     """
     name = course_module.url_name
     export_file = NamedTemporaryFile(prefix=name + '.', suffix=".tar.gz")  # lint-amnesty, pylint: disable=consider-using-with
-    root_dir = path(mkdtemp())
 
     try:
+        # The OLX and assets are streamed straight into the tarball, rather than written to a
+        # temporary directory and compressed afterwards.
+        LOGGER.debug('tar file being generated at %s', export_file.name)
         if isinstance(course_key, LibraryLocator):
-            export_library_to_xml(modulestore(), contentstore(), course_key, root_dir, name)
+            export_library_to_tarball(modulestore(), contentstore(), course_key, name, export_file)
         else:
-            export_course_to_xml(modulestore(), contentstore(), course_module.id, root_dir, name)
+            export_course_to_tarball(modulestore(), contentstore(), course_module.id, name, export_file)
+        export_file.seek(0)
 
         if status:
             status.set_state('Compressing')
             status.increment_completed_steps()
-        LOGGER.debug('tar file being generated at %s', export_file.name)
-        with tarfile.open(name=export_file.name, mode='w:gz') as tar_file:
-            tar_file.add(root_dir / name, arcname=name)
 
     except SerializationError as exc:
         LOGGER.exception('There was an error exporting %s', course_key, exc_info=True)
@@ -383,9 +383,6 @@ def create_export_tarball(course_module, course_key, context, status=None):
         if status:
             status.fail(json.dumps({'raw_error_msg': context['raw_err_msg']}))
         raise
-    finally:
-        if os.path.exists(root_dir / name):
-            shutil.rmtree(root_dir / name)
 
     return export_file
 
@@ -424,6 +421,30 @@ class CourseImportTask(UserTask):  # pylint: disable=abstract-method
         return f'Import of {key} from {filename}'
 
 
+def _import_progress_callback(status, log_prefix):
+    """
+    Return a progress callback for import_course_from_xml, which adds the items of each stage of the
+    import to the steps of the given import task status, and completes them as they're imported.
+
+    The import page only shows the state of the task, so it isn't affected by the extra steps.
+    """
+    completed_items = {}
+
+    def report_progress(stage, completed, total):
+        """
+        Record the progress of the given stage of the import.
+        """
+        if stage not in completed_items:
+            completed_items[stage] = 0
+            status.increment_total_steps(total)
+        if completed > completed_items[stage]:
+            status.increment_completed_steps(completed - completed_items[stage])
+            completed_items[stage] = completed
+        LOGGER.info(f'{log_prefix}: {stage}: {completed} of {total} done')
+
+    return report_progress
+
+
 @shared_task(base=CourseImportTask, bind=True)
 # Note: The decorator @set_code_owner_attribute could not be used because  # lint-amnesty, pylint: disable=too-many-statements
 #   the implementation of this task breaks with any additional decorators.
@@ -633,6 +654,8 @@ def import_olx(self, user_id, course_key_string, archive_path, archive_name, lan
             static_content_store=contentstore(),
             target_id=courselike_key,
             verbose=True,
+            static_content_workers=settings.COURSE_IMPORT_STATIC_CONTENT_WORKERS,
+            progress_callback=_import_progress_callback(self.status, log_prefix),
         )
 
         new_location = courselike_items[0].location
@@ -5,7 +5,7 @@ Tests for import_course_from_xml using the mongo modulestore.
 
 
 import copy
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 from uuid import uuid4
 
 import ddt
@@ -156,6 +156,28 @@ class ContentStoreImportTest(ModuleStoreTestCase):
         self.assertEqual(len(all_assets), 0)
         self.assertEqual(count, 0)
 
+    def test_import_progress(self):
+        """
+        Test that the import reports the progress of its stages, with static files imported concurrently.
+        """
+        module_store = modulestore()
+        content_store = contentstore()
+        progress_callback = Mock()
+        courses = import_course_from_xml(
+            module_store, self.user.id, TEST_DATA_DIR, ['toy'], static_content_store=content_store,
+            create_if_not_present=True, static_content_workers=4, progress_callback=progress_callback,
+        )
+
+        # The last report of each stage is that all of its items were imported.
+        final_progress = {
+            stage: (completed, total) for (stage, completed, total), _ in progress_callback.call_args_list
+        }
+        _, num_assets = content_store.get_all_content_for_course(courses[0].id)
+        self.assertEqual(final_progress['Importing static content'], (num_assets, num_assets))
+        num_blocks, total_blocks = final_progress['Importing blocks']
+        self.assertGreater(num_blocks, 0)
+        self.assertEqual(num_blocks, total_blocks)
+
     def test_no_static_link_rewrites_on_import(self):
         module_store = modulestore()
         courses = import_course_from_xml(
@@ -5,6 +5,7 @@ Unit tests for course import and export Celery tasks
 
 import copy
 import json
+import tarfile
 from unittest import mock
 from uuid import uuid4
 
@@ -53,8 +54,13 @@ class ExportCourseTestCase(CourseTestCase):
         self.assertEqual(len(artifacts), 1)
         output = artifacts[0]
         self.assertEqual(output.name, 'Output')
+        with tarfile.open(fileobj=output.file, mode='r:gz') as tar_file:
+            names = tar_file.getnames()
+        course_dir = self.course.location.block_id
+        self.assertIn(f'{course_dir}/course.xml', names)
+        self.assertIn(f'{course_dir}/policies/assets.json', names)
 
-    @mock.patch('cms.djangoapps.contentstore.tasks.export_course_to_xml', side_effect=side_effect_exception)
+    @mock.patch('cms.djangoapps.contentstore.tasks.export_course_to_tarball', side_effect=side_effect_exception)
     def test_exception(self, mock_export):  # pylint: disable=unused-argument
         """
         The export task should fail gracefully if an exception is thrown
@@ -1071,6 +1071,12 @@ MESSAGE_STORAGE = 'django.contrib.messages.storage.session.SessionStorage'
 COURSE_IMPORT_EXPORT_STORAGE = 'django.core.files.storage.FileSystemStorage'
 COURSE_METADATA_EXPORT_STORAGE = 'django.core.files.storage.FileSystemStorage'
 
+# .. setting_name: COURSE_IMPORT_STATIC_CONTENT_WORKERS
+# .. setting_default: 4
+# .. setting_description: Number of threads which read, thumbnail and save the static files of a course
+#     or library being imported into the contentstore concurrently. Set to 1 to import them one at a time.
+COURSE_IMPORT_STATIC_CONTENT_WORKERS = 4
+
 
 ##### EMBARGO #####
 EMBARGO_SITE_REDIRECT_URL = None
@@ -1990,6 +1996,22 @@ CACHES = {
     },
 }
 
+# .. setting_name: COURSE_STRUCTURE_LRU_CACHE_MAX_BYTES
+# .. setting_default: 0
+# .. setting_description: Maximum estimated size, in bytes, of the process-local LRU cache of decoded
+#     split modulestore course structures that sits in front of the 'course_structure_cache' cache.
+#     Structures are immutable, so cached entries are only ever evicted, never invalidated. Set to 0
+#     to disable the process-local cache.
+COURSE_STRUCTURE_LRU_CACHE_MAX_BYTES = 0
+
+# .. setting_name: COURSE_DEFINITION_PREFETCH_MAX_BYTES
+# .. setting_default: 8 * 1024 * 1024
+# .. setting_description: Maximum estimated size, in bytes, of the definitions prefetched by a split
+#     modulestore runtime. When a subtree of a course is loaded lazily, the definitions of its blocks are
+#     fetched in batches the first time any of them is read, rather than one query per block. Set to 0
+#     to fetch each definition separately.
+COURSE_DEFINITION_PREFETCH_MAX_BYTES = 8 * 1024 * 1024
+
 ############################ OAUTH2 Provider ###################################
 
 
@@ -2,6 +2,7 @@
 
 import logging
 import re
+from functools import lru_cache
 
 from django.conf import settings
 from django.contrib.staticfiles import finders
@@ -29,6 +30,37 @@ def _url_replace_regex(prefix):
         """.format(prefix=prefix)
 
 
+@lru_cache(maxsize=64)
+def _compiled_url_replace_regex(prefix):
+    """
+    Compiled _url_replace_regex, for the rewrites that run over every rendered fragment.
+    """
+    return re.compile(_url_replace_regex(prefix))
+
+
+def _static_prefix_regex(data_dir):
+    """
+    Match the prefix of static urls, unless they're already in the data directory.
+    """
+    return '(?:{static_url}|/static/)(?!{data_dir})'.format(
+        static_url=settings.STATIC_URL,
+        data_dir=data_dir
+    )
+
+
+def _is_xblock_resource_url(url):
+    """
+    Return whether the static url is a link to an XBlock resource, which isn't rewritten.
+
+    Probably wasn't a good idea that /static works for actual static assets and for magical
+    course asset URLs....
+    """
+    starts_with_static_url = url.startswith(str(settings.STATIC_URL))
+    starts_with_prefix = url.startswith(XBLOCK_STATIC_RESOURCE_PREFIX)
+    contains_prefix = XBLOCK_STATIC_RESOURCE_PREFIX in url
+    return starts_with_prefix or (starts_with_static_url and contains_prefix)
+
+
 def try_staticfiles_lookup(path):
     """
     Try to lookup a path in staticfiles_storage.  If it fails, return
@@ -70,7 +102,7 @@ def replace_jump_to_id_urls(text, course_id, jump_to_id_base_url):  # lint-amnes
         rest = match.group('rest')
         return "".join([quote, jump_to_id_base_url + rest, quote])
 
-    return re.sub(_url_replace_regex('/jump_to_id/'), replace_jump_to_id_url, text)
+    return _compiled_url_replace_regex('/jump_to_id/').sub(replace_jump_to_id_url, text)
 
 
 def replace_course_urls(text, course_key):
@@ -90,7 +122,7 @@ def replace_course_urls(text, course_key):
         rest = match.group('rest')
         return "".join([quote, '/courses/' + course_id + '/', rest, quote])
 
-    return re.sub(_url_replace_regex('/course/'), replace_course_url, text)
+    return _compiled_url_replace_regex('/course/').sub(replace_course_url, text)
 
 
 def process_static_urls(text, replacement_function, data_dir=None):
@@ -108,26 +140,13 @@ def process_static_urls(text, replacement_function, data_dir=None):
         quote = match.group('quote')
         rest = match.group('rest')
 
-        # Don't rewrite XBlock resource links.  Probably wasn't a good idea that /static
-        # works for actual static assets and for magical course asset URLs....
-        full_url = prefix + rest
-
-        starts_with_static_url = full_url.startswith(str(settings.STATIC_URL))
-        starts_with_prefix = full_url.startswith(XBLOCK_STATIC_RESOURCE_PREFIX)
-        contains_prefix = XBLOCK_STATIC_RESOURCE_PREFIX in full_url
-        if starts_with_prefix or (starts_with_static_url and contains_prefix):
+        # Don't rewrite XBlock resource links.
+        if _is_xblock_resource_url(prefix + rest):
             return original
 
         return replacement_function(original, prefix, quote, rest)
 
-    return re.sub(
-        _url_replace_regex('(?:{static_url}|/static/)(?!{data_dir})'.format(
-            static_url=settings.STATIC_URL,
-            data_dir=data_dir
-        )),
-        wrap_part_extraction,
-        text
-    )
+    return _compiled_url_replace_regex(_static_prefix_regex(data_dir)).sub(wrap_part_extraction, text)
 
 
 def make_static_urls_absolute(request, html):
@@ -171,58 +190,122 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
         Replace a single matched url.
         """
         original_uri = "".join([prefix, rest])
-        # Don't mess with things that end in '?raw'
-        if rest.endswith('?raw'):
+        url = _resolve_static_url(prefix, rest, data_directory, course_id, static_asset_path)
+        if url is None:
             static_paths_out.append((original_uri, original_uri))
             return original
 
-        # In debug mode, if we can find the url as is,
-        if settings.DEBUG and finders.find(rest, True):
-            static_paths_out.append((original_uri, original_uri))
+        static_paths_out.append((original_uri, url))
+        return "".join([quote, url, quote])
+
+    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+
+
+def replace_urls(text, course_id, jump_to_id_base_url, data_directory=None, static_asset_path='',
+                 resolved_static_urls=None):
+    """
+    Apply replace_static_urls, replace_course_urls and replace_jump_to_id_urls to `text` in a single scan.
+
+    The result is the same as that of applying them one after the other, except for urls nested
+    within the quotes of other urls, which are left as they are.
+
+    text: The source text to do the substitutions in
+    course_id: The course identifier, as passed to each of the three rewrites
+    jump_to_id_base_url: The base of the jump_to_id handler, see replace_jump_to_id_urls
+    data_directory, static_asset_path: As passed to replace_static_urls
+    resolved_static_urls: (optional) a dict memoizing the url each static path is replaced with, which
+      may be shared between calls with the same course_id, data_directory and static_asset_path
+    """
+    if resolved_static_urls is None:
+        resolved_static_urls = {}
+    course_url_base = '/courses/' + str(course_id) + '/'
+    data_dir = static_asset_path or data_directory
+
+    def replace_url(match):
+        """
+        Replace a single matched url, according to its prefix.
+        """
+        original = match.group(0)
+        prefix = match.group('prefix')
+        quote = match.group('quote')
+        rest = match.group('rest')
+
+        if match.group('static_prefix') is None:
+            base_url = course_url_base if prefix == '/course/' else jump_to_id_base_url
+            return "".join([quote, base_url, rest, quote])
+
+        # Don't rewrite XBlock resource links.
+        if _is_xblock_resource_url(prefix + rest):
+            return original
+
+        try:
+            url = resolved_static_urls[(prefix, rest)]
+        except KeyError:
+            url = resolved_static_urls[(prefix, rest)] = _resolve_static_url(
+                prefix, rest, data_directory, course_id, static_asset_path
+            )
+        if url is None:
             return original
+        return "".join([quote, url, quote])
 
-        # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
-        elif (not static_asset_path) and course_id:
-            # first look in the static file pipeline and see if we are trying to reference
-            # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
+    regex = _compiled_url_replace_regex(
+        '(?P<static_prefix>{static_prefix})|/course/|/jump_to_id/'.format(static_prefix=_static_prefix_regex(data_dir))
+    )
+    return regex.sub(replace_url, text)
 
-            exists_in_staticfiles_storage = False
-            try:
-                exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
-            except Exception as err:  # lint-amnesty, pylint: disable=broad-except
-                log.warning("staticfiles_storage couldn't find path {}: {}".format(
-                    rest, str(err)))
 
-            if exists_in_staticfiles_storage:
+def _resolve_static_url(prefix, rest, data_directory, course_id, static_asset_path):
+    """
+    Return the url that the static url `prefix + rest` should be replaced with, as described
+    in replace_static_urls, or None if it should be left as it is.
+    """
+    # Don't mess with things that end in '?raw'
+    if rest.endswith('?raw'):
+        return None
+
+    # In debug mode, if we can find the url as is,
+    if settings.DEBUG and finders.find(rest, True):
+        return None
+
+    # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
+    elif (not static_asset_path) and course_id:
+        # first look in the static file pipeline and see if we are trying to reference
+        # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
+
+        exists_in_staticfiles_storage = False
+        try:
+            exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
+        except Exception as err:  # lint-amnesty, pylint: disable=broad-except
+            log.warning("staticfiles_storage couldn't find path {}: {}".format(
+                rest, str(err)))
+
+        if exists_in_staticfiles_storage:
+            url = staticfiles_storage.url(rest)
+        else:
+            # if not, then assume it's courseware specific content and then look in the
+            # Mongo-backed database
+            # Import is placed here to avoid model import at project startup.
+            from common.djangoapps.static_replace.models import AssetBaseUrlConfig, AssetExcludedExtensionsConfig
+            base_url = AssetBaseUrlConfig.get_base_url()
+            excluded_exts = AssetExcludedExtensionsConfig.get_excluded_extensions()
+            url = StaticContent.get_canonicalized_asset_path(course_id, rest, base_url, excluded_exts)
+
+            if AssetLocator.CANONICAL_NAMESPACE in url:
+                url = url.replace('block@', 'block/', 1)
+
+    # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
+    else:
+        course_path = "/".join((static_asset_path or data_directory, rest))
+
+        try:
+            if staticfiles_storage.exists(rest):
                 url = staticfiles_storage.url(rest)
             else:
-                # if not, then assume it's courseware specific content and then look in the
-                # Mongo-backed database
-                # Import is placed here to avoid model import at project startup.
-                from common.djangoapps.static_replace.models import AssetBaseUrlConfig, AssetExcludedExtensionsConfig
-                base_url = AssetBaseUrlConfig.get_base_url()
-                excluded_exts = AssetExcludedExtensionsConfig.get_excluded_extensions()
-                url = StaticContent.get_canonicalized_asset_path(course_id, rest, base_url, excluded_exts)
-
-                if AssetLocator.CANONICAL_NAMESPACE in url:
-                    url = url.replace('block@', 'block/', 1)
-
-        # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
-        else:
-            course_path = "/".join((static_asset_path or data_directory, rest))
-
-            try:
-                if staticfiles_storage.exists(rest):
-                    url = staticfiles_storage.url(rest)
-                else:
-                    url = staticfiles_storage.url(course_path)
-            # And if that fails, assume that it's course content, and add manually data directory
-            except Exception as err:  # lint-amnesty, pylint: disable=broad-except
-                log.warning("staticfiles_storage couldn't find path {}: {}".format(
-                    rest, str(err)))
-                url = "".join([prefix, course_path])
-
-        static_paths_out.append((original_uri, url))
-        return "".join([quote, url, quote])
+                url = staticfiles_storage.url(course_path)
+        # And if that fails, assume that it's course content, and add manually data directory
+        except Exception as err:  # lint-amnesty, pylint: disable=broad-except
+            log.warning("staticfiles_storage couldn't find path {}: {}".format(
+                rest, str(err)))
+            url = "".join([prefix, course_path])
 
-    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+    return url
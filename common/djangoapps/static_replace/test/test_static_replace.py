@@ -18,7 +18,9 @@ from common.djangoapps.static_replace import (
     make_static_urls_absolute,
     process_static_urls,
     replace_course_urls,
-    replace_static_urls
+    replace_jump_to_id_urls,
+    replace_static_urls,
+    replace_urls
 )
 from xmodule.assetstore.assetmgr import AssetManager
 from xmodule.contentstore.content import StaticContent
@@ -110,6 +112,45 @@ def test_storage_url_not_exists(mock_storage):
     mock_storage.url.assert_called_once_with('data_dir/file.png')
 
 
+@patch('common.djangoapps.static_replace.staticfiles_storage', autospec=True)
+def test_replace_urls(mock_storage):
+    """
+    Make sure replace_urls makes the same replacements as the three separate rewrites.
+    """
+    mock_storage.exists.return_value = True
+    mock_storage.url.side_effect = lambda path: '/static/hashed/' + path
+    jump_to_id_base_url = '/courses/org/course/run/jump_to_id/'
+    text = (
+        '<img src="/static/file.png"/><a href="/course/info">Info</a>'
+        '<a href=\'/jump_to_id/problem_1\'>Problem</a><script src="/static/file.js?raw"></script>'
+        '<img src="/static/xblock/resources/some.xblock/public/image.png"/>'
+    )
+    expected = replace_jump_to_id_urls(
+        replace_course_urls(replace_static_urls(text, DATA_DIRECTORY, COURSE_KEY), COURSE_KEY),
+        COURSE_KEY,
+        jump_to_id_base_url,
+    )
+    assert '/static/hashed/file.png' in expected
+    assert replace_urls(text, COURSE_KEY, jump_to_id_base_url, data_directory=DATA_DIRECTORY) == expected
+
+
+@patch('common.djangoapps.static_replace.staticfiles_storage', autospec=True)
+def test_replace_urls_resolved_static_urls(mock_storage):
+    """
+    Make sure replace_urls resolves each static url once, given a dict to memoize them in.
+    """
+    mock_storage.exists.return_value = True
+    mock_storage.url.return_value = '/static/hashed/file.png'
+    resolved_static_urls = {}
+    for __ in range(2):
+        assert replace_urls(
+            STATIC_SOURCE + STATIC_SOURCE, COURSE_KEY, '/jump_to_id/', DATA_DIRECTORY,
+            resolved_static_urls=resolved_static_urls,
+        ) == '"/static/hashed/file.png"' * 2
+    mock_storage.exists.assert_called_once_with('file.png')
+    assert resolved_static_urls == {('/static/', 'file.png'): '/static/hashed/file.png'}
+
+
 @patch('common.djangoapps.static_replace.StaticContent', autospec=True)
 @patch('xmodule.modulestore.django.modulestore', autospec=True)
 @patch('common.djangoapps.static_replace.models.AssetBaseUrlConfig.get_base_url')
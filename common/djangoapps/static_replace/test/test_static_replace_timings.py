@@ -0,0 +1,113 @@
+"""
+Performance test for rewriting the urls of a rendered sequence with the three
+separate static_replace rewrites, or with replace_urls.
+"""
+
+
+import timeit
+import unittest
+
+from common.djangoapps.static_replace import (
+    replace_course_urls,
+    replace_jump_to_id_urls,
+    replace_static_urls,
+    replace_urls
+)
+from xmodule.contentstore.content import StaticContent
+from xmodule.contentstore.django import contentstore
+from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
+
+# Number of units of the sequence, and of components per unit.
+SEQUENCE_SHAPE = (12, 5)
+
+# Number of distinct course assets linked from the components.
+NUM_ASSETS = 10
+
+# Number of timed renders of the sequence.
+NUM_CALLS = 5
+
+COMPONENT_HTML = '''
+<div class="xblock xblock-student_view xblock-student_view-html" data-block-type="html">
+  <h3 class="hd hd-2">Component {index}</h3>
+  <p>Read the <a href="/course/info">course info</a>, then <a href="/jump_to_id/problem_{index}">try it</a>.</p>
+  <img src="/static/figure_{asset}.png" alt="Figure {asset}"/>
+  <p><a href="/static/handout_{asset}.pdf">Handout</a> and <a href='/static/figure_{next_asset}.png'>next figure</a></p>
+  <script type="text/javascript" src="/static/js/vendor/jquery.min.js?raw"></script>
+  <img src="/static/xblock/resources/html.xblock/public/icon.png"/>
+</div>
+'''
+
+
+@unittest.skip
+class StaticReplaceTimings(SharedModuleStoreTestCase):
+    """
+    This class exists to time the url rewrites of a rendered sequence, which
+    the LMS applies to the fragment of each block: components, units and the
+    sequence itself.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.course = CourseFactory.create()
+        for asset in range(NUM_ASSETS):
+            for filename in (f'figure_{asset}.png', f'handout_{asset}.pdf'):
+                location = StaticContent.compute_location(cls.course.id, filename)
+                contentstore().save(StaticContent(location, filename, 'application/octet-stream', b'data'))
+        cls.jump_to_id_base_url = f'/courses/{cls.course.id}/jump_to_id/'
+
+    def _render_sequence(self, rewrite):
+        """
+        Builds the html of the sequence, applying `rewrite` to the fragment of
+        each block as the block wrappers of the LMS do.
+        """
+        num_units, num_components = SEQUENCE_SHAPE
+        units = []
+        for unit_index in range(num_units):
+            components = []
+            for component_index in range(num_components):
+                index = unit_index * num_components + component_index
+                components.append(rewrite(COMPONENT_HTML.format(
+                    index=index, asset=index % NUM_ASSETS, next_asset=(index + 1) % NUM_ASSETS,
+                )))
+            units.append(rewrite('<div class="vert-mod">{}</div>'.format(''.join(components))))
+        return rewrite('<div class="sequence">{}</div>'.format(''.join(units)))
+
+    def _separate_rewrites(self, text):
+        """
+        The three rewrites, one after the other.
+        """
+        text = replace_static_urls(text, None, course_id=self.course.id)
+        text = replace_course_urls(text, self.course.id)
+        return replace_jump_to_id_urls(text, self.course.id, self.jump_to_id_base_url)
+
+    def test_rewrite_timings(self):
+        """
+        Time the rewrites of the sequence with the separate rewrites and replace_urls.
+        """
+        separate_html = self._render_sequence(self._separate_rewrites)
+        separate_time = timeit.timeit(lambda: self._render_sequence(self._separate_rewrites), number=NUM_CALLS)
+
+        def render_with_replace_urls():
+            """
+            Render the sequence with replace_urls, memoizing static urls for the render as a request would.
+            """
+            resolved_static_urls = {}
+            return self._render_sequence(lambda text: replace_urls(
+                text, self.course.id, self.jump_to_id_base_url, resolved_static_urls=resolved_static_urls,
+            ))
+
+        single_pass_html = render_with_replace_urls()
+        single_pass_time = timeit.timeit(render_with_replace_urls, number=NUM_CALLS)
+
+        assert single_pass_html == separate_html
+        num_units = SEQUENCE_SHAPE[0]
+        print('{} units, separate rewrites {:.2f}ms, replace_urls {:.2f}ms per unit'.format(
+            num_units,
+            separate_time * 1000 / NUM_CALLS / num_units,
+            single_pass_time * 1000 / NUM_CALLS / num_units,
+        ))
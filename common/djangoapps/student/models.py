@@ -246,6 +246,29 @@ def anonymous_id_for_user(user, course_id, save='DEPRECATED'):
     return anonymous_user_id
 
 
+def prefetch_anonymous_ids_for_users(users, course_id):
+    """
+    Load the existing anonymous ids of the given users in the given course
+    with a single query, caching them on the user objects so subsequent
+    calls to anonymous_id_for_user for these users don't hit the database.
+
+    Users without an anonymous id yet are left alone; anonymous_id_for_user
+    creates one for them on first use.
+    """
+    users_by_id = {user.id: user for user in users if not user.is_anonymous}
+    anonymous_user_ids = AnonymousUserId.objects.filter(
+        user_id__in=list(users_by_id), course_id=course_id,
+    ).order_by('id').values_list('user_id', 'anonymous_user_id')
+
+    # Ordered by id, so that the most recently created id of a user wins,
+    # matching the precedence used by anonymous_id_for_user.
+    for user_id, anonymous_user_id in anonymous_user_ids:
+        user = users_by_id[user_id]
+        if not hasattr(user, '_anonymous_id'):
+            user._anonymous_id = {}  # pylint: disable=protected-access
+        user._anonymous_id[course_id] = anonymous_user_id  # pylint: disable=protected-access
+
+
 def user_by_anonymous_id(uid):
     """
     Return user by anonymous_user_id using AnonymousUserId lookup table.
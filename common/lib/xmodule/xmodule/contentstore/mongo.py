@@ -10,6 +10,7 @@ import gridfs
 import pymongo
 from bson.son import SON
 from fs.osfs import OSFS
+from fs.path import join, relpath
 from gridfs.errors import NoFile, FileExists
 from mongodb_proxy import autoretry_read
 from opaque_keys.edx.keys import AssetKey
@@ -22,6 +23,9 @@ from xmodule.util.misc import escape_invalid_characters
 
 from .content import ContentStore, StaticContent, StaticContentStream
 
+# GridFS bookkeeping attributes which aren't exported to the assets policy file
+NON_POLICY_ASSET_ATTRS = ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']
+
 
 class MongoContentStore(ContentStore):
     """
@@ -217,12 +221,49 @@ class MongoContentStore(ContentStore):
             # to look. -- pmitros
             self.export(asset['asset_key'], output_directory)
             for attr, value in asset.items():
-                if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']:
+                if attr not in NON_POLICY_ASSET_ATTRS:
                     policy.setdefault(asset['asset_key'].block_id, {})[attr] = value
 
         with open(assets_policy_file, 'w') as f:
             json.dump(policy, f, sort_keys=True, indent=4)
 
+    def export_all_for_course_to_fs(self, course_key, export_fs, output_directory, assets_policy_file):
+        """
+        Like `export_all_for_course`, but writes to the filesystem `export_fs` instead of to disk.
+
+        Each asset is read from GridFS as a stream and handed to `export_fs.upload`, so it's
+        never held in memory as a whole.
+
+        Args:
+            course_key (CourseKey): the :class:`CourseKey` identifying the course
+            export_fs (FS): the filesystem to export to
+            output_directory: the directory in `export_fs` under which to put all the asset files
+            assets_policy_file: the path in `export_fs` of the policy file
+        """
+        policy = {}
+        assets, __ = self.get_all_content_for_course(course_key)
+
+        for asset in assets:
+            content = self.find(asset['asset_key'], as_stream=True)
+            asset_dir = output_directory
+            if content.import_path is not None:
+                asset_dir = join(asset_dir, relpath(os.path.dirname(content.import_path)))
+            export_fs.makedirs(asset_dir, recreate=True)
+
+            # Escape invalid char from filename.
+            export_name = escape_invalid_characters(name=content.name, invalid_char_list=['/', '\\'])
+            try:
+                export_fs.upload(join(asset_dir, export_name), content)
+            finally:
+                content.close()
+
+            for attr, value in asset.items():
+                if attr not in NON_POLICY_ASSET_ATTRS:
+                    policy.setdefault(asset['asset_key'].block_id, {})[attr] = value
+
+        with export_fs.open(assets_policy_file, 'w') as f:
+            json.dump(policy, f, sort_keys=True, indent=4)
+
     def get_all_content_thumbnails_for_course(self, course_key):
         return self._get_all_content_for_course(course_key, get_thumbnails=True)[0]
 
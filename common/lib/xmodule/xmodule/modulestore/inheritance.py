@@ -274,12 +274,18 @@ def compute_inherited_metadata(descriptor):
     NOTE: This means that there is no such thing as lazy loading at the
     moment--this accesses all the children."""
     if descriptor.has_children:
-        parent_metadata = descriptor.xblock_kvs.inherited_settings.copy()
+        parent_metadata = descriptor.xblock_kvs.inherited_settings
         # add any of descriptor's explicitly set fields to the inheriting list
-        for field in InheritanceMixin.fields.values():  # lint-amnesty, pylint: disable=no-member
-            if field.is_set_on(descriptor):
-                # inherited_settings values are json repr
-                parent_metadata[field.name] = field.read_json(descriptor)
+        # (inherited_settings values are json repr)
+        explicit_metadata = {
+            field.name: field.read_json(descriptor)
+            for field in InheritanceMixin.fields.values()  # lint-amnesty, pylint: disable=no-member
+            if field.is_set_on(descriptor)
+        }
+        # Descendants share the settings dict of their nearest ancestor that sets
+        # an inheritable field, so that dicts are only made where values change.
+        if explicit_metadata:
+            parent_metadata = dict(parent_metadata, **explicit_metadata)
 
         for child in descriptor.get_children():
             inherit_metadata(child, parent_metadata)
@@ -312,14 +318,20 @@ def own_metadata(module):
 class InheritingFieldData(KvsFieldData):
     """A `FieldData` implementation that can inherit value from parents to children."""
 
-    def __init__(self, inheritable_names, **kwargs):
+    def __init__(self, inheritable_names, inherited_value_lookup=None, **kwargs):
         """
         `inheritable_names` is a list of names that can be inherited from
         parents.
 
+        `inherited_value_lookup`, if given, is a function of a field name
+        which returns the json value that the block inherits for that name
+        from its nearest ancestor that sets it, or raises KeyError if none
+        does. It replaces walking up the block's ancestors, which loads them.
+
         """
         super().__init__(**kwargs)
         self.inheritable_names = set(inheritable_names)
+        self.inherited_value_lookup = inherited_value_lookup
 
     def has_default_value(self, name):
         """
@@ -340,6 +352,9 @@ class InheritingFieldData(KvsFieldData):
             # that this field is set on. Use the field from the current
             # block so that if it has a different default than the root
             # node of the tree, the block's default will be used.
+            if self.inherited_value_lookup is not None:
+                return self._default_from_lookup(block, name)
+
             field = block.fields[name]
             ancestor = block.get_parent()
             # In case, if block's parent is of type 'library_content',
@@ -358,11 +373,25 @@ class InheritingFieldData(KvsFieldData):
                     ancestor = ancestor.get_parent()
         return super().default(block, name)
 
+    def _default_from_lookup(self, block, name):
+        """
+        The default for an inheritable name, found with `inherited_value_lookup`.
+        """
+        # As above, children of 'library_content' blocks use the kvs' default.
+        parent = block.parent
+        if not (parent and parent.block_type == 'library_content' and self.has_default_value(name)):
+            try:
+                return self.inherited_value_lookup(name)
+            except KeyError:
+                pass
+        return super().default(block, name)
+
 
-def inheriting_field_data(kvs):
+def inheriting_field_data(kvs, inherited_value_lookup=None):
     """Create an InheritanceFieldData that inherits the names in InheritanceMixin."""
     return InheritingFieldData(
         inheritable_names=InheritanceMixin.fields.keys(),  # lint-amnesty, pylint: disable=no-member
+        inherited_value_lookup=inherited_value_lookup,
         kvs=kvs,
     )
 
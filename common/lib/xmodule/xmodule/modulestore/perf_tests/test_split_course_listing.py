@@ -0,0 +1,64 @@
+"""
+Performance test for listing many courses in the split modulestore, with
+structures read one query at a time or in concurrent batches.
+"""
+
+
+import timeit
+import unittest
+
+import ddt
+
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.tests.utils import MongoContentstoreBuilder, VersioningModulestoreBuilder
+
+# Number of courses to create, and of chapters in each of them.
+NUM_COURSES = 200
+NUM_CHAPTERS = 20
+
+# Number of timed calls of each listing.
+NUM_CALLS = 10
+
+
+@ddt.ddt
+@unittest.skip
+class SplitCourseListingTimings(unittest.TestCase):
+    """
+    This class exists to time get_course_summaries and get_courses on a local
+    mongo with many courses, with and without concurrent reads.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    def _create_courses(self, store):
+        """
+        Creates NUM_COURSES courses of NUM_CHAPTERS chapters in the given store.
+        """
+        user_id = ModuleStoreEnum.UserID.test
+        for course_index in range(NUM_COURSES):
+            course = store.create_course('perf', f'listing_{course_index}', 'run', user_id)
+            with store.bulk_operations(course.id):
+                for _ in range(NUM_CHAPTERS):
+                    store.create_child(user_id, course.location, 'chapter')
+
+    @ddt.data('get_course_summaries', 'get_courses')
+    def test_course_listing_timings(self, listing_method):
+        """
+        Time the given listing method with increasing read concurrency.
+        """
+        with MongoContentstoreBuilder().build() as contentstore:
+            with VersioningModulestoreBuilder().build_with_contentstore(contentstore) as store:
+                self._create_courses(store)
+                list_courses = lambda: getattr(store, listing_method)(ModuleStoreEnum.BranchName.draft)
+
+                timings = []
+                for read_concurrency in (0, 2, 4, 8):
+                    store.db_connection.read_concurrency = read_concurrency
+                    assert len(list_courses()) == NUM_COURSES
+                    timings.append((read_concurrency, timeit.timeit(list_courses, number=NUM_CALLS)))
+
+        for read_concurrency, timing in timings:
+            print('{} with read_concurrency={}: {:.2f}ms per call'.format(
+                listing_method, read_concurrency, timing * 1000 / NUM_CALLS,
+            ))
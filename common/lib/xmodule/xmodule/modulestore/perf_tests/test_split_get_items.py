@@ -0,0 +1,100 @@
+"""
+Performance test for SplitMongoModuleStore.get_items with and without the
+secondary indexes of course structures.
+"""
+
+
+import re
+import timeit
+import unittest
+from unittest.mock import patch
+
+import ddt
+
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
+from xmodule.modulestore.split_mongo.structure_index import STRUCTURE_INDEX_CACHE
+from xmodule.modulestore.tests.utils import MongoContentstoreBuilder, VersioningModulestoreBuilder
+
+# Number of chapters, sequentials per chapter, verticals per sequential and
+# problems per vertical of the generated course: 5111 blocks in total.
+COURSE_SHAPE = (10, 10, 10, 4)
+
+# Number of timed calls of get_items for each query.
+NUM_CALLS = 20
+
+QUERIES = (
+    ('chapters', {'qualifiers': {'category': 'chapter'}}),
+    ('by_name', {'qualifiers': {'name': ['chapter_0', 'sequential_0_0']}}),
+    ('graded', {'settings': {'graded': True}}),
+    ('graded_problems', {'qualifiers': {'category': 'problem'}, 'settings': {'graded': True}}),
+    ('regex', {'settings': {'display_name': re.compile('Sequential 0 0$')}}),
+)
+
+
+@ddt.ddt
+@unittest.skip
+class SplitGetItemsTimings(unittest.TestCase):
+    """
+    This class exists to time get_items on a generated 5k-block course, with
+    qualifiers looked up in the structure index or scanned for.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    def _create_course(self, store):
+        """
+        Creates the course of COURSE_SHAPE in the given store, returning its key.
+        """
+        num_chapters, num_sequentials, num_verticals, num_problems = COURSE_SHAPE
+        user_id = ModuleStoreEnum.UserID.test
+        course = store.create_course('perf', 'get_items', 'run', user_id)
+        with store.bulk_operations(course.id):
+            for chapter_index in range(num_chapters):
+                chapter = store.create_child(
+                    user_id, course.location, 'chapter', block_id=f'chapter_{chapter_index}',
+                )
+                for sequential_index in range(num_sequentials):
+                    sequential = store.create_child(
+                        user_id, chapter.location, 'sequential',
+                        block_id=f'sequential_{chapter_index}_{sequential_index}',
+                        fields={
+                            'display_name': f'Sequential {chapter_index} {sequential_index}',
+                            'graded': sequential_index % 2 == 0,
+                        },
+                    )
+                    for vertical_index in range(num_verticals):
+                        vertical = store.create_child(user_id, sequential.location, 'vertical')
+                        for _ in range(num_problems):
+                            store.create_child(
+                                user_id, vertical.location, 'problem',
+                                fields={'graded': vertical_index == 0},
+                            )
+        return course.id
+
+    @ddt.data(*QUERIES)
+    @ddt.unpack
+    def test_get_items_timings(self, query_name, query):
+        """
+        Time get_items for the given query with and without the structure index.
+        """
+        with MongoContentstoreBuilder().build() as contentstore:
+            with VersioningModulestoreBuilder().build_with_contentstore(contentstore) as store:
+                course_key = self._create_course(store)
+                STRUCTURE_INDEX_CACHE.clear()
+
+                indexed_items = store.get_items(course_key, **query)
+                indexed_time = timeit.timeit(lambda: store.get_items(course_key, **query), number=NUM_CALLS)
+
+                with patch.object(
+                    SplitMongoModuleStore, '_get_candidate_blocks',
+                    lambda self, course, *args: course.structure['blocks'].items(),
+                ):
+                    scanned_items = store.get_items(course_key, **query)
+                    scanned_time = timeit.timeit(lambda: store.get_items(course_key, **query), number=NUM_CALLS)
+
+        assert [item.location for item in indexed_items] == [item.location for item in scanned_items]
+        print('{}: {} items, indexed {:.2f}ms, scanned {:.2f}ms per call'.format(
+            query_name, len(indexed_items), indexed_time * 1000 / NUM_CALLS, scanned_time * 1000 / NUM_CALLS,
+        ))
@@ -0,0 +1,89 @@
+"""
+Performance test for editing a block of a large course in the split
+modulestore, as Studio does, with copy-on-write or deep-copied structure
+versions.
+"""
+
+
+import copy
+import time
+import tracemalloc
+import unittest
+from unittest.mock import patch
+
+import ddt
+
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.split_mongo.copy_on_write import fork_blocks
+from xmodule.modulestore.tests.utils import MongoContentstoreBuilder, VersioningModulestoreBuilder
+
+# Number of chapters, sequentials per chapter, verticals per sequential and
+# problems per vertical of the generated course: 5111 blocks in total.
+COURSE_SHAPE = (10, 10, 10, 4)
+
+# Number of timed edits.
+NUM_EDITS = 20
+
+
+@ddt.ddt
+@unittest.skip
+class SplitUpdateItemTimings(unittest.TestCase):
+    """
+    This class exists to time update_item on a generated 5k-block course, and
+    to measure the memory it allocates.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    def _create_course(self, store):
+        """
+        Creates the course of COURSE_SHAPE in the given store, returning the
+        locations of its problems.
+        """
+        num_chapters, num_sequentials, num_verticals, num_problems = COURSE_SHAPE
+        user_id = ModuleStoreEnum.UserID.test
+        course = store.create_course('perf', 'update_item', 'run', user_id)
+        problem_locations = []
+        with store.bulk_operations(course.id):
+            for _ in range(num_chapters):
+                chapter = store.create_child(user_id, course.location, 'chapter')
+                for _ in range(num_sequentials):
+                    sequential = store.create_child(user_id, chapter.location, 'sequential')
+                    for _ in range(num_verticals):
+                        vertical = store.create_child(user_id, sequential.location, 'vertical')
+                        for _ in range(num_problems):
+                            problem = store.create_child(user_id, vertical.location, 'problem')
+                            problem_locations.append(problem.location)
+        return problem_locations
+
+    @ddt.data(True, False)
+    def test_update_item_timings(self, copy_on_write):
+        """
+        Time update_item of a problem's settings, with structure versions
+        sharing unchanged blocks or deep-copying them.
+        """
+        with MongoContentstoreBuilder().build() as contentstore:
+            with VersioningModulestoreBuilder().build_with_contentstore(contentstore) as store:
+                problem_locations = self._create_course(store)
+                user_id = ModuleStoreEnum.UserID.test
+
+                if copy_on_write:
+                    version_blocks = fork_blocks
+                else:
+                    version_blocks = lambda structure: copy.deepcopy(structure['blocks'])
+
+                with patch('xmodule.modulestore.split_mongo.split.fork_blocks', version_blocks):
+                    tracemalloc.start()
+                    start = time.perf_counter()
+                    for edit_index in range(NUM_EDITS):
+                        problem = store.get_item(problem_locations[edit_index * 97 % len(problem_locations)])
+                        problem.display_name = f'Edit {edit_index}'
+                        store.update_item(problem, user_id)
+                    elapsed = time.perf_counter() - start
+                    _, peak_bytes = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+
+        print('update_item with copy_on_write={}: {:.2f}ms per edit, {:.1f}MiB peak allocations'.format(
+            copy_on_write, elapsed * 1000 / NUM_EDITS, peak_bytes / (1024 * 1024),
+        ))
@@ -2,6 +2,7 @@
 
 import logging
 import sys
+from functools import partial
 
 from contracts import contract, new_contract
 from fs.osfs import OSFS
@@ -20,7 +21,9 @@ from xmodule.modulestore.edit_info import EditInfoRuntimeMixin
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.modulestore.inheritance import InheritanceMixin, inheriting_field_data
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
+from xmodule.modulestore.split_mongo.copy_on_write import shared_items
 from xmodule.modulestore.split_mongo.definition_lazy_loader import DefinitionLazyLoader
+from xmodule.modulestore.split_mongo.definition_prefetcher import DefinitionPrefetcher
 from xmodule.modulestore.split_mongo.id_manager import SplitMongoIdManager
 from xmodule.modulestore.split_mongo.split_mongo_kvs import SplitMongoKVS
 from xmodule.x_module import XModuleMixin
@@ -82,6 +85,8 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):  # li
         self.course_id = course_entry.course_key
         self.lazy = lazy
         self.module_data = module_data
+        # Fetches the definitions of lazily loaded subtrees in batches
+        self.definition_prefetcher = DefinitionPrefetcher(modulestore)
         self.default_class = default_class
         self.local_modules = {}
         self._services['library_tools'] = LibraryToolsService(modulestore, user_id=None)
@@ -90,11 +95,27 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):  # li
     @contract(returns="dict(BlockKey: BlockKey)")
     def _parent_map(self):  # lint-amnesty, pylint: disable=missing-function-docstring
         parent_map = {}
-        for block_key, block in self.course_entry.structure['blocks'].items():
+        for block_key, block in shared_items(self.course_entry.structure['blocks']):
             for child in block.fields.get('children', []):
                 parent_map[child] = block_key
         return parent_map
 
+    @lazy
+    def _structure_inheritance(self):
+        """
+        The inheritable settings of the blocks of this runtime's structure, or None if it may still be modified.
+        """
+        return self.modulestore.get_structure_inheritance(self.course_entry)
+
+    def _get_inherited_value_lookup(self, block_key):
+        """
+        Returns the function looking up the values inherited by the given block, or None
+        if they must be inherited from its loaded ancestors.
+        """
+        if self._structure_inheritance is None or block_key not in self.course_entry.structure['blocks']:
+            return None
+        return partial(self._structure_inheritance.get_inherited_value, block_key)
+
     @contract(usage_key="BlockUsageLocator | BlockKey", course_entry_override="CourseEnvelope | None")
     def _load_item(self, usage_key, course_entry_override=None, **kwargs):
         """
@@ -195,7 +216,7 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):  # li
 
         if definition_id is not None and not block_data.definition_loaded:
             definition_loader = DefinitionLazyLoader(
-                self.modulestore,
+                self.definition_prefetcher,
                 course_key,
                 block_key.type,
                 definition_id,
@@ -245,7 +266,7 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):  # li
             )
 
             if InheritanceMixin in self.modulestore.xblock_mixins:
-                field_data = inheriting_field_data(kvs)
+                field_data = inheriting_field_data(kvs, self._get_inherited_value_lookup(block_key))
             else:
                 field_data = KvsFieldData(kvs)
 
@@ -0,0 +1,134 @@
+"""
+Copy-on-write blocks of course structures.
+
+Versioning a structure used to deep-copy all of its blocks, although an
+edit changes only a few of them.  Instead, the blocks of the new version
+and of the version it was copied from share their BlockData, and each
+version deep-copies a block the first time the block is read from it.
+Unchanged blocks are thus never copied.
+
+Shared BlockData are never handed out by a :class:`CopyOnWriteBlocks`, so
+callers may mutate the BlockData they read, as they may with plain
+dicts of blocks.  Only :func:`shared_items` and :func:`get_shared` read
+blocks without copying them, and their callers must not mutate them.
+"""
+
+
+import copy
+
+
+class CopyOnWriteBlocks(dict):
+    """
+    A {BlockKey: BlockData} dict of the blocks of a structure, which may
+    share BlockData with the blocks of other structures.
+
+    Reading a shared block through any of the dict's methods first replaces
+    it by a private deep copy.  Iterating over the keys, testing membership
+    and getting the length don't copy any block.
+    """
+    def __init__(self, blocks=()):
+        super().__init__(shared_items(blocks) if isinstance(blocks, dict) else blocks)
+        # Keys of the blocks whose BlockData may be shared with other structures.
+        self._shared = set(self.keys())
+
+    def fork(self):
+        """
+        Return a copy of these blocks sharing all of their BlockData, which
+        both copies will deep-copy before handing out.
+        """
+        self._shared = set(self.keys())
+        return CopyOnWriteBlocks(self)
+
+    def changed_keys(self):
+        """
+        Return the keys of the blocks that were read or set since these
+        blocks were forked, i.e. which may have changed.
+        """
+        return [block_key for block_key in self if block_key not in self._shared]
+
+    def _unshare(self, key):
+        """
+        Replace the given block's BlockData by a private copy if it's shared.
+        """
+        if key in self._shared:
+            self._shared.discard(key)
+            dict.__setitem__(self, key, copy.deepcopy(dict.__getitem__(self, key)))
+
+    def __getitem__(self, key):
+        self._unshare(key)
+        return dict.__getitem__(self, key)
+
+    def __setitem__(self, key, value):
+        self._shared.discard(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self._shared.discard(key)
+        dict.__delitem__(self, key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        if key not in self:
+            return dict.pop(self, key, *default)
+        value = self[key]
+        del self[key]
+        return value
+
+    def popitem(self):
+        key = next(reversed(self))
+        return key, self.pop(key)
+
+    def update(self, *args, **kwargs):  # pylint: disable=arguments-differ
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def copy(self):
+        return dict(self.items())
+
+    def __deepcopy__(self, memo):
+        return {key: copy.deepcopy(value, memo) for key, value in shared_items(self)}
+
+    def __reduce__(self):
+        # Pickle as a plain dict, to be read back as structures loaded from mongo are.
+        return (dict, (dict(shared_items(self)),))
+
+
+def fork_blocks(structure):
+    """
+    Return the blocks of a new version of the given structure, sharing the
+    BlockData of the given structure's blocks.
+    """
+    blocks = structure['blocks']
+    if not isinstance(blocks, CopyOnWriteBlocks):
+        # The given structure must also copy the blocks it now shares before handing them out.
+        blocks = structure['blocks'] = CopyOnWriteBlocks(blocks)
+    return blocks.fork()
+
+
+def shared_items(blocks):
+    """
+    Return the (BlockKey, BlockData) items of the given plain or
+    copy-on-write blocks without copying them, for read-only use.
+    """
+    return dict.items(blocks)
+
+
+def get_shared(blocks, block_key):
+    """
+    Return the BlockData of the given block of the given plain or
+    copy-on-write blocks without copying it, for read-only use, or None.
+    """
+    return dict.get(blocks, block_key)
@@ -15,7 +15,8 @@ class DefinitionLazyLoader:
     def __init__(self, modulestore, course_key, block_type, definition_id, field_converter):
         """
         Simple placeholder for yet-to-be-fetched data
-        :param modulestore: the pymongo db connection with the definitions
+        :param modulestore: the split modulestore, or its runtime's DefinitionPrefetcher, to get
+            the definition from
         :param definition_locator: the id of the record in the above to fetch
         """
         self.modulestore = modulestore
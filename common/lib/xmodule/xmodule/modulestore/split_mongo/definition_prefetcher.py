@@ -0,0 +1,148 @@
+"""
+Batched fetching of the definitions of the blocks loaded by a
+:class:`CachingDescriptorSystem`.
+
+When a subtree of a course is loaded lazily, the definitions of its blocks
+aren't fetched until a block's definition fields are first read, one
+``get_definition`` query per block.  Walking a whole course, as export,
+the course outline or search indexing do, would then make as many round
+trips to mongo as there are blocks.
+
+Instead, the ids of the definitions of a loaded subtree are queued, in the
+order in which the subtree is walked, and the first read of any of them
+fetches it together with the following queued definitions in a single
+``$in`` query.  Fetched definitions are kept by the runtime, i.e. for a
+single structure version, up to a bounded estimated size in bytes.
+"""
+
+
+from collections import OrderedDict
+
+import bson
+
+from xmodule.modulestore.split_mongo.mongo_connection import TIMER
+
+try:
+    from django.conf import settings
+    DJANGO_AVAILABLE = True
+except ImportError:
+    DJANGO_AVAILABLE = False
+
+# Maximum number of definitions fetched in a single query.
+DEFINITION_PREFETCH_BATCH_SIZE = 100
+
+# Default maximum estimated size, in bytes, of the definitions kept by a runtime.
+DEFAULT_DEFINITION_PREFETCH_MAX_BYTES = 8 * 1024 * 1024
+
+
+def get_definition_prefetch_max_bytes():
+    """
+    Return the maximum estimated size of the definitions prefetched by a
+    runtime, according to the ``COURSE_DEFINITION_PREFETCH_MAX_BYTES``
+    setting (prefetching is disabled if it's 0).
+    """
+    if not DJANGO_AVAILABLE:
+        return DEFAULT_DEFINITION_PREFETCH_MAX_BYTES
+    return getattr(settings, 'COURSE_DEFINITION_PREFETCH_MAX_BYTES', DEFAULT_DEFINITION_PREFETCH_MAX_BYTES)
+
+
+class DefinitionPrefetcher:
+    """
+    Fetches the definitions of the blocks of a single structure version in
+    batches, on behalf of :class:`DefinitionLazyLoader`.
+    """
+    def __init__(self, modulestore, max_bytes=None, batch_size=DEFINITION_PREFETCH_BATCH_SIZE):
+        self.modulestore = modulestore
+        self.max_bytes = get_definition_prefetch_max_bytes() if max_bytes is None else max_bytes
+        self.batch_size = batch_size
+        self.current_bytes = 0
+        # Number of get_definitions queries made, and of definitions read from prefetched batches.
+        self.round_trips = 0
+        self.hits = 0
+        # {definition_id: None} of the definitions to fetch, in the order in which they're expected to be read.
+        self._queued = OrderedDict()
+        # {definition_id: (definition, size)} of the prefetched definitions, least recently read first.
+        self._definitions = OrderedDict()
+
+    @property
+    def enabled(self):
+        """
+        Whether definitions are prefetched at all.
+        """
+        return self.max_bytes > 0
+
+    def queue(self, blocks):
+        """
+        Queue the definitions of the given BlockData, which aren't loaded
+        yet, to be fetched in batches.
+        """
+        if not self.enabled:
+            return
+        for block in blocks:
+            definition_id = block.definition
+            if (
+                definition_id is not None and
+                not block.definition_loaded and
+                definition_id not in self._definitions
+            ):
+                self._queued[definition_id] = None
+
+    def get_definition(self, course_key, definition_id):
+        """
+        Return the definition with the given id, as the modulestore's
+        get_definition does, fetching it along with the next queued
+        definitions if it's queued.
+        """
+        entry = self._definitions.get(definition_id)
+        if entry is not None:
+            self.hits += 1
+            self._definitions.move_to_end(definition_id)
+            return entry[0]
+
+        if definition_id in self._queued:
+            definition = self._fetch_batch(course_key, definition_id)
+            if definition is not None:
+                return definition
+        return self.modulestore.get_definition(course_key, definition_id)
+
+    def _fetch_batch(self, course_key, definition_id):
+        """
+        Fetch the given definition and the next queued ones in a single
+        query, and return the given definition.
+        """
+        del self._queued[definition_id]
+        batch = [definition_id]
+        while self._queued and len(batch) < self.batch_size:
+            batch.append(self._queued.popitem(last=False)[0])
+
+        with TIMER.timer('prefetch_definitions', course_key) as tagger:
+            definitions = self.modulestore.get_definitions(course_key, batch)
+            self.round_trips += 1
+            tagger.measure('definitions', len(batch))
+            tagger.measure('round_trips', self.round_trips)
+
+            requested_definition = None
+            for definition in definitions:
+                if definition['_id'] == definition_id:
+                    requested_definition = definition
+                else:
+                    self._add(definition)
+            tagger.measure('prefetched_bytes', self.current_bytes)
+        return requested_definition
+
+    def _add(self, definition):
+        """
+        Keep the given definition, evicting the least recently read ones to
+        stay within max_bytes.
+        """
+        size = len(bson.encode(definition))
+        if size > self.max_bytes:
+            return
+        previous = self._definitions.pop(definition['_id'], None)
+        if previous is not None:
+            self.current_bytes -= previous[1]
+        self._definitions[definition['_id']] = (definition, size)
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._definitions.popitem(last=False)
+            self.current_bytes -= evicted_size
@@ -3,12 +3,17 @@ Segregation of pymongo functions from the data modeling mechanisms for split mod
 """
 
 
+import copy
 import datetime
 import logging
 import math
+import os
 import pickle
 import re
+import threading
 import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from time import time
 
@@ -21,9 +26,12 @@ from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
 from xmodule.exceptions import HeartbeatFailure
 from xmodule.modulestore import BlockData
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.copy_on_write import CopyOnWriteBlocks, get_shared, shared_items
+from xmodule.modulestore.split_mongo.structure_deltas import DELTA_BASE, apply_delta, is_delta
 from xmodule.mongo_utils import connect_to_mongodb, create_collection_index
 
 try:
+    from django.conf import settings
     from django.core.cache import caches, InvalidCacheBackendError
     DJANGO_AVAILABLE = True
 except ImportError:
@@ -32,6 +40,15 @@ except ImportError:
 new_contract('BlockData', BlockData)
 log = logging.getLogger(__name__)
 
+# Number of ids looked up by each of the concurrent queries of a concurrent read.
+CONCURRENT_READ_BATCH_SIZE = 20
+
+# Number of documents inserted by each query of a bulk insert.
+BULK_WRITE_BATCH_SIZE = 500
+
+# The code of the write errors of inserting a document whose _id is already in the collection.
+DUPLICATE_KEY_ERROR_CODE = 11000
+
 
 def get_cache(alias):
     """
@@ -182,18 +199,29 @@ def structure_to_mongo(structure, course_context=None):
         directly into mongo.
     """
     with TIMER.timer('structure_to_mongo', course_context) as tagger:
-        tagger.measure('blocks', len(structure['blocks']))
+        blocks = structure['blocks']
+        tagger.measure('blocks', len(blocks))
+
+        # Blocks still shared with the structure this one was versioned from were checked when that
+        # structure was stored or loaded, so only the blocks that may have changed are checked again.
+        if isinstance(blocks, CopyOnWriteBlocks):
+            checked_keys = blocks.changed_keys()
+            tagger.measure('changed_blocks', len(checked_keys))
+        else:
+            checked_keys = list(blocks.keys())
 
         check('BlockKey', structure['root'])
-        check('dict(BlockKey: BlockData)', structure['blocks'])
-        for block in structure['blocks'].values():
+        for block_key in checked_keys:
+            block = get_shared(blocks, block_key)
+            check('BlockKey', block_key)
+            check('BlockData', block)
             if 'children' in block.fields:
                 check('list(BlockKey)', block.fields['children'])
 
         new_structure = dict(structure)
         new_structure['blocks'] = []
 
-        for block_key, block in structure['blocks'].items():
+        for block_key, block in shared_items(blocks):
             new_block = dict(block.to_storable())
             new_block.setdefault('block_type', block_key.type)
             new_block['block_id'] = block_key.id
@@ -202,16 +230,140 @@ def structure_to_mongo(structure, course_context=None):
         return new_structure
 
 
+def _copy_structure(structure):
+    """
+    Return a copy of ``structure`` that can be mutated the way callers of
+    ``get_structure`` mutate structures without affecting the original.
+
+    The structure dict, its blocks map and every block's ``fields`` dict and
+    ``EditInfo`` are copied; field values themselves are shared, since they
+    are only ever replaced, never mutated, outside of structures versioned
+    by ``version_structure`` (which copy each block before handing it out).
+    """
+    new_structure = dict(structure)
+    new_blocks = {}
+    for block_key, block_data in structure['blocks'].items():
+        new_block_data = copy.copy(block_data)
+        new_block_data.fields = dict(block_data.fields)
+        new_block_data.edit_info = copy.copy(block_data.edit_info)
+        new_blocks[block_key] = new_block_data
+    new_structure['blocks'] = new_blocks
+    return new_structure
+
+
+class StructureLRUCache:
+    """
+    A process-local LRU cache of decoded course structures, keyed by structure
+    id and bounded by the estimated size of the cached structures in bytes.
+
+    Structures are immutable once stored in mongo, so entries never need to be
+    invalidated. The cache never hands out the objects it holds: copies made
+    by :func:`_copy_structure` are stored and returned instead.
+    """
+    def __init__(self, max_bytes=0):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        """
+        Whether the cache holds any entries at all.
+        """
+        return self.max_bytes > 0
+
+    def get(self, key):
+        """
+        Return a copy of the structure cached for ``key``, or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        return _copy_structure(entry[0])
+
+    def set(self, key, structure, size):
+        """
+        Cache a copy of ``structure`` for ``key``, with ``size`` as its
+        estimated size in bytes.
+
+        Returns:
+            int: The number of entries evicted to make room for it.
+        """
+        if not self.enabled or size > self.max_bytes:
+            return 0
+
+        structure = _copy_structure(structure)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+            self._entries[key] = (structure, size)
+            self.current_bytes += size
+            return self._evict()
+
+    def resize(self, max_bytes):
+        """
+        Change the maximum size of the cache, evicting entries as needed.
+        """
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        """
+        Remove all entries from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self):
+        """
+        Evict least recently used entries until the cache fits in max_bytes.
+        Must be called with the lock held. Returns the number of evictions.
+        """
+        evictions = 0
+        while self._entries and self.current_bytes > self.max_bytes:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+            evictions += 1
+        return evictions
+
+
+STRUCTURE_LRU_CACHE = StructureLRUCache()
+
+
+def get_structure_lru_cache():
+    """
+    Return the process-local structure LRU cache, sized according to the
+    ``COURSE_STRUCTURE_LRU_CACHE_MAX_BYTES`` setting (disabled if unset).
+    """
+    max_bytes = getattr(settings, 'COURSE_STRUCTURE_LRU_CACHE_MAX_BYTES', 0) if DJANGO_AVAILABLE else 0
+    if STRUCTURE_LRU_CACHE.max_bytes != max_bytes:
+        STRUCTURE_LRU_CACHE.resize(max_bytes)
+    return STRUCTURE_LRU_CACHE
+
+
 class CourseStructureCache:
     """
     Wrapper around django cache object to cache course structure objects.
     The course structures are pickled and compressed when cached.
 
+    Decoded structures are additionally kept in the process-local
+    :class:`StructureLRUCache`, if enabled, which is consulted first.
+
     If the 'course_structure_cache' doesn't exist, then don't do anything for
-    for set and get.
+    for set and get (beyond using the process-local cache).
     """
     def __init__(self):
         self.cache = None
+        self.lru_cache = get_structure_lru_cache()
         if DJANGO_AVAILABLE:
             try:
                 self.cache = get_cache('course_structure_cache')
@@ -220,6 +372,15 @@ class CourseStructureCache:
 
     def get(self, key, course_context=None):
         """Pull the compressed, pickled struct data from cache and deserialize."""
+        if self.lru_cache.enabled:
+            with TIMER.timer("CourseStructureCache.lru_get", course_context) as tagger:
+                structure = self.lru_cache.get(key)
+                tagger.tag(lru_hit=str(structure is not None).lower())
+                tagger.measure('lru_entries', len(self.lru_cache))
+                tagger.measure('lru_size', self.lru_cache.current_bytes)
+                if structure is not None:
+                    return structure
+
         if self.cache is None:
             return None
 
@@ -238,21 +399,28 @@ class CourseStructureCache:
                 pickled_data = zlib.decompress(compressed_pickled_data)
                 tagger.measure('uncompressed_size', len(pickled_data))
 
-                return pickle.loads(pickled_data, encoding='latin-1')
+                structure = pickle.loads(pickled_data, encoding='latin-1')
             except Exception:  # lint-amnesty, pylint: disable=broad-except
                 # The cached data is corrupt in some way, get rid of it.
                 log.warning("CourseStructureCache: Bad data in cache for %s", course_context)
                 self.cache.delete(key)
                 return None
 
+            self._set_in_lru(key, structure, len(pickled_data), tagger)
+            return structure
+
     def set(self, key, structure, course_context=None):
         """Given a structure, will pickle, compress, and write to cache."""
-        if self.cache is None:
+        if self.cache is None and not self.lru_cache.enabled:
             return None
 
         with TIMER.timer("CourseStructureCache.set", course_context) as tagger:
             pickled_data = pickle.dumps(structure, 4)  # Protocol can't be incremented until cache is cleared
             tagger.measure('uncompressed_size', len(pickled_data))
+            self._set_in_lru(key, structure, len(pickled_data), tagger)
+
+            if self.cache is None:
+                return None
 
             # 1 = Fastest (slightly larger results)
             compressed_pickled_data = zlib.compress(pickled_data, 1)
@@ -261,6 +429,14 @@ class CourseStructureCache:
             # Stuctures are immutable, so we set a timeout of "never"
             self.cache.set(key, compressed_pickled_data, None)
 
+    def _set_in_lru(self, key, structure, size, tagger):
+        """
+        Add the structure to the process-local cache, using the size of its
+        pickled representation as the estimate of its size in memory.
+        """
+        if self.lru_cache.enabled:
+            tagger.measure('lru_evictions', self.lru_cache.set(key, structure, size))
+
 
 class MongoConnection:
     """
@@ -268,10 +444,15 @@ class MongoConnection:
     """
     def __init__(
         self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
-        asset_collection=None, retry_wait_time=0.1, **kwargs  # lint-amnesty, pylint: disable=unused-argument
+        asset_collection=None, retry_wait_time=0.1, read_concurrency=0,
+        **kwargs  # lint-amnesty, pylint: disable=unused-argument
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        read_concurrency: the number of threads that look up the documents of reads by many ids, such
+        as structures for many courses or definitions for many blocks, in concurrent batches of
+        CONCURRENT_READ_BATCH_SIZE ids. Reads are made one query at a time if it's 0 or 1.
         """
         # Set a write concern of 1, which makes writes complete successfully to the primary
         # only before returning. Also makes pymongo report write errors.
@@ -287,6 +468,114 @@ class MongoConnection:
         self.structures = self.database[collection + '.structures']
         self.definitions = self.database[collection + '.definitions']
 
+        self._read_executor = None
+        self._read_executor_pid = None
+        self.read_concurrency = read_concurrency
+
+    @property
+    def read_concurrency(self):
+        """
+        The number of threads of concurrent reads.
+        """
+        return self._read_concurrency
+
+    @read_concurrency.setter
+    def read_concurrency(self, read_concurrency):
+        self._shutdown_read_executor()
+        self._read_concurrency = read_concurrency
+
+    def _shutdown_read_executor(self):
+        """
+        Shut down the thread pool of concurrent reads, if any, once its pending reads are done.
+        """
+        if self._read_executor is not None:
+            self._read_executor.shutdown(wait=False)
+            self._read_executor = None
+
+    def _get_read_executor(self):
+        """
+        Return the thread pool of concurrent reads, or None if reads aren't concurrent.
+
+        The pool is created lazily, and again in forked processes, which don't inherit its threads.
+        """
+        if self.read_concurrency <= 1:
+            return None
+        if self._read_executor is None or self._read_executor_pid != os.getpid():
+            self._read_executor = ThreadPoolExecutor(
+                max_workers=self.read_concurrency, thread_name_prefix='split-mongo-read',
+            )
+            self._read_executor_pid = os.getpid()
+        return self._read_executor
+
+    def _find_by_ids(self, collection, ids, convert=None, projection=None):
+        """
+        Return the documents of ``collection`` whose ``_id`` is in ``ids``, converted by ``convert``
+        if given.
+
+        When reads are concurrent and there are more than CONCURRENT_READ_BATCH_SIZE ids, the ids
+        are split into batches, which are queried, and their documents converted, concurrently.
+        """
+        def find_batch(batch_ids):
+            """
+            Query and convert the documents of the given ids.
+            """
+            docs = collection.find({'_id': {'$in': batch_ids}}, projection)
+            return [convert(doc) for doc in docs] if convert else list(docs)
+
+        executor = self._get_read_executor()
+        if executor is None or len(ids) <= CONCURRENT_READ_BATCH_SIZE:
+            return find_batch(ids)
+
+        batches = [
+            ids[start:start + CONCURRENT_READ_BATCH_SIZE]
+            for start in range(0, len(ids), CONCURRENT_READ_BATCH_SIZE)
+        ]
+        return [doc for docs in executor.map(find_batch, batches) for doc in docs]
+
+    def _resolve_delta(self, doc):
+        """
+        Return the full structure document of the given structure document, which may be stored as a
+        delta against a full base structure (see structure_deltas).
+        """
+        if not is_delta(doc):
+            return doc
+        with TIMER.timer("resolve_delta", None) as tagger:
+            tagger.measure("changed_blocks", len(doc['blocks']))
+            return apply_delta(doc, self.structures.find_one({'_id': doc[DELTA_BASE]}))
+
+    def _insert_many(self, collection, docs, tagger):
+        """
+        Insert ``docs`` into ``collection`` in ordered batches of BULK_WRITE_BATCH_SIZE documents,
+        skipping the documents which are already in the collection.
+
+        Split collections are append only, so a document already in the collection was written
+        either by an earlier bulk operation, or by an earlier attempt of a batch whose query failed
+        part way and was retried by the connection's proxy. An ordered batch stops at its first
+        error, after inserting all the documents before it, so the batch resumes right after a
+        duplicate document. Any other write error, or any write concern error, is raised.
+        """
+        batches = 0
+        start = 0
+        while start < len(docs):
+            batch = docs[start:start + BULK_WRITE_BATCH_SIZE]
+            batches += 1
+            try:
+                collection.insert_many(batch, ordered=True)
+                start += len(batch)
+            except pymongo.errors.BulkWriteError as error:
+                write_errors = error.details.get('writeErrors')
+                if (
+                    not write_errors or
+                    error.details.get('writeConcernErrors') or
+                    write_errors[0]['code'] != DUPLICATE_KEY_ERROR_CODE
+                ):
+                    raise
+                write_error = write_errors[0]
+                duplicate_index = start + write_error['index']
+                log.debug("Attempted to insert duplicate document %s", docs[duplicate_index]['_id'])
+                start = duplicate_index + 1
+        tagger.measure('batches', batches)
+
     def heartbeat(self):
         """
         Check that the db is reachable.
@@ -321,6 +610,7 @@ class MongoConnection:
                             str(key)
                         )
                         return None
+                    doc = self._resolve_delta(doc)
                     tagger_find_one.measure("blocks", len(doc['blocks']))
                     structure = structure_from_mongo(doc, course_context)
                     tagger_find_one.sample_rate = 1
@@ -339,10 +629,10 @@ class MongoConnection:
         """
         with TIMER.timer("find_structures_by_id", course_context) as tagger:
             tagger.measure("requested_ids", len(ids))
-            docs = [
-                structure_from_mongo(structure, course_context)
-                for structure in self.structures.find({'_id': {'$in': ids}})
-            ]
+            docs = self._find_by_ids(
+                self.structures, ids,
+                convert=lambda structure: structure_from_mongo(self._resolve_delta(structure), course_context),
+            )
             tagger.measure("structures", len(docs))
             return docs
 
@@ -355,15 +645,26 @@ class MongoConnection:
             ids (list): A list of structure ids
             block_type: type of block to return
         """
+        def convert(structure):
+            """
+            Convert the structure, reading the courselike block of structures stored as deltas from
+            their full structure, since the delta may not hold it.
+            """
+            if is_delta(structure):
+                full_structure = self._resolve_delta(self.structures.find_one({'_id': structure['_id']}))
+                structure = {
+                    '_id': full_structure['_id'],
+                    'root': full_structure['root'],
+                    'blocks': [block for block in full_structure['blocks'] if block['block_type'] == block_type][:1],
+                }
+            return structure_from_mongo(structure, course_context)
+
         with TIMER.timer("find_courselike_blocks_by_id", course_context) as tagger:
             tagger.measure("requested_ids", len(ids))
-            docs = [
-                structure_from_mongo(structure, course_context)
-                for structure in self.structures.find(
-                    {'_id': {'$in': ids}},
-                    {'blocks': {'$elemMatch': {'block_type': block_type}}, 'root': 1}
-                )
-            ]
+            docs = self._find_by_ids(
+                self.structures, ids, convert=convert,
+                projection={'blocks': {'$elemMatch': {'block_type': block_type}}, 'root': 1, DELTA_BASE: 1},
+            )
             tagger.measure("structures", len(docs))
             return docs
 
@@ -378,7 +679,7 @@ class MongoConnection:
         with TIMER.timer("find_structures_derived_from", course_context) as tagger:
             tagger.measure("base_ids", len(ids))
             docs = [
-                structure_from_mongo(structure, course_context)
+                structure_from_mongo(self._resolve_delta(structure), course_context)
                 for structure in self.structures.find({'previous_version': {'$in': ids}})
             ]
             tagger.measure("structures", len(docs))
@@ -394,8 +695,10 @@ class MongoConnection:
             block_key (BlockKey): The id of the block in question
         """
         with TIMER.timer("find_ancestor_structures", course_context) as tagger:
+            # Structures stored as deltas hold all the blocks changed since their base, so they match
+            # whenever the block changed in their version, which are the only matches callers use.
             docs = [
-                structure_from_mongo(structure, course_context)
+                structure_from_mongo(self._resolve_delta(structure), course_context)
                 for structure in self.structures.find({
                     'original_version': original_version,
                     'blocks': {
@@ -420,6 +723,18 @@ class MongoConnection:
             tagger.measure("blocks", len(structure["blocks"]))
             self.structures.insert_one(structure_to_mongo(structure, course_context))
 
+    def insert_structures(self, structures, course_context=None):
+        """
+        Insert new structures into the database in batches, skipping those already in it.
+        """
+        with TIMER.timer("insert_structures", course_context) as tagger:
+            tagger.measure("structures", len(structures))
+            self._insert_many(
+                self.structures,
+                [structure_to_mongo(structure, course_context) for structure in structures],
+                tagger,
+            )
+
     def get_course_index(self, key, ignore_case=False):
         """
         Get the course_index from the persistence mechanism whose id is the given key
@@ -551,7 +866,7 @@ class MongoConnection:
         """
         with TIMER.timer("get_definitions", course_context) as tagger:
             tagger.measure('definitions', len(definitions))
-            definitions = self.definitions.find({'_id': {'$in': definitions}})
+            definitions = self._find_by_ids(self.definitions, definitions)
             return definitions
 
     def insert_definition(self, definition, course_context=None):
@@ -563,6 +878,14 @@ class MongoConnection:
             tagger.tag(block_type=definition['block_type'])
             self.definitions.insert_one(definition)
 
+    def insert_definitions(self, definitions, course_context=None):
+        """
+        Create the definitions in the db in batches, skipping those already in it.
+        """
+        with TIMER.timer("insert_definitions", course_context) as tagger:
+            tagger.measure('definitions', len(definitions))
+            self._insert_many(self.definitions, definitions, tagger)
+
     def ensure_indexes(self):
         """
         Ensure that all appropriate indexes are created that are needed by this modulestore, or raise
@@ -581,11 +904,19 @@ class MongoConnection:
             unique=True,
             background=True
         )
+        # The history of a course is looked up by its original version, by find_ancestor_structures and when
+        # compacting it into deltas.
+        create_collection_index(
+            self.structures,
+            [('original_version', pymongo.ASCENDING)],
+            background=True
+        )
 
     def close_connections(self):
         """
         Closes any open connections to the underlying databases
         """
+        self._shutdown_read_executor()
         self.database.client.close()
 
     def _drop_database(self, database=True, collections=True, connections=True):
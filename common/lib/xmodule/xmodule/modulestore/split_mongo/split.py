@@ -103,7 +103,9 @@ from xmodule.modulestore.exceptions import (
     VersionConflictError
 )
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
-from xmodule.modulestore.split_mongo.mongo_connection import DuplicateKeyError, MongoConnection
+from xmodule.modulestore.split_mongo.copy_on_write import fork_blocks, get_shared, shared_items
+from xmodule.modulestore.split_mongo.mongo_connection import TIMER, MongoConnection
+from xmodule.modulestore.split_mongo.structure_index import STRUCTURE_INDEX_CACHE
 from xmodule.modulestore.store_utilities import DETACHED_XBLOCK_TYPES
 from xmodule.partitions.partitions_service import PartitionService
 
@@ -258,43 +260,39 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
         """
         End the active bulk write operation on structure_key (course or library key).
         """
+        with TIMER.timer("flush_bulk_operation", bulk_write_record.course_key) as tagger:
+            # If the content is dirty, then update the database, inserting all new structures and all
+            # new definitions with as few queries as possible. Documents that are already in the database
+            # are skipped: we may not have looked them up inside this bulk operation, and thus didn't
+            # realize that they were already there. That's OK, the store is append only.
+            structures = [
+                structure for _id, structure in bulk_write_record.structures.items()
+                if _id not in bulk_write_record.structures_in_db
+            ]
+            definitions = [
+                definition for _id, definition in bulk_write_record.definitions.items()
+                if _id not in bulk_write_record.definitions_in_db
+            ]
+            tagger.measure('structures', len(structures))
+            tagger.measure('definitions', len(definitions))
+            dirty = bool(structures or definitions)
 
-        dirty = False
-
-        # If the content is dirty, then update the database
-        for _id in bulk_write_record.structures.keys() - bulk_write_record.structures_in_db:
-            dirty = True
-
-            try:
-                self.db_connection.insert_structure(bulk_write_record.structures[_id], bulk_write_record.course_key)
-            except DuplicateKeyError:
-                # We may not have looked up this structure inside this bulk operation, and thus
-                # didn't realize that it was already in the database. That's OK, the store is
-                # append only, so if it's already been written, we can just keep going.
-                log.debug("Attempted to insert duplicate structure %s", _id)
+            if structures:
+                self.db_connection.insert_structures(structures, bulk_write_record.course_key)
+            if definitions:
+                self.db_connection.insert_definitions(definitions, bulk_write_record.course_key)
 
-        for _id in bulk_write_record.definitions.keys() - bulk_write_record.definitions_in_db:
-            dirty = True
+            if bulk_write_record.index is not None and bulk_write_record.index != bulk_write_record.initial_index:
+                dirty = True
 
-            try:
-                self.db_connection.insert_definition(bulk_write_record.definitions[_id], bulk_write_record.course_key)
-            except DuplicateKeyError:
-                # We may not have looked up this definition inside this bulk operation, and thus
-                # didn't realize that it was already in the database. That's OK, the store is
-                # append only, so if it's already been written, we can just keep going.
-                log.debug("Attempted to insert duplicate definition %s", _id)
-
-        if bulk_write_record.index is not None and bulk_write_record.index != bulk_write_record.initial_index:
-            dirty = True
-
-            if bulk_write_record.initial_index is None:
-                self.db_connection.insert_course_index(bulk_write_record.index, bulk_write_record.course_key)
-            else:
-                self.db_connection.update_course_index(
-                    bulk_write_record.index,
-                    from_index=bulk_write_record.initial_index,
-                    course_context=bulk_write_record.course_key
-                )
+                if bulk_write_record.initial_index is None:
+                    self.db_connection.insert_course_index(bulk_write_record.index, bulk_write_record.course_key)
+                else:
+                    self.db_connection.update_course_index(
+                        bulk_write_record.index,
+                        from_index=bulk_write_record.initial_index,
+                        course_context=bulk_write_record.course_key
+                    )
 
         return dirty
 
@@ -483,8 +481,9 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
         if bulk_write_record.active and course_key.branch in bulk_write_record.dirty_branches:
             return bulk_write_record.structure_for_branch(course_key.branch)
 
-        # Otherwise, make a new structure
-        new_structure = copy.deepcopy(structure)
+        # Otherwise, make a new structure, sharing the blocks of the original until they're modified
+        new_structure = dict(structure)
+        new_structure['blocks'] = fork_blocks(structure)
         new_structure['_id'] = ObjectId()
         new_structure['previous_version'] = structure['_id']
         new_structure['edited_by'] = user_id
@@ -811,6 +810,9 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                         # convert_fields gets done later in the runtime's xblock_from_json
                         block.fields.update(definition.get('fields'))
                         block.definition_loaded = True
+            elif depth != 0:
+                # Lazy loading of a subtree: fetch its definitions in batches once they're needed.
+                system.definition_prefetcher.queue(new_module_data.values())
 
             system.module_data.update(new_module_data)
             return system.module_data
@@ -1302,7 +1304,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             # odd case where we don't search just confirm
             block_name = qualifiers.pop('name')
             block_ids = []
-            for block_id, block in course.structure['blocks'].items():
+            for block_id, block in self._get_candidate_blocks(course, qualifiers, settings, block_name):
                 # Don't do an in comparison blindly; first check to make sure
                 # that the name qualifier we're looking at isn't a plain string;
                 # if it is a string, then it should match exactly. If it's other
@@ -1325,15 +1327,16 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         if 'children' in qualifiers:
             settings['children'] = qualifiers.pop('children')
 
-        # No need of these caches unless include_orphans is set to False
+        # No need of these caches unless include_orphans is set to False, and
+        # the structure's hierarchy can't be looked up in its index
         path_cache = None
         parents_cache = None
 
-        if not include_orphans:
+        if not include_orphans and self._get_structure_index(course) is None:
             path_cache = {}
             parents_cache = self.build_block_key_to_parents_mapping(course.structure)
 
-        for block_id, value in course.structure['blocks'].items():
+        for block_id, value in self._get_candidate_blocks(course, qualifiers, settings):
             if _block_matches_all(value):
                 if not include_orphans:
                     if (
@@ -1349,6 +1352,45 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         else:
             return []
 
+    def _get_candidate_blocks(self, course, qualifiers, settings, block_name=None):
+        """
+        Returns the (block key, block data) pairs of the blocks of the given
+        course's structure that may match the given get_items qualifiers,
+        settings and name, in the order of the structure's blocks.
+
+        The blocks are looked up in the structure's index when possible, or
+        else all blocks of the structure are returned.
+        """
+        blocks = course.structure['blocks']
+        structure_index = self._get_structure_index(course)
+        if structure_index is not None:
+            block_keys = structure_index.get_candidates(course.structure, qualifiers, settings, block_name)
+            if block_keys is not None:
+                return [(block_key, get_shared(blocks, block_key)) for block_key in block_keys]
+        return shared_items(blocks)
+
+    def _get_structure_index(self, course):
+        """
+        Returns the index of the given course's structure, or None if the
+        structure may still be modified.
+        """
+        bulk_write_record = self._get_bulk_ops_record(course.course_key)
+        # Structures not yet stored in mongo may still be modified, so they aren't indexed.
+        if not bulk_write_record.active or course.structure['_id'] in bulk_write_record.structures_in_db:
+            return STRUCTURE_INDEX_CACHE.get_index(course.structure)
+        return None
+
+    def get_structure_inheritance(self, course):
+        """
+        Returns the inheritable settings of the blocks of the given course's
+        structure, or None if the structure may still be modified, in which
+        case values must be inherited from the loaded ancestors.
+        """
+        structure_index = self._get_structure_index(course)
+        if structure_index is None:
+            return None
+        return structure_index.get_inheritance(course.structure)
+
     def build_block_key_to_parents_mapping(self, structure):
         """
         Given a structure, builds block_key to parents mapping for all block keys in structure
@@ -1359,7 +1401,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         :return dict: a dictionary containing mapping of block_keys against their parents.
         """
         children_to_parents = defaultdict(list)
-        for parent_key, value in structure['blocks'].items():
+        for parent_key, value in shared_items(structure['blocks']):
             for child_key in value.fields.get('children', []):
                 children_to_parents[child_key].append(parent_key)
 
@@ -1378,6 +1420,10 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         :return Bool: whether or not component has path to the root
         """
+        if parents_cache is None:
+            structure_index = self._get_structure_index(course)
+            if structure_index is not None:
+                return structure_index.get_hierarchy(course.structure).has_path_to_root(block_key)
 
         if path_cache and block_key in path_cache:
             return path_cache[block_key]
@@ -1417,7 +1463,12 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             raise ItemNotFoundError(locator)
 
         course = self._lookup_course(locator.course_key)
-        all_parent_ids = self._get_parents_from_structure(BlockKey.from_usage_key(locator), course.structure)
+        block_key = BlockKey.from_usage_key(locator)
+        structure_index = self._get_structure_index(course)
+        if structure_index is not None:
+            all_parent_ids = structure_index.get_hierarchy(course.structure).get_parents(block_key)
+        else:
+            all_parent_ids = self._get_parents_from_structure(block_key, course.structure)
 
         # Check and verify the found parent_ids are not orphans; Remove parent which has no valid path
         # to the course root
@@ -1448,16 +1499,19 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         detached_categories = [name for name, __ in XBlock.load_tagged_classes("detached")]
         course = self._lookup_course(course_key)
-        items = set(course.structure['blocks'].keys())
-        items.remove(course.structure['root'])
         blocks = course.structure['blocks']
-        for block_id, block_data in blocks.items():
-            items.difference_update(BlockKey(*child) for child in block_data.fields.get('children', []))
-            if block_data.block_type in detached_categories:
-                items.discard(block_id)
+        structure_index = self._get_structure_index(course)
+        if structure_index is not None:
+            items = set(structure_index.get_hierarchy(course.structure).parentless_blocks)
+        else:
+            items = set(blocks.keys())
+            for _, block_data in shared_items(blocks):
+                items.difference_update(BlockKey(*child) for child in block_data.fields.get('children', []))
+        items.discard(course.structure['root'])
         return [
             course_key.make_usage_key(block_type=block_id.type, block_id=block_id.id)
             for block_id in items
+            if get_shared(blocks, block_id).block_type not in detached_categories
         ]
 
     def get_course_index_info(self, course_key):
@@ -2732,7 +2786,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         """
         # create mapping from each child's key to its parents' keys
         child_parent_map = defaultdict(set)
-        for block_key, block_data in blocks.items():
+        for block_key, block_data in shared_items(blocks):
             for child in block_data.fields.get('children', []):
                 child_parent_map[BlockKey(*child)].add(block_key)
 
@@ -3228,7 +3282,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         """
         return [
             parent_block_key
-            for parent_block_key, value in structure['blocks'].items()
+            for parent_block_key, value in shared_items(structure['blocks'])
             if block_key in value.fields.get('children', [])
         ]
 
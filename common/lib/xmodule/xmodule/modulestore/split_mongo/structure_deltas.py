@@ -0,0 +1,189 @@
+"""
+Delta-encoded storage of the history of split modulestore structures.
+
+Every edit of a course inserts a complete new structure document, although
+it changes only a few of its blocks.  The structures which are no longer the
+head of any branch of any course are only read to look at the course history,
+so they can instead be stored as deltas, which hold only the blocks that
+differ from a full snapshot of an earlier version of the course.
+
+A delta document keeps all the top-level fields of its structure, plus:
+
+* 'delta_base': the id of the full structure the delta is based on,
+* 'blocks': the blocks added or changed since that base, in mongo format,
+* 'removed_blocks': the [block_type, block_id] of the blocks removed since
+  that base.
+
+A delta is always based on a full structure, never on another delta, so a
+delta structure is read back with a single extra query.  Structures are only
+ever delta-encoded by :func:`compact_structure_history`; they're always
+inserted in full, so reading the head structures doesn't get any slower.
+"""
+
+
+import logging
+from collections import OrderedDict, defaultdict
+
+import bson
+
+log = logging.getLogger(__name__)
+
+DELTA_BASE = 'delta_base'
+REMOVED_BLOCKS = 'removed_blocks'
+
+# Default number of consecutive versions stored as deltas against the same full snapshot.
+DEFAULT_SNAPSHOT_INTERVAL = 20
+
+# A structure is stored as a delta only if the delta is at most this fraction of the full structure's size.
+MAX_DELTA_SIZE_RATIO = 0.5
+
+# Number of full base structures kept in memory while compacting a history.
+BASE_CACHE_SIZE = 4
+
+
+def is_delta(doc):
+    """
+    Return whether the given structure document is stored as a delta.
+    """
+    return DELTA_BASE in doc
+
+
+def _block_key(block):
+    """
+    Return the (block_type, block_id) of the given block in mongo format.
+    """
+    return (block['block_type'], block['block_id'])
+
+
+def apply_delta(delta, base):
+    """
+    Return the full structure document, in mongo format, of the given delta
+    document applied to the given full base structure document.
+
+    The blocks of the base are kept in their order, with the changed blocks
+    replacing them in place, and the added blocks follow them.
+    """
+    structure = {key: value for key, value in delta.items() if key not in (DELTA_BASE, REMOVED_BLOCKS)}
+    removed = {tuple(block_key) for block_key in delta[REMOVED_BLOCKS]}
+    changed = OrderedDict((_block_key(block), block) for block in delta['blocks'])
+
+    blocks = []
+    for block in base['blocks']:
+        block_key = _block_key(block)
+        if block_key not in removed:
+            blocks.append(changed.pop(block_key, block))
+    blocks.extend(changed.values())
+    structure['blocks'] = blocks
+    return structure
+
+
+def encode_delta(structure, base):
+    """
+    Return the delta document of the given full structure document against
+    the given full base structure document, both in mongo format.
+
+    Returns None if the structure is better stored in full: if the delta
+    wouldn't be much smaller, or if it wouldn't restore the order of the
+    structure's blocks.
+    """
+    base_blocks = {_block_key(block): block for block in base['blocks']}
+    block_keys = {_block_key(block) for block in structure['blocks']}
+
+    delta = {key: value for key, value in structure.items() if key != 'blocks'}
+    delta[DELTA_BASE] = base['_id']
+    delta['blocks'] = [
+        block for block in structure['blocks']
+        if base_blocks.get(_block_key(block)) != block
+    ]
+    delta[REMOVED_BLOCKS] = [list(block_key) for block_key in base_blocks if block_key not in block_keys]
+
+    if len(bson.encode(delta)) > MAX_DELTA_SIZE_RATIO * len(bson.encode(structure)):
+        return None
+    if apply_delta(delta, base)['blocks'] != structure['blocks']:
+        return None
+    return delta
+
+
+def get_head_structure_ids(db_connection):
+    """
+    Return the ids of the structures which are the head of any branch of
+    any course or library, which must stay full structures.
+    """
+    return {
+        version
+        for course_index in db_connection.find_matching_course_indexes()
+        for version in course_index['versions'].values()
+    }
+
+
+def compact_structure_history(
+    db_connection, original_version, head_ids, snapshot_interval=DEFAULT_SNAPSHOT_INTERVAL, dry_run=False
+):
+    """
+    Store the structures derived from ``original_version`` which aren't in
+    ``head_ids`` as deltas.
+
+    The history is walked from ``original_version`` along ``previous_version``.
+    The original version, the heads, the bases of existing deltas and every
+    ``snapshot_interval``th version stay full structures, and each other
+    structure is stored as a delta against the nearest full structure it
+    derives from.
+
+    Returns the number of structures stored as deltas (or which would have
+    been, if ``dry_run``) and the number of bytes they saved.
+    """
+    structures = db_connection.structures
+    versions = list(structures.find(
+        {'original_version': original_version}, {'previous_version': 1, DELTA_BASE: 1},
+    ))
+    version_ids = {version['_id'] for version in versions}
+    derived_versions = defaultdict(list)
+    roots = []
+    for version in versions:
+        if version.get('previous_version') in version_ids and version['_id'] != original_version:
+            derived_versions[version['previous_version']].append(version)
+        else:
+            roots.append(version)
+
+    keep_ids = set(head_ids) | {version[DELTA_BASE] for version in versions if is_delta(version)}
+    bases = OrderedDict()
+
+    def get_base(base_id):
+        """
+        Return the full base structure of the given id.
+        """
+        if base_id in bases:
+            bases.move_to_end(base_id)
+        else:
+            bases[base_id] = structures.find_one({'_id': base_id})
+            if len(bases) > BASE_CACHE_SIZE:
+                bases.popitem(last=False)
+        return bases[base_id]
+
+    num_deltas = saved_bytes = 0
+    # Versions to visit, with the id of the nearest full structure they derive from and their distance to it.
+    to_visit = [(version, None, 0) for version in roots]
+    while to_visit:
+        version, base_id, distance = to_visit.pop()
+        if is_delta(version):
+            base_id, distance = version[DELTA_BASE], distance + 1
+        else:
+            delta = None
+            if base_id is not None and version['_id'] not in keep_ids and distance < snapshot_interval:
+                structure = structures.find_one({'_id': version['_id']})
+                delta = encode_delta(structure, get_base(base_id))
+            if delta is None:
+                base_id, distance = version['_id'], 1
+            else:
+                num_deltas += 1
+                saved_bytes += len(bson.encode(structure)) - len(bson.encode(delta))
+                if not dry_run:
+                    structures.replace_one({'_id': version['_id']}, delta)
+                distance += 1
+        to_visit.extend((derived, base_id, distance) for derived in derived_versions[version['_id']])
+
+    log.info(
+        'Compacted history of structure %s: %d of %d versions stored as deltas, saving %d bytes%s',
+        original_version, num_deltas, len(versions), saved_bytes, ' (dry run)' if dry_run else '',
+    )
+    return num_deltas, saved_bytes
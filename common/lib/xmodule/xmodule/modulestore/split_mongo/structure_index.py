@@ -0,0 +1,447 @@
+"""
+Secondary indexes of the blocks of course structures.
+
+:meth:`SplitMongoModuleStore.get_items` uses them to find the blocks that
+may match its qualifiers without testing every block of the structure.
+An index only ever narrows down the candidate blocks: each candidate is
+still tested against all of the qualifiers, so the results are the same
+as those of a full scan.
+
+The index of a structure covers the block types and ids of its blocks,
+which are indexed when the index is created, and any settings field
+queried for equality, ``$in`` or ``$exists``, which is indexed the first
+time it is queried.  Qualifiers of any other form, such as regexes or
+functions, don't narrow down the candidates.
+
+The index of a structure also holds the hierarchy of its blocks, which
+is built the first time it is needed: the parents of each block and
+whether it has a path to a root block, so that parent and orphan lookups
+don't walk the structure.  The depth of each block below the structure's
+root and the interval of its subtree in a depth-first tour of the
+structure, used by depth and ancestor lookups, are only computed the
+first time one of them is looked up.
+
+Finally, the index holds the inheritable settings of the blocks, which
+are collected the first time they're needed: for each setting, only the
+blocks that set it, so that the value a block inherits is found by
+walking up its parents to the nearest of them, without loading any of
+its ancestors.
+
+Indexes are only built for structures stored in mongo, which are
+immutable, and are cached per process by structure id.
+"""
+
+
+import copy
+import re
+import threading
+from collections import OrderedDict, defaultdict
+
+from xmodule.modulestore.inheritance import InheritanceMixin
+from xmodule.modulestore.split_mongo.copy_on_write import get_shared, shared_items
+
+# Maximum number of structure indexes kept in the process-local cache.
+STRUCTURE_INDEX_CACHE_SIZE = 16
+
+# Types of the blocks that are roots of the structures that contain them.
+ROOT_BLOCK_TYPES = ('course', 'library')
+
+
+class _ValueIndex:
+    """
+    An index of the blocks of a structure by the values of one of their
+    attributes or fields.
+    """
+    def __init__(self):
+        # {value: [block_key]} of the blocks whose value, or one of whose
+        # list elements, is the given hashable value.
+        self.blocks_by_value = defaultdict(list)
+        # Keys of the blocks with values that couldn't be indexed.
+        self.unindexed_blocks = []
+        # Keys of the blocks on which the value is set.
+        self.set_blocks = []
+
+    def add(self, block_key, value):
+        """
+        Indexes the given value of the block with the given key.
+        """
+        self.set_blocks.append(block_key)
+        indexed_values = set()
+        if not self._add_value(block_key, value, indexed_values):
+            self.unindexed_blocks.append(block_key)
+
+    def _add_value(self, block_key, value, indexed_values):
+        """
+        Indexes the given value, or its elements if it's a list, as
+        ModuleStoreRead._value_matches matches lists.  Returns whether the
+        value could be indexed.
+        """
+        if isinstance(value, list):
+            return all(self._add_value(block_key, element, indexed_values) for element in value)
+        try:
+            if value not in indexed_values:
+                indexed_values.add(value)
+                self.blocks_by_value[value].append(block_key)
+        except TypeError:
+            return False
+        return True
+
+    def lookup(self, criteria):
+        """
+        Returns the keys of the blocks that may match the given criteria,
+        or None if the criteria can't be looked up in the index.
+        """
+        if isinstance(criteria, dict):
+            if criteria.get('$exists') is True:
+                return self.set_blocks
+            if '$in' in criteria and '$exists' not in criteria:
+                values = criteria['$in']
+                if all(_is_equality_criteria(value) for value in values):
+                    return self._lookup_values(values)
+            return None
+        if _is_equality_criteria(criteria):
+            return self._lookup_values([criteria])
+        return None
+
+    def _lookup_values(self, values):
+        """
+        Returns the keys of the blocks with any of the given values.
+        """
+        block_keys = list(self.unindexed_blocks)
+        for value in values:
+            block_keys.extend(self.blocks_by_value.get(value, ()))
+        return block_keys
+
+
+def _is_equality_criteria(criteria):
+    """
+    Returns whether the given criteria is matched by equality, and can be
+    looked up in a _ValueIndex.
+    """
+    if isinstance(criteria, (dict, re.Pattern)) or callable(criteria):
+        return False
+    try:
+        hash(criteria)
+    except TypeError:
+        return False
+    return True
+
+
+class StructureHierarchy:
+    """
+    The parents, root paths, depths and subtree intervals of the blocks of
+    a single structure.  The depths and intervals are computed from the
+    parents of the blocks the first time they're looked up.
+    """
+    def __init__(self, structure):
+        blocks = structure['blocks']
+        # {block_key: [parent_block_key]}, with the parents in the order of the structure's blocks.
+        self._parents = defaultdict(list)
+        for parent_key, block_data in shared_items(blocks):
+            for child_key in block_data.fields.get('children', []):
+                self._parents[child_key].append(parent_key)
+
+        self.parentless_blocks = frozenset(block_key for block_key in blocks if block_key not in self._parents)
+        self._rooted_blocks = self._get_descendants(
+            blocks, [block_key for block_key in self.parentless_blocks if block_key.type in ROOT_BLOCK_TYPES],
+        )
+        self._root_key = structure['root']
+        self._depths = None
+        self._intervals = None
+        self._is_tree = None
+
+    @staticmethod
+    def _get_descendants(blocks, block_keys):
+        """
+        Returns the set of the given blocks and of all of their descendants.
+        """
+        descendants = set(block_keys)
+        stack = list(block_keys)
+        while stack:
+            for child_key in _get_children(blocks, stack.pop()):
+                if child_key not in descendants:
+                    descendants.add(child_key)
+                    stack.append(child_key)
+        return descendants
+
+    def _get_children_map(self):
+        """
+        Returns the {block_key: [child_block_key]} of the blocks with
+        children, computed from the parents of the blocks.
+        """
+        children = defaultdict(list)
+        for child_key, parent_keys in self._parents.items():
+            for parent_key in parent_keys:
+                children[parent_key].append(child_key)
+        return children
+
+    @staticmethod
+    def _get_depths(children, root_key):
+        """
+        Returns the depth of each block below the root of the structure, i.e.
+        the length of its shortest path from the root.
+        """
+        depths = {root_key: 0}
+        level = [root_key]
+        while level:
+            next_level = []
+            for block_key in level:
+                for child_key in children.get(block_key, ()):
+                    if child_key not in depths:
+                        depths[child_key] = depths[block_key] + 1
+                        next_level.append(child_key)
+            level = next_level
+        return depths
+
+    @staticmethod
+    def _get_intervals(children, root_key):
+        """
+        Returns the {block_key: (enter, exit)} intervals of the blocks in a
+        depth-first tour from the root of the structure, such that the
+        interval of a block contains the intervals of its descendants, and
+        whether the blocks under the root form a tree.
+        """
+        intervals = {}
+        is_tree = True
+        counter = 0
+        enters = {root_key: counter}
+        stack = [(root_key, iter(children.get(root_key, ())))]
+        while stack:
+            block_key, children = stack[-1]
+            child_key = next(children, None)
+            if child_key is None:
+                stack.pop()
+                counter += 1
+                intervals[block_key] = (enters[block_key], counter)
+            elif child_key in enters:
+                # The child was already toured under another parent.
+                is_tree = False
+            else:
+                counter += 1
+                enters[child_key] = counter
+                stack.append((child_key, iter(children.get(child_key, ()))))
+        return intervals, is_tree
+
+    def get_parents(self, block_key):
+        """
+        Returns the keys of the parents of the given block, in the order of
+        the structure's blocks.
+        """
+        return self._parents.get(block_key, [])
+
+    def has_path_to_root(self, block_key):
+        """
+        Returns whether the given block is a root block, i.e. a course or
+        library without parents, or a descendant of one.
+        """
+        if block_key in self._rooted_blocks:
+            return True
+        return not self._parents.get(block_key) and block_key.type in ROOT_BLOCK_TYPES
+
+    def get_depth(self, block_key):
+        """
+        Returns the depth of the given block below the root of the
+        structure, or None if it isn't a descendant of the root.
+        """
+        if self._depths is None:
+            # Concurrent computations of the depths are equivalent, so the last one wins.
+            self._depths = self._get_depths(self._get_children_map(), self._root_key)
+        return self._depths.get(block_key)
+
+    def is_ancestor(self, ancestor_key, block_key):
+        """
+        Returns whether the block with key ancestor_key is a proper ancestor
+        of the block with key block_key.
+        """
+        if ancestor_key == block_key:
+            return False
+        if self._intervals is None:
+            # Concurrent computations of the intervals are equivalent, so the last one wins.
+            self._intervals, self._is_tree = self._get_intervals(self._get_children_map(), self._root_key)
+        if self._is_tree and ancestor_key in self._intervals and block_key in self._intervals:
+            ancestor_enter, ancestor_exit = self._intervals[ancestor_key]
+            block_enter, block_exit = self._intervals[block_key]
+            return ancestor_enter < block_enter and block_exit < ancestor_exit
+
+        # Blocks shared by several parents, or outside of the root's subtree, are checked by walking up.
+        visited = {block_key}
+        stack = [block_key]
+        while stack:
+            for parent_key in self.get_parents(stack.pop()):
+                if parent_key == ancestor_key:
+                    return True
+                if parent_key not in visited:
+                    visited.add(parent_key)
+                    stack.append(parent_key)
+        return False
+
+
+class StructureInheritance:
+    """
+    The inheritable settings of the blocks of a single structure, stored
+    only on the blocks that set them.
+    """
+    def __init__(self, structure, hierarchy):
+        self._hierarchy = hierarchy
+        inheritable_names = set(InheritanceMixin.fields)  # lint-amnesty, pylint: disable=no-member
+        # {field_name: {block_key: json_value}} of the blocks on which each inheritable field is set.
+        self._set_values = defaultdict(dict)
+        for block_key, block_data in shared_items(structure['blocks']):
+            for field_name, value in block_data.fields.items():
+                if field_name in inheritable_names:
+                    self._set_values[field_name][block_key] = value
+
+    def get_inherited_value(self, block_key, field_name):
+        """
+        Returns the json value of the given field set on the nearest
+        ancestor of the given block, following the last parent of blocks
+        with several as the split runtime does.
+
+        Raises:
+            KeyError: if no ancestor of the block sets the field.
+        """
+        set_values = self._set_values.get(field_name)
+        if set_values:
+            visited = {block_key}
+            parents = self._hierarchy.get_parents(block_key)
+            while parents and parents[-1] not in visited:
+                parent_key = parents[-1]
+                if parent_key in set_values:
+                    # Blocks must not share mutable values through inheritance.
+                    return copy.deepcopy(set_values[parent_key])
+                visited.add(parent_key)
+                parents = self._hierarchy.get_parents(parent_key)
+        raise KeyError(field_name)
+
+
+def _get_children(blocks, block_key):
+    """
+    Returns the keys of the children of the given block, if it exists.
+    """
+    block_data = get_shared(blocks, block_key)
+    return block_data.fields.get('children', []) if block_data else []
+
+
+class StructureIndex:
+    """
+    The secondary indexes of the blocks of a single structure.
+    """
+    def __init__(self, structure):
+        blocks = structure['blocks']
+        self._positions = {block_key: position for position, block_key in enumerate(blocks)}
+        self._block_types = _ValueIndex()
+        self._block_ids = _ValueIndex()
+        for block_key in blocks:
+            self._block_types.add(block_key, block_key.type)
+            self._block_ids.add(block_key, block_key.id)
+        self._fields = {}
+        self._hierarchy = None
+        self._inheritance = None
+
+    def get_hierarchy(self, structure):
+        """
+        Returns the hierarchy of the blocks of the given structure, which
+        this index was built for, building it if needed.
+        """
+        if self._hierarchy is None:
+            # Concurrent builds of the hierarchy are equivalent, so the last one wins.
+            self._hierarchy = StructureHierarchy(structure)
+        return self._hierarchy
+
+    def get_inheritance(self, structure):
+        """
+        Returns the inheritable settings of the blocks of the given
+        structure, which this index was built for, collecting them if needed.
+        """
+        if self._inheritance is None:
+            # Concurrent builds of the inheritance are equivalent, so the last one wins.
+            self._inheritance = StructureInheritance(structure, self.get_hierarchy(structure))
+        return self._inheritance
+
+    def get_candidates(self, structure, qualifiers, settings, block_name=None):
+        """
+        Returns the keys, in the order of the structure's blocks, of the
+        blocks of the given structure that may match the given get_items
+        qualifiers, settings and name, or None if none of them can be
+        looked up in the index.
+
+        Arguments:
+            structure (dict): The structure this index was built for.
+            qualifiers (dict): The qualifiers on the blocks' BlockData.
+            settings (dict): The qualifiers on the blocks' settings fields.
+            block_name (str or iterable): The block id, or block ids, to
+                look for, if any.
+        """
+        lookups = []
+        if block_name is not None:
+            if isinstance(block_name, str):
+                lookups.append(self._block_ids.lookup(block_name))
+            elif isinstance(block_name, (list, tuple, set, frozenset)):
+                lookups.append(self._block_ids.lookup({'$in': list(block_name)}))
+        if 'block_type' in qualifiers:
+            lookups.append(self._block_types.lookup(qualifiers['block_type']))
+        for field_name, criteria in settings.items():
+            lookups.append(self._get_field_index(structure, field_name).lookup(criteria))
+
+        lookups = [block_keys for block_keys in lookups if block_keys is not None]
+        if not lookups:
+            return None
+
+        lookups.sort(key=len)
+        candidates = set(lookups[0])
+        for block_keys in lookups[1:]:
+            candidates.intersection_update(block_keys)
+        return sorted(candidates, key=self._positions.__getitem__)
+
+    def _get_field_index(self, structure, field_name):
+        """
+        Returns the index of the given settings field, building it if needed.
+        """
+        field_index = self._fields.get(field_name)
+        if field_index is None:
+            field_index = _ValueIndex()
+            for block_key, block_data in shared_items(structure['blocks']):
+                if field_name in block_data.fields:
+                    field_index.add(block_key, block_data.fields[field_name])
+            # Concurrent builds of the same field index are equivalent, so the last one wins.
+            self._fields[field_name] = field_index
+        return field_index
+
+
+class StructureIndexCache:
+    """
+    A process-local LRU cache of structure indexes, keyed by structure id.
+    """
+    def __init__(self, max_entries=STRUCTURE_INDEX_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_index(self, structure):
+        """
+        Returns the index of the given immutable structure, building it if
+        it isn't cached.
+        """
+        structure_id = structure['_id']
+        with self._lock:
+            structure_index = self._entries.get(structure_id)
+            if structure_index is not None:
+                self._entries.move_to_end(structure_id)
+                return structure_index
+
+        structure_index = StructureIndex(structure)
+        with self._lock:
+            self._entries[structure_id] = structure_index
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return structure_index
+
+    def clear(self):
+        """
+        Removes all cached indexes.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+STRUCTURE_INDEX_CACHE = StructureIndexCache()
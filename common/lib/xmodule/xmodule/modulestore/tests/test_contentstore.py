@@ -13,6 +13,7 @@ from uuid import uuid4
 import pytest
 import ddt
 import path
+from fs.memoryfs import MemoryFS
 from opaque_keys.edx.keys import AssetKey
 from opaque_keys.edx.locator import AssetLocator, CourseLocator
 
@@ -147,6 +148,21 @@ class TestContentstore(unittest.TestCase):
         finally:
             shutil.rmtree(root_dir)
 
+    @ddt.data(True, False)
+    def test_export_for_course_to_fs(self, deprecated):
+        """
+        Test export to a filesystem object
+        """
+        self.set_up_assets(deprecated)
+        export_fs = MemoryFS()
+        self.contentstore.export_all_for_course_to_fs(self.course1_key, export_fs, 'static', 'policy.json')
+        for filename in self.course1_files:
+            assert export_fs.isfile('static/' + filename), f'{filename} is not a file'
+        for filename in self.course2_files:
+            if filename not in self.course1_files:
+                assert not export_fs.exists('static/' + filename), f'{filename} is unexpectedly exported'
+        assert export_fs.isfile('policy.json')
+
     @ddt.data(True, False)
     def test_get_all_content(self, deprecated):
         """
@@ -911,8 +911,8 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
     #   Sends: delete item, update parent
     # Split
     #   Find: active_versions, 2 structures (published & draft), definition (unnecessary)
-    #   Sends: updated draft and published structures and active_versions
-    @ddt.data((ModuleStoreEnum.Type.mongo, 7, 2), (ModuleStoreEnum.Type.split, 3, 3))
+    #   Sends: updated draft and published structures (in one batch) and active_versions
+    @ddt.data((ModuleStoreEnum.Type.mongo, 7, 2), (ModuleStoreEnum.Type.split, 3, 2))
     @ddt.unpack
     def test_delete_item(self, default_ms, max_find, max_send):
         """
@@ -939,8 +939,8 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
     #    sends: delete draft vertical and update parent
     # Split:
     #    queries: active_versions, draft and published structures, definition (unnecessary)
-    #    sends: update published (why?), draft, and active_versions
-    @ddt.data((ModuleStoreEnum.Type.mongo, 9, 2), (ModuleStoreEnum.Type.split, 4, 3))
+    #    sends: update published (why?) and draft (in one batch), and active_versions
+    @ddt.data((ModuleStoreEnum.Type.mongo, 9, 2), (ModuleStoreEnum.Type.split, 4, 2))
     @ddt.unpack
     def test_delete_private_vertical(self, default_ms, max_find, max_send):
         """
@@ -154,7 +154,8 @@ class CountMongoCallsCourseTraversal(TestCase):
         # The line below shows the way this traversal *should* be done
         # (if you'll eventually access all the fields and load all the definitions anyway).
         (MIXED_SPLIT_MODULESTORE_BUILDER, None, False, True, 3),
-        (MIXED_SPLIT_MODULESTORE_BUILDER, None, True, True, 38),
+        # Lazily loaded definitions of the whole course are fetched in a single batch.
+        (MIXED_SPLIT_MODULESTORE_BUILDER, None, True, True, 4),
         (MIXED_SPLIT_MODULESTORE_BUILDER, 0, False, True, 38),
         (MIXED_SPLIT_MODULESTORE_BUILDER, 0, True, True, 38),
         (MIXED_SPLIT_MODULESTORE_BUILDER, None, False, False, 3),
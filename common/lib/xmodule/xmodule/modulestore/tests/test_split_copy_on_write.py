@@ -0,0 +1,88 @@
+"""
+Tests for split_mongo/copy_on_write.py
+"""
+
+
+import copy
+import pickle
+import unittest
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.copy_on_write import CopyOnWriteBlocks, fork_blocks, shared_items
+
+COURSE = BlockKey('course', 'course')
+CHAPTER = BlockKey('chapter', 'chapter')
+HTML = BlockKey('html', 'html')
+
+
+class TestCopyOnWriteBlocks(unittest.TestCase):
+    """
+    Tests for CopyOnWriteBlocks
+    """
+    def setUp(self):
+        super().setUp()
+        self.structure = {
+            '_id': 'original',
+            'blocks': {
+                COURSE: BlockData(block_type='course', fields={'children': [CHAPTER]}),
+                CHAPTER: BlockData(block_type='chapter', fields={'display_name': 'Chapter', 'children': []}),
+            },
+        }
+        self.original_blocks = dict(self.structure['blocks'])
+        self.new_blocks = fork_blocks(self.structure)
+
+    def test_unchanged_blocks_are_shared(self):
+        for block_key, block_data in shared_items(self.new_blocks):
+            assert block_data is self.original_blocks[block_key]
+        assert not self.new_blocks.changed_keys()
+
+    def test_read_blocks_are_copied(self):
+        chapter = self.new_blocks[CHAPTER]
+        chapter.fields['display_name'] = 'Changed'
+        chapter.fields['children'].append(HTML)
+
+        assert chapter is not self.original_blocks[CHAPTER]
+        assert self.new_blocks[CHAPTER] is chapter
+        assert self.new_blocks.changed_keys() == [CHAPTER]
+        assert self.structure['blocks'][CHAPTER].fields == {'display_name': 'Chapter', 'children': []}
+
+    def test_original_blocks_are_copied(self):
+        # The original structure copies the blocks it shares before handing them out too.
+        assert isinstance(self.structure['blocks'], CopyOnWriteBlocks)
+        self.structure['blocks'][COURSE].fields['children'].clear()
+        assert self.new_blocks[COURSE].fields['children'] == [CHAPTER]
+
+    def test_dict_methods_copy(self):
+        for block_data in (
+            self.new_blocks.get(COURSE),
+            dict(self.new_blocks.items())[COURSE],
+            self.new_blocks.values()[0],
+            self.new_blocks.setdefault(COURSE),
+        ):
+            assert block_data is not self.original_blocks[COURSE]
+        assert self.new_blocks.pop(CHAPTER) is not self.original_blocks[CHAPTER]
+        assert CHAPTER not in self.new_blocks
+        assert self.new_blocks.get(CHAPTER) is None
+
+    def test_set_and_delete(self):
+        html = BlockData(block_type='html')
+        self.new_blocks[HTML] = html
+        del self.new_blocks[CHAPTER]
+
+        assert self.new_blocks[HTML] is html
+        assert set(self.new_blocks) == {COURSE, HTML}
+        assert set(self.structure['blocks']) == {COURSE, CHAPTER}
+
+    def test_nested_forks(self):
+        newer_blocks = self.new_blocks.fork()
+        self.new_blocks[CHAPTER].fields['display_name'] = 'Changed'
+        assert newer_blocks[CHAPTER].fields['display_name'] == 'Chapter'
+        assert self.structure['blocks'][CHAPTER].fields['display_name'] == 'Chapter'
+
+    def test_deepcopy_and_pickle(self):
+        for blocks in (copy.deepcopy(self.new_blocks), pickle.loads(pickle.dumps(self.new_blocks))):
+            assert type(blocks) is dict  # pylint: disable=unidiomatic-typecheck
+            assert set(blocks) == {COURSE, CHAPTER}
+            assert blocks[CHAPTER] is not self.original_blocks[CHAPTER]
+            assert blocks[CHAPTER].fields == self.original_blocks[CHAPTER].fields
@@ -0,0 +1,83 @@
+"""
+Tests for split_mongo/definition_prefetcher.py
+"""
+
+
+import unittest
+from unittest.mock import Mock
+
+from bson.objectid import ObjectId
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo.definition_prefetcher import DefinitionPrefetcher
+
+
+class TestDefinitionPrefetcher(unittest.TestCase):
+    """
+    Tests for DefinitionPrefetcher
+    """
+    def setUp(self):
+        super().setUp()
+        self.definitions = {}
+        for index in range(5):
+            definition_id = ObjectId()
+            self.definitions[definition_id] = {'_id': definition_id, 'fields': {'data': f'<p>{index}</p>'}}
+        self.definition_ids = list(self.definitions)
+        self.course_key = Mock()
+
+        self.modulestore = Mock()
+        self.modulestore.get_definitions.side_effect = lambda course_key, ids: [
+            self.definitions[definition_id] for definition_id in ids
+        ]
+        self.modulestore.get_definition.side_effect = lambda course_key, definition_id: (
+            self.definitions[definition_id]
+        )
+
+    def _create_prefetcher(self, **kwargs):
+        """
+        Returns a prefetcher with all test definitions queued.
+        """
+        prefetcher = DefinitionPrefetcher(self.modulestore, **kwargs)
+        prefetcher.queue(
+            BlockData(block_type='html', definition=definition_id) for definition_id in self.definition_ids
+        )
+        return prefetcher
+
+    def test_batches(self):
+        prefetcher = self._create_prefetcher(max_bytes=1024 * 1024, batch_size=3)
+        for definition_id in self.definition_ids:
+            assert prefetcher.get_definition(self.course_key, definition_id) == self.definitions[definition_id]
+
+        assert [call[0][1] for call in self.modulestore.get_definitions.call_args_list] == [
+            self.definition_ids[:3], self.definition_ids[3:],
+        ]
+        assert prefetcher.round_trips == 2
+        assert prefetcher.hits == 3
+        self.modulestore.get_definition.assert_not_called()
+
+    def test_max_bytes(self):
+        prefetcher = self._create_prefetcher(max_bytes=100)
+        for definition_id in self.definition_ids:
+            assert prefetcher.get_definition(self.course_key, definition_id) == self.definitions[definition_id]
+
+        assert prefetcher.current_bytes <= 100
+        assert prefetcher.round_trips == 1
+        # The definitions evicted to stay within max_bytes are fetched separately.
+        assert self.modulestore.get_definition.call_count == 4 - prefetcher.hits
+
+    def test_disabled(self):
+        prefetcher = self._create_prefetcher(max_bytes=0)
+        assert prefetcher.get_definition(self.course_key, self.definition_ids[0]) == self.definitions[
+            self.definition_ids[0]
+        ]
+        self.modulestore.get_definitions.assert_not_called()
+        assert self.modulestore.get_definition.call_count == 1
+
+    def test_not_queued(self):
+        prefetcher = DefinitionPrefetcher(self.modulestore, max_bytes=1024 * 1024)
+        block = BlockData(block_type='html', definition=self.definition_ids[0])
+        block.definition_loaded = True
+        prefetcher.queue([block])
+        prefetcher.get_definition(self.course_key, self.definition_ids[0])
+        self.modulestore.get_definitions.assert_not_called()
+        assert self.modulestore.get_definition.call_count == 1
@@ -16,6 +16,7 @@ import ddt
 from ccx_keys.locator import CCXBlockUsageLocator
 from contracts import contract
 from django.core.cache import InvalidCacheBackendError, caches
+from django.test.utils import override_settings
 from opaque_keys.edx.locator import BlockUsageLocator, CourseKey, CourseLocator, LocalId, VersionTree
 from path import Path as path
 from xblock.fields import Reference, ReferenceList, ReferenceValueDict
@@ -35,6 +36,7 @@ from xmodule.modulestore.exceptions import (
 )
 from xmodule.modulestore.inheritance import InheritanceMixin
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import get_structure_lru_cache
 from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.modulestore.tests.factories import check_mongo_calls
 from xmodule.modulestore.tests.mongo_connection import MONGO_HOST, MONGO_PORT_NUM
@@ -1005,6 +1007,29 @@ class TestCourseStructureCache(SplitModuleTest):
         # now make sure that you get the same structure
         assert cached_structure == not_cached_structure
 
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_course_structure_lru_cache(self, mock_get_cache):
+        mock_get_cache.return_value = self.cache
+        lru_cache = get_structure_lru_cache()
+        self.addCleanup(lru_cache.clear)
+
+        with override_settings(COURSE_STRUCTURE_LRU_CACHE_MAX_BYTES=10 * 1024 * 1024):
+            lru_cache.clear()
+            with check_mongo_calls(1):
+                not_cached_structure = self._get_structure(self.new_course)
+
+            # Even with the shared cache emptied, the structure comes from the process-local cache.
+            self.cache.clear()
+            with check_mongo_calls(0):
+                cached_structure = self._get_structure(self.new_course)
+            assert cached_structure == not_cached_structure
+            assert cached_structure is not not_cached_structure
+
+        # Once disabled, the process-local cache is emptied.
+        with check_mongo_calls(1):
+            self._get_structure(self.new_course)
+        assert len(lru_cache) == 0
+
     def _get_structure(self, course):
         """
         Helper function to get a structure from a course.
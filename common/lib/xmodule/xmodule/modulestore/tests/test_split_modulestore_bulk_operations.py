@@ -35,7 +35,7 @@ class TestBulkWriteMixin(unittest.TestCase):  # lint-amnesty, pylint: disable=mi
 
         self.course_key = CourseLocator('org', 'course', 'run-a', branch='test')
         self.course_key_b = CourseLocator('org', 'course', 'run-b', branch='test')
-        self.structure = {'this': 'is', 'a': 'structure', '_id': ObjectId()}
+        self.structure = {'this': 'is', 'a': 'structure', '_id': ObjectId(), 'blocks': {}}
         self.definition = {'this': 'is', 'a': 'definition', '_id': ObjectId()}
         self.index_entry = {'this': 'is', 'an': 'index'}
 
@@ -157,7 +157,7 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_structure(self.course_key, self.structure)
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertConnCalls(call.insert_structure(self.structure, self.course_key))
+        self.assertConnCalls(call.insert_structures([self.structure], self.course_key))
 
     def test_write_multiple_structures_on_close(self):
         self.conn.get_course_index.return_value = None
@@ -168,13 +168,7 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_structure(self.course_key.replace(branch='b'), other_structure)
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertCountEqual(
-            [
-                call.insert_structure(self.structure, self.course_key),
-                call.insert_structure(other_structure, self.course_key)
-            ],
-            self.conn.mock_calls
-        )
+        self.assertConnCalls(call.insert_structures([self.structure, other_structure], self.course_key))
 
     def test_write_index_and_definition_on_close(self):
         original_index = {'versions': {}}
@@ -186,7 +180,7 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
         self.assertConnCalls(
-            call.insert_definition(self.definition, self.course_key),
+            call.insert_definitions([self.definition], self.course_key),
             call.update_course_index(
                 {'versions': {self.course_key.branch: self.definition['_id']}},  # lint-amnesty, pylint: disable=no-member
                 from_index=original_index,
@@ -204,17 +198,13 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_definition(self.course_key.replace(branch='b'), other_definition)
         self.bulk.insert_course_index(self.course_key, {'versions': {'a': self.definition['_id'], 'b': other_definition['_id']}})  # lint-amnesty, pylint: disable=line-too-long
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertCountEqual(
-            [
-                call.insert_definition(self.definition, self.course_key),
-                call.insert_definition(other_definition, self.course_key),
-                call.update_course_index(
-                    {'versions': {'a': self.definition['_id'], 'b': other_definition['_id']}},
-                    from_index=original_index,
-                    course_context=self.course_key,
-                )
-            ],
-            self.conn.mock_calls
+        self.assertConnCalls(
+            call.insert_definitions([self.definition, other_definition], self.course_key),
+            call.update_course_index(
+                {'versions': {'a': self.definition['_id'], 'b': other_definition['_id']}},
+                from_index=original_index,
+                course_context=self.course_key,
+            )
         )
 
     def test_write_definition_on_close(self):
@@ -224,7 +214,7 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_definition(self.course_key, self.definition)
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertConnCalls(call.insert_definition(self.definition, self.course_key))
+        self.assertConnCalls(call.insert_definitions([self.definition], self.course_key))
 
     def test_write_multiple_definitions_on_close(self):
         self.conn.get_course_index.return_value = None
@@ -235,13 +225,7 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_definition(self.course_key.replace(branch='b'), other_definition)
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertCountEqual(
-            [
-                call.insert_definition(self.definition, self.course_key),
-                call.insert_definition(other_definition, self.course_key)
-            ],
-            self.conn.mock_calls
-        )
+        self.assertConnCalls(call.insert_definitions([self.definition, other_definition], self.course_key))
 
     def test_write_index_and_structure_on_close(self):
         original_index = {'versions': {}}
@@ -253,7 +237,7 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
         self.assertConnCalls(
-            call.insert_structure(self.structure, self.course_key),
+            call.insert_structures([self.structure], self.course_key),
             call.update_course_index(
                 {'versions': {self.course_key.branch: self.structure['_id']}},  # lint-amnesty, pylint: disable=no-member
                 from_index=original_index,
@@ -271,17 +255,13 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_structure(self.course_key.replace(branch='b'), other_structure)
         self.bulk.insert_course_index(self.course_key, {'versions': {'a': self.structure['_id'], 'b': other_structure['_id']}})  # lint-amnesty, pylint: disable=line-too-long
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertCountEqual(
-            [
-                call.insert_structure(self.structure, self.course_key),
-                call.insert_structure(other_structure, self.course_key),
-                call.update_course_index(
-                    {'versions': {'a': self.structure['_id'], 'b': other_structure['_id']}},
-                    from_index=original_index,
-                    course_context=self.course_key,
-                )
-            ],
-            self.conn.mock_calls
+        self.assertConnCalls(
+            call.insert_structures([self.structure, other_structure], self.course_key),
+            call.update_course_index(
+                {'versions': {'a': self.structure['_id'], 'b': other_structure['_id']}},
+                from_index=original_index,
+                course_context=self.course_key,
+            )
         )
 
     def test_version_structure_creates_new_version(self):
@@ -475,7 +455,7 @@ class TestBulkWriteMixinFindMethods(TestBulkWriteMixin):
         self.bulk._begin_bulk_operation(self.course_key)
         self.bulk.get_definitions(self.course_key, test_ids)
         self.bulk._end_bulk_operation(self.course_key)
-        assert not self.conn.insert_definition.called
+        assert not self.conn.insert_definitions.called
 
     def test_no_bulk_find_structures_derived_from(self):
         ids = [Mock(name='id')]
@@ -734,7 +714,7 @@ class TestBulkWriteMixinOpen(TestBulkWriteMixin):
         index_copy['versions']['draft'] = index['versions']['published']
         self.bulk.update_course_index(self.course_key, index_copy)
         self.bulk._end_bulk_operation(self.course_key)
-        self.conn.insert_structure.assert_called_once_with(published_structure, self.course_key)
+        self.conn.insert_structures.assert_called_once_with([published_structure], self.course_key)
         self.conn.update_course_index.assert_called_once_with(
             index_copy,
             from_index=self.conn.get_course_index.return_value,
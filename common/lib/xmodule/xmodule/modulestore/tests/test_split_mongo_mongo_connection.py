@@ -1,14 +1,25 @@
 """ Test the behavior of split_mongo/MongoConnection """
 
 
+import copy
+import threading
 import unittest
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
+import ddt
 import pytest
-from pymongo.errors import ConnectionFailure
+from pymongo.errors import BulkWriteError, ConnectionFailure
 
 from xmodule.exceptions import HeartbeatFailure
-from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import (
+    BULK_WRITE_BATCH_SIZE,
+    CONCURRENT_READ_BATCH_SIZE,
+    DUPLICATE_KEY_ERROR_CODE,
+    MongoConnection,
+    StructureLRUCache
+)
 
 
 class TestHeartbeatFailureException(unittest.TestCase):
@@ -24,3 +35,211 @@ class TestHeartbeatFailureException(unittest.TestCase):
 
             with pytest.raises(HeartbeatFailure):
                 useless_conn.heartbeat()
+
+
+class TestStructureLRUCache(unittest.TestCase):
+    """ Test the process-local, size-bounded structure cache """
+
+    def _structure(self, structure_id):
+        """ Return a minimal structure with a single block """
+        return {
+            '_id': structure_id,
+            'root': BlockKey('course', 'course'),
+            'blocks': {BlockKey('course', 'course'): BlockData(fields={'display_name': 'Course'})},
+        }
+
+    def test_disabled(self):
+        cache = StructureLRUCache()
+        assert not cache.enabled
+        cache.set('a', self._structure('a'), 1)
+        assert cache.get('a') is None
+
+    def test_hit_returns_isolated_copy(self):
+        cache = StructureLRUCache(max_bytes=100)
+        structure = self._structure('a')
+        cache.set('a', structure, 10)
+
+        # Mutating the structure that was cached doesn't affect the cache...
+        structure['blocks'][BlockKey('course', 'course')].fields['display_name'] = 'Changed'
+        cached = cache.get('a')
+        assert cached['blocks'][BlockKey('course', 'course')].fields['display_name'] == 'Course'
+
+        # ... and neither does mutating a structure returned from it.
+        cached['blocks'][BlockKey('course', 'course')].fields.update({'data': '<p/>'})
+        cached['blocks'].clear()
+        assert cache.get('a')['blocks'][BlockKey('course', 'course')].fields == {'display_name': 'Course'}
+
+    def test_evicts_least_recently_used_by_size(self):
+        cache = StructureLRUCache(max_bytes=100)
+        assert cache.set('a', self._structure('a'), 40) == 0
+        assert cache.set('b', self._structure('b'), 40) == 0
+        cache.get('a')
+        assert cache.set('c', self._structure('c'), 40) == 1
+        assert cache.get('b') is None
+        assert cache.get('a') is not None
+        assert cache.get('c') is not None
+        assert cache.current_bytes == 80
+
+    def test_oversized_structure_not_cached(self):
+        cache = StructureLRUCache(max_bytes=100)
+        cache.set('a', self._structure('a'), 101)
+        assert cache.get('a') is None
+        assert cache.current_bytes == 0
+
+    def test_resize(self):
+        cache = StructureLRUCache(max_bytes=100)
+        cache.set('a', self._structure('a'), 40)
+        cache.set('b', self._structure('b'), 40)
+        cache.resize(50)
+        assert len(cache) == 1
+        assert cache.get('b') is not None
+
+
+@ddt.ddt
+class TestConcurrentReads(unittest.TestCase):
+    """ Test reads of documents by many ids, made concurrently or not """
+
+    @patch('pymongo.MongoClient')
+    @patch('pymongo.database.Database')
+    def _connection(self, read_concurrency, *calls):  # pylint: disable=unused-argument
+        """ Return a connection whose definitions collection returns a document per requested id """
+        with patch('mongodb_proxy.MongoProxy'):
+            connection = MongoConnection('useless', 'useless', 'useless', read_concurrency=read_concurrency)
+        self.addCleanup(connection.close_connections)
+        self.query_threads = set()
+
+        def find(query, projection=None):  # pylint: disable=unused-argument
+            self.query_threads.add(threading.current_thread().name)
+            return [{'_id': definition_id} for definition_id in query['_id']['$in']]
+
+        connection.definitions = Mock(find=Mock(side_effect=find))
+        return connection
+
+    @ddt.data(
+        (0, 3 * CONCURRENT_READ_BATCH_SIZE, 1),
+        (4, CONCURRENT_READ_BATCH_SIZE, 1),
+        (4, 3 * CONCURRENT_READ_BATCH_SIZE + 1, 4),
+    )
+    @ddt.unpack
+    def test_get_definitions(self, read_concurrency, num_ids, num_queries):
+        connection = self._connection(read_concurrency)
+        ids = list(range(num_ids))
+        definitions = connection.get_definitions(ids)
+
+        # The documents are returned in the order of the batches of ids.
+        assert [definition['_id'] for definition in definitions] == ids
+        assert connection.definitions.find.call_count == num_queries
+        if num_queries == 1:
+            assert self.query_threads == {threading.current_thread().name}
+        else:
+            assert all(name.startswith('split-mongo-read') for name in self.query_threads)
+
+
+class TestBulkInserts(unittest.TestCase):
+    """ Test inserts of many documents in ordered batches """
+
+    @patch('pymongo.MongoClient')
+    @patch('pymongo.database.Database')
+    def setUp(self, *calls):  # pylint: disable=arguments-differ, unused-argument
+        super().setUp()
+        with patch('mongodb_proxy.MongoProxy'):
+            self.connection = MongoConnection('useless', 'useless', 'useless')
+        self.addCleanup(self.connection.close_connections)
+        self.connection.definitions = Mock()
+        self.definitions = [{'_id': index, 'fields': {}} for index in range(BULK_WRITE_BATCH_SIZE + 10)]
+
+    def _inserted_ids(self):
+        """ Return the ids of the documents of each insert_many call """
+        return [
+            [definition['_id'] for definition in call[0][0]]
+            for call in self.connection.definitions.insert_many.call_args_list
+        ]
+
+    def test_batches(self):
+        self.connection.insert_definitions(self.definitions)
+        assert self._inserted_ids() == [list(range(BULK_WRITE_BATCH_SIZE)), list(range(BULK_WRITE_BATCH_SIZE, 510))]
+
+    def test_duplicates_are_skipped(self):
+        # The first batch fails on its third document, after inserting the first two.
+        self.connection.definitions.insert_many.side_effect = [
+            BulkWriteError({'writeErrors': [{'index': 2, 'code': DUPLICATE_KEY_ERROR_CODE}]}), None, None,
+        ]
+        self.connection.insert_definitions(self.definitions)
+        assert self._inserted_ids() == [
+            list(range(BULK_WRITE_BATCH_SIZE)),
+            list(range(3, BULK_WRITE_BATCH_SIZE + 3)),
+            list(range(BULK_WRITE_BATCH_SIZE + 3, 510)),
+        ]
+
+    def test_other_errors_are_raised(self):
+        self.connection.definitions.insert_many.side_effect = BulkWriteError(
+            {'writeErrors': [{'index': 0, 'code': 2}]}
+        )
+        with pytest.raises(BulkWriteError):
+            self.connection.insert_definitions(self.definitions)
+        assert self.connection.definitions.insert_many.call_count == 1
+
+    def test_write_concern_errors_are_raised(self):
+        self.connection.definitions.insert_many.side_effect = BulkWriteError(
+            {'writeErrors': [], 'writeConcernErrors': [{'code': 64, 'errmsg': 'waiting for replication timed out'}]}
+        )
+        with pytest.raises(BulkWriteError):
+            self.connection.insert_definitions(self.definitions)
+        assert self.connection.definitions.insert_many.call_count == 1
+
+    def test_duplicates_with_write_concern_errors_are_raised(self):
+        self.connection.definitions.insert_many.side_effect = BulkWriteError({
+            'writeErrors': [{'index': 2, 'code': DUPLICATE_KEY_ERROR_CODE}],
+            'writeConcernErrors': [{'code': 64, 'errmsg': 'waiting for replication timed out'}],
+        })
+        with pytest.raises(BulkWriteError):
+            self.connection.insert_definitions(self.definitions)
+        assert self.connection.definitions.insert_many.call_count == 1
+
+
+class TestDeltaReads(unittest.TestCase):
+    """ Test reads of structures stored as deltas """
+
+    @patch('pymongo.MongoClient')
+    @patch('pymongo.database.Database')
+    def setUp(self, *calls):  # pylint: disable=arguments-differ, unused-argument
+        super().setUp()
+        with patch('mongodb_proxy.MongoProxy'):
+            self.connection = MongoConnection('useless', 'useless', 'useless')
+        self.addCleanup(self.connection.close_connections)
+
+        course = {'block_type': 'course', 'block_id': 'course', 'fields': {'children': [['html', 'html']]}}
+        html = {'block_type': 'html', 'block_id': 'html', 'fields': {}}
+        self.docs = {
+            'base': {'_id': 'base', 'root': ['course', 'course'], 'blocks': [course, html]},
+            'delta': {
+                '_id': 'delta', 'root': ['course', 'course'], 'delta_base': 'base',
+                'blocks': [dict(html, fields={'display_name': 'Changed'})], 'removed_blocks': [],
+            },
+        }
+
+        def find(query, projection=None):
+            docs = [copy.deepcopy(self.docs[doc_id]) for doc_id in query['_id']['$in']]
+            if projection:
+                # Only the blocks of the type the projection matches are returned.
+                block_type = projection['blocks']['$elemMatch']['block_type']
+                for doc in docs:
+                    doc['blocks'] = [block for block in doc['blocks'] if block['block_type'] == block_type]
+            return docs
+
+        self.connection.structures = Mock(
+            find=Mock(side_effect=find),
+            find_one=Mock(side_effect=lambda query: copy.deepcopy(self.docs[query['_id']])),
+        )
+
+    def test_find_structures_by_id(self):
+        base, delta = self.connection.find_structures_by_id(['base', 'delta'])
+        assert set(delta['blocks']) == set(base['blocks'])
+        assert delta['blocks'][BlockKey('html', 'html')].fields == {'display_name': 'Changed'}
+        assert 'delta_base' not in delta
+        # Only the delta structure needs its base to be read.
+        self.connection.structures.find_one.assert_called_once_with({'_id': 'base'})
+
+    def test_find_courselike_blocks_by_id(self):
+        for structure in self.connection.find_courselike_blocks_by_id(['base', 'delta'], 'course'):
+            assert list(structure['blocks']) == [BlockKey('course', 'course')]
@@ -0,0 +1,169 @@
+"""
+Tests for split_mongo/structure_deltas.py
+"""
+
+
+import copy
+import unittest
+from unittest.mock import Mock
+
+from bson.objectid import ObjectId
+
+from xmodule.modulestore.split_mongo.structure_deltas import (
+    DELTA_BASE,
+    REMOVED_BLOCKS,
+    apply_delta,
+    compact_structure_history,
+    encode_delta,
+    is_delta
+)
+
+
+def _block(block_type, block_id, version, **fields):
+    """
+    Return a block in mongo format.
+    """
+    return {
+        'block_type': block_type,
+        'block_id': block_id,
+        'definition': 'definition',
+        'fields': fields,
+        'edit_info': {'update_version': version},
+    }
+
+
+def _structure(structure_id, previous_version, original_version, blocks):
+    """
+    Return a structure in mongo format.
+    """
+    return {
+        '_id': structure_id,
+        'previous_version': previous_version,
+        'original_version': original_version,
+        'root': ['course', 'course'],
+        'blocks': blocks,
+    }
+
+
+class InMemoryStructures:
+    """
+    The few queries of a structures collection compact_structure_history makes.
+    """
+    def __init__(self, structures):
+        self.docs = {structure['_id']: copy.deepcopy(structure) for structure in structures}
+
+    def find(self, query, projection):
+        return [
+            {key: value for key, value in doc.items() if key == '_id' or key in projection}
+            for doc in self.docs.values() if doc['original_version'] == query['original_version']
+        ]
+
+    def find_one(self, query):
+        return copy.deepcopy(self.docs[query['_id']])
+
+    def replace_one(self, query, doc):
+        self.docs[query['_id']] = doc
+
+
+class TestDeltas(unittest.TestCase):
+    """
+    Tests for encode_delta and apply_delta
+    """
+    def setUp(self):
+        super().setUp()
+        self.base = _structure('v1', None, 'v1', [
+            _block('course', 'course', 'v1', children=[['chapter', str(index)] for index in range(10)]),
+        ] + [
+            _block('chapter', str(index), 'v1', display_name=f'Chapter {index}') for index in range(10)
+        ])
+
+    def test_round_trip(self):
+        structure = _structure('v2', 'v1', 'v1', copy.deepcopy(self.base['blocks']))
+        structure['blocks'][3] = _block('chapter', '2', 'v2', display_name='Changed')
+        del structure['blocks'][5]
+        structure['blocks'].append(_block('html', 'new', 'v2'))
+
+        delta = encode_delta(structure, self.base)
+        assert is_delta(delta)
+        assert not is_delta(structure)
+        assert delta[DELTA_BASE] == 'v1'
+        assert [block['block_id'] for block in delta['blocks']] == ['2', 'new']
+        assert delta[REMOVED_BLOCKS] == [['chapter', '4']]
+        assert apply_delta(delta, self.base) == structure
+
+    def test_large_delta(self):
+        structure = _structure('v2', 'v1', 'v1', [
+            _block(block['block_type'], block['block_id'], 'v2', display_name='Changed')
+            for block in self.base['blocks']
+        ])
+        assert encode_delta(structure, self.base) is None
+
+    def test_reordered_blocks(self):
+        structure = _structure('v2', 'v1', 'v1', copy.deepcopy(self.base['blocks']))
+        structure['blocks'].append(structure['blocks'].pop(1))
+        assert encode_delta(structure, self.base) is None
+
+
+class TestCompactStructureHistory(unittest.TestCase):
+    """
+    Tests for compact_structure_history
+    """
+    def setUp(self):
+        super().setUp()
+        self.version_ids = [ObjectId() for _ in range(8)]
+        original_version = self.version_ids[0]
+        blocks = [_block('course', 'course', original_version)] + [
+            _block('chapter', str(index), original_version, display_name=f'Chapter {index}') for index in range(20)
+        ]
+        self.structures = []
+        previous_version = None
+        for index, version_id in enumerate(self.version_ids):
+            blocks = copy.deepcopy(blocks)
+            blocks[index + 1] = _block('chapter', str(index), version_id, display_name=f'Edit {index}')
+            self.structures.append(_structure(version_id, previous_version, original_version, blocks))
+            previous_version = version_id
+
+        self.db_connection = Mock()
+        self.db_connection.structures = InMemoryStructures(self.structures)
+
+    def _compact(self, **kwargs):
+        """
+        Compacts the test history, whose last version is the head, and checks it's still the same.
+        """
+        result = compact_structure_history(
+            self.db_connection, self.version_ids[0], {self.version_ids[-1]}, **kwargs
+        )
+        docs = self.db_connection.structures.docs
+        for structure in self.structures:
+            doc = docs[structure['_id']]
+            if is_delta(doc):
+                assert not is_delta(docs[doc[DELTA_BASE]])
+                doc = apply_delta(doc, docs[doc[DELTA_BASE]])
+            assert doc == structure
+        return result
+
+    def _full_versions(self):
+        """
+        Returns the indexes of the versions stored in full.
+        """
+        docs = self.db_connection.structures.docs
+        return [index for index, version_id in enumerate(self.version_ids) if not is_delta(docs[version_id])]
+
+    def test_snapshots(self):
+        num_deltas, saved_bytes = self._compact(snapshot_interval=3)
+        assert num_deltas == 4
+        assert saved_bytes > 0
+        # The original version and the head stay full, with a snapshot every third version.
+        assert self._full_versions() == [0, 3, 6, 7]
+
+    def test_dry_run(self):
+        num_deltas, _ = self._compact(dry_run=True)
+        assert num_deltas == 6
+        assert self._full_versions() == list(range(8))
+
+    def test_compact_again(self):
+        self._compact(snapshot_interval=3)
+        # Versions already stored as deltas, and their bases, are kept as they are.
+        num_deltas, _ = self._compact(snapshot_interval=100)
+        assert num_deltas == 1
+        assert self._full_versions() == [0, 3, 7]
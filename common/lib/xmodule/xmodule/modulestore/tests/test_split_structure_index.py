@@ -0,0 +1,244 @@
+"""
+Tests for split_mongo/structure_index.py
+"""
+
+
+import re
+import unittest
+
+import ddt
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_index import (
+    StructureHierarchy,
+    StructureIndex,
+    StructureIndexCache,
+    StructureInheritance
+)
+
+CHAPTER = BlockKey('chapter', 'chapter')
+SEQUENTIAL_1 = BlockKey('sequential', 'sequential_1')
+SEQUENTIAL_2 = BlockKey('sequential', 'sequential_2')
+PROBLEM = BlockKey('problem', 'problem')
+HTML = BlockKey('html', 'html')
+
+
+def _create_structure(structure_id='structure'):
+    """
+    Returns a structure with blocks of various types and settings.
+    """
+    return {
+        '_id': structure_id,
+        'blocks': {
+            CHAPTER: BlockData(block_type='chapter', fields={'display_name': 'Chapter'}),
+            SEQUENTIAL_1: BlockData(block_type='sequential', fields={'graded': True, 'format': 'Homework'}),
+            SEQUENTIAL_2: BlockData(block_type='sequential', fields={'graded': False}),
+            PROBLEM: BlockData(block_type='problem', fields={'graded': True, 'tags': ['easy', 'short']}),
+            HTML: BlockData(block_type='html', fields={'tags': [{'unhashable': True}]}),
+        },
+    }
+
+
+@ddt.ddt
+class TestStructureIndex(unittest.TestCase):
+    """
+    Tests for StructureIndex
+    """
+    def setUp(self):
+        super().setUp()
+        self.structure = _create_structure()
+        self.index = StructureIndex(self.structure)
+
+    @ddt.data(
+        ({'block_type': 'sequential'}, {}, None, [SEQUENTIAL_1, SEQUENTIAL_2]),
+        ({'block_type': {'$in': ['chapter', 'problem']}}, {}, None, [CHAPTER, PROBLEM]),
+        ({}, {}, 'sequential_2', [SEQUENTIAL_2]),
+        ({}, {}, ['problem', 'chapter'], [CHAPTER, PROBLEM]),
+        ({}, {'graded': True}, None, [SEQUENTIAL_1, PROBLEM]),
+        ({'block_type': 'sequential'}, {'graded': True}, None, [SEQUENTIAL_1]),
+        ({}, {'graded': {'$exists': True}}, None, [SEQUENTIAL_1, SEQUENTIAL_2, PROBLEM]),
+        ({}, {'format': 'Exam'}, None, []),
+        # Blocks whose values can't be indexed are always candidates.
+        ({}, {'tags': 'easy'}, None, [PROBLEM, HTML]),
+        ({'block_type': 'problem'}, {'display_name': re.compile('Problem')}, None, [PROBLEM]),
+    )
+    @ddt.unpack
+    def test_get_candidates(self, qualifiers, settings, block_name, expected_candidates):
+        candidates = self.index.get_candidates(self.structure, qualifiers, settings, block_name)
+        assert candidates == expected_candidates
+
+    @ddt.data(
+        ({}, {}),
+        ({'edit_info.update_version': 'version'}, {}),
+        ({}, {'display_name': re.compile('Chapter')}),
+        ({}, {'graded': lambda value: value}),
+        ({}, {'graded': {'$exists': False}}),
+        ({}, {'format': {'$nin': ['Homework']}}),
+    )
+    @ddt.unpack
+    def test_get_candidates_not_indexed(self, qualifiers, settings):
+        assert self.index.get_candidates(self.structure, qualifiers, settings) is None
+
+
+class TestStructureIndexCache(unittest.TestCase):
+    """
+    Tests for StructureIndexCache
+    """
+    def test_get_index(self):
+        cache = StructureIndexCache(max_entries=2)
+        structures = [_create_structure(structure_id) for structure_id in range(3)]
+        indexes = [cache.get_index(structure) for structure in structures[:2]]
+
+        assert cache.get_index(structures[0]) is indexes[0]
+        # Indexing a third structure evicts the least recently used index.
+        cache.get_index(structures[2])
+        assert cache.get_index(structures[0]) is indexes[0]
+        assert cache.get_index(structures[1]) is not indexes[1]
+
+
+@ddt.ddt
+class TestStructureHierarchy(unittest.TestCase):
+    """
+    Tests for StructureHierarchy
+
+    The structure's blocks:
+
+            course
+            /    \
+        chapter  chapter_2
+          |   \   /
+          |   shared
+        sequential
+          |
+        vertical            orphan   library
+    """
+    COURSE = BlockKey('course', 'course')
+    CHAPTER = BlockKey('chapter', 'chapter')
+    CHAPTER_2 = BlockKey('chapter', 'chapter_2')
+    SHARED = BlockKey('html', 'shared')
+    SEQUENTIAL = BlockKey('sequential', 'sequential')
+    VERTICAL = BlockKey('vertical', 'vertical')
+    ORPHAN = BlockKey('vertical', 'orphan')
+    LIBRARY = BlockKey('library', 'library')
+
+    def _create_hierarchy(self, shared=True):
+        """
+        Returns the hierarchy of the structure above, with or without the
+        block shared by both chapters.
+        """
+        children = {
+            self.COURSE: [self.CHAPTER, self.CHAPTER_2],
+            self.CHAPTER: [self.SEQUENTIAL, self.SHARED] if shared else [self.SEQUENTIAL],
+            self.CHAPTER_2: [self.SHARED] if shared else [],
+            self.SEQUENTIAL: [self.VERTICAL],
+        }
+        block_keys = [
+            self.COURSE, self.CHAPTER, self.CHAPTER_2, self.SEQUENTIAL, self.VERTICAL, self.ORPHAN, self.LIBRARY,
+        ]
+        if shared:
+            block_keys.append(self.SHARED)
+        return StructureHierarchy({
+            'root': self.COURSE,
+            'blocks': {
+                block_key: BlockData(block_type=block_key.type, fields={'children': children.get(block_key, [])})
+                for block_key in block_keys
+            },
+        })
+
+    def test_get_parents(self):
+        hierarchy = self._create_hierarchy()
+        assert hierarchy.get_parents(self.SHARED) == [self.CHAPTER, self.CHAPTER_2]
+        assert hierarchy.get_parents(self.VERTICAL) == [self.SEQUENTIAL]
+        assert hierarchy.get_parents(self.COURSE) == []
+        assert hierarchy.parentless_blocks == {self.COURSE, self.ORPHAN, self.LIBRARY}
+
+    def test_has_path_to_root(self):
+        hierarchy = self._create_hierarchy()
+        for block_key in (self.COURSE, self.SHARED, self.VERTICAL, self.LIBRARY):
+            assert hierarchy.has_path_to_root(block_key)
+        assert not hierarchy.has_path_to_root(self.ORPHAN)
+        assert not hierarchy.has_path_to_root(BlockKey('vertical', 'missing'))
+
+    def test_get_depth(self):
+        hierarchy = self._create_hierarchy()
+        assert hierarchy._depths is None  # pylint: disable=protected-access
+        assert hierarchy.get_depth(self.COURSE) == 0
+        assert hierarchy.get_depth(self.SHARED) == 2
+        assert hierarchy.get_depth(self.VERTICAL) == 3
+        assert hierarchy.get_depth(self.ORPHAN) is None
+
+    @ddt.data(True, False)
+    def test_is_ancestor(self, shared):
+        hierarchy = self._create_hierarchy(shared)
+        assert hierarchy._intervals is None  # pylint: disable=protected-access
+        assert hierarchy.is_ancestor(self.COURSE, self.VERTICAL)
+        assert hierarchy.is_ancestor(self.CHAPTER, self.VERTICAL)
+        assert not hierarchy.is_ancestor(self.VERTICAL, self.CHAPTER)
+        assert not hierarchy.is_ancestor(self.CHAPTER_2, self.VERTICAL)
+        assert not hierarchy.is_ancestor(self.CHAPTER, self.CHAPTER)
+        assert not hierarchy.is_ancestor(self.COURSE, self.ORPHAN)
+        if shared:
+            assert hierarchy.is_ancestor(self.CHAPTER_2, self.SHARED)
+            assert hierarchy.is_ancestor(self.CHAPTER, self.SHARED)
+
+
+class TestStructureInheritance(unittest.TestCase):
+    """
+    Tests for StructureInheritance
+
+    The structure's blocks, with the inheritable fields they set:
+
+                    course (graded=False, group_access)
+                    /                  \
+        chapter (due=2020)        chapter_2 (graded=True)
+                 \                 /
+                  sequential (due=2030)
+                        |
+                     vertical
+    """
+    COURSE = BlockKey('course', 'course')
+    CHAPTER = BlockKey('chapter', 'chapter')
+    CHAPTER_2 = BlockKey('chapter', 'chapter_2')
+    SEQUENTIAL = BlockKey('sequential', 'sequential')
+    VERTICAL = BlockKey('vertical', 'vertical')
+
+    def setUp(self):
+        super().setUp()
+        blocks = {
+            self.COURSE: BlockData(block_type='course', fields={
+                'children': [self.CHAPTER, self.CHAPTER_2], 'graded': False, 'group_access': {'1': [2]},
+            }),
+            self.CHAPTER: BlockData(block_type='chapter', fields={
+                'children': [self.SEQUENTIAL], 'due': '2020-01-01T00:00:00Z', 'display_name': 'Chapter',
+            }),
+            self.CHAPTER_2: BlockData(block_type='chapter', fields={'children': [self.SEQUENTIAL], 'graded': True}),
+            self.SEQUENTIAL: BlockData(block_type='sequential', fields={
+                'children': [self.VERTICAL], 'due': '2030-01-01T00:00:00Z',
+            }),
+            self.VERTICAL: BlockData(block_type='vertical', fields={}),
+        }
+        structure = {'root': self.COURSE, 'blocks': blocks}
+        self.inheritance = StructureInheritance(structure, StructureHierarchy(structure))
+
+    def test_get_inherited_value(self):
+        assert self.inheritance.get_inherited_value(self.VERTICAL, 'due') == '2030-01-01T00:00:00Z'
+        assert self.inheritance.get_inherited_value(self.CHAPTER, 'graded') is False
+
+    def test_last_parent_is_followed(self):
+        # The sequential's last parent is chapter_2, which doesn't set due but does set graded.
+        assert self.inheritance.get_inherited_value(self.VERTICAL, 'graded') is True
+        with self.assertRaises(KeyError):
+            self.inheritance.get_inherited_value(self.SEQUENTIAL, 'due')
+
+    def test_not_inherited(self):
+        with self.assertRaises(KeyError):
+            self.inheritance.get_inherited_value(self.COURSE, 'graded')
+        with self.assertRaises(KeyError):
+            self.inheritance.get_inherited_value(self.VERTICAL, 'display_name')
+
+    def test_mutable_values_are_copied(self):
+        group_access = self.inheritance.get_inherited_value(self.VERTICAL, 'group_access')
+        assert group_access == {'1': [2]}
+        group_access['1'].append(3)
+        assert self.inheritance.get_inherited_value(self.VERTICAL, 'group_access') == {'1': [2]}
@@ -3,13 +3,20 @@ Methods for exporting course data to XML
 """
 
 
+import io
 import logging
-import os
+import tarfile
+import time
 from abc import abstractmethod
 from json import dumps
+from tempfile import SpooledTemporaryFile
 
 import lxml.etree
+from fs.base import FS
+from fs.memoryfs import MemoryFS
+from fs.mode import Mode
 from fs.osfs import OSFS
+from fs.path import abspath, relpath
 from opaque_keys.edx.locator import CourseLocator, LibraryLocator
 from xblock.fields import Reference, ReferenceList, ReferenceValueDict, Scope
 
@@ -26,6 +33,89 @@ PUBLISHED_DIR = "published"
 
 DEFAULT_CONTENT_FIELDS = ['metadata', 'data']
 
+# Files written to a TarStreamFS are buffered in memory up to this size, and in a temporary file beyond it
+TAR_MEMBER_SPOOL_SIZE = 8 * 1024 * 1024  # bytes
+
+
+class _TarMemberFile(io.RawIOBase):
+    """
+    A file being written to a TarStreamFS, which is added to the tarball once it's closed.
+    """
+    def __init__(self, tar_fs, path):
+        super().__init__()
+        self.tar_fs = tar_fs
+        self.path = path
+        self.buffer = SpooledTemporaryFile(max_size=TAR_MEMBER_SPOOL_SIZE)  # pylint: disable=consider-using-with
+
+    def writable(self):
+        return True
+
+    def write(self, data):  # lint-amnesty, pylint: disable=arguments-differ
+        return self.buffer.write(data)
+
+    def close(self):
+        if not self.closed:
+            try:
+                size = self.buffer.tell()
+                self.buffer.seek(0)
+                self.tar_fs.add_member(self.path, size=size, fileobj=self.buffer)
+            finally:
+                self.buffer.close()
+        super().close()
+
+
+class TarStreamFS(MemoryFS):
+    """
+    A write-only filesystem which appends each file to `tar_file` as soon as it's closed.
+
+    Only empty placeholders are kept in memory, so that the exporters can still make
+    directories and check for files. Since members are added in the order they're written,
+    `tar_file` can be opened in stream mode (e.g. 'w|gz') over a file that can't seek, such as
+    an upload to the export storage. Writing the same file twice adds two members, and the last
+    one wins on extraction, just as it would overwrite the first on disk.
+    """
+    def __init__(self, tar_file):
+        super().__init__()
+        self.tar_file = tar_file
+
+    def add_member(self, path, size=0, fileobj=None, member_type=tarfile.REGTYPE):
+        """
+        Add a member for `path` to the tarball, copying `size` bytes of its data from `fileobj`.
+        """
+        tarinfo = tarfile.TarInfo(relpath(abspath(path)))
+        tarinfo.type = member_type
+        tarinfo.size = size
+        tarinfo.mtime = time.time()
+        tarinfo.mode = 0o755 if member_type == tarfile.DIRTYPE else 0o644
+        self.tar_file.addfile(tarinfo, fileobj)
+
+    def makedir(self, path, permissions=None, recreate=False):
+        exists = self.isdir(path)
+        sub_fs = super().makedir(path, permissions=permissions, recreate=recreate)
+        if not exists:
+            self.add_member(path, member_type=tarfile.DIRTYPE)
+        return sub_fs
+
+    def openbin(self, path, mode='r', buffering=-1, **options):
+        _mode = Mode(mode)
+        if _mode.reading or _mode.appending:
+            return super().openbin(path, mode=mode, buffering=buffering, **options)
+        # Check the path, and leave an empty placeholder for it.
+        super().openbin(path, mode=mode, buffering=buffering, **options).close()
+        return _TarMemberFile(self, path)
+
+    def upload(self, path, file, chunk_size=None, **options):
+        """
+        Copy the data of `file` to `path`, streaming it straight into the tarball when `file`
+        knows its `length` (as contentstore streams do) rather than buffering it first.
+        """
+        size = getattr(file, 'length', None)
+        if size is None:
+            super().upload(path, file, chunk_size=chunk_size, **options)
+            return
+        super().openbin(path, mode='wb').close()
+        self.add_member(path, size=size, fileobj=file)
+
 
 def _export_drafts(modulestore, course_key, export_fs, xml_centric_course_key):
     """
@@ -112,7 +202,7 @@ class ExportManager:
         `modulestore`: A `ModuleStore` object that is the source of the modules to export
         `contentstore`: A `ContentStore` object that is the source of the content to export, can be None
         `courselike_key`: The Locator of the Descriptor to export
-        `root_dir`: The directory to write the exported xml to
+        `root_dir`: The directory to write the exported xml to, or a filesystem such as a TarStreamFS
         `target_dir`: The name of the directory inside `root_dir` to write the content to
         """
         self.modulestore = modulestore
@@ -133,6 +223,21 @@ class ExportManager:
         Perform any additional tasks to the root XML node.
         """
 
+    def export_assets(self, export_fs, root_courselike_dir):
+        """
+        Export the contentstore's assets to `static/`, and their attributes to `policies/assets.json`.
+        """
+        if isinstance(self.root_dir, FS):
+            self.contentstore.export_all_for_course_to_fs(
+                self.courselike_key, export_fs, 'static', 'policies/assets.json',
+            )
+        else:
+            self.contentstore.export_all_for_course(
+                self.courselike_key,
+                root_courselike_dir + '/static/',
+                root_courselike_dir + '/policies/assets.json',
+            )
+
     def process_extra(self, root, courselike, root_courselike_dir, xml_centric_courselike_key, export_fs):
         """
         Process additional content, like static assets.
@@ -155,7 +260,7 @@ class ExportManager:
         """
         with self.modulestore.bulk_operations(self.courselike_key):
 
-            fsm = OSFS(self.root_dir)
+            fsm = self.root_dir if isinstance(self.root_dir, FS) else OSFS(self.root_dir)
             root = lxml.etree.Element('unknown')
 
             # export only the published content
@@ -173,7 +278,8 @@ class ExportManager:
             self.process_root(root, export_fs)
 
             # Process extra items-- drafts, assets, etc
-            root_courselike_dir = self.root_dir + '/' + self.target_dir
+            # Streaming exports have no directory on disk
+            root_courselike_dir = None if isinstance(self.root_dir, FS) else self.root_dir + '/' + self.target_dir
             self.process_extra(root, courselike, root_courselike_dir, xml_centric_courselike_key, export_fs)
 
             # Any last pass adjustments
@@ -203,26 +309,20 @@ class CourseExportManager(ExportManager):
 
     def process_extra(self, root, courselike, root_courselike_dir, xml_centric_courselike_key, export_fs):
         # Export the modulestore's asset metadata.
-        asset_dir = root_courselike_dir + '/' + AssetMetadata.EXPORTED_ASSET_DIR + '/'
-        if not os.path.isdir(asset_dir):
-            os.makedirs(asset_dir)
+        asset_dir = export_fs.makedirs(AssetMetadata.EXPORTED_ASSET_DIR, recreate=True)
         asset_root = lxml.etree.Element(AssetMetadata.ALL_ASSETS_XML_TAG)
         course_assets = self.modulestore.get_all_asset_metadata(self.courselike_key, None)
         for asset_md in course_assets:
             # All asset types are exported using the "asset" tag - but their asset type is specified in each asset key.
             asset = lxml.etree.SubElement(asset_root, AssetMetadata.ASSET_XML_TAG)
             asset_md.to_xml(asset)
-        with OSFS(asset_dir).open(AssetMetadata.EXPORTED_ASSET_FILENAME, 'wb') as asset_xml_file:
+        with asset_dir.open(AssetMetadata.EXPORTED_ASSET_FILENAME, 'wb') as asset_xml_file:
             lxml.etree.ElementTree(asset_root).write(asset_xml_file, encoding='utf-8')
 
         # export the static assets
         policies_dir = export_fs.makedir('policies', recreate=True)
         if self.contentstore:
-            self.contentstore.export_all_for_course(
-                self.courselike_key,
-                root_courselike_dir + '/static/',
-                root_courselike_dir + '/policies/assets.json',
-            )
+            self.export_assets(export_fs, root_courselike_dir)
 
             # If we are using the default course image, export it to the
             # legacy location to support backwards compatibility.
@@ -237,10 +337,8 @@ class CourseExportManager(ExportManager):
                 except NotFoundError:
                     pass
                 else:
-                    output_dir = root_courselike_dir + '/static/images/'
-                    if not os.path.isdir(output_dir):
-                        os.makedirs(output_dir)
-                    with OSFS(output_dir).open('course_image.jpg', 'wb') as course_image_file:
+                    output_dir = export_fs.makedirs('static/images', recreate=True)
+                    with output_dir.open('course_image.jpg', 'wb') as course_image_file:
                         course_image_file.write(course_image.data)
 
         # export the static tabs
@@ -317,11 +415,7 @@ class LibraryExportManager(ExportManager):
         export_fs.makedir('policies', recreate=True)
 
         if self.contentstore:
-            self.contentstore.export_all_for_course(
-                self.courselike_key,
-                self.root_dir + '/' + self.target_dir + '/static/',
-                self.root_dir + '/' + self.target_dir + '/policies/assets.json',
-            )
+            self.export_assets(export_fs, root_courselike_dir)
 
     def post_process(self, root, export_fs):
         """
@@ -350,6 +444,23 @@ def export_library_to_xml(modulestore, contentstore, library_key, root_dir, libr
     LibraryExportManager(modulestore, contentstore, library_key, root_dir, library_dir).export()
 
 
+def export_course_to_tarball(modulestore, contentstore, course_key, course_dir, fileobj):
+    """
+    Export a course as a .tar.gz archive written to `fileobj` as it goes, with `course_dir` as its
+    top-level directory, without writing the OLX to disk first. See TarStreamFS for details.
+    """
+    with tarfile.open(fileobj=fileobj, mode='w|gz') as tar_file:
+        CourseExportManager(modulestore, contentstore, course_key, TarStreamFS(tar_file), course_dir).export()
+
+
+def export_library_to_tarball(modulestore, contentstore, library_key, library_dir, fileobj):
+    """
+    Export a library as a .tar.gz archive written to `fileobj` as it goes. See export_course_to_tarball.
+    """
+    with tarfile.open(fileobj=fileobj, mode='w|gz') as tar_file:
+        LibraryExportManager(modulestore, contentstore, library_key, TarStreamFS(tar_file), library_dir).export()
+
+
 def adapt_references(subtree, destination_course_key, export_fs):
     """
     Map every reference in the subtree into destination_course_key and set it back into the xblock fields
@@ -27,6 +27,8 @@ import mimetypes
 import os
 import re
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 import xblock
 from lxml import etree
@@ -60,6 +62,9 @@ log = logging.getLogger(__name__)
 
 DEFAULT_STATIC_CONTENT_SUBDIR = 'static'
 
+# Number of imported static files or blocks between two reports of the progress of an import.
+IMPORT_PROGRESS_INTERVAL = 100
+
 
 class LocationMixin(XBlockMixin):
     """
@@ -84,10 +89,12 @@ class LocationMixin(XBlockMixin):
 
 
 class StaticContentImporter:  # lint-amnesty, pylint: disable=missing-class-docstring
-    def __init__(self, static_content_store, course_data_path, target_id):
+    def __init__(self, static_content_store, course_data_path, target_id, max_workers=1):
         self.static_content_store = static_content_store
         self.target_id = target_id
         self.course_data_path = course_data_path
+        # Number of threads which import the files of a directory concurrently.
+        self.max_workers = max_workers
         try:
             with open(course_data_path / 'policies/assets.json') as f:
                 self.policy = json.load(f)
@@ -100,10 +107,13 @@ class StaticContentImporter:  # lint-amnesty, pylint: disable=missing-class-docs
         mimetypes.add_type('application/octet-stream', '.srt')
         self.mimetypes_list = list(mimetypes.types_map.values())
 
-    def import_static_content_directory(self, content_subdir=DEFAULT_STATIC_CONTENT_SUBDIR, verbose=False):  # lint-amnesty, pylint: disable=missing-function-docstring
+    def import_static_content_directory(  # lint-amnesty, pylint: disable=missing-function-docstring
+        self, content_subdir=DEFAULT_STATIC_CONTENT_SUBDIR, verbose=False, progress_callback=None,
+    ):
         remap_dict = {}
 
         static_dir = self.course_data_path / content_subdir
+        file_paths = []
         for dirname, _, filenames in os.walk(static_dir):
             for filename in filenames:
 
@@ -114,16 +124,38 @@ class StaticContentImporter:  # lint-amnesty, pylint: disable=missing-class-docs
                         log.debug('skipping static content %s...', file_path)
                     continue
 
-                if verbose:
-                    log.debug('importing static content %s...', file_path)
-
-                imported_file_attrs = self.import_static_file(file_path, base_dir=static_dir)
+                file_paths.append(file_path)
 
+        def import_file(file_path):
+            """
+            Import the static file at the given path.
+            """
+            if verbose:
+                log.debug('importing static content %s...', file_path)
+            return self.import_static_file(file_path, base_dir=static_dir)
+
+        # Reading, thumbnailing and saving files mostly waits on the disk and the contentstore, so
+        # they may be imported by a pool of threads. Their results are still collected (and the
+        # progress reported) in order, by this thread.
+        executor = None
+        if self.max_workers > 1 and len(file_paths) > 1:
+            executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='static-import')
+        if progress_callback:
+            progress_callback(0, len(file_paths))
+        try:
+            results = executor.map(import_file, file_paths) if executor else map(import_file, file_paths)
+            for index, imported_file_attrs in enumerate(results, 1):
                 if imported_file_attrs:
                     # store the remapping information which will be needed
                     # to subsitute in the module data
                     remap_dict[imported_file_attrs[0]] = imported_file_attrs[1]
 
+                if progress_callback:
+                    progress_callback(index, len(file_paths))
+        finally:
+            if executor:
+                executor.shutdown()
+
         return remap_dict
 
     def import_static_file(self, full_file_path, base_dir):  # lint-amnesty, pylint: disable=missing-function-docstring
@@ -222,6 +254,13 @@ class ImportManager:
             create this file to implement custom logic in their course.
 
         default_class, load_error_modules: are arguments for constructing the XMLModuleStore (see its doc)
+
+        static_content_workers: The number of threads which import the static files of a directory into
+            static_content_store concurrently.
+
+        progress_callback: If specified, a function called with the name of the current stage of the import,
+            the number of items it has imported and its total number of items, at the start and end of each
+            stage and every IMPORT_PROGRESS_INTERVAL items.
     """
     store_class = XMLModuleStore
 
@@ -234,6 +273,7 @@ class ImportManager:
             create_if_not_present=False, raise_on_failure=False,
             static_content_subdir=DEFAULT_STATIC_CONTENT_SUBDIR,
             python_lib_filename='python_lib.zip',
+            static_content_workers=1, progress_callback=None,
     ):
         self.store = store
         self.user_id = user_id
@@ -249,6 +289,8 @@ class ImportManager:
         self.do_import_python_lib = do_import_python_lib
         self.create_if_not_present = create_if_not_present
         self.raise_on_failure = raise_on_failure
+        self.static_content_workers = static_content_workers
+        self.progress_callback = progress_callback
         self.xml_module_store = self.store_class(
             data_dir,
             default_class=default_class,
@@ -269,6 +311,14 @@ class ImportManager:
         if self.target_id:
             assert len(self.xml_module_store.modules) == 1, 'Store unable to load course correctly.'
 
+    def report_progress(self, stage, completed, total):
+        """
+        Report the progress of the given stage of the import to the progress callback, if any, when
+        the stage starts or ends and every IMPORT_PROGRESS_INTERVAL items.
+        """
+        if self.progress_callback and (completed % IMPORT_PROGRESS_INTERVAL == 0 or completed == total):
+            self.progress_callback(stage, completed, total)
+
     def import_static(self, data_path, dest_id):
         """
         Import all static items into the content store.
@@ -282,14 +332,16 @@ class ImportManager:
         static_content_importer = StaticContentImporter(
             self.static_content_store,
             course_data_path=data_path,
-            target_id=dest_id
+            target_id=dest_id,
+            max_workers=self.static_content_workers,
         )
         if self.do_import_static:
             if self.verbose:
                 log.info(f'Course import {self.target_id}: Importing static content and python library')
             # first pass to find everything in the static content directory
             static_content_importer.import_static_content_directory(
-                content_subdir=self.static_content_subdir, verbose=self.verbose
+                content_subdir=self.static_content_subdir, verbose=self.verbose,
+                progress_callback=partial(self.report_progress, 'Importing static content'),
             )
         elif self.do_import_python_lib and self.python_lib_filename:
             if self.verbose:
@@ -320,7 +372,8 @@ class ImportManager:
             if self.verbose:
                 log.info(f'Course import {self.target_id}: Importing {simport} directory')
             static_content_importer.import_static_content_directory(
-                content_subdir=simport, verbose=self.verbose
+                content_subdir=simport, verbose=self.verbose,
+                progress_callback=partial(self.report_progress, f'Importing {simport}'),
             )
 
     def import_asset_metadata(self, data_dir, course_id):
@@ -450,6 +503,8 @@ class ImportManager:
         """
         all_locs = set(self.xml_module_store.modules[courselike_key].keys())
         all_locs.remove(source_courselike.location)
+        num_blocks = len(all_locs)
+        self.report_progress('Importing blocks', 0, num_blocks)
 
         def depth_first(subtree):
             """
@@ -482,11 +537,12 @@ class ImportManager:
                         )
                         raise ModuleFailedToImport(child.display_name, child.location)  # pylint: disable=raise-missing-from
 
+                    self.report_progress('Importing blocks', num_blocks - len(all_locs), num_blocks)
                     depth_first(child)
 
         depth_first(source_courselike)
 
-        for leftover in all_locs:
+        for index, leftover in enumerate(all_locs, 1):
             if self.verbose:
                 log.debug('importing module location %s', leftover)
 
@@ -507,6 +563,8 @@ class ImportManager:
                 # pylint: disable=raise-missing-from
                 raise ModuleFailedToImport(leftover.display_name, leftover.location)
 
+            self.report_progress('Importing blocks', num_blocks - len(all_locs) + index, num_blocks)
+
     def run_imports(self):
         """
         Iterate over the given directories and yield courses.
@@ -3,7 +3,9 @@ Tests of XML export
 """
 
 
+import io
 import shutil
+import tarfile
 import unittest
 from datetime import datetime, timedelta, tzinfo
 from tempfile import mkdtemp
@@ -24,6 +26,7 @@ from xblock.test.tools import blocks_are_equivalent
 
 from xmodule.modulestore import EdxJSONEncoder
 from xmodule.modulestore.xml import XMLModuleStore
+from xmodule.modulestore.xml_exporter import TarStreamFS
 from xmodule.tests import DATA_DIR
 from xmodule.x_module import XModuleMixin
 
@@ -147,6 +150,54 @@ class RoundTripTestCase(unittest.TestCase):
                                          second_import.modules[course_id][location])
 
 
+class TestTarStreamFS(unittest.TestCase):
+    """
+    Tests of TarStreamFS, which streams exported files into a tarball.
+    """
+
+    def _read_tarball(self, fileobj):
+        """
+        Return a dict of the member names of the tarball in `fileobj` to their data (None for directories).
+        """
+        fileobj.seek(0)
+        with tarfile.open(fileobj=fileobj, mode='r:gz') as tar_file:
+            return {
+                member.name: tar_file.extractfile(member).read() if member.isfile() else None
+                for member in tar_file.getmembers()
+            }
+
+    def test_files_are_streamed_on_close(self):
+        fileobj = io.BytesIO()
+        with tarfile.open(fileobj=fileobj, mode='w|gz') as tar_file:
+            export_fs = TarStreamFS(tar_file)
+            course_fs = export_fs.makedir('course')
+            course_fs.makedirs('static/images', recreate=True)
+            with course_fs.open('course.xml', 'wb') as course_xml:
+                course_xml.write(b'<course/>')
+            with course_fs.open('policies.json', 'w') as policies:
+                policies.write('{}')
+            assert course_fs.isfile('course.xml')
+            # Only an empty placeholder is kept once the file is closed.
+            assert course_fs.getsize('course.xml') == 0
+
+        assert self._read_tarball(fileobj) == {
+            'course': None,
+            'course/static': None,
+            'course/static/images': None,
+            'course/course.xml': b'<course/>',
+            'course/policies.json': b'{}',
+        }
+
+    def test_upload_with_length(self):
+        stream = io.BytesIO(b'image data')
+        stream.length = len(b'image data')
+        fileobj = io.BytesIO()
+        with tarfile.open(fileobj=fileobj, mode='w|gz') as tar_file:
+            TarStreamFS(tar_file).upload('image.jpg', stream)
+
+        assert self._read_tarball(fileobj) == {'image.jpg': b'image data'}
+
+
 class TestEdxJsonEncoder(unittest.TestCase):
     """
     Tests for xml_exporter.EdxJSONEncoder
@@ -4,8 +4,9 @@ Tests that check that we ignore the appropriate files when importing courses.
 
 
 import unittest
-from unittest.mock import Mock
+from unittest.mock import Mock, call
 
+import ddt
 from opaque_keys.edx.locator import CourseLocator
 
 from xmodule.modulestore.tests.utils import (
@@ -18,6 +19,7 @@ from xmodule.modulestore.xml_importer import StaticContentImporter
 from xmodule.tests import DATA_DIR
 
 
+@ddt.ddt
 class IgnoredFilesTestCase(unittest.TestCase):
     """
     Tests for ignored files
@@ -31,7 +33,8 @@ class IgnoredFilesTestCase(unittest.TestCase):
             self.addCleanup(remove_temp_files_from_list, list(dictionary.keys()), self.course_dir / "static")
             add_temp_files_from_dict(dictionary, self.course_dir / "static")
 
-    def test_sample_static_files(self):
+    @ddt.data(1, 4)
+    def test_sample_static_files(self, max_workers):
         """
         Test for to ensure Mac OS metadata files (filename starts with "._") as well
         as files ending with "~" get ignored, while files starting with "." are not.
@@ -42,10 +45,12 @@ class IgnoredFilesTestCase(unittest.TestCase):
         static_content_importer = StaticContentImporter(
             static_content_store=content_store,
             course_data_path=self.course_dir,
-            target_id=course_id
+            target_id=course_id,
+            max_workers=max_workers,
         )
-        static_content_importer.import_static_content_directory()
-        saved_static_content = [call[0][0] for call in content_store.save.call_args_list]
+        progress_callback = Mock()
+        static_content_importer.import_static_content_directory(progress_callback=progress_callback)
+        saved_static_content = [save_call[0][0] for save_call in content_store.save.call_args_list]
         name_val = {sc.name: sc.data for sc in saved_static_content}
         assert 'example.txt' in name_val
         assert '.example.txt' in name_val
@@ -54,3 +59,5 @@ class IgnoredFilesTestCase(unittest.TestCase):
         assert '._example.txt' not in name_val
         assert '.DS_Store' not in name_val
         assert 'example.txt~' not in name_val
+        num_files = len(saved_static_content)
+        assert progress_callback.call_args_list == [call(index, num_files) for index in range(num_files + 1)]
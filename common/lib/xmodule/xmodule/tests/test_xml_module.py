@@ -226,6 +226,34 @@ class InheritingFieldDataTest(unittest.TestCase):
         assert child.inherited == "child's default"
 
 
+    def test_inherited_value_lookup(self):
+        """
+        Test that a given lookup of inherited values is used instead of the block's ancestors.
+        """
+        self.field_data = InheritingFieldData(
+            inheritable_names=['inherited'],
+            inherited_value_lookup={'inherited': 'Looked up!'}.__getitem__,
+            kvs=DictKeyValueStore({}),
+        )
+        child = self.get_a_block(usage_id=self.get_usage_id("vertical", "child"))
+        # The parent isn't loaded, so it doesn't need to exist.
+        child.parent = self.get_usage_id("course", "missing")
+        assert child.inherited == 'Looked up!'
+        assert child.not_inherited == 'nothing'
+
+    def test_inherited_value_lookup_missing(self):
+        """
+        Test that the field's default is used if the lookup finds no inherited value.
+        """
+        self.field_data = InheritingFieldData(
+            inheritable_names=['inherited'],
+            inherited_value_lookup={}.__getitem__,
+            kvs=DictKeyValueStore({}),
+        )
+        child = self.get_a_block(usage_id=self.get_usage_id("vertical", "child"))
+        assert child.inherited == 'the default'
+
+
 class EditableMetadataFieldsTest(unittest.TestCase):
 
     def test_display_name_field(self):
@@ -6,17 +6,23 @@ by the individual custom courses feature.
 
 import json
 import logging
+from uuid import uuid4
 
 from ccx_keys.locator import CCXBlockUsageLocator, CCXLocator
+from django.core.cache import cache
 from django.db import transaction
 from opaque_keys.edx.keys import CourseKey, UsageKey
 
 from lms.djangoapps.ccx.models import CcxFieldOverride, CustomCourseForEdX
-from lms.djangoapps.courseware.field_overrides import FieldOverrideProvider
+from lms.djangoapps.courseware.field_overrides import FieldOverrideProvider, clear_overridable_fields
 from openedx.core.lib.cache_utils import get_cache
 
 log = logging.getLogger(__name__)
 
+CCX_OVERRIDES_CACHE_KEY = 'ccx.overrides.{ccx_id}.{version}'
+CCX_OVERRIDES_VERSION_CACHE_KEY = 'ccx.overrides.version.{ccx_id}'
+CCX_OVERRIDES_CACHE_TIMEOUT = 24 * 60 * 60  # 1 day
+
 
 class CustomCoursesForEdxOverrideProvider(FieldOverrideProvider):
     """
@@ -48,6 +54,20 @@ class CustomCoursesForEdxOverrideProvider(FieldOverrideProvider):
             return get_override_for_ccx(ccx, block, name, default)
         return default
 
+    def get_overridable_fields(self, course_key):
+        """
+        Returns the fields overridden in the CCX of the course, if any, from
+        the overrides of the CCX cached for the request.
+        """
+        ccx = get_current_ccx(course_key)
+        if not ccx:
+            return {}
+        overridable_fields = {'course_edit_method': None}
+        for location, block_overrides in _get_overrides_for_ccx(ccx).items():
+            for field in block_overrides:
+                overridable_fields.setdefault(field, set()).add((location.block_type, location.block_id))
+        return overridable_fields
+
     @classmethod
     def enabled_for(cls, block):  # lint-amnesty, pylint: disable=arguments-differ
         """
@@ -117,24 +137,66 @@ def _clean_ccx_key(block_location):
     return clean_key.version_agnostic().for_branch(None)
 
 
+def _get_overrides_version_for_ccx(ccx):
+    """
+    Returns the version of the overrides of the `ccx` in the cache, which
+    changes whenever an override of the `ccx` is written.  A random version is
+    used so that a version evicted from the cache never names a stale map.
+    """
+    cache_key = CCX_OVERRIDES_VERSION_CACHE_KEY.format(ccx_id=ccx.id)
+    version = cache.get(cache_key)
+    if version is None:
+        version = uuid4().hex
+        if not cache.add(cache_key, version, None):
+            version = cache.get(cache_key, version)
+    return version
+
+
+def _invalidate_overrides_for_ccx(ccx):
+    """
+    Changes the version of the cached overrides of the `ccx`, now and once the
+    current transaction is committed, so that a map read from the database
+    before the commit is never used by later requests.
+    """
+    def change_version():
+        cache.set(CCX_OVERRIDES_VERSION_CACHE_KEY.format(ccx_id=ccx.id), uuid4().hex, None)
+
+    change_version()
+    transaction.on_commit(change_version)
+
+
 def _get_overrides_for_ccx(ccx):
     """
     Returns a dictionary mapping field name to overriden value for any
     overrides set on this block for this CCX.
+
+    The decoded overrides are cached across requests for the current version
+    of the overrides of the CCX, without the "_instance" entries, which are
+    only set in the request which reads the overrides from the database.
     """
     overrides_cache = get_cache('ccx-overrides')
 
     if ccx not in overrides_cache:
-        overrides = {}
-        query = CcxFieldOverride.objects.filter(
-            ccx=ccx,
-        )
-
-        for override in query:
-            block_overrides = overrides.setdefault(override.location, {})
-            block_overrides[override.field] = json.loads(override.value)
-            block_overrides[override.field + "_id"] = override.id
-            block_overrides[override.field + "_instance"] = override
+        cache_key = CCX_OVERRIDES_CACHE_KEY.format(ccx_id=ccx.id, version=_get_overrides_version_for_ccx(ccx))
+        overrides = cache.get(cache_key)
+        if overrides is None:
+            overrides = {}
+            cached_overrides = {}
+            query = CcxFieldOverride.objects.filter(
+                ccx=ccx,
+            )
+
+            for override in query:
+                value = json.loads(override.value)
+                block_overrides = overrides.setdefault(override.location, {})
+                block_overrides[override.field] = value
+                block_overrides[override.field + "_id"] = override.id
+                block_overrides[override.field + "_instance"] = override
+                cached_block_overrides = cached_overrides.setdefault(override.location, {})
+                cached_block_overrides[override.field] = value
+                cached_block_overrides[override.field + "_id"] = override.id
+
+            cache.set(cache_key, cached_overrides, CCX_OVERRIDES_CACHE_TIMEOUT)
 
         overrides_cache[ccx] = overrides
 
@@ -176,6 +238,8 @@ def override_field_for_ccx(ccx, block, name, value):
 
     _get_overrides_for_ccx(ccx).setdefault(clean_ccx_key, {})[name] = value_json
     _get_overrides_for_ccx(ccx).setdefault(clean_ccx_key, {})[name + "_instance"] = override
+    _invalidate_overrides_for_ccx(ccx)
+    clear_overridable_fields(ccx.locator)
 
 
 def clear_override_for_ccx(ccx, block, name):
@@ -209,6 +273,8 @@ def clear_ccx_field_info_from_ccx_map(ccx, block, name):
         ccx_override_map.pop(name + "_instance")
     except KeyError:
         pass
+    _invalidate_overrides_for_ccx(ccx)
+    clear_overridable_fields(ccx.locator)
 
 
 def bulk_delete_ccx_override_fields(ccx, ids):
@@ -219,3 +285,4 @@ def bulk_delete_ccx_override_fields(ccx, ids):
     ids = list(set(ids))
     if ids:
         CcxFieldOverride.objects.filter(ccx=ccx, id__in=ids).delete()
+        _invalidate_overrides_for_ccx(ccx)
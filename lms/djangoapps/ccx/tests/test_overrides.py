@@ -13,7 +13,7 @@ from edx_django_utils.cache import RequestCache
 
 from common.djangoapps.student.tests.factories import AdminFactory
 from lms.djangoapps.ccx.models import CustomCourseForEdX
-from lms.djangoapps.ccx.overrides import override_field_for_ccx
+from lms.djangoapps.ccx.overrides import get_override_for_ccx, override_field_for_ccx
 from lms.djangoapps.ccx.tests.utils import flatten, iter_blocks
 from lms.djangoapps.courseware.field_overrides import OverrideFieldData
 from lms.djangoapps.courseware.tests.test_field_overrides import inject_field_overrides
@@ -169,3 +169,29 @@ class TestFieldOverrides(FieldOverrideTestMixin, SharedModuleStoreTestCase):
         override_field_for_ccx(self.ccx, chapter, 'due', ccx_due)
         vertical = chapter.get_children()[0].get_children()[0]
         assert vertical.due == ccx_due
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'ccx_overrides'},
+    })
+    def test_overrides_cached_across_requests(self):
+        """
+        Test that the decoded overrides of a CCX are read from the cache in
+        later requests, until an override of the CCX is written.
+        """
+        ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
+        ccx_due = datetime.datetime(2015, 1, 1, 00, 00, tzinfo=pytz.UTC)
+        chapter = self.ccx_course.get_children()[0]
+        override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
+
+        RequestCache.clear_all_namespaces()
+        with self.assertNumQueries(1):
+            assert get_override_for_ccx(self.ccx, chapter, 'start') == ccx_start
+
+        RequestCache.clear_all_namespaces()
+        with self.assertNumQueries(0):
+            assert get_override_for_ccx(self.ccx, chapter, 'start') == ccx_start
+            assert get_override_for_ccx(self.ccx, chapter, 'due') is None
+
+        override_field_for_ccx(self.ccx, chapter, 'due', ccx_due)
+        RequestCache.clear_all_namespaces()
+        assert get_override_for_ccx(self.ccx, chapter, 'due') == ccx_due
@@ -12,6 +12,7 @@ from openedx.core.djangoapps.content.block_structure.api import get_block_struct
 from openedx.core.djangoapps.content.block_structure.transformers import BlockStructureTransformers
 from openedx.features.content_type_gating.block_transformers import ContentTypeGateTransformer
 
+from . import request_cache
 from .transformers import library_content, load_override_data, start_date, user_partitions, visibility
 from .usage_info import CourseUsageInfo
 
@@ -92,6 +93,10 @@ def get_course_blocks(
             transformers, the transformed block structure will be
             exactly equivalent to the blocks that the given user has
             access.
+
+    When the REUSE_TRANSFORMED_IN_REQUEST switch is enabled, the block
+    structures of prior calls within the same request are reused, as
+    described in request_cache.
     """
     if not transformers:
         transformers = BlockStructureTransformers(get_course_block_access_transformers(user))
@@ -104,7 +109,10 @@ def get_course_blocks(
         include_has_scheduled_content
     )
 
-    return get_block_structure_manager(starting_block_usage_key.course_key).get_transformed(
+    manager = get_block_structure_manager(starting_block_usage_key.course_key)
+    if request_cache.can_reuse_transformed(user, starting_block_usage_key.course_key, collected_block_structure):
+        return request_cache.get_transformed(manager, transformers, starting_block_usage_key)
+    return manager.get_transformed(
         transformers,
         starting_block_usage_key,
         collected_block_structure,
@@ -0,0 +1,172 @@
+"""
+Request-scoped reuse of the block structures built by get_course_blocks.
+
+Within a single request, several callers may each get the course blocks
+of the same user and course with different, though often overlapping,
+collections of transformers.  When the REUSE_TRANSFORMED_IN_REQUEST
+switch is enabled, the collected block structure of a course is read once
+per request, and the block structure transformed by the reusable leading
+steps of each collection of transformers is cached.  A later call then
+continues from the longest sequence of steps already run for the same
+user, course, starting block and usage options, instead of starting over.
+
+The steps of a collection of transformers are those returned by
+BlockStructureTransformers.get_steps.  A step is reusable if each of its
+transformers can be identified by its name and its hashable instance
+attributes.  Only the steps up to the first step that isn't reusable are
+cached.
+
+Cached block structures are never returned to callers, which are always
+given a copy of their own.
+"""
+
+
+from edx_django_utils.cache import RequestCache
+from edx_django_utils.monitoring import set_custom_attribute
+
+from lms.djangoapps.courseware.masquerade import is_masquerading
+from openedx.core.djangoapps.content.block_structure.exceptions import BlockStructureNotFound
+
+from .toggles import REUSE_TRANSFORMED_IN_REQUEST
+
+REQUEST_CACHE_NAMESPACE = 'course_blocks.transformed'
+
+
+def can_reuse_transformed(user, course_key, collected_block_structure=None):
+    """
+    Returns whether block structures transformed for the given user in the
+    given course may be reused within the current request.
+
+    Block structures transformed from a collected block structure given by
+    the caller aren't reused, since they may differ from the one in the
+    store.  Neither are those transformed while masquerading, since they
+    depend on the masquerade settings rather than on the user alone.
+    """
+    return (
+        REUSE_TRANSFORMED_IN_REQUEST.is_enabled() and
+        collected_block_structure is None and
+        not hasattr(user, 'real_user') and
+        not is_masquerading(user, course_key)
+    )
+
+
+def get_transformed(manager, transformers, starting_block_usage_key):
+    """
+    Returns the block structure transformed by the given transformers for
+    the given usage key, as BlockStructureManager.get_transformed does,
+    reusing the block structures cached within the current request.
+
+    Arguments:
+        manager (BlockStructureManager) - The manager of the course's block
+            structure.
+
+        transformers (BlockStructureTransformers) - The transformers to
+            apply, whose usage_info is set.
+
+        starting_block_usage_key (UsageKey) - The starting block of the
+            block structure that is to be transformed.
+    """
+    try:
+        return _get_transformed(manager, transformers, starting_block_usage_key)
+    except BlockStructureNotFound:
+        # The collected data of a transformer, which is decoded lazily, is
+        # corrupt, so none of the block structures cached in the request
+        # can be reused, and the manager collects the data again.
+        RequestCache(REQUEST_CACHE_NAMESPACE).clear()
+        return manager.get_transformed(transformers, starting_block_usage_key)
+
+
+def _get_transformed(manager, transformers, starting_block_usage_key):
+    """
+    Returns the block structure transformed by the given transformers, as
+    described in get_transformed.
+    """
+    request_cache = RequestCache(REQUEST_CACHE_NAMESPACE)
+    usage_info = transformers.usage_info
+    usage_key = (
+        usage_info.user.id,
+        starting_block_usage_key,
+        usage_info.allow_start_dates_in_future,
+        usage_info.include_has_scheduled_content,
+    )
+    step_keys = _get_reusable_step_keys(transformers)
+
+    # Find the block structure cached for the longest prefix of the reusable steps.
+    num_reused_steps = len(step_keys)
+    while num_reused_steps:
+        cached_response = request_cache.get_cached_response(
+            ('transformed', usage_key, tuple(step_keys[:num_reused_steps]))
+        )
+        if cached_response.is_found:
+            block_structure = cached_response.value.copy()
+            break
+        num_reused_steps -= 1
+    else:
+        block_structure = manager.get_untransformed(
+            starting_block_usage_key,
+            _get_collected(request_cache, manager),
+        )
+    _increment_total(request_cache, 'reused_steps', num_reused_steps)
+    _increment_total(request_cache, 'transformed_hits' if num_reused_steps else 'transformed_misses')
+
+    if num_reused_steps < len(step_keys):
+        transformers.transform_steps(block_structure, num_reused_steps, len(step_keys))
+        request_cache.set(('transformed', usage_key, tuple(step_keys)), block_structure.copy())
+
+    transformers.transform(block_structure, start_step=len(step_keys))
+    return block_structure
+
+
+def _get_collected(request_cache, manager):
+    """
+    Returns the collected block structure of the given manager's course,
+    reading it from the store only once per request.
+    """
+    cache_key = ('collected', manager.root_block_usage_key)
+    cached_response = request_cache.get_cached_response(cache_key)
+    if cached_response.is_found:
+        _increment_total(request_cache, 'collected_hits')
+        return cached_response.value
+
+    collected_block_structure = manager.get_collected()
+    request_cache.set(cache_key, collected_block_structure)
+    return collected_block_structure
+
+
+def _get_reusable_step_keys(transformers):
+    """
+    Returns the keys identifying the leading reusable steps of the given
+    transformers.
+    """
+    step_keys = []
+    for step in transformers.get_steps():
+        transformer_keys = [_get_transformer_key(transformer) for transformer in step]
+        if None in transformer_keys:
+            break
+        step_keys.append(tuple(transformer_keys))
+    return step_keys
+
+
+def _get_transformer_key(transformer):
+    """
+    Returns a key identifying the given transformer by its name and its
+    instance attributes, or None if they aren't hashable.
+    """
+    try:
+        key = (transformer.name(), tuple(sorted(vars(transformer).items())))
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _increment_total(request_cache, name, value=1):
+    """
+    Adds the given value to the request's total of the given counter and
+    reports it as a custom attribute.
+    """
+    cache_key = ('total', name)
+    cached_response = request_cache.get_cached_response(cache_key)
+    total = (cached_response.value if cached_response.is_found else 0) + value
+    request_cache.set(cache_key, total)
+    set_custom_attribute(f'course_blocks.reuse.{name}', total)
@@ -0,0 +1,105 @@
+"""
+Tests for request_cache.py
+"""
+
+
+from unittest.mock import patch
+
+import ddt
+from edx_django_utils.cache import RequestCache
+from edx_toggles.toggles.testutils import override_waffle_switch
+
+from openedx.core.djangoapps.content.block_structure.exceptions import BlockStructureNotFound
+from openedx.core.djangoapps.content.block_structure.manager import BlockStructureManager
+from openedx.core.djangoapps.content.block_structure.transformers import BlockStructureTransformers
+
+from ..api import get_course_blocks
+from ..toggles import REUSE_TRANSFORMED_IN_REQUEST
+from ..transformers.tests.helpers import BlockParentsMapTestCase, publish_course, update_block
+from ..transformers.visibility import VisibilityTransformer
+
+
+@ddt.ddt
+class ReuseTransformedInRequestTestCase(BlockParentsMapTestCase):
+    """
+    Test the reuse of block structures by get_course_blocks within a request.
+    """
+    TRANSFORMER_CLASS_TO_TEST = VisibilityTransformer
+
+    def setUp(self):
+        super().setUp()
+        block = self.get_block(1)
+        block.visible_to_staff_only = True
+        update_block(block)
+        publish_course(self.course)
+        RequestCache.clear_all_namespaces()
+
+    def _get_course_blocks_twice(self, user):
+        """
+        Returns the block keys of two consecutive calls to get_course_blocks
+        for the given user, along with the number of times the collected
+        block structure and the filters of the VisibilityTransformer were
+        computed.
+        """
+        with patch.object(
+            BlockStructureManager, 'get_collected', autospec=True, side_effect=BlockStructureManager.get_collected,
+        ) as mock_get_collected, patch.object(
+            VisibilityTransformer, 'transform_block_filters', autospec=True,
+            side_effect=VisibilityTransformer.transform_block_filters,
+        ) as mock_transform_block_filters:
+            block_keys = [
+                set(get_course_blocks(
+                    user, self.course.location, BlockStructureTransformers([VisibilityTransformer()]),
+                ).get_block_keys())
+                for _ in range(2)
+            ]
+        return block_keys, mock_get_collected.call_count, mock_transform_block_filters.call_count
+
+    @ddt.data(True, False)
+    def test_reuse(self, enabled):
+        with override_waffle_switch(REUSE_TRANSFORMED_IN_REQUEST, active=enabled):
+            block_keys, num_collected, num_transformed = self._get_course_blocks_twice(self.student)
+
+        expected_block_keys = {self.xblock_keys[idx] for idx in (0, 2, 5, 6)}
+        assert block_keys == [expected_block_keys, expected_block_keys]
+        assert num_collected == (1 if enabled else 2)
+        assert num_transformed == (1 if enabled else 2)
+
+    def test_returned_structures_are_copies(self):
+        with override_waffle_switch(REUSE_TRANSFORMED_IN_REQUEST, active=True):
+            block_structure = get_course_blocks(
+                self.student, self.course.location, BlockStructureTransformers([VisibilityTransformer()]),
+            )
+            block_structure.remove_block(self.xblock_keys[2], keep_descendants=False)
+            block_structure = get_course_blocks(
+                self.student, self.course.location, BlockStructureTransformers([VisibilityTransformer()]),
+            )
+        assert self.xblock_keys[2] in block_structure
+
+    def test_not_reused_when_masquerading(self):
+        self.student.real_user = self.staff
+        with override_waffle_switch(REUSE_TRANSFORMED_IN_REQUEST, active=True):
+            _, num_collected, num_transformed = self._get_course_blocks_twice(self.student)
+        assert num_collected == 2
+        assert num_transformed == 2
+
+    def test_corrupt_collected_data(self):
+        transform_block_filters = VisibilityTransformer.transform_block_filters
+        calls = []
+
+        def fail_once(transformer, usage_info, block_structure):
+            """
+            Fails as the lazily decoded data of a corrupt collected block structure does, the first time.
+            """
+            calls.append(transformer)
+            if len(calls) == 1:
+                raise BlockStructureNotFound(self.course.location)
+            return transform_block_filters(transformer, usage_info, block_structure)
+
+        with override_waffle_switch(REUSE_TRANSFORMED_IN_REQUEST, active=True):
+            with patch.object(VisibilityTransformer, 'transform_block_filters', autospec=True, side_effect=fail_once):
+                block_structure = get_course_blocks(
+                    self.student, self.course.location, BlockStructureTransformers([VisibilityTransformer()]),
+                )
+        assert set(block_structure.get_block_keys()) == {self.xblock_keys[idx] for idx in (0, 2, 5, 6)}
+        assert len(calls) == 2
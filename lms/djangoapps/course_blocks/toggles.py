@@ -0,0 +1,22 @@
+"""
+Toggles for the course_blocks app.
+"""
+
+from edx_toggles.toggles import WaffleSwitch
+
+# .. toggle_name: course_blocks.reuse_transformed_in_request
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, the collected block structure of a course and the block
+#   structures transformed by get_course_blocks are cached for the duration of the request. Later
+#   calls for the same course, user and starting block then reuse the collected block structure and
+#   continue from the longest sequence of transformers already run, instead of starting over.
+# .. toggle_warnings: Changes to the course or to the user's access made later in the same request,
+#   e.g. enrolling the user in a cohort, aren't reflected by the cached block structures. Calls made
+#   while masquerading aren't cached.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2026-10-16
+# .. toggle_target_removal_date: 2027-01-16
+REUSE_TRANSFORMED_IN_REQUEST = WaffleSwitch(
+    'course_blocks.reuse_transformed_in_request', __name__
+)
@@ -31,10 +31,17 @@ class StartDateTransformer(FilteringTransformerMixin, BlockStructureTransformer)
     So as long as one parent chain allows access, the block has access.
 
     Staff users are exempted from visibility rules.
+
+    The distinct (start, days_early_for_beta) pairs of the blocks are
+    compiled into a table, so that the start date check is evaluated
+    once per pair rather than once per block for each request.
     """
-    WRITE_VERSION = 1
+    WRITE_VERSION = 2
     READ_VERSION = 1
+    SUPPORTS_PARTIAL_COLLECT = True
     MERGED_START_DATE = 'merged_start_date'
+    START_DATE_CONDITIONS = 'start_date_conditions'
+    START_DATE_CONDITION_INDEX = 'start_date_condition_index'
 
     @classmethod
     def name(cls):
@@ -89,6 +96,45 @@ class StartDateTransformer(FilteringTransformerMixin, BlockStructureTransformer)
             func_merge_ancestors=max,
         )
 
+    @classmethod
+    def compile(cls, block_structure):
+        """
+        Compiles the start date conditions of the blocks into a table of
+        their distinct (merged start date, days_early_for_beta) pairs,
+        recording the index of each block's pair in the table.
+        """
+        conditions = {}
+        for block_key in block_structure:
+            condition = (
+                cls._get_merged_start_date(block_structure, block_key),
+                block_structure.get_xblock_field(block_key, 'days_early_for_beta'),
+            )
+            condition_index = conditions.setdefault(condition, len(conditions))
+            block_structure.set_transformer_block_field(
+                block_key, cls, cls.START_DATE_CONDITION_INDEX, condition_index,
+            )
+        block_structure.set_transformer_data(cls, cls.START_DATE_CONDITIONS, list(conditions))
+
+    def _get_compiled_removal_condition(self, usage_info, block_structure, now):
+        """
+        Returns a removal condition evaluating the start date check of each
+        compiled condition only once, or None if the collected data of the
+        given block_structure wasn't compiled.
+        """
+        conditions = block_structure.get_transformer_data(self, self.START_DATE_CONDITIONS)
+        if conditions is None:
+            return None
+
+        # Bitset of the indices of the conditions of blocks that haven't started.
+        not_started = 0
+        for condition_index, (start, days_early_for_beta) in enumerate(conditions):
+            if not check_start_date(usage_info.user, days_early_for_beta, start, usage_info.course_key, now=now):
+                not_started |= 1 << condition_index
+
+        return lambda block_key: bool(not_started >> block_structure.get_transformer_block_field(
+            block_key, self, self.START_DATE_CONDITION_INDEX,
+        ) & 1)
+
     def transform_block_filters(self, usage_info, block_structure):
         # Users with staff access bypass the Start Date check.
         if usage_info.has_staff_access or usage_info.allow_start_dates_in_future:
@@ -96,13 +142,15 @@ class StartDateTransformer(FilteringTransformerMixin, BlockStructureTransformer)
 
         now = datetime.now(UTC)
 
-        removal_condition = lambda block_key: not check_start_date(
-            usage_info.user,
-            block_structure.get_xblock_field(block_key, 'days_early_for_beta'),
-            self._get_merged_start_date(block_structure, block_key),
-            usage_info.course_key,
-            now=now,
-        )
+        removal_condition = self._get_compiled_removal_condition(usage_info, block_structure, now)
+        if removal_condition is None:
+            removal_condition = lambda block_key: not check_start_date(
+                usage_info.user,
+                block_structure.get_xblock_field(block_key, 'days_early_for_beta'),
+                self._get_merged_start_date(block_structure, block_key),
+                usage_info.course_key,
+                now=now,
+            )
 
         if usage_info.include_has_scheduled_content:
             self._check_has_scheduled_content(block_structure, removal_condition)
@@ -11,8 +11,9 @@ from django.utils.timezone import now
 
 from common.djangoapps.student.tests.factories import BetaTesterFactory
 
-from ..start_date import DEFAULT_START_DATE, StartDateTransformer
-from .helpers import BlockParentsMapTestCase, update_block
+from ...api import get_course_blocks
+from ..start_date import DEFAULT_START_DATE, StartDateTransformer, check_start_date
+from .helpers import BlockParentsMapTestCase, publish_course, update_block
 
 
 @ddt.ddt
@@ -120,3 +121,22 @@ class StartDateTransformerTestCase(BlockParentsMapTestCase):
             blocks_with_differing_student_access,
             self.transformers,
         )
+
+    @patch.dict('django.conf.settings.FEATURES', {'DISABLE_START_DATES': False})
+    def test_start_date_checked_once_per_condition(self):
+        for idx, start_date_type in ((0, self.StartDateType.released), (5, self.StartDateType.future)):
+            block = self.get_block(idx)
+            block.start = self.StartDateType.start(start_date_type)
+            update_block(block)
+        publish_course(self.course)
+
+        with patch(
+            'lms.djangoapps.course_blocks.transformers.start_date.check_start_date', wraps=check_start_date,
+        ) as mock_check_start_date:
+            block_structure = get_course_blocks(self.student, self.course.location, self.transformers)
+
+        # All blocks but 5 share the start date of the course.
+        assert mock_check_start_date.call_count == 2
+        assert set(block_structure.get_block_keys()) == {
+            self.xblock_keys[idx] for idx in (0, 1, 2, 3, 4, 6)
+        }
@@ -226,6 +226,25 @@ class UserPartitionTransformerTestCase(UserPartitionTestMixin, CourseStructureTe
             self.get_block_key_set(self.blocks, *expected_blocks)
         )
 
+    def test_transform_without_compiled_data(self):
+        self.setup_partitions_and_course()
+        add_user_to_cohort(self.partition_cohorts[self.user_partition.id - 1][0], self.user.username)
+
+        with patch(
+            'lms.djangoapps.course_blocks.transformers.user_partitions.UserPartitionTransformer'
+            '._get_denied_group_accesses',
+            return_value=None,
+        ):
+            trans_block_structure = get_course_blocks(
+                self.user,
+                self.course.location,
+                self.transformers,
+            )
+        self.assertSetEqual(
+            set(trans_block_structure.get_block_keys()),
+            self.get_block_key_set(self.blocks, 'course', 'A', 'B', 'C', 'E', 'F', 'G', 'J', 'L', 'M', 'O')
+        )
+
     def test_transform_with_content_gating_partition(self):
         self.setup_partitions_and_course()
         CourseModeFactory.create(course_id=self.course.id, mode_slug='audit')
@@ -25,8 +25,12 @@ class UserPartitionTransformer(BlockStructureTransformer):
     not have group access.
 
     Staff users are *not* exempted from user partition pathways.
+
+    The distinct merged group accesses of the blocks are compiled into a
+    table, so that the user's group access is checked once per distinct
+    merged group access rather than once per block for each request.
     """
-    WRITE_VERSION = 1
+    WRITE_VERSION = 2
     READ_VERSION = 1
 
     @classmethod
@@ -75,6 +79,47 @@ class UserPartitionTransformer(BlockStructureTransformer):
             merged_group_access = _MergedGroupAccess(user_partitions, xblock, merged_parent_access_list)
             block_structure.set_transformer_block_field(block_key, cls, 'merged_group_access', merged_group_access)
 
+    @classmethod
+    def compile(cls, block_structure):
+        """
+        Compiles the merged group accesses of the blocks into a table of
+        the distinct ones, recording the index of each block's merged group
+        access in the table.
+        """
+        if not block_structure.get_transformer_data(cls, 'user_partitions'):
+            return
+
+        group_accesses = {}
+        for block_key in block_structure:
+            merged_group_access = block_structure.get_transformer_block_field(block_key, cls, 'merged_group_access')
+            if merged_group_access is None:
+                continue
+            group_access_index = group_accesses.setdefault(merged_group_access.cache_key(), (
+                len(group_accesses), merged_group_access,
+            ))[0]
+            block_structure.set_transformer_block_field(
+                block_key, cls, 'merged_group_access_index', group_access_index,
+            )
+        block_structure.set_transformer_data(
+            cls, 'merged_group_accesses', [merged_group_access for _, merged_group_access in group_accesses.values()],
+        )
+
+    def _get_denied_group_accesses(self, block_structure, user_groups):
+        """
+        Returns a bitset of the indices of the compiled merged group
+        accesses denying access to a user with the given groups, or None if
+        the collected data of the given block_structure wasn't compiled.
+        """
+        merged_group_accesses = block_structure.get_transformer_data(self, 'merged_group_accesses')
+        if merged_group_accesses is None:
+            return None
+
+        denied_group_accesses = 0
+        for group_access_index, merged_group_access in enumerate(merged_group_accesses):
+            if not merged_group_access.check_group_access(user_groups):
+                denied_group_accesses |= 1 << group_access_index
+        return denied_group_accesses
+
     def transform(self, usage_info, block_structure):
         user = usage_info.user
         SplitTestTransformer().transform(usage_info, block_structure)
@@ -89,8 +134,17 @@ class UserPartitionTransformer(BlockStructureTransformer):
             return
 
         user_groups = get_user_partition_groups(usage_info.course_key, user_partitions, user, 'id')
+        denied_group_accesses = self._get_denied_group_accesses(block_structure, user_groups)
 
         for block_key in block_structure.topological_traversal():
+            if denied_group_accesses is not None:
+                group_access_index = block_structure.get_transformer_block_field(
+                    block_key, self, 'merged_group_access_index'
+                )
+                if group_access_index is None or not denied_group_accesses >> group_access_index & 1:
+                    # The user has access to the block.
+                    continue
+
             transformer_block_field = block_structure.get_transformer_block_field(
                 block_key, self, 'merged_group_access'
             )
@@ -226,6 +280,15 @@ class _MergedGroupAccess:
     def get_allowed_groups(self):
         return self._access
 
+    def cache_key(self):
+        """
+        Returns a hashable value identifying the access restrictions of
+        this merged group access.
+        """
+        return frozenset(
+            (partition_id, frozenset(group_ids)) for partition_id, group_ids in self._access.items()
+        )
+
     @staticmethod
     def _intersection(*sets):
         """
@@ -18,10 +18,13 @@ by `authored_data`, e.g. course content and settings stored in Mongo.
 
 import threading
 from abc import ABCMeta, abstractmethod
+from collections import Counter
 from contextlib import contextmanager
 
 from django.conf import settings
 from edx_django_utils.cache import DEFAULT_REQUEST_CACHE
+from edx_django_utils.monitoring import set_custom_attribute
+from opaque_keys.edx.asides import AsideUsageKeyV1, AsideUsageKeyV2
 from xblock.field_data import FieldData
 
 from xmodule.modulestore.inheritance import InheritanceMixin
@@ -29,6 +32,8 @@ from xmodule.modulestore.inheritance import InheritanceMixin
 NOTSET = object()
 ENABLED_OVERRIDE_PROVIDERS_KEY = 'courseware.field_overrides.enabled_providers.{course_id}'
 ENABLED_MODULESTORE_OVERRIDE_PROVIDERS_KEY = 'courseware.modulestore_field_overrides.enabled_providers.{course_id}'
+OVERRIDABLE_FIELDS_KEY = 'courseware.field_overrides.overridable_fields'
+OVERRIDE_COUNTERS_KEY = 'courseware.field_overrides.counters'
 
 
 def resolve_dotted(name):
@@ -61,6 +66,96 @@ def _lineage(block):
         parent = parent.get_parent()
 
 
+def _overridable_block_key(block):
+    """
+    Returns the `(block_type, block_id)` pair identifying the given block, or
+    the block an aside is applied to, in the sets returned by
+    `FieldOverrideProvider.get_overridable_fields`.  The pair is the same for a
+    block of a course and of its CCXs, whatever the version or branch of its
+    location.  Returns None for objects which aren't blocks.
+    """
+    usage_id = getattr(getattr(block, 'scope_ids', None), 'usage_id', None)
+    if isinstance(usage_id, (AsideUsageKeyV1, AsideUsageKeyV2)):
+        usage_id = usage_id.usage_key
+    if usage_id is None:
+        return None
+    return (usage_id.block_type, usage_id.block_id)
+
+
+def _may_override(overridable_fields, block_key, name):
+    """
+    Checks whether a provider which returned `overridable_fields` from
+    `get_overridable_fields` may override the field named `name` of the block
+    identified by `block_key`.
+    """
+    if overridable_fields is None or block_key is None:
+        return True
+    if name not in overridable_fields:
+        return False
+    block_keys = overridable_fields[name]
+    return block_keys is None or block_key in block_keys
+
+
+def _overridable_course_id(course_key):
+    """
+    Returns the id of the course identified by `course_key` in the keys of the
+    overridable fields cache.  The id is the same whatever the version or
+    branch of the key, so that the fields cached for the course key of a block
+    location are cleared along with those of the bare course key.
+    """
+    if getattr(course_key, 'org', None) and (
+        getattr(course_key, 'branch', None) or getattr(course_key, 'version_guid', None)
+    ):
+        course_key = course_key.replace(branch=None, version_guid=None)
+    return str(course_key)
+
+
+def clear_overridable_fields(course_key, user=None):
+    """
+    Forgets the fields which override providers may override in the course
+    identified by `course_key`, for `user` or for every user if `user` is None.
+    Must be called whenever an override is written, so that the following
+    reads of the request consult the providers for the new override.
+    """
+    overridable_fields = DEFAULT_REQUEST_CACHE.data.get(OVERRIDABLE_FIELDS_KEY)
+    if not overridable_fields:
+        return
+    course_id = _overridable_course_id(course_key)
+    user_id = getattr(user, 'id', None)
+    # Replace the cache rather than delete from it, so that `OverrideFieldData`
+    # instances holding on to the lists computed from it compute them again.
+    DEFAULT_REQUEST_CACHE.data[OVERRIDABLE_FIELDS_KEY] = {
+        cache_key: fields for cache_key, fields in overridable_fields.items()
+        if not (cache_key[1] == course_id and (user is None or cache_key[0] == user_id))
+    }
+
+
+def get_override_counters():
+    """
+    Returns a dict of the counters of field override lookups in the current
+    request:
+
+        consulted: the number of times a provider was asked for an override
+        hits: the number of times a provider returned an override
+        skipped: the number of reads no provider may override, which were
+            answered without consulting any provider
+    """
+    totals = Counter()
+    for counters in DEFAULT_REQUEST_CACHE.data.get(OVERRIDE_COUNTERS_KEY, ()):
+        totals.update(counters)
+    return {name: totals[name] for name in ('consulted', 'hits', 'skipped')}
+
+
+def report_override_counters():
+    """
+    Reports the counters of field override lookups in the current request, if
+    any, as custom attributes of its monitoring transaction.
+    """
+    if DEFAULT_REQUEST_CACHE.data.get(OVERRIDE_COUNTERS_KEY):
+        for name, count in get_override_counters().items():
+            set_custom_attribute(f'field_overrides.{name}', count)
+
+
 class _OverridesDisabled(threading.local):
     """
     A thread local used to manage state of overrides being disabled or not.
@@ -133,6 +228,20 @@ class FieldOverrideProvider(metaclass=ABCMeta):
         """
         return False
 
+    def get_overridable_fields(self, course_key):
+        """
+        Return the fields this provider may override for its user in the course
+        identified by `course_key`, as a dict mapping the name of each field to
+        the set of `(block_type, block_id)` pairs of the blocks it may be
+        overridden on, or to None if it may be overridden on any block.
+
+        Returning None, as this default implementation does, means any field of
+        any block may be overridden, and the provider is consulted for every
+        field read.  `OverrideFieldData` caches the result for the request until
+        `clear_overridable_fields` is called.
+        """
+        return None
+
 
 class OverrideFieldData(FieldData):
     """
@@ -146,6 +255,10 @@ class OverrideFieldData(FieldData):
     is important for this setting.  Override providers will tried in the order
     configured in the setting.  The first provider to find an override 'wins'
     for a particular field lookup.
+
+    Providers are only consulted for the fields returned by their
+    `get_overridable_fields`, computed once per user and course in a request,
+    so reads of fields no provider may override skip the providers entirely.
     """
     provider_classes = None
 
@@ -168,7 +281,7 @@ class OverrideFieldData(FieldData):
             # to check for instance.providers after the instance is built. This
             # would allow for the case where we have registered providers but
             # none are enabled for the provided course
-            return cls(user, wrapped, enabled_providers)
+            return cls(user, wrapped, enabled_providers, course.id if course is not None else None)
 
         return wrapped
 
@@ -196,9 +309,52 @@ class OverrideFieldData(FieldData):
 
         return enabled_providers
 
-    def __init__(self, user, fallback, providers):  # pylint: disable=super-init-not-called
+    def __init__(self, user, fallback, providers, course_key=None):  # pylint: disable=super-init-not-called
         self.fallback = fallback
         self.providers = tuple(provider(user, fallback) for provider in providers)
+        self.course_key = course_key
+        self._overridable_fields_key = (getattr(user, 'id', None), _overridable_course_id(course_key))
+        self._overridable_fields_cache = None
+        self._overridable_fields = [None] * len(self.providers)
+        self._register_counters()
+
+    def _register_counters(self):
+        """
+        Starts the counters of the lookups of this instance, which are kept on
+        the instance rather than in the request cache, so that reads don't
+        look them up.  They are summed with the counters of the other instances
+        of the current request by `get_override_counters`.
+        """
+        self._counters = Counter()
+        self._counters_registry = DEFAULT_REQUEST_CACHE.data.setdefault(OVERRIDE_COUNTERS_KEY, [])
+        self._counters_registry.append(self._counters)
+
+    def _get_overridable_fields(self):
+        """
+        Returns a list of the overridable fields of each provider, in the order
+        of `self.providers`.  The list is computed again only when the cache of
+        the current request is replaced, by a new request or by
+        `clear_overridable_fields`, computing the fields not yet cached for the
+        user and course in the current request.
+        """
+        if self.course_key is None:
+            return self._overridable_fields
+
+        cache = DEFAULT_REQUEST_CACHE.data.get(OVERRIDABLE_FIELDS_KEY)
+        if cache is None or cache is not self._overridable_fields_cache:
+            if cache is None:
+                cache = DEFAULT_REQUEST_CACHE.data[OVERRIDABLE_FIELDS_KEY] = {}
+            overridable_fields = cache.setdefault(self._overridable_fields_key, {})
+            for provider in self.providers:
+                provider_class = type(provider)
+                if provider_class not in overridable_fields:
+                    overridable_fields[provider_class] = provider.get_overridable_fields(self.course_key)
+            self._overridable_fields = [overridable_fields[type(provider)] for provider in self.providers]
+            self._overridable_fields_cache = cache
+            if DEFAULT_REQUEST_CACHE.data.get(OVERRIDE_COUNTERS_KEY) is not self._counters_registry:
+                # The instance is used in a new request.
+                self._register_counters()
+        return self._overridable_fields
 
     def get_override(self, block, name):
         """
@@ -206,10 +362,20 @@ class OverrideFieldData(FieldData):
         Returns the overridden value or `NOTSET` if no override is found.
         """
         if not overrides_disabled():
-            for provider in self.providers:
+            block_key = _overridable_block_key(block)
+            counters = self._counters
+            consulted = False
+            for provider, overridable_fields in zip(self.providers, self._get_overridable_fields()):
+                if not _may_override(overridable_fields, block_key, name):
+                    continue
+                consulted = True
+                counters['consulted'] += 1
                 value = provider.get(block, name, NOTSET)
                 if value is not NOTSET:
+                    counters['hits'] += 1
                     return value
+            if not consulted:
+                counters['skipped'] += 1
         return NOTSET
 
     def get(self, block, name):
@@ -279,7 +445,7 @@ class OverrideModulestoreFieldData(OverrideFieldData):
 
         enabled_providers = cls._providers_for_block(block)
         if enabled_providers:
-            return cls(field_data, enabled_providers)
+            return cls(field_data, enabled_providers, block.location.course_key)
 
         return field_data
 
@@ -307,5 +473,5 @@ class OverrideModulestoreFieldData(OverrideFieldData):
 
         return enabled_providers
 
-    def __init__(self, fallback, providers):
-        super().__init__(None, fallback, providers)
+    def __init__(self, fallback, providers, course_key=None):
+        super().__init__(None, fallback, providers, course_key)
@@ -3,12 +3,24 @@ Middleware for the courseware app
 """
 
 
+import logging
+
+from django.db import DatabaseError
+from django.http import HttpResponseServerError
 from django.shortcuts import redirect
 from django.utils.deprecation import MiddlewareMixin
 
 from lms.djangoapps.courseware.exceptions import Redirect
+from lms.djangoapps.courseware.field_overrides import report_override_counters
+from lms.djangoapps.courseware.user_state_client import (
+    DjangoXBlockUserStateClient,
+    start_write_behind,
+    stop_write_behind
+)
 from openedx.core.lib.request_utils import COURSE_REGEX
 
+log = logging.getLogger(__name__)
+
 
 class RedirectMiddleware(MiddlewareMixin):
     """
@@ -37,3 +49,56 @@ class CacheCourseIdMiddleware(MiddlewareMixin):
 
             if course_id and course_id != request.session.get('course_id'):
                 request.session['course_id'] = course_id
+
+
+class FlushUserStateMiddleware(MiddlewareMixin):
+    """
+    Middleware that lets write-behind user state clients defer their writes
+    until the response is returned, and flushes them then.
+    """
+
+    def process_request(self, request):  # pylint: disable=unused-argument
+        """
+        Let write-behind clients defer their writes in this request.
+        """
+        start_write_behind()
+
+    def process_exception(self, request, exception):  # pylint: disable=unused-argument
+        """
+        Discard the state deferred by a view which raised, as the rest of its
+        writes were rolled back.
+        """
+        stop_write_behind()
+
+    def process_response(self, request, response):
+        """
+        Write the state deferred while handling the request, unless the request
+        failed.  Writes made while a streaming response is generated are no
+        longer deferred.
+
+        If the state can't be written, even a row at a time, the request fails
+        with a server error instead of reporting the state as saved.
+        """
+        try:
+            if response.status_code < 500:
+                DjangoXBlockUserStateClient().flush_pending_writes()
+        except DatabaseError:
+            log.exception("Failed to write the user state deferred while handling %s", request.path)
+            return HttpResponseServerError()
+        finally:
+            stop_write_behind()
+        return response
+
+
+class FieldOverrideMonitoringMiddleware(MiddlewareMixin):
+    """
+    Middleware that reports the counters of the field override lookups made
+    while handling the request.
+    """
+
+    def process_response(self, request, response):  # pylint: disable=unused-argument
+        """
+        Report the field override counters of the request.
+        """
+        report_override_counters()
+        return response
@@ -37,6 +37,7 @@ from xblock.exceptions import InvalidScopeError, KeyValueMultiSaveError
 from xblock.fields import Scope, UserScope
 from xblock.runtime import KeyValueStore
 
+from lms.djangoapps.courseware.toggles import WRITE_BEHIND_USER_STATE
 from lms.djangoapps.courseware.user_state_client import DjangoXBlockUserStateClient
 from xmodule.modulestore.django import modulestore
 
@@ -344,12 +345,21 @@ class DjangoOrmFieldCache(metaclass=ABCMeta):
 class UserStateCache:
     """
     Cache for Scope.user_state xblock field data.
+
+    A sparse cache only looks up which blocks have state when fields are cached,
+    and loads the state of a block, along with that of its siblings, the first
+    time it is read.
     """
-    def __init__(self, user, course_id):
+    def __init__(self, user, course_id, sparse=False):
         self._cache = defaultdict(dict)
         self.course_id = course_id
         self.user = user
-        self._client = DjangoXBlockUserStateClient(self.user)
+        self.sparse = sparse
+        self._client = DjangoXBlockUserStateClient(self.user, write_behind=WRITE_BEHIND_USER_STATE.is_enabled())
+        # Maps the keys of blocks with state that hasn't been loaded yet to the key
+        # of the group of siblings they are loaded with, and each group to its keys.
+        self._unhydrated = {}
+        self._unhydrated_groups = defaultdict(set)
 
     def cache_fields(self, fields, xblocks, aside_types):  # pylint: disable=unused-argument
         """
@@ -361,6 +371,10 @@ class UserStateCache:
             xblocks (list of :class:`XBlock`): XBlocks to cache fields for.
             aside_types (list of str): Aside types to cache fields for.
         """
+        if self.sparse:
+            self._index_fields(xblocks, aside_types)
+            return
+
         block_field_state = self._client.get_many(
             self.user.username,
             _all_usage_keys(xblocks, aside_types),
@@ -368,6 +382,42 @@ class UserStateCache:
         for user_state in block_field_state:
             self._cache[user_state.block_key] = user_state.state
 
+    def _index_fields(self, xblocks, aside_types):
+        """
+        Record which of the supplied ``xblocks`` and ``aside_types`` have state,
+        without loading it. Blocks are grouped with their siblings, so that
+        rendering a unit loads the state of its components in a single query.
+        """
+        group_for_key = {}
+        for xblock in xblocks:
+            for usage_key in _all_usage_keys([xblock], aside_types):
+                if usage_key not in self._cache and usage_key not in self._unhydrated:
+                    group_for_key[usage_key] = xblock.parent
+
+        if not group_for_key:
+            return
+
+        keys_with_state = self._client.get_block_keys_with_state(self.user.username, list(group_for_key))
+        for usage_key in keys_with_state:
+            group = group_for_key[usage_key]
+            self._unhydrated[usage_key] = group
+            self._unhydrated_groups[group].add(usage_key)
+
+    def _hydrate(self, cache_key):
+        """
+        Load the state of the block identified by ``cache_key``, and of the
+        siblings it was indexed with, if it hasn't been loaded yet.
+        """
+        if cache_key not in self._unhydrated:
+            return
+
+        group_keys = self._unhydrated_groups.pop(self._unhydrated[cache_key])
+        for usage_key in group_keys:
+            del self._unhydrated[usage_key]
+
+        for user_state in self._client.get_many(self.user.username, group_keys):
+            self._cache[user_state.block_key] = user_state.state
+
     @contract(kvs_key=DjangoKeyValueStore.Key)
     def set(self, kvs_key, value):
         """
@@ -413,6 +463,12 @@ class UserStateCache:
 
             pending_updates[cache_key][kvs_key.field_name] = value
 
+        # The written state replaces any state that hasn't been loaded yet, as it would replace loaded state.
+        for cache_key in pending_updates:
+            group = self._unhydrated.pop(cache_key, None)
+            if group is not None:
+                self._unhydrated_groups[group].discard(cache_key)
+
         try:
             self._client.set_many(
                 self.user.username,
@@ -436,6 +492,7 @@ class UserStateCache:
         Returns: A django orm object from the cache
         """
         cache_key = self._cache_key_for_kvs_key(kvs_key)
+        self._hydrate(cache_key)
         if cache_key not in self._cache:
             raise KeyError(kvs_key.field_name)
 
@@ -452,6 +509,7 @@ class UserStateCache:
         Raises: KeyError if key isn't found in the cache
         """
         cache_key = self._cache_key_for_kvs_key(kvs_key)
+        self._hydrate(cache_key)
         if cache_key not in self._cache:
             raise KeyError(kvs_key.field_name)
 
@@ -474,6 +532,7 @@ class UserStateCache:
         Returns: bool
         """
         cache_key = self._cache_key_for_kvs_key(kvs_key)
+        self._hydrate(cache_key)
 
         return (
             cache_key in self._cache and
@@ -481,7 +540,7 @@ class UserStateCache:
         )
 
     def __len__(self):
-        return len(self._cache)
+        return len(self._cache) + len(self._unhydrated)
 
     def _cache_key_for_kvs_key(self, key):
         """
@@ -682,7 +741,7 @@ class FieldDataCache:
     A cache of django model objects needed to supply the data
     for a module and its descendants
     """
-    def __init__(self, descriptors, course_id, user, asides=None, read_only=False):
+    def __init__(self, descriptors, course_id, user, asides=None, read_only=False, sparse=False):
         """
         Find any courseware.models objects that are needed by any descriptor
         in descriptors. Attempts to minimize the number of queries to the database.
@@ -695,6 +754,8 @@ class FieldDataCache:
         user: The user for which to cache data
         asides: The list of aside types to load, or None to prefetch no asides.
         read_only: We should not perform writes (they become a no-op).
+        sparse: Only look up which blocks have user state up front, and load the
+            state of each block with its siblings when it is first read.
         """
         if asides is None:
             self.asides = []
@@ -710,6 +771,7 @@ class FieldDataCache:
             Scope.user_state: UserStateCache(
                 self.user,
                 self.course_id,
+                sparse=sparse,
             ),
             Scope.user_info: UserInfoCache(
                 self.user,
@@ -779,7 +841,7 @@ class FieldDataCache:
     @classmethod
     def cache_for_descriptor_descendents(cls, course_id, user, descriptor, depth=None,
                                          descriptor_filter=lambda descriptor: True,
-                                         asides=None, read_only=False):
+                                         asides=None, read_only=False, sparse=False):
         """
         course_id: the course in the context of which we want StudentModules.
         user: the django user for whom to load modules.
@@ -788,8 +850,9 @@ class FieldDataCache:
             the supplied descriptor. If depth is None, load all descendant StudentModules
         descriptor_filter is a function that accepts a descriptor and return whether the field data
             should be cached
+        sparse: whether to load the user state of each block when it is first read, rather than up front
         """
-        cache = FieldDataCache([], course_id, user, asides=asides, read_only=read_only)
+        cache = FieldDataCache([], course_id, user, asides=asides, read_only=read_only, sparse=sparse)
         cache.add_descriptor_descendents(descriptor, depth, descriptor_filter)
         return cache
 
@@ -988,12 +1051,41 @@ class ScoresClient:
         client.fetch_scores(scorable_locations)
         return client
 
+    @classmethod
+    def create_for_users(cls, course_id, user_ids, scorable_locations):
+        """
+        Create ScoresClients for each of the given users, with pre-fetched data
+        for the given locations, using a single query for all the users.
+
+        Returns a dict of user_id to ScoresClient.
+        """
+        clients = {user_id: cls(course_id, user_id) for user_id in user_ids}
+        scores_qset = StudentModule.objects.filter(
+            student_id__in=list(clients),
+            course_id=course_id,
+            module_state_key__in=set(scorable_locations),
+        )
+        for user_id, location, correct, total, created in scores_qset.values_list(
+            'student_id', 'module_state_key', 'grade', 'max_grade', 'created'
+        ):
+            clients[user_id]._locations_to_scores[location.map_into_course(course_id)] = (  # pylint: disable=protected-access
+                cls.Score(correct, total, created)
+            )
+        for client in clients.values():
+            client._has_fetched = True  # pylint: disable=protected-access
+        return clients
+
 
 # @contract(user_id=int, usage_key=UsageKey, score="number|None", max_score="number|None")
 def set_score(user_id, usage_key, score, max_score):
     """
     Set the score and max_score for the specified user and xblock usage.
     """
+    # Write the state deferred for the block so far before its score.  The
+    # state saved by the handler publishing the score is written once the
+    # handler returns, see _invoke_xblock_handler.
+    DjangoXBlockUserStateClient().flush_pending_writes(keys={(user_id, usage_key)})
+
     created = False
     kwargs = {"student_id": user_id, "module_state_key": usage_key, "course_id": usage_key.context_key}
     try:
@@ -22,6 +22,9 @@ class SelfPacedDateOverrideProvider(FieldOverrideProvider):
 
         return default
 
+    def get_overridable_fields(self, course_key):
+        return {'due': None, 'start': None}
+
     @classmethod
     def enabled_for(cls, block):  # lint-amnesty, pylint: disable=arguments-differ
         """This provider is enabled for self-paced courses only."""
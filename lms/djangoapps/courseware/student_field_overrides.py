@@ -9,7 +9,7 @@ import json
 from lms.djangoapps.courseware.models import StudentFieldOverride
 from openedx.core.lib.xblock_utils import is_xblock_aside
 
-from .field_overrides import FieldOverrideProvider
+from .field_overrides import FieldOverrideProvider, clear_overridable_fields
 
 
 class IndividualStudentOverrideProvider(FieldOverrideProvider):
@@ -21,6 +21,20 @@ class IndividualStudentOverrideProvider(FieldOverrideProvider):
     def get(self, block, name, default):
         return get_override_for_user(self.user, block, name, default)
 
+    def get_overridable_fields(self, course_key):
+        """
+        Returns the fields overridden for the user in the course, which are
+        looked up with a single query rather than a query per block.
+        """
+        overridable_fields = {}
+        query = StudentFieldOverride.objects.filter(
+            course_id=course_key,
+            student_id=getattr(self.user, 'id', None),
+        ).values_list('location', 'field')
+        for location, field in query:
+            overridable_fields.setdefault(field, set()).add((location.block_type, location.block_id))
+        return overridable_fields
+
     @classmethod
     def enabled_for(cls, course):
         """This simple override provider is always enabled"""
@@ -83,6 +97,7 @@ def override_field_for_user(user, block, name, value):
     field = block.fields[name]
     override.value = json.dumps(field.to_json(value))
     override.save()
+    clear_overridable_fields(block.runtime.course_id, user)
 
 
 def clear_override_for_user(user, block, name):
@@ -100,3 +115,5 @@ def clear_override_for_user(user, block, name):
             field=name).delete()
     except StudentFieldOverride.DoesNotExist:
         pass
+    else:
+        clear_overridable_fields(block.runtime.course_id, user)
@@ -0,0 +1,107 @@
+"""
+Performance test for rendering the courseware index view for a learner with
+state in every problem of a large course, with the eager and the sparse
+FieldDataCache.
+"""
+
+
+import json
+import timeit
+import tracemalloc
+import unittest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from edx_toggles.toggles.testutils import override_waffle_switch
+
+from common.djangoapps.student.models import CourseEnrollment
+from common.djangoapps.student.tests.factories import UserFactory
+from lms.djangoapps.courseware.tests.factories import StudentModuleFactory
+from lms.djangoapps.courseware.toggles import SPARSE_FIELD_DATA_CACHE
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+# Number of chapters, sequentials per chapter, units per sequential and problems per unit.
+COURSE_SHAPE = (4, 4, 3, 4)
+
+# Number of timed renders of the index view.
+NUM_CALLS = 3
+
+
+@unittest.skip
+class FieldDataCacheTimings(ModuleStoreTestCase):
+    """
+    This class exists to compare the time, the number of queries and the peak
+    memory of rendering a section of the courseware index view, with a
+    FieldDataCache which loads all the user state of the course up front, and
+    with one which loads the user state of the blocks that are rendered.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    def setUp(self):
+        super().setUp()
+        num_chapters, num_sequentials, num_units, num_problems = COURSE_SHAPE
+        self.user = UserFactory.create()
+        self.course = CourseFactory.create()
+        problems = []
+        with self.store.bulk_operations(self.course.id):
+            for _ in range(num_chapters):
+                chapter = ItemFactory.create(category='chapter', parent_location=self.course.location)
+                for _ in range(num_sequentials):
+                    section = ItemFactory.create(category='sequential', parent_location=chapter.location)
+                    for _ in range(num_units):
+                        vertical = ItemFactory.create(category='vertical', parent_location=section.location)
+                        for _ in range(num_problems):
+                            problems.append(ItemFactory.create(category='problem', parent_location=vertical.location))
+        for problem in problems:
+            StudentModuleFactory.create(
+                student=self.user,
+                course_id=self.course.id,
+                module_state_key=problem.location,
+                state=json.dumps({'attempts': 1, 'done': True, 'student_answers': {'answer': 'x' * 200}}),
+            )
+
+        CourseEnrollment.enroll(self.user, self.course.id)
+        self.client.login(username=self.user.username, password=self.TEST_PASSWORD)
+        self.url = reverse(
+            'courseware_section',
+            kwargs={
+                'course_id': str(self.course.id),
+                'chapter': chapter.location.block_id,
+                'section': section.location.block_id,
+            }
+        )
+
+    def _render_index(self):
+        """
+        Renders the last section of the course.
+        """
+        response = self.client.get(self.url)
+        assert response.status_code == 200
+
+    def _measure(self):
+        """
+        Returns the number of queries, the peak memory in KB and the time in ms of rendering the section.
+        """
+        self._render_index()
+        with CaptureQueriesContext(connection) as queries:
+            tracemalloc.start()
+            self._render_index()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        render_time = timeit.timeit(self._render_index, number=NUM_CALLS)
+        return len(queries), peak / 1024, render_time * 1000 / NUM_CALLS
+
+    def test_index_timings(self):
+        """
+        Measure rendering the section with the eager and the sparse FieldDataCache.
+        """
+        for sparse in (False, True):
+            with override_waffle_switch(SPARSE_FIELD_DATA_CACHE, sparse):
+                num_queries, peak_kb, render_ms = self._measure()
+            print('sparse={}: {} queries, peak memory {:.0f}KB, {:.2f}ms per render'.format(
+                sparse, num_queries, peak_kb, render_ms,
+            ))
@@ -2,9 +2,14 @@
 Tests for `field_overrides` module.
 """
 import unittest
+from collections import namedtuple
+
 import pytest
 from django.test.utils import override_settings
+from edx_django_utils.cache import DEFAULT_REQUEST_CACHE
+from opaque_keys.edx.locator import CourseLocator
 from xblock.field_data import DictFieldData
+from xblock.fields import ScopeIds
 
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
@@ -13,7 +18,10 @@ from ..field_overrides import (
     FieldOverrideProvider,
     OverrideFieldData,
     OverrideModulestoreFieldData,
+    _overridable_course_id,
+    clear_overridable_fields,
     disable_overrides,
+    get_override_counters,
     resolve_dotted
 )
 from ..testutils import FieldOverrideTestMixin
@@ -43,6 +51,31 @@ class TestOverrideProvider(FieldOverrideProvider):
         return True
 
 
+FakeBlock = namedtuple('FakeBlock', 'scope_ids')
+
+
+class TestOverridableFieldsProvider(FieldOverrideProvider):
+    """
+    A `FieldOverrideProvider` for testing which declares the fields it may
+    override, and records the fields it is asked for.
+    """
+    overridden_block_ids = {'overridden'}
+    consulted = []
+
+    def get(self, block, name, default):
+        self.consulted.append((block.scope_ids.usage_id.block_id, name))
+        if name == 'foo' and block.scope_ids.usage_id.block_id in self.overridden_block_ids:
+            return 'fu'
+        return default
+
+    def get_overridable_fields(self, course_key):
+        return {'foo': {('html', block_id) for block_id in self.overridden_block_ids}}
+
+    @classmethod
+    def enabled_for(cls, course):
+        return True
+
+
 class OverrideFieldBase(SharedModuleStoreTestCase):
     """
     Base class for field data override tests.  Using override_settings and
@@ -145,6 +178,92 @@ class OverrideModulestoreFieldDataTests(FieldOverrideTestMixin, OverrideFieldDat
         assert isinstance(data, DictFieldData)
 
 
+@override_settings(FIELD_OVERRIDE_PROVIDERS=(
+    'lms.djangoapps.courseware.tests.test_field_overrides.TestOverridableFieldsProvider',))
+class OverridableFieldsTests(OverrideFieldBase):
+    """
+    Tests that `OverrideFieldData` only consults providers for the fields they
+    may override.
+    """
+
+    def setUp(self):
+        super().setUp()
+        OverrideFieldData.provider_classes = None
+        DEFAULT_REQUEST_CACHE.clear()
+        TestOverridableFieldsProvider.overridden_block_ids = {'overridden'}
+        TestOverridableFieldsProvider.consulted = []
+
+    def tearDown(self):
+        super().tearDown()
+        OverrideFieldData.provider_classes = None
+
+    def make_block(self, block_id):
+        """
+        Returns a stand-in for the html block with the given block id.
+        """
+        usage_id = self.course.id.make_usage_key('html', block_id)
+        return FakeBlock(ScopeIds(None, 'html', usage_id, usage_id))
+
+    def make_one(self):
+        """
+        Factory method.
+        """
+        return OverrideFieldData.wrap(TESTUSER, self.course, DictFieldData({
+            'foo': 'bar',
+            'bees': 'knees',
+        }))
+
+    def test_skips_fields_not_overridable(self):
+        data = self.make_one()
+        overridden, other = self.make_block('overridden'), self.make_block('other')
+        assert data.get(overridden, 'foo') == 'fu'
+        assert data.get(overridden, 'bees') == 'knees'
+        assert data.get(other, 'foo') == 'bar'
+        assert TestOverridableFieldsProvider.consulted == [('overridden', 'foo')]
+        assert get_override_counters() == {'consulted': 1, 'hits': 1, 'skipped': 2}
+
+    def test_clear_overridable_fields(self):
+        data = self.make_one()
+        other = self.make_block('other')
+        assert data.get(other, 'foo') == 'bar'
+
+        TestOverridableFieldsProvider.overridden_block_ids = {'overridden', 'other'}
+        assert data.get(other, 'foo') == 'bar'
+        clear_overridable_fields(self.course.id)
+        assert data.get(other, 'foo') == 'fu'
+        assert get_override_counters() == {'consulted': 1, 'hits': 1, 'skipped': 2}
+
+    def test_counters_of_new_request(self):
+        data = self.make_one()
+        assert data.get(self.make_block('other'), 'foo') == 'bar'
+        DEFAULT_REQUEST_CACHE.clear()
+        assert data.get(self.make_block('overridden'), 'foo') == 'fu'
+        assert get_override_counters() == {'consulted': 1, 'hits': 1, 'skipped': 0}
+
+    @override_settings(MODULESTORE_FIELD_OVERRIDE_PROVIDERS=[
+        'lms.djangoapps.courseware.tests.test_field_overrides.TestOverridableFieldsProvider'
+    ])
+    def test_modulestore_skips_fields_not_overridable(self):
+        OverrideModulestoreFieldData.provider_classes = None
+        self.addCleanup(setattr, OverrideModulestoreFieldData, 'provider_classes', None)
+        data = OverrideModulestoreFieldData.wrap(self.course, DictFieldData({'foo': 'bar'}))
+        assert data.course_key == self.course.id
+
+        overridden, other = self.make_block('overridden'), self.make_block('other')
+        assert data.get(overridden, 'foo') == 'fu'
+        assert data.get(other, 'foo') == 'bar'
+        assert TestOverridableFieldsProvider.consulted == [('overridden', 'foo')]
+
+        TestOverridableFieldsProvider.overridden_block_ids = {'overridden', 'other'}
+        clear_overridable_fields(self.course.id)
+        assert data.get(other, 'foo') == 'fu'
+
+    def test_overridable_course_id(self):
+        course_key = CourseLocator('org', 'course', 'run')
+        assert _overridable_course_id(course_key.for_branch('published-branch')) == str(course_key)
+        assert _overridable_course_id(course_key.for_version('a' * 24)) == str(course_key)
+
+
 class ResolveDottedTests(unittest.TestCase):
     """
     Tests for `resolve_dotted`.
@@ -3,11 +3,18 @@ Tests for courseware middleware
 """
 
 
-from django.http import Http404
+from unittest.mock import patch
+
+from django.db import OperationalError
+from django.http import Http404, HttpResponse, HttpResponseServerError
 from django.test.client import RequestFactory
+from edx_django_utils.cache import RequestCache
 
+from common.djangoapps.student.tests.factories import UserFactory
 from lms.djangoapps.courseware.exceptions import Redirect
-from lms.djangoapps.courseware.middleware import RedirectMiddleware
+from lms.djangoapps.courseware.middleware import FlushUserStateMiddleware, RedirectMiddleware
+from lms.djangoapps.courseware.models import StudentModule
+from lms.djangoapps.courseware.user_state_client import DjangoXBlockUserStateClient
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
 
@@ -41,3 +48,61 @@ class CoursewareMiddlewareTestCase(SharedModuleStoreTestCase):
         assert response.status_code == 302
         target_url = response._headers['location'][1]  # lint-amnesty, pylint: disable=protected-access
         assert target_url.endswith(test_url)
+
+    def test_flush_user_state(self):
+        """
+        State written by write-behind clients is stored when the response is returned.
+        """
+        self.addCleanup(RequestCache.clear_all_namespaces)
+        user = UserFactory.create()
+        block_key = self.course.id.make_usage_key('html', 'html')
+        request = RequestFactory().get("dummy_url")
+        middleware = FlushUserStateMiddleware()
+
+        middleware.process_request(request)
+        DjangoXBlockUserStateClient(write_behind=True).set_many(user.username, {block_key: {'a': 1}})
+        assert not StudentModule.objects.filter(student=user).exists()
+        middleware.process_response(request, HttpResponse())
+        assert StudentModule.objects.get(student=user, module_state_key=block_key).state == '{"a": 1}'
+
+    def test_discard_user_state_of_failed_request(self):
+        """
+        State written by a request whose view raised, or which failed, is discarded.
+        """
+        self.addCleanup(RequestCache.clear_all_namespaces)
+        user = UserFactory.create()
+        block_key = self.course.id.make_usage_key('html', 'html')
+        middleware = FlushUserStateMiddleware()
+
+        request = RequestFactory().get("dummy_url")
+        middleware.process_request(request)
+        DjangoXBlockUserStateClient(write_behind=True).set_many(user.username, {block_key: {'a': 1}})
+        middleware.process_exception(request, Exception())
+        middleware.process_response(request, HttpResponseServerError())
+
+        request = RequestFactory().get("dummy_url")
+        middleware.process_request(request)
+        DjangoXBlockUserStateClient(write_behind=True).set_many(user.username, {block_key: {'a': 1}})
+        middleware.process_response(request, HttpResponseServerError())
+
+        assert not StudentModule.objects.filter(student=user).exists()
+
+    def test_flush_user_state_failure(self):
+        """
+        The request fails with a server error if the state written by it can't be stored.
+        """
+        self.addCleanup(RequestCache.clear_all_namespaces)
+        user = UserFactory.create()
+        block_key = self.course.id.make_usage_key('html', 'html')
+        request = RequestFactory().get("dummy_url")
+        middleware = FlushUserStateMiddleware()
+        response = HttpResponse()
+
+        middleware.process_request(request)
+        DjangoXBlockUserStateClient(write_behind=True).set_many(user.username, {block_key: {'a': 1}})
+        with patch.object(
+            DjangoXBlockUserStateClient, 'flush_pending_writes', side_effect=OperationalError('Deadlock'),
+        ):
+            with patch('lms.djangoapps.courseware.middleware.log') as mock_log:
+                assert middleware.process_response(request, response).status_code == 500
+        assert mock_log.exception.called
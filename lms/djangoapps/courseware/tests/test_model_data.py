@@ -239,6 +239,49 @@ class TestStudentModuleStorage(OtherUserFailureTestMixin, TestCase):
         assert exception_context.value.saved_field_names == []
 
 
+class TestSparseStudentModuleStorage(TestCase):
+    """Tests for user_state storage via StudentModule, loaded on first read"""
+    # Tell Django to clean out all databases, not just default
+    databases = {alias for alias in connections}  # lint-amnesty, pylint: disable=unnecessary-comprehension
+
+    def setUp(self):
+        super().setUp()
+        student_module = StudentModuleFactory(state=json.dumps({'a_field': 'a_value', 'b_field': 'b_value'}))
+        self.user = student_module.student
+
+        # Only the keys of the StudentModules are looked up
+        with self.assertNumQueries(1):
+            self.field_data_cache = FieldDataCache(
+                [mock_descriptor([mock_field(Scope.user_state, 'a_field')])],
+                COURSE_KEY,
+                self.user,
+                sparse=True,
+            )
+
+        self.kvs = DjangoKeyValueStore(self.field_data_cache)
+
+    def test_get_existing_field(self):
+        "Test that the state is loaded by the first read, and read from the cache after that"
+        with self.assertNumQueries(1):
+            assert 'a_value' == self.kvs.get(user_state_key('a_field'))
+        with self.assertNumQueries(0):
+            assert 'b_value' == self.kvs.get(user_state_key('b_field'))
+            assert self.kvs.has(user_state_key('a_field'))
+
+    def test_get_missing_module(self):
+        "Test that reading a block without state doesn't query the database"
+        missing_key = DjangoKeyValueStore.Key(Scope.user_state, self.user.id, LOCATION('other_id'), 'a_field')
+        with self.assertNumQueries(0):
+            self.assertRaises(KeyError, self.kvs.get, missing_key)
+            assert not self.kvs.has(missing_key)
+
+    def test_set_existing_field(self):
+        "Test that setting a field of state that hasn't been loaded stores the merged state"
+        self.kvs.set(user_state_key('a_field'), 'new_value')
+        assert {'b_field': 'b_value', 'a_field': 'new_value'} == json.loads(StudentModule.objects.get().state)
+        assert 'new_value' == self.kvs.get(user_state_key('a_field'))
+
+
 class TestMissingStudentModule(TestCase):  # lint-amnesty, pylint: disable=missing-class-docstring
     # Tell Django to clean out all databases, not just default
     databases = {alias for alias in connections}  # lint-amnesty, pylint: disable=unnecessary-comprehension
@@ -18,6 +18,7 @@ from django.test import TestCase
 from django.test.client import RequestFactory
 from django.urls import reverse
 from django.utils.timezone import now
+from edx_toggles.toggles.testutils import override_waffle_switch
 from submissions import api as submissions_api
 
 from capa.tests.response_xml_factory import (
@@ -27,7 +28,10 @@ from capa.tests.response_xml_factory import (
     SchematicResponseXMLFactory
 )
 from common.djangoapps.course_modes.models import CourseMode
+from lms.djangoapps.courseware.middleware import FlushUserStateMiddleware
 from lms.djangoapps.courseware.models import BaseStudentModuleHistory, StudentModule
+from lms.djangoapps.courseware.toggles import WRITE_BEHIND_USER_STATE
+from lms.djangoapps.courseware.user_state_client import stop_write_behind
 from lms.djangoapps.courseware.tests.helpers import LoginEnrollmentTestCase
 from lms.djangoapps.grades.api import CourseGradeFactory, task_compute_all_grades_for_course
 from openedx.core.djangoapps.credit.api import get_credit_requirement_status, set_credit_requirements
@@ -332,6 +336,23 @@ class TestCourseGrades(TestSubmittingProblems):
         self.reset_question_answer('p1')
         self._verify_grade(expected_problem_score=(0.0, 1.0), expected_hw_grade=(0.0, 1.0))
 
+    def test_write_behind_stores_state_with_score(self):
+        # The deferred writes are never flushed with the response, as if the worker died after the view returned.
+        def discard_pending_writes(middleware, request, response):  # pylint: disable=unused-argument
+            stop_write_behind()
+            return response
+
+        with override_waffle_switch(WRITE_BEHIND_USER_STATE, active=True):
+            with patch.object(FlushUserStateMiddleware, 'process_response', discard_pending_writes):
+                self._submit_correct_answer()
+
+        student_module = StudentModule.objects.get(student=self.student_user, module_state_key=self.problem.location)
+        assert (student_module.grade, student_module.max_grade) == (1.0, 1.0)
+        state = json.loads(student_module.state)
+        assert state['attempts'] == 1
+        assert state['student_answers'] == {f'input_{self.problem.location.html_id()}_2_1': 'Correct'}
+        self._verify_grade(expected_problem_score=(1.0, 1.0), expected_hw_grade=(1.0, 1.0))
+
 
 @ddt.ddt
 class TestCourseGrader(TestSubmittingProblems):
@@ -4,14 +4,25 @@ defined in edx_user_state_client.
 """
 
 
+import json
 from collections import defaultdict
+from unittest.mock import patch
 
-from django.db import connections
-
+import pytest
+from django.db import OperationalError, connection, connections
+from django.test.utils import CaptureQueriesContext
+from edx_django_utils.cache import RequestCache
 from edx_user_state_client.tests import UserStateClientTestBase
+from opaque_keys.edx.locator import CourseLocator
 
 from common.djangoapps.student.tests.factories import UserFactory
-from lms.djangoapps.courseware.user_state_client import DjangoXBlockUserStateClient
+from lms.djangoapps.courseware.model_data import set_score
+from lms.djangoapps.courseware.models import StudentModule
+from lms.djangoapps.courseware.user_state_client import (
+    FLUSH_ATTEMPTS,
+    DjangoXBlockUserStateClient,
+    start_write_behind
+)
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
 
@@ -36,3 +47,126 @@ class TestDjangoUserStateClient(UserStateClientTestBase, ModuleStoreTestCase):
         super().setUp()
         self.client = DjangoXBlockUserStateClient()
         self.users = defaultdict(UserFactory.create)
+
+
+class TestWriteBehindDjangoUserStateClient(ModuleStoreTestCase):
+    """
+    Tests of the DjangoUserStateClient backend deferring its writes to the
+    end of the request.
+    """
+    # Tell Django to clean out all databases, not just default
+    databases = {alias for alias in connections}  # lint-amnesty, pylint: disable=unnecessary-comprehension
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(RequestCache.clear_all_namespaces)
+        self.client = DjangoXBlockUserStateClient(write_behind=True)
+        self.user = UserFactory.create()
+        course_key = CourseLocator('org', 'course', 'run')
+        self.block_keys = [course_key.make_usage_key('problem', f'problem_{index}') for index in range(3)]
+
+    def _stored_state(self, block_key):
+        """
+        Returns the state stored in the database for the user and block.
+        """
+        return json.loads(StudentModule.objects.get(student=self.user, module_state_key=block_key).state)
+
+    def test_writes_are_coalesced(self):
+        start_write_behind()
+        self.client.set_many(self.user.username, {self.block_keys[0]: {'a': 1, 'b': 1}})
+        self.client.set_many(self.user.username, {self.block_keys[0]: {'b': 2}, self.block_keys[1]: {'c': 3}})
+        assert not StudentModule.objects.filter(student=self.user).exists()
+        assert self.client.get(self.user.username, self.block_keys[0]).state == {'a': 1, 'b': 2}
+
+        self.client.flush_pending_writes()
+        assert self._stored_state(self.block_keys[0]) == {'a': 1, 'b': 2}
+        assert self._stored_state(self.block_keys[1]) == {'c': 3}
+        assert len(list(self.client.get_history(self.user.username, self.block_keys[0]))) == 1
+
+    def test_flush_merges_stored_state(self):
+        DjangoXBlockUserStateClient().set_many(
+            self.user.username, {block_key: {'a': 1, 'b': 1} for block_key in self.block_keys[:2]}
+        )
+        start_write_behind()
+        self.client.set_many(self.user.username, {block_key: {'b': 2} for block_key in self.block_keys})
+        assert self.client.get(self.user.username, self.block_keys[1]).state == {'a': 1, 'b': 2}
+
+        self.client.flush_pending_writes()
+        assert self._stored_state(self.block_keys[0]) == {'a': 1, 'b': 2}
+        assert self._stored_state(self.block_keys[1]) == {'a': 1, 'b': 2}
+        assert self._stored_state(self.block_keys[2]) == {'b': 2}
+        assert len(list(self.client.get_history(self.user.username, self.block_keys[1]))) == 2
+
+    def test_rows_are_locked_in_key_order(self):
+        other_course_key = CourseLocator('another', 'course', 'run')
+        other_block_key = other_course_key.make_usage_key('problem', 'problem_0')
+        start_write_behind()
+        self.client.set_many(self.user.username, {block_key: {'a': 1} for block_key in reversed(self.block_keys)})
+        self.client.set_many(self.user.username, {other_block_key: {'a': 1}})
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.flush_pending_writes()
+        lock_queries = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and 'courseware_studentmodule' in query['sql']
+        ]
+        # The rows of the other course, which sorts first, are locked before
+        # those of the course, both before and after the missing rows are inserted.
+        assert len(lock_queries) == 4
+        for other_course_query, course_query in (lock_queries[:2], lock_queries[2:]):
+            assert str(other_course_key) in other_course_query
+            assert str(self.block_keys[0].course_key) in course_query
+
+    @patch('lms.djangoapps.courseware.user_state_client._in_transaction', return_value=False)
+    def test_flush_is_retried_after_deadlock(self, _mock_in_transaction):
+        write_pending = DjangoXBlockUserStateClient._write_pending  # pylint: disable=protected-access
+        attempts = []
+
+        def deadlock_once(client, writes):
+            attempts.append(writes)
+            if len(attempts) == 1:
+                raise OperationalError('Deadlock found when trying to get lock')
+            return write_pending(client, writes)
+
+        start_write_behind()
+        self.client.set_many(self.user.username, {self.block_keys[0]: {'a': 1}})
+        with patch.object(DjangoXBlockUserStateClient, '_write_pending', autospec=True, side_effect=deadlock_once):
+            self.client.flush_pending_writes()
+        assert len(attempts) == 2
+        assert self._stored_state(self.block_keys[0]) == {'a': 1}
+
+    @patch('lms.djangoapps.courseware.user_state_client._in_transaction', return_value=False)
+    def test_flush_writes_rows_after_retries(self, _mock_in_transaction):
+        start_write_behind()
+        self.client.set_many(self.user.username, {block_key: {'a': 1} for block_key in self.block_keys[:2]})
+        with patch.object(
+            DjangoXBlockUserStateClient, '_write_pending', side_effect=OperationalError('Deadlock'),
+        ) as mock_write_pending:
+            self.client.flush_pending_writes()
+        assert mock_write_pending.call_count == FLUSH_ATTEMPTS
+        for block_key in self.block_keys[:2]:
+            assert self._stored_state(block_key) == {'a': 1}
+
+    def test_flush_is_not_retried_in_transaction(self):
+        start_write_behind()
+        self.client.set_many(self.user.username, {self.block_keys[0]: {'a': 1}})
+        with patch.object(
+            DjangoXBlockUserStateClient, '_write_pending', side_effect=OperationalError('Deadlock'),
+        ) as mock_write_pending:
+            with pytest.raises(OperationalError):
+                self.client.flush_pending_writes()
+        assert mock_write_pending.call_count == 1
+
+    def test_set_score_flushes_block_state(self):
+        start_write_behind()
+        self.client.set_many(self.user.username, {block_key: {'a': 1} for block_key in self.block_keys[:2]})
+        set_score(self.user.id, self.block_keys[0], 1, 2)
+
+        student_module = StudentModule.objects.get(student=self.user, module_state_key=self.block_keys[0])
+        assert json.loads(student_module.state) == {'a': 1}
+        assert (student_module.grade, student_module.max_grade) == (1, 2)
+        assert not StudentModule.objects.filter(student=self.user, module_state_key=self.block_keys[1]).exists()
+
+    def test_writes_immediately_outside_write_behind_requests(self):
+        self.client.set_many(self.user.username, {self.block_keys[0]: {'a': 1}})
+        assert self._stored_state(self.block_keys[0]) == {'a': 1}
@@ -2,7 +2,7 @@
 Toggles for courseware in-course experience.
 """
 
-from edx_toggles.toggles import LegacyWaffleFlagNamespace, SettingToggle
+from edx_toggles.toggles import LegacyWaffleFlagNamespace, SettingToggle, WaffleSwitch
 from opaque_keys.edx.keys import CourseKey
 
 from openedx.core.djangoapps.waffle_utils import CourseWaffleFlag
@@ -236,3 +236,39 @@ def streak_celebration_is_active(course_key):
 # .. toggle_status: unsupported
 def is_courses_default_invite_only_enabled():
     return SettingToggle("COURSES_INVITE_ONLY", default=False).is_enabled()
+
+
+# .. toggle_name: courseware.write_behind_user_state
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, the XBlock user state written while handling a request is kept
+#   in the request, coalesced per user and block, and written to courseware_studentmodule with bulk
+#   queries when the response is returned, by FlushUserStateMiddleware. Reads in the same request see
+#   the pending state. History entries are written in the same flush. The state deferred by an XBlock
+#   handler is written as soon as the handler returns and the block is saved, right after any score
+#   the handler published, as it is when this switch is disabled.
+# .. toggle_warnings: FlushUserStateMiddleware must be installed; without it, writes aren't deferred.
+#   State written by a request whose view raises, or whose response is a server error, is discarded
+#   along with the rest of its writes. State which still can't be written after retrying deadlocks is
+#   written a row at a time, and if that fails too, the response is replaced by a server error.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2026-10-16
+# .. toggle_target_removal_date: 2027-01-16
+WRITE_BEHIND_USER_STATE = WaffleSwitch(
+    'courseware.write_behind_user_state', __name__
+)
+
+# .. toggle_name: courseware.sparse_field_data_cache
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, the FieldDataCache of the courseware index view only looks up
+#   which blocks of the course have user state when it is built, and loads the state of a block, along
+#   with that of its siblings, the first time it is read. Learners with a lot of state in large courses
+#   then only load the state of the blocks that are rendered.
+# .. toggle_warnings: Reading the state of blocks spread across many parents takes a query per parent.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2026-10-16
+# .. toggle_target_removal_date: 2027-01-16
+SPARSE_FIELD_DATA_CACHE = WaffleSwitch(
+    'courseware.sparse_field_data_cache', __name__
+)
@@ -6,19 +6,24 @@ data in a Django ORM model.
 
 import itertools
 import logging
+from collections import defaultdict, namedtuple
+from contextlib import ExitStack
 from operator import attrgetter
 from time import time
 
+from django.apps import apps
 from django.conf import settings
 from django.contrib.auth.models import User  # lint-amnesty, pylint: disable=imported-auth-user
 from django.core.paginator import Paginator
-from django.db import transaction
-from django.db.utils import IntegrityError
+from django.db import connections, router, transaction
+from django.db.utils import IntegrityError, OperationalError
+from django.utils.timezone import now
 from edx_django_utils import monitoring as monitoring_utils
+from edx_django_utils.cache import RequestCache
 from edx_user_state_client.interface import XBlockUserState, XBlockUserStateClient
 from xblock.fields import Scope
 
-from lms.djangoapps.courseware.models import BaseStudentModuleHistory, StudentModule
+from lms.djangoapps.courseware.models import BaseStudentModuleHistory, StudentModule, StudentModuleHistory, chunks
 
 try:
     import simplejson as json
@@ -28,6 +33,89 @@ except ImportError:
 
 log = logging.getLogger(__name__)
 
+WRITE_BEHIND_NAMESPACE = 'courseware.user_state_client.write_behind'
+
+# The state written by write-behind clients for a user and block in the
+# current request, not yet flushed to the database.
+PendingUserState = namedtuple('PendingUserState', ['student_id', 'state'])
+
+# Number of times a flush of pending writes is attempted, should it deadlock
+# with another transaction writing the same rows.
+FLUSH_ATTEMPTS = 3
+
+
+def start_write_behind():
+    """
+    Lets write-behind clients defer their writes in the current request,
+    until :meth:`DjangoXBlockUserStateClient.flush_pending_writes` is called.
+    """
+    RequestCache(WRITE_BEHIND_NAMESPACE).set('pending_writes', {})
+
+
+def stop_write_behind():
+    """
+    Makes write-behind clients write immediately again for the rest of the
+    current request, e.g. while a streaming response is generated.
+    """
+    RequestCache(WRITE_BEHIND_NAMESPACE).delete('pending_writes')
+
+
+def _get_pending_writes():
+    """
+    Returns the dict of the pending writes of the current request, keyed by
+    username and usage key, or None if writes can't be deferred.
+    """
+    return RequestCache(WRITE_BEHIND_NAMESPACE).data.get('pending_writes')
+
+
+def _history_models():
+    """
+    Returns the models which the post_save handlers of StudentModule write
+    history entries to, as bulk writes don't send signals.
+    """
+    history_models = []
+    if apps.is_installed('lms.djangoapps.coursewarehistoryextended'):
+        history_models.append(apps.get_model('coursewarehistoryextended', 'StudentModuleHistoryExtended'))
+    if not settings.FEATURES.get('ENABLE_CSMH_EXTENDED'):
+        history_models.append(StudentModuleHistory)
+    return history_models
+
+
+def _in_transaction(using):
+    """
+    Returns whether a transaction is open on the database named by `using`.
+    """
+    return transaction.get_connection(using).in_atomic_block
+
+
+def _lock_order(key):
+    """
+    Returns the sort key of a `(student_id, usage_key)` pair, in the order
+    in which rows are locked by flushes.
+    """
+    student_id, usage_key = key
+    return student_id, str(usage_key)
+
+
+class _RoundTripCounter:
+    """
+    A database execute wrapper which counts the queries sent to the database.
+    """
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def install(self, exit_stack, aliases):
+        """
+        Counts the queries sent to the databases named by `aliases` until
+        `exit_stack` is closed.
+        """
+        for alias in set(aliases):
+            exit_stack.enter_context(connections[alias].execute_wrapper(self))
+
 
 class DjangoXBlockUserStateClient(XBlockUserStateClient):
     """
@@ -70,14 +158,18 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         """
         pass  # lint-amnesty, pylint: disable=unnecessary-pass
 
-    def __init__(self, user=None):
+    def __init__(self, user=None, write_behind=False):
         """
         Arguments:
             user (:class:`~User`): An already-loaded django user. If this user matches the username
                 supplied to `set_many`, then that will reduce the number of queries made to store
                 the user state.
+            write_behind (bool): If True, and the current request was started with
+                :func:`start_write_behind`, `set_many` records the state in the request, and the
+                writes of the request are coalesced and written by :meth:`flush_pending_writes`.
         """
         self.user = user
+        self.write_behind = write_behind
 
     def _get_student_modules(self, username, block_keys):
         """
@@ -105,6 +197,45 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
                 usage_key = student_module.module_state_key.map_into_course(student_module.course_id)
                 yield (student_module, usage_key)
 
+    def get_block_keys_with_state(self, username, block_keys, scope=Scope.user_state):
+        """
+        Return the set of the ``block_keys`` for which state is stored for the user, reading
+        only the keys of the stored rows rather than their state.
+
+        Arguments:
+            username: The name of the user whose state should be looked up
+            block_keys ([UsageKey]): A list of UsageKeys identifying which xblocks to look up.
+            scope (Scope): The scope to look up
+        """
+        if scope != Scope.user_state:
+            raise ValueError(f"Only Scope.user_state is supported, not {scope}")
+
+        self._nr_stat_increment('get_block_keys_with_state', 'calls')
+        self._nr_stat_accumulate('get_block_keys_with_state', 'blocks_requested', len(block_keys))
+
+        block_keys_with_state = set(self._get_pending_states(username, block_keys))
+        course_key_func = attrgetter('course_key')
+        by_course = itertools.groupby(
+            sorted(block_keys, key=course_key_func),
+            course_key_func,
+        )
+        for course_key, usage_keys in by_course:
+            for usage_keys_chunk in chunks(usage_keys, 500):
+                query = StudentModule.objects.filter(
+                    module_state_key__in=usage_keys_chunk,
+                    student__username=username,
+                    course_id=course_key,
+                    state__isnull=False,
+                ).exclude(
+                    # Deleted state, which conformant clients treat as missing.
+                    state='{}',
+                ).values_list('module_state_key', 'course_id')
+                for module_state_key, course_id in query:
+                    block_keys_with_state.add(module_state_key.map_into_course(course_id))
+
+        self._nr_stat_accumulate('get_block_keys_with_state', 'blocks_out', len(block_keys_with_state))
+        return block_keys_with_state
+
     def _nr_attribute_name(self, function_name, stat_name, block_type=None):
         """
         Return an attribute name (string) representing the provided descriptors.
@@ -176,13 +307,17 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         # keep track of blocks requested
         self._nr_stat_accumulate('get_many', 'blocks_requested', len(block_keys))
 
+        pending_states = self._get_pending_states(username, block_keys)
         modules = self._get_student_modules(username, block_keys)
         for module, usage_key in modules:
-            if module.state is None:
+            pending_state = pending_states.pop(usage_key, None)
+            if module.state is None and pending_state is None:
                 continue
 
-            state = json.loads(module.state)
-            state_length = len(module.state)
+            state = json.loads(module.state) if module.state is not None else {}
+            state_length = len(module.state or '')
+            if pending_state is not None:
+                state.update(pending_state)
 
             # If the state is the empty dict, then it has been deleted, and so
             # conformant UserStateClients should treat it as if it doesn't exist.
@@ -203,6 +338,18 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
                 }
             yield XBlockUserState(username, usage_key, state, module.modified, scope)
 
+        # Blocks whose state was only written in this request, and not flushed yet.
+        for usage_key, state in pending_states.items():
+            self._nr_block_stat_increment('get_many', usage_key.block_type, 'blocks_out')
+            total_block_count += 1
+            if fields is not None:
+                state = {
+                    field: state[field]
+                    for field in fields
+                    if field in state
+                }
+            yield XBlockUserState(username, usage_key, dict(state), now(), scope)
+
         # The rest of this method exists only to report custom attributes.
         finish_time = time()
         duration = (finish_time - evt_time) * 1000  # milliseconds
@@ -240,8 +387,38 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
             # what we have.
             return
 
+        pending_writes = _get_pending_writes() if self.write_behind else None
+        if pending_writes is not None:
+            for usage_key, state in block_keys_to_state.items():
+                pending_write = pending_writes.setdefault(
+                    (username, usage_key), PendingUserState(user.id, {})
+                )
+                # Copy the values as they would be stored now, as the block may
+                # mutate them before the writes are flushed.
+                pending_write.state.update(json.loads(json.dumps(state)))
+            self._nr_stat_accumulate('set_many', 'blocks_deferred', len(block_keys_to_state))
+            return
+
         evt_time = time()
+        round_trips = _RoundTripCounter()
+        with ExitStack() as exit_stack:
+            round_trips.install(exit_stack, [router.db_for_write(StudentModule)])
+            self._set_many_immediately(user, block_keys_to_state)
+
+        # Each created or updated row is locked until the end of its transaction.
+        self._nr_stat_accumulate('set_many', 'round_trips', round_trips.count)
+        self._nr_stat_accumulate('set_many', 'rows_locked', len(block_keys_to_state))
+
+        # Events for the entire set_many call.
+        finish_time = time()
+        duration = (finish_time - evt_time) * 1000  # milliseconds
+        self._nr_stat_accumulate('set_many', 'duration', duration)
 
+    def _set_many_immediately(self, user, block_keys_to_state):
+        """
+        Writes the state of each block in `block_keys_to_state` for `user`,
+        a row at a time.
+        """
         for usage_key, state in block_keys_to_state.items():
             try:
                 student_module, created = StudentModule.objects.get_or_create(
@@ -305,10 +482,199 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
             # Event to record number of existing fields updated in set/set_many.
             num_fields_updated = max(0, len(state) - num_new_fields_set)
 
-        # Events for the entire set_many call.
+    def _get_pending_states(self, username, block_keys):
+        """
+        Returns a dict mapping the usage keys among `block_keys` written for
+        `username` in this request, but not flushed yet, to their pending state.
+        """
+        pending_writes = _get_pending_writes()
+        if not pending_writes:
+            return {}
+        return {
+            usage_key: pending_writes[(username, usage_key)].state
+            for usage_key in block_keys
+            if (username, usage_key) in pending_writes
+        }
+
+    def _lock_student_modules(self, keys):
+        """
+        Selects for update the :class:`~StudentModule`s of the given
+        `(student_id, usage_key)` pairs, with a query per student and course.
+
+        The rows are locked in the order of their keys, so that concurrent
+        flushes writing the same rows can't lock them in opposite orders.
+
+        Returns:
+            dict mapping `(student_id, usage_key)` pairs to their StudentModule.
+        """
+        by_student_and_course = defaultdict(list)
+        for student_id, usage_key in sorted(keys, key=_lock_order):
+            by_student_and_course[(student_id, usage_key.context_key)].append(usage_key)
+
+        student_modules = {}
+        for (student_id, course_key), usage_keys in sorted(
+            by_student_and_course.items(), key=lambda item: (item[0][0], str(item[0][1]))
+        ):
+            for usage_keys_chunk in chunks(usage_keys, 500):
+                query = StudentModule.objects.select_for_update().filter(
+                    student_id=student_id,
+                    course_id=course_key,
+                    module_state_key__in=usage_keys_chunk,
+                )
+                for student_module in query:
+                    usage_key = student_module.module_state_key.map_into_course(student_module.course_id)
+                    student_modules[(student_id, usage_key)] = student_module
+        return student_modules
+
+    def flush_pending_writes(self, keys=None):
+        """
+        Write the state recorded by write-behind clients in the current request.
+
+        The writes are coalesced per user and block, and written with bulk
+        queries in a single transaction: the existing rows are locked and read,
+        the missing rows are inserted, the changed rows are updated, and their
+        history entries are inserted.  The history entries are committed no
+        later than the state they record, even when they are stored in another
+        database, so a crash can't lose the history of committed state.
+
+        A flush which deadlocks with another transaction is attempted again,
+        unless it runs within an enclosing transaction, which the deadlock
+        rolled back.  If the last attempt fails too, the state is written a row
+        at a time, as it is without write-behind.
+
+        Arguments:
+            keys: The `(student_id, usage_key)` pairs of the writes to flush,
+                or None to flush all pending writes.
+        """
+        pending_writes = _get_pending_writes()
+        if not pending_writes:
+            return
+        writes = {}
+        for pending_key, pending_write in list(pending_writes.items()):
+            key = (pending_write.student_id, pending_key[1])
+            if keys is None or key in keys:
+                writes[key] = pending_writes.pop(pending_key).state
+        if not writes:
+            return
+
+        self._nr_stat_increment('flush_pending_writes', 'calls')
+        self._nr_stat_accumulate('flush_pending_writes', 'blocks', len(writes))
+        evt_time = time()
+
+        csm_database = router.db_for_write(StudentModule)
+        attempts = 1 if _in_transaction(csm_database) else FLUSH_ATTEMPTS
+        for attempt in range(1, attempts + 1):
+            try:
+                self._write_pending(writes)
+            except (OperationalError, IntegrityError):
+                if attempt == attempts:
+                    if attempts == 1:
+                        raise
+                    log.warning(
+                        "flush_pending_writes: writing %d blocks failed %d times, writing them a row at a time",
+                        len(writes), attempts, exc_info=True,
+                    )
+                    self._nr_stat_increment('flush_pending_writes', 'fallbacks')
+                    self._write_pending_by_row(writes)
+                    break
+                log.warning(
+                    "flush_pending_writes: attempt %d of writing %d blocks failed, retrying",
+                    attempt, len(writes), exc_info=True,
+                )
+                self._nr_stat_increment('flush_pending_writes', 'retries')
+            else:
+                break
+
         finish_time = time()
         duration = (finish_time - evt_time) * 1000  # milliseconds
-        self._nr_stat_accumulate('set_many', 'duration', duration)
+        self._nr_stat_accumulate('flush_pending_writes', 'duration', duration)
+
+    def _write_pending_by_row(self, writes):
+        """
+        Writes the pending `writes`, a dict mapping `(student_id, usage_key)`
+        pairs to the state to merge into the stored state, a row at a time.
+        """
+        users = User.objects.in_bulk({student_id for student_id, __ in writes})
+        for (student_id, usage_key), state in sorted(writes.items(), key=lambda item: _lock_order(item[0])):
+            self._set_many_immediately(users[student_id], {usage_key: state})
+
+    def _write_pending(self, writes):
+        """
+        Writes the pending `writes`, a dict mapping `(student_id, usage_key)`
+        pairs to the state to merge into the stored state, in a transaction.
+        """
+        csm_database = router.db_for_write(StudentModule)
+        history_models = _history_models()
+        round_trips = _RoundTripCounter()
+        with ExitStack() as exit_stack:
+            round_trips.install(
+                exit_stack,
+                [csm_database] + [router.db_for_write(history_model) for history_model in history_models],
+            )
+            with transaction.atomic(using=csm_database):
+                student_modules = self._lock_student_modules(writes)
+                rows_locked = len(student_modules)
+
+                missing_keys = sorted((key for key in writes if key not in student_modules), key=_lock_order)
+                if missing_keys:
+                    StudentModule.objects.bulk_create(
+                        [
+                            StudentModule(
+                                student_id=student_id,
+                                course_id=usage_key.context_key,
+                                module_state_key=usage_key,
+                                module_type=usage_key.block_type,
+                                state=json.dumps(writes[(student_id, usage_key)]),
+                            )
+                            for student_id, usage_key in missing_keys
+                        ],
+                        ignore_conflicts=True,
+                    )
+                    # Read the inserted rows back for their ids, along with any
+                    # row inserted concurrently in another transaction.
+                    inserted_modules = self._lock_student_modules(missing_keys)
+                    rows_locked += len(inserted_modules)
+                    student_modules.update(inserted_modules)
+
+                written_modules = []
+                updated_modules = []
+                inserted_keys = set(missing_keys)
+                for key, state in writes.items():
+                    student_module = student_modules[key]
+                    # Rows inserted above already hold the state; the others, including
+                    # rows inserted concurrently, are updated as set_many would.
+                    if key not in inserted_keys or student_module.state != json.dumps(state):
+                        current_state = json.loads(student_module.state) if student_module.state else {}
+                        current_state.update(state)
+                        student_module.state = json.dumps(current_state)
+                        student_module.modified = now()
+                        updated_modules.append(student_module)
+                    written_modules.append(student_module)
+                    self._nr_block_stat_accumulate(
+                        'flush_pending_writes', key[1].block_type, 'size', len(student_module.state)
+                    )
+                if updated_modules:
+                    StudentModule.objects.bulk_update(updated_modules, ['state', 'modified'])
+
+                for history_model in history_models:
+                    history_entries = [
+                        history_model(
+                            student_module=student_module,
+                            version=None,
+                            created=student_module.modified,
+                            state=student_module.state,
+                            grade=student_module.grade,
+                            max_grade=student_module.max_grade,
+                        )
+                        for student_module in written_modules
+                        if student_module.module_type in history_model.HISTORY_SAVING_TYPES
+                    ]
+                    if history_entries:
+                        with transaction.atomic(using=router.db_for_write(history_model)):
+                            history_model.objects.bulk_create(history_entries)
+
+        self._nr_stat_accumulate('flush_pending_writes', 'round_trips', round_trips.count)
+        self._nr_stat_accumulate('flush_pending_writes', 'rows_locked', rows_locked)
 
     def delete_many(self, username, block_keys, scope=Scope.user_state, fields=None):
         """
@@ -323,6 +689,7 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
 
+        self.flush_pending_writes()
         evt_time = time()  # lint-amnesty, pylint: disable=unused-variable
         student_modules = self._get_student_modules(username, block_keys)
         for student_module, _ in student_modules:
@@ -361,6 +728,7 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
 
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
+        self.flush_pending_writes()
         student_modules = list(
             student_module
             for student_module, usage_id
@@ -412,6 +780,7 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
 
+        self.flush_pending_writes()
         results = StudentModule.objects.order_by('id').filter(module_state_key=block_key)
         p = Paginator(results, settings.USER_STATE_BATCH_SIZE)
 
@@ -444,6 +813,7 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
 
+        self.flush_pending_writes()
         results = StudentModule.objects.order_by('id').filter(course_id=course_key)
         if block_type:
             results = results.filter(module_type=block_type)
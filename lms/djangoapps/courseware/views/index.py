@@ -64,7 +64,7 @@ from ..masquerade import check_content_start_date_for_masquerade_user, setup_mas
 from ..model_data import FieldDataCache
 from ..module_render import get_module_for_descriptor, toc_for_course
 from ..permissions import MASQUERADE_AS_STUDENT
-from ..toggles import courseware_legacy_is_visible, courseware_mfe_is_advertised
+from ..toggles import SPARSE_FIELD_DATA_CACHE, courseware_legacy_is_visible, courseware_mfe_is_advertised
 from .views import CourseTabView
 
 log = logging.getLogger("edx.courseware.views.index")
@@ -367,6 +367,7 @@ class CoursewareIndex(View):
             self.course,
             depth=CONTENT_DEPTH,
             read_only=CrawlersConfig.is_crawler(request),
+            sparse=SPARSE_FIELD_DATA_CACHE.is_enabled(),
         )
 
         self.course = get_module_for_descriptor(
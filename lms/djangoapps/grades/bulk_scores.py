@@ -0,0 +1,100 @@
+"""
+Bulk loading of the problem scores of a batch of users in a course.
+"""
+
+
+from collections import defaultdict
+
+from lazy import lazy
+from submissions.models import ScoreSummary
+from submissions.serializers import UnannotatedScoreSerializer
+
+from common.djangoapps.student.models import anonymous_id_for_user, prefetch_anonymous_ids_for_users
+from lms.djangoapps.courseware.model_data import ScoresClient
+
+from .scores import possibly_scored
+
+
+class BulkCourseScores:
+    """
+    The problem scores of a batch of users in a course, as stored in the
+    Courseware Student Module and by the Submissions API.
+
+    Each score storage is queried once for the whole batch, the first time
+    a score from it is requested, instead of once per user, so that computing
+    the grades of the batch doesn't incur per-user score queries.
+    """
+    def __init__(self, course_key, users, scorable_locations):
+        """
+        Arguments:
+            course_key (CourseKey) - The course of the scores.
+            users (list of User) - The users of the batch.
+            scorable_locations (list of UsageKey) - The possibly scored blocks
+                of the collected (user-independent) course structure, which
+                are the superset of those of each user, as returned by
+                get_scorable_locations. They can be shared by all batches.
+        """
+        self.course_key = course_key
+        self.users = users
+        self.scorable_locations = scorable_locations
+
+    def csm_scores(self, user):
+        """
+        Returns the ScoresClient with the CSM scores of the given user.
+        """
+        try:
+            return self._csm_scores_by_user_id[user.id]
+        except KeyError:
+            raise ValueError(f'User {user.id} is not part of this batch of scores.')  # lint-amnesty, pylint: disable=raise-missing-from
+
+    def submissions_scores(self, user):
+        """
+        Returns the Submissions API scores of the given user, in the
+        format returned by submissions.api.get_scores.
+        """
+        return self._submissions_scores_by_anonymous_id.get(anonymous_id_for_user(user, self.course_key), {})
+
+    @lazy
+    def _csm_scores_by_user_id(self):
+        """
+        Returns a dict of user id to ScoresClient, for all users of the batch.
+        """
+        return ScoresClient.create_for_users(
+            self.course_key, [user.id for user in self.users], self.scorable_locations,
+        )
+
+    @lazy
+    def _submissions_scores_by_anonymous_id(self):
+        """
+        Returns a dict of anonymous user id to Submissions API scores, for
+        all users of the batch.
+        """
+        return _bulk_get_submissions_scores(self.course_key, self.users)
+
+
+def get_scorable_locations(collected_block_structure):
+    """
+    Returns the possibly scored blocks of the given collected course structure.
+    """
+    return [block_key for block_key in collected_block_structure if possibly_scored(block_key)]
+
+
+def _bulk_get_submissions_scores(course_key, users):
+    """
+    Returns a dict of anonymous user id to the user's scores in the course,
+    as would be returned by submissions.api.get_scores for each of the given
+    users, using a single query.
+    """
+    prefetch_anonymous_ids_for_users(users, course_key)
+    anonymous_user_ids = [anonymous_id_for_user(user, course_key) for user in users]
+
+    scores = defaultdict(dict)
+    score_summaries = ScoreSummary.objects.filter(
+        student_item__course_id=str(course_key),
+        student_item__student_id__in=anonymous_user_ids,
+    ).select_related('latest', 'latest__submission', 'student_item')
+    for summary in score_summaries:
+        if not summary.latest.is_hidden():
+            student_item = summary.student_item
+            scores[student_item.student_id][student_item.item_id] = UnannotatedScoreSerializer(summary.latest).data
+    return scores
@@ -25,9 +25,20 @@ class CourseGradeBase:
     """
     Base class for Course Grades.
     """
-    def __init__(self, user, course_data, percent=0.0, letter_grade=None, passed=False, force_update_subsections=False):
+    def __init__(
+            self,
+            user,
+            course_data,
+            percent=0.0,
+            letter_grade=None,
+            passed=False,
+            force_update_subsections=False,
+            grader=None,
+    ):
         self.user = user
         self.course_data = course_data
+        # The course grader, when shared by the grades of many users (see get_course_grader).
+        self._grader = grader
 
         self.percent = percent
         self.passed = passed
@@ -163,8 +174,8 @@ class CourseGradeBase:
         """
         Returns the result from the course grader.
         """
-        course = self._prep_course_for_grading(self.course_data.course)
-        return course.grader.grade(
+        grader = self._grader or self.get_course_grader(self.course_data.course)
+        return grader.grade(
             self.graded_subsections_by_format,
             generate_random_scores=settings.GENERATE_PROFILE_SCORES,
         )
@@ -181,6 +192,15 @@ class CourseGradeBase:
         grade_summary['grade'] = self.letter_grade
         return grade_summary
 
+    @classmethod
+    def get_course_grader(cls, course):
+        """
+        Returns the grader of the course, per grading policy.  Building it
+        parses the grading policy, so the grades of many users of the course
+        should share it.
+        """
+        return cls._prep_course_for_grading(course).grader
+
     @classmethod
     def get_subsection_type_graders(cls, course):
         """
@@ -258,9 +278,11 @@ class CourseGrade(CourseGradeBase):
     """
     Course Grade class when grades are updated or read from storage.
     """
-    def __init__(self, user, course_data, *args, **kwargs):
+    def __init__(self, user, course_data, *args, bulk_scores=None, **kwargs):
         super().__init__(user, course_data, *args, **kwargs)
-        self._subsection_grade_factory = SubsectionGradeFactory(user, course_data=course_data)
+        self._subsection_grade_factory = SubsectionGradeFactory(
+            user, course_data=course_data, bulk_scores=bulk_scores,
+        )
 
     def update(self):
         """
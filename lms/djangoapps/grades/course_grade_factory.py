@@ -2,6 +2,7 @@
 Course Grade Factory Class
 """
 from collections import namedtuple
+from itertools import islice
 from logging import getLogger
 
 from openedx.core.djangoapps.signals.signals import (
@@ -10,11 +11,12 @@ from openedx.core.djangoapps.signals.signals import (
     COURSE_GRADE_NOW_PASSED
 )
 
+from .bulk_scores import BulkCourseScores, get_scorable_locations
 from .config import assume_zero_if_absent, should_persist_grades
 from .course_data import CourseData
 from .course_grade import CourseGrade, ZeroCourseGrade
 from .models import PersistentCourseGrade
-from .models_api import prefetch_grade_overrides_and_visible_blocks
+from .models_api import prefetch_course_and_subsection_grades, prefetch_grade_overrides_and_visible_blocks
 
 log = getLogger(__name__)
 
@@ -45,15 +47,7 @@ class CourseGradeFactory:
         or course_key should be provided.
         """
         course_data = CourseData(user, course, collected_block_structure, course_structure, course_key)
-        try:
-            return self._read(user, course_data)
-        except PersistentCourseGrade.DoesNotExist:
-            if assume_zero_if_absent(course_data.course_key):
-                return self._create_zero(user, course_data)
-            elif create_if_needed:
-                return self._update(user, course_data)
-            else:
-                return None
+        return self._read_or_create(user, course_data, create_if_needed)
 
     def update(
             self,
@@ -85,6 +79,7 @@ class CourseGradeFactory:
             collected_block_structure=None,
             course_key=None,
             force_update=False,
+            batch_size=None,
     ):
         """
         Given a course and an iterable of students (User), yield a GradeResult
@@ -94,6 +89,13 @@ class CourseGradeFactory:
 
         If an error occurred, course_grade will be None and err_msg will be an
         exception message. If there was no error, err_msg is an empty string.
+
+        If batch_size is given, the students are graded in batches of that
+        size: the scores (CSM and Submissions API) and persisted grades of all
+        students in a batch are loaded with a single query each, rather than
+        with separate queries for every student, and the course grader and
+        scorable blocks are computed once for all students. Results are still
+        yielded one student at a time, as soon as they are computed.
         """
         # Pre-fetch the collected course_structure (in _iter_grade_result) so:
         # 1. Correctness: the same version of the course is used to
@@ -104,11 +106,49 @@ class CourseGradeFactory:
             user=None, course=course, collected_block_structure=collected_block_structure, course_key=course_key,
         )
         stats_tags = [f'action:{course_data.course_key}']  # lint-amnesty, pylint: disable=unused-variable
+        if batch_size:
+            grader = CourseGrade.get_course_grader(course_data.course)
+            scorable_locations = get_scorable_locations(course_data.collected_structure)
+            users = iter(users)
+            batch = list(islice(users, batch_size))
+            while batch:
+                yield from self._iter_grade_results_for_batch(
+                    batch, course_data, force_update, grader, scorable_locations,
+                )
+                batch = list(islice(users, batch_size))
+        else:
+            for user in users:
+                yield self._iter_grade_result(user, course_data, force_update)
+
+    def _iter_grade_results_for_batch(self, users, course_data, force_update, grader, scorable_locations):
+        """
+        Yields a GradeResult for each of the given users, computed using
+        scores and persisted grades bulk-loaded for all of the users, and
+        the given course grader and scorable blocks shared by all batches.
+        """
+        if not force_update:
+            prefetch_course_and_subsection_grades(course_data.course_key, users)
+        bulk_scores = BulkCourseScores(course_data.course_key, users, scorable_locations)
         for user in users:
-            yield self._iter_grade_result(user, course_data, force_update)
+            yield self._iter_grade_result(user, course_data, force_update, bulk_scores, grader)
 
-    def _iter_grade_result(self, user, course_data, force_update):  # lint-amnesty, pylint: disable=missing-function-docstring
+    def _iter_grade_result(self, user, course_data, force_update, bulk_scores=None, grader=None):  # lint-amnesty, pylint: disable=missing-function-docstring
         try:
+            if bulk_scores is not None:
+                user_course_data = CourseData(
+                    user,
+                    course=course_data.course,
+                    collected_block_structure=course_data.collected_structure,
+                    course_key=course_data.course_key,
+                )
+                if force_update:
+                    course_grade = self._update(
+                        user, user_course_data, force_update_subsections=True, bulk_scores=bulk_scores, grader=grader,
+                    )
+                else:
+                    course_grade = self._read_or_create(user, user_course_data, bulk_scores=bulk_scores, grader=grader)
+                return self.GradeResult(user, course_grade, None)
+
             kwargs = {
                 'user': user,
                 'course': course_data.course,
@@ -132,16 +172,31 @@ class CourseGradeFactory:
             )
             return self.GradeResult(user, None, exc)
 
+    def _read_or_create(self, user, course_data, create_if_needed=True, bulk_scores=None, grader=None):
+        """
+        Returns the stored CourseGrade for the given user, or a ZeroCourseGrade
+        or newly computed CourseGrade if none is stored (see read).
+        """
+        try:
+            return self._read(user, course_data, bulk_scores, grader)
+        except PersistentCourseGrade.DoesNotExist:
+            if assume_zero_if_absent(course_data.course_key):
+                return self._create_zero(user, course_data, grader)
+            elif create_if_needed:
+                return self._update(user, course_data, bulk_scores=bulk_scores, grader=grader)
+            else:
+                return None
+
     @staticmethod
-    def _create_zero(user, course_data):
+    def _create_zero(user, course_data, grader=None):
         """
         Returns a ZeroCourseGrade object for the given user and course.
         """
         log.debug('Grades: CreateZero, %s, User: %s', str(course_data), user.id)
-        return ZeroCourseGrade(user, course_data)
+        return ZeroCourseGrade(user, course_data, grader=grader)
 
     @staticmethod
-    def _read(user, course_data):
+    def _read(user, course_data, bulk_scores=None, grader=None):
         """
         Returns a CourseGrade object based on stored grade information
         for the given user and course.
@@ -157,11 +212,13 @@ class CourseGradeFactory:
             course_data,
             persistent_grade.percent_grade,
             persistent_grade.letter_grade,
-            persistent_grade.letter_grade != ''
+            persistent_grade.letter_grade != '',
+            bulk_scores=bulk_scores,
+            grader=grader,
         )
 
     @staticmethod
-    def _update(user, course_data, force_update_subsections=False):
+    def _update(user, course_data, force_update_subsections=False, bulk_scores=None, grader=None):
         """
         Computes, saves, and returns a CourseGrade object for the
         given user and course.
@@ -176,7 +233,9 @@ class CourseGradeFactory:
         course_grade = CourseGrade(
             user,
             course_data,
-            force_update_subsections=force_update_subsections
+            force_update_subsections=force_update_subsections,
+            bulk_scores=bulk_scores,
+            grader=grader,
         )
         course_grade = course_grade.update()
 
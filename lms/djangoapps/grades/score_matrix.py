@@ -0,0 +1,270 @@
+"""
+NumPy-backed aggregation of the problem scores of many learners into
+subsection and course grade percentages.
+
+This is an optional alternative to building a CourseGrade per learner when
+only the resulting percentages are needed, for instance when grading large
+batches of learners. It is fed the weighted scores of the problems visible
+to each learner, computed from their raw scores without building subsection
+grades, and the overrides of their subsection grades. The scores of a batch
+are laid out as dense (learners x problems) arrays, reduced to subsections,
+patched with the overrides and graded with the course's grading policy as
+array operations.
+
+Floating point additions are done in the same order as the CourseGrade
+path, so the resulting percentages are identical to those of
+CourseGrade.percent.
+"""
+
+
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+
+from xmodule.graders import AssignmentFormatGrader, WeightedSubsectionsGrader
+
+from .course_grade import CourseGradeBase
+from .models import PersistentSubsectionGradeOverride
+from .scores import get_score, possibly_scored
+
+
+def visible_problem_scores(course_structure, submissions_scores, csm_scores):
+    """
+    Returns an OrderedDict of the usage key of each scorable block of the
+    given course structure of a learner to its weighted ProblemScore, as
+    CreateSubsectionGrade computes them.
+
+    Arguments:
+        course_structure (BlockStructure) - The course structure of the
+            learner, containing the blocks visible to them.
+        submissions_scores (dict) - The learner's scores stored by the
+            Submissions API, e.g. from BulkCourseScores.submissions_scores.
+        csm_scores (ScoresClient) - The learner's scores stored in the
+            user state, e.g. from BulkCourseScores.csm_scores.
+    """
+    problem_scores = OrderedDict()
+    for block_key in course_structure.post_order_traversal(filter_func=possibly_scored):
+        block = course_structure[block_key]
+        if getattr(block, 'has_score', False):
+            problem_score = get_score(submissions_scores, csm_scores, None, block)
+            if problem_score:
+                problem_scores[block_key] = problem_score
+    return problem_scores
+
+
+def subsection_grade_overrides(course_key, users):
+    """
+    Returns a list of the overrides of the subsection grades of each of the
+    given users in the course, as dicts of subsection usage key to
+    PersistentSubsectionGradeOverride, loaded with a single query.
+    """
+    overrides_by_user_id = defaultdict(dict)
+    for override in PersistentSubsectionGradeOverride.objects.select_related('grade').filter(
+        grade__course_id=course_key,
+        grade__user_id__in=[user.id for user in users],
+    ):
+        overrides_by_user_id[override.grade.user_id][override.grade.usage_key] = override
+    return [overrides_by_user_id.get(user.id, {}) for user in users]
+
+
+class CourseGradeMatrix:
+    """
+    The layout of the scorable problems of a course, as needed to grade
+    learners from their problem scores.
+
+    The layout is computed once per course structure and can then be used
+    to grade any number of batches of learners.
+    """
+    def __init__(self, course, course_structure):
+        """
+        Arguments:
+            course (CourseBlock) - The course whose grading policy is applied.
+            course_structure (BlockStructure) - A structure of the course,
+                whose scorable blocks are the superset of those of the
+                graded learners, e.g. the collected course structure.
+
+        Raises ValueError if the course's grader isn't composed of
+        assignment format graders, which are the only ones supported.
+        """
+        grader = CourseGradeBase._prep_course_for_grading(course).grader  # pylint: disable=protected-access
+        if not isinstance(grader, WeightedSubsectionsGrader) or not all(
+            isinstance(subgrader, AssignmentFormatGrader) for subgrader, _, _ in grader.subgraders
+        ):
+            raise ValueError(f'Unsupported grader for score matrices: {grader!r}.')
+        self.grader = grader
+
+        # Subsections, in the order in which CourseGrade.graded_subsections_by_format lists them.
+        self.subsections = list(OrderedDict.fromkeys(
+            subsection_key
+            for chapter_key in course_structure.get_children(course_structure.root_block_usage_key)
+            for subsection_key in course_structure.get_children(chapter_key)
+        ))
+        self._subsection_columns = {subsection_key: index for index, subsection_key in enumerate(self.subsections)}
+        self._graded_subsections_by_format = OrderedDict()
+        for index, subsection_key in enumerate(self.subsections):
+            subsection = course_structure[subsection_key]
+            if getattr(subsection, 'graded', False):
+                subsection_format = getattr(subsection, 'format', '')
+                self._graded_subsections_by_format.setdefault(subsection_format, []).append(index)
+
+        # A problem in several subsections has one column per subsection.
+        self.problems = []
+        self._problem_columns = defaultdict(list)
+        subsection_indices = []
+        for index, subsection_key in enumerate(self.subsections):
+            for block_key in course_structure.post_order_traversal(
+                    filter_func=possibly_scored,
+                    start_node=subsection_key,
+            ):
+                if getattr(course_structure[block_key], 'has_score', False):
+                    self._problem_columns[block_key].append(len(self.problems))
+                    self.problems.append(block_key)
+                    subsection_indices.append(index)
+        self._subsection_index = np.array(subsection_indices, dtype=np.intp)
+
+    def subsection_graded_totals(self, problem_scores_by_learner, overrides_by_learner=None):
+        """
+        Returns a tuple of (learners x subsections) arrays of the earned and
+        possible graded totals of each subsection, in the order of
+        self.subsections.
+
+        Arguments:
+            problem_scores_by_learner (list of dict) - For each learner, a
+                dict of the usage key of each problem visible to them to its
+                weighted ProblemScore, as returned by visible_problem_scores.
+            overrides_by_learner (list of dict) - For each learner, a dict of
+                subsection usage key to the override of their grade of the
+                subsection, as returned by subsection_grade_overrides.  The
+                overridden totals replace the totals of the scores, as
+                they do in the subsection grades of CourseGrade.
+        """
+        earned, possible = self._graded_problem_scores(problem_scores_by_learner)
+        shape = (len(problem_scores_by_learner), len(self.subsections))
+        subsection_earned, subsection_possible = np.zeros(shape), np.zeros(shape)
+        # np.add.at adds the problem columns one after the other, in order,
+        # as graders.aggregate_scores does.
+        np.add.at(subsection_earned.T, self._subsection_index, earned.T)
+        np.add.at(subsection_possible.T, self._subsection_index, possible.T)
+        if overrides_by_learner:
+            self._apply_overrides(subsection_earned, subsection_possible, overrides_by_learner)
+        return subsection_earned, subsection_possible
+
+    def percents(self, problem_scores_by_learner, overrides_by_learner=None):
+        """
+        Returns an array of the course grade percentage of each learner,
+        as CourseGrade.percent would be computed from the given scores.
+
+        Arguments:
+            See subsection_graded_totals.
+        """
+        earned, possible = self.subsection_graded_totals(problem_scores_by_learner, overrides_by_learner)
+        subsection_percents = np.zeros(earned.shape)
+        np.divide(earned, possible, out=subsection_percents, where=possible > 0)
+        # Rounds to two decimal places, as scores.compute_percent does.
+        subsection_percents = np.around(subsection_percents, decimals=2)
+        # Only subsections with something to earn make it to the grade sheet.
+        in_grade_sheet = possible > 0
+
+        total_percents = np.zeros(len(problem_scores_by_learner))
+        for subgrader, assignment_type, weight in self.grader.subgraders:
+            columns = self._graded_subsections_by_format.get(assignment_type, [])
+            total_percents += self._assignment_percents(
+                subgrader, subsection_percents[:, columns], in_grade_sheet[:, columns],
+            ) * weight
+        return self._round_percents(total_percents)
+
+    def _graded_problem_scores(self, problem_scores_by_learner):
+        """
+        Returns a tuple of (learners x problems) arrays of the earned and
+        possible scores of the graded problems, in the order of self.problems.
+        """
+        rows, columns, earned_values, possible_values = [], [], [], []
+        for row, problem_scores in enumerate(problem_scores_by_learner):
+            for problem_key, score in problem_scores.items():
+                if score.graded:
+                    for column in self._problem_columns.get(problem_key, ()):
+                        rows.append(row)
+                        columns.append(column)
+                        earned_values.append(score.earned)
+                        possible_values.append(score.possible)
+
+        shape = (len(problem_scores_by_learner), len(self.problems))
+        earned, possible = np.zeros(shape), np.zeros(shape)
+        earned[rows, columns] = earned_values
+        possible[rows, columns] = possible_values
+        return earned, possible
+
+    def _apply_overrides(self, subsection_earned, subsection_possible, overrides_by_learner):
+        """
+        Replaces the graded totals of the overridden subsection grades, as
+        SubsectionGrade._aggregated_score_from_model does.
+        """
+        for totals, field_name in (
+            (subsection_earned, 'earned_graded_override'),
+            (subsection_possible, 'possible_graded_override'),
+        ):
+            rows, columns, values = [], [], []
+            for row, overrides in enumerate(overrides_by_learner):
+                for subsection_key, override in overrides.items():
+                    value = getattr(override, field_name)
+                    column = self._subsection_columns.get(subsection_key)
+                    if value is not None and column is not None:
+                        rows.append(row)
+                        columns.append(column)
+                        values.append(value)
+            totals[rows, columns] = values
+
+    @staticmethod
+    def _assignment_percents(subgrader, percents, in_grade_sheet):
+        """
+        Returns the percentage of each learner for the given assignment
+        format grader, as AssignmentFormatGrader.grade computes it.
+
+        Arguments:
+            subgrader (AssignmentFormatGrader) - The grader of the assignment type.
+            percents (ndarray) - (learners x subsections) percentages of the
+                subsections of the assignment type.
+            in_grade_sheet (ndarray) - (learners x subsections) booleans of
+                whether each subsection is part of each learner's grade sheet.
+        """
+        num_learners, num_subsections = percents.shape
+        min_count = int(float(subgrader.min_count))
+        width = max(min_count, num_subsections)
+        padding = ((0, 0), (0, width - num_subsections))
+        percents = np.pad(percents, padding)
+        in_grade_sheet = np.pad(in_grade_sheet, padding)
+
+        # Each learner's breakdown lists the subsections of their grade sheet
+        # in order, followed by zeros up to min_count.
+        breakdown_order = np.argsort(~in_grade_sheet, axis=1, kind='stable')
+        breakdown = np.take_along_axis(percents, breakdown_order, axis=1)
+        breakdown_lengths = np.maximum(min_count, in_grade_sheet.sum(axis=1))
+        kept = np.arange(width) < breakdown_lengths[:, np.newaxis]
+
+        if subgrader.drop_count > 0 and width:
+            # Drop the last entries of the breakdown stably sorted by descending
+            # percentage, as total_with_drops does; entries past the breakdown
+            # sort first so they are never the ones dropped.
+            ranks = np.argsort(np.where(kept, -breakdown, -np.inf), axis=1, kind='stable')
+            dropped = ranks[:, max(width - subgrader.drop_count, 0):]
+            np.put_along_axis(kept, dropped, False, axis=1)
+
+        totals = np.zeros(num_learners)
+        if width:
+            # cumsum adds the kept entries one after the other, in breakdown order.
+            totals = np.cumsum(np.where(kept, breakdown, 0.0), axis=1)[:, -1]
+        counts = breakdown_lengths - subgrader.drop_count
+        np.divide(totals, counts, out=totals, where=counts > 0)
+        return totals
+
+    @staticmethod
+    def _round_percents(percents):
+        """
+        Returns the given grader percentages rounded as CourseGrade._compute_percent does.
+        """
+        percents = percents * 100 + 0.05
+        return np.where(
+            percents >= 0,
+            np.floor(percents + 0.5),
+            np.ceil(percents - 0.5),
+        ) / 100
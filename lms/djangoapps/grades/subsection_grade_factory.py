@@ -28,9 +28,10 @@ class SubsectionGradeFactory:
     """
     Factory for Subsection Grades.
     """
-    def __init__(self, student, course=None, course_structure=None, course_data=None):
+    def __init__(self, student, course=None, course_structure=None, course_data=None, bulk_scores=None):
         self.student = student
         self.course_data = course_data or CourseData(student, course=course, structure=course_structure)
+        self._bulk_scores = bulk_scores
 
         self._cached_subsection_grades = None
         self._unsaved_subsection_grades = OrderedDict()
@@ -123,6 +124,8 @@ class SubsectionGradeFactory:
         Lazily queries and returns all the scores stored in the user
         state (in CSM) for the course, while caching the result.
         """
+        if self._bulk_scores is not None:
+            return self._bulk_scores.csm_scores(self.student)
         scorable_locations = [block_key for block_key in self.course_data.structure if possibly_scored(block_key)]
         return ScoresClient.create_for_locations(self.course_data.course_key, self.student.id, scorable_locations)
 
@@ -132,6 +135,8 @@ class SubsectionGradeFactory:
         Lazily queries and returns the scores stored by the
         Submissions API for the course, while caching the result.
         """
+        if self._bulk_scores is not None:
+            return self._bulk_scores.submissions_scores(self.student)
         anonymous_user_id = anonymous_id_for_user(self.student, self.course_data.course_key)
         return submissions_api.get_scores(str(self.course_data.course_key), anonymous_user_id)
 
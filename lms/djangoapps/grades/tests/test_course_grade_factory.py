@@ -2,14 +2,19 @@
 Tests for the CourseGradeFactory class.
 """
 import itertools
+import re
 from unittest.mock import patch
 
 import ddt
 from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from edx_toggles.toggles.testutils import override_waffle_switch
 
+from common.djangoapps.student.models import CourseEnrollment
 from common.djangoapps.student.tests.factories import UserFactory
 from lms.djangoapps.courseware.access import has_access
+from lms.djangoapps.courseware.model_data import ScoresClient
 from lms.djangoapps.grades.config.tests.utils import persistent_grades_feature_flags
 from openedx.core.djangoapps.content.block_structure.factory import BlockStructureFactory
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
@@ -23,6 +28,16 @@ from .base import GradeTestBase
 from .utils import mock_get_score
 
 
+def _score_query_counts(queries):
+    """
+    Returns the number of the captured queries reading each score storage.
+    """
+    return {
+        table: sum(1 for query in queries.captured_queries if re.search(fr'FROM [`"]{table}[`"]', query['sql']))
+        for table in ('courseware_studentmodule', 'submissions_scoresummary')
+    }
+
+
 @ddt.ddt
 class TestCourseGradeFactory(GradeTestBase):
     """
@@ -188,6 +203,46 @@ class TestCourseGradeFactory(GradeTestBase):
             ))
         assert mock_update.called == force_update
 
+    @ddt.data(True, False)
+    def test_iter_batched(self, force_update):
+        def _enrolled_users():
+            users = [UserFactory.create() for _ in range(3)]
+            for user in users:
+                CourseEnrollment.enroll(user, self.course.id)
+            return users
+
+        def _percents(users, **kwargs):
+            return [
+                result.course_grade.percent
+                for result in CourseGradeFactory().iter(
+                    users=users, course=self.course, force_update=force_update, **kwargs
+                )
+            ]
+
+        # Neither set of users has persisted grades, so both are graded from their scores.
+        unbatched_users, batched_users = _enrolled_users(), _enrolled_users()
+        with mock_get_score(1, 2):
+            with CaptureQueriesContext(connection) as unbatched_queries:
+                unbatched_percents = _percents(unbatched_users)
+            with patch(
+                'lms.djangoapps.grades.bulk_scores.ScoresClient.create_for_users',
+                wraps=ScoresClient.create_for_users,
+            ) as mock_create_for_users:
+                with patch.object(
+                    CourseGrade, 'get_course_grader', wraps=CourseGrade.get_course_grader,
+                ) as mock_get_course_grader:
+                    with CaptureQueriesContext(connection) as batched_queries:
+                        batched_percents = _percents(batched_users, batch_size=2)
+
+        assert batched_percents == unbatched_percents
+        # The scores of each batch of 2 users are loaded with a query per
+        # score storage, rather than with a query per user.
+        assert mock_create_for_users.call_count == 2
+        assert _score_query_counts(unbatched_queries) == {'courseware_studentmodule': 3, 'submissions_scoresummary': 3}
+        assert _score_query_counts(batched_queries) == {'courseware_studentmodule': 2, 'submissions_scoresummary': 2}
+        # The course grader is built once for all users.
+        assert mock_get_course_grader.call_count == 1
+
     def test_course_grade_summary(self):
         with mock_get_score(1, 2):
             self.subsection_grade_factory.update(self.course_structure[self.sequence.location])
@@ -0,0 +1,193 @@
+"""
+Tests for the CourseGradeMatrix class.
+"""
+
+
+from contextlib import contextmanager
+from unittest.mock import Mock, PropertyMock, patch
+
+import ddt
+import pytest
+
+from common.djangoapps.student.models import CourseEnrollment
+from common.djangoapps.student.tests.factories import UserFactory
+from lms.djangoapps.course_blocks.api import get_course_blocks
+from xmodule.graders import CourseGrader, ProblemScore
+
+from ..course_grade_factory import CourseGradeFactory
+from ..models import PersistentSubsectionGrade, PersistentSubsectionGradeOverride
+from ..score_matrix import CourseGradeMatrix, subsection_grade_overrides, visible_problem_scores
+from .base import GradeTestBase
+
+
+@ddt.ddt
+class TestCourseGradeMatrix(GradeTestBase):
+    """
+    Tests that the percentages computed by CourseGradeMatrix are
+    identical to those of CourseGrade.
+    """
+    # (earned, possible) of problem and problem2, for each learner.
+    LEARNER_SCORES = [
+        ((1, 2), (1, 2)),
+        ((0, 1), (1, 1)),
+        ((2, 2), (0, 2)),
+        ((1, 3), (2, 3)),
+        ((0, 0), (0, 0)),
+        ((2, 3), (0, 0)),
+        ((5, 7), (1, 9)),
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.learners = []
+        for __ in self.LEARNER_SCORES:
+            learner = UserFactory.create()
+            CourseEnrollment.enroll(learner, self.course.id)
+            self.learners.append(learner)
+
+    def _grading_policy(self, min_count, drop_count, weight, passing=0.5):
+        """
+        Returns a grading policy with a single Homework assignment type.
+        """
+        return {
+            "GRADER": [
+                {
+                    "type": "Homework",
+                    "min_count": min_count,
+                    "drop_count": drop_count,
+                    "short_label": "HW",
+                    "weight": weight,
+                },
+                {
+                    "type": "NoCredit",
+                    "min_count": 0,
+                    "drop_count": 0,
+                    "short_label": "NC",
+                    "weight": 0.0,
+                },
+            ],
+            "GRADE_CUTOFFS": {
+                "Pass": passing,
+            },
+        }
+
+    @contextmanager
+    def _mock_scores(self, learner_scores):
+        """
+        Mocks the weighted scores computed for both the CourseGrade and the
+        CourseGradeMatrix paths to the given (earned, possible) of problem
+        and problem2.
+        """
+        problem_score, problem2_score = learner_scores
+        scores = {self.problem.location: problem_score, self.problem2.location: problem2_score}
+
+        def _get_score(submissions_scores, csm_scores, persisted_block, block):  # pylint: disable=unused-argument
+            earned, possible = scores[block.location]
+            return ProblemScore(
+                raw_earned=earned,
+                raw_possible=possible,
+                weighted_earned=earned,
+                weighted_possible=possible,
+                weight=1,
+                graded=True,
+                first_attempted=None,
+            )
+
+        with patch('lms.djangoapps.grades.subsection_grade.get_score', side_effect=_get_score):
+            with patch('lms.djangoapps.grades.score_matrix.get_score', side_effect=_get_score):
+                yield
+
+    def _course_grades(self):
+        """
+        Returns the course grade of each learner, for their LEARNER_SCORES.
+        """
+        course_grades = []
+        for learner, learner_scores in zip(self.learners, self.LEARNER_SCORES):
+            with self._mock_scores(learner_scores):
+                course_grades.append(
+                    CourseGradeFactory().update(learner, self.course, force_update_subsections=True)
+                )
+        return course_grades
+
+    def _visible_problem_scores(self):
+        """
+        Returns the visible problem scores of each learner, for their LEARNER_SCORES.
+        """
+        problem_scores_by_learner = []
+        for learner, learner_scores in zip(self.learners, self.LEARNER_SCORES):
+            with self._mock_scores(learner_scores):
+                problem_scores_by_learner.append(visible_problem_scores(
+                    get_course_blocks(learner, self.course.location), submissions_scores={}, csm_scores={},
+                ))
+        return problem_scores_by_learner
+
+    @ddt.data(
+        (1, 0, 1.0),
+        (2, 0, 1.0),
+        (2, 1, 1.0),
+        (4, 1, 0.75),
+        (1, 2, 1.0),
+        (0, 0, 0.5),
+        (3, 3, 1.0),
+    )
+    @ddt.unpack
+    def test_percents_parity(self, min_count, drop_count, weight):
+        self.course.set_grading_policy(self._grading_policy(min_count, drop_count, weight))
+        self.store.update_item(self.course, 0)
+
+        course_grades = self._course_grades()
+        matrix = CourseGradeMatrix(self.course, self.course_structure)
+        percents = matrix.percents(self._visible_problem_scores())
+        assert list(percents) == [course_grade.percent for course_grade in course_grades]
+
+    @ddt.data(
+        {'earned_graded_override': 3.0},
+        {'earned_graded_override': 0.0, 'possible_graded_override': 4.0},
+        {'possible_graded_override': 0.0},
+    )
+    def test_percents_parity_with_overrides(self, override_data):
+        self.course.set_grading_policy(self._grading_policy(2, 1, 1.0))
+        self.store.update_item(self.course, 0)
+        self._course_grades()
+        for learner in self.learners[::2]:
+            PersistentSubsectionGradeOverride.update_or_create_override(
+                requesting_user=None,
+                subsection_grade_model=PersistentSubsectionGrade.read_grade(learner.id, self.sequence.location),
+                **override_data
+            )
+
+        course_grades = self._course_grades()
+        matrix = CourseGradeMatrix(self.course, self.course_structure)
+        percents = matrix.percents(
+            self._visible_problem_scores(), subsection_grade_overrides(self.course.id, self.learners),
+        )
+        assert list(percents) == [course_grade.percent for course_grade in course_grades]
+
+    def test_visible_problem_scores(self):
+        course_grades = self._course_grades()
+        assert self._visible_problem_scores() == [course_grade.problem_scores for course_grade in course_grades]
+
+    def test_subsection_graded_totals(self):
+        course_grades = self._course_grades()
+        matrix = CourseGradeMatrix(self.course, self.course_structure)
+        earned, possible = matrix.subsection_graded_totals(self._visible_problem_scores())
+        assert matrix.subsections == [self.sequence.location, self.sequence2.location]
+        for row, course_grade in enumerate(course_grades):
+            for column, subsection_key in enumerate(matrix.subsections):
+                graded_total = course_grade.subsection_grades[subsection_key].graded_total
+                assert earned[row, column] == graded_total.earned
+                assert possible[row, column] == graded_total.possible
+
+    def test_missing_problems(self):
+        matrix = CourseGradeMatrix(self.course, self.course_structure)
+        problem_scores = dict(self._visible_problem_scores()[0])
+        del problem_scores[self.problem.location]
+        earned, possible = matrix.subsection_graded_totals([problem_scores])
+        assert list(earned[0]) == [0.0, 1.0]
+        assert list(possible[0]) == [0.0, 2.0]
+
+    def test_unsupported_grader(self):
+        with patch('xmodule.course_module.CourseBlock.grader', new_callable=PropertyMock) as mock_grader:
+            mock_grader.return_value = Mock(spec=CourseGrader)
+            with pytest.raises(ValueError):
+                CourseGradeMatrix(self.course, self.course_structure)
@@ -39,6 +39,7 @@ class GradesTransformer(BlockStructureTransformer):
     """
     WRITE_VERSION = 4
     READ_VERSION = 4
+    SUPPORTS_PARTIAL_COLLECT = True
     FIELDS_TO_COLLECT = [
         'due',
         'format',
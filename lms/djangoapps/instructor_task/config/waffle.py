@@ -23,6 +23,21 @@ GENERATE_PROBLEM_GRADE_REPORT_VERIFIED_ONLY = 'generate_problem_grade_report_ver
 # TODO: Replace with WaffleFlag(). See waffle_flags() docstring.
 GENERATE_COURSE_GRADE_REPORT_VERIFIED_ONLY = 'generate_course_grade_report_verified_only'
 
+# .. toggle_name: instructor_task.parallel_grade_reports
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: When enabled, course and problem grade reports are generated by subtasks that each grade
+#   a range of user ids in parallel, and whose partial reports are merged by a final subtask, instead of by a single
+#   task.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2026-10-16
+# .. toggle_target_removal_date: 2027-04-16
+PARALLEL_GRADE_REPORTS = CourseWaffleFlag(
+    waffle_namespace=INSTRUCTOR_TASK_WAFFLE_FLAG_NAMESPACE,
+    flag_name='parallel_grade_reports',
+    module_name=__name__,
+)
+
 
 def waffle_flags():
     """
@@ -68,3 +83,11 @@ def course_grade_report_verified_only(course_id):
     False otherwise.
     """
     return waffle_flags()[GENERATE_COURSE_GRADE_REPORT_VERIFIED_ONLY].is_enabled(course_id)
+
+
+def parallel_grade_reports_enabled(course_id):
+    """
+    Returns True if grade reports of the given course should be
+    generated by parallel subtasks, False otherwise.
+    """
+    return PARALLEL_GRADE_REPORTS.is_enabled(course_id)
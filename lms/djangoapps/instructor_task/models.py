@@ -22,7 +22,7 @@ from uuid import uuid4
 from boto.exception import BotoServerError
 from django.conf import settings
 from django.contrib.auth.models import User  # lint-amnesty, pylint: disable=imported-auth-user
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
 from django.db import models, transaction
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.translation import ugettext as _
@@ -293,6 +293,37 @@ class DjangoStorageReportStore(ReportStore):
         output_buffer.seek(0)
         self.store(course_id, filename, output_buffer)
 
+    def store_file(self, course_id, filename, file_obj):
+        """
+        Store the binary contents of the file-like object `file_obj`, read
+        from the beginning, in a directory determined by hashing `course_id`,
+        and name the file `filename`.
+
+        Unlike `store`, the contents aren't read into memory at once, so
+        storage backends can upload large files in parts.
+        """
+        path = self.path_to(course_id, filename)
+        file_obj.seek(0)
+        self.storage.save(path, File(file_obj))
+
+    def open(self, course_id, filename):
+        """
+        Return a binary file object of the stored file `filename` of `course_id`.
+        """
+        return self.storage.open(self.path_to(course_id, filename), 'rb')
+
+    def exists(self, course_id, filename):
+        """
+        Return whether the file `filename` of `course_id` is stored.
+        """
+        return self.storage.exists(self.path_to(course_id, filename))
+
+    def delete(self, course_id, filename):
+        """
+        Delete the stored file `filename` of `course_id`, if it exists.
+        """
+        self.storage.delete(self.path_to(course_id, filename))
+
     def links_for(self, course_id):
         """
         For a given `course_id`, return a list of `(filename, url)` tuples.
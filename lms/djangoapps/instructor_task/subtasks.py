@@ -280,6 +280,7 @@ def queue_subtasks_for_query(
     item_fields,
     items_per_task,
     total_num_items,
+    reduce_subtask_id=None,
 ):
     """
     Generates and queues subtasks to each execute a chunk of "items" generated by a queryset.
@@ -295,6 +296,10 @@ def queue_subtasks_for_query(
             These are in addition to the 'pk' field.
         `items_per_task` : maximum size of chunks to break each query chunk into for use by a subtask.
         `total_num_items` : total amount of items that will be put into subtasks
+        `reduce_subtask_id` : optional id of a subtask that combines the results of the other
+            subtasks.  It is tracked like the other subtasks, so that the InstructorTask only
+            succeeds once it has completed, but it is not queued here: it should be queued once
+            `is_ready_to_reduce` returns True, e.g. by the last of the other subtasks to complete.
 
     Returns:  the task progress as stored in the InstructorTask object.
 
@@ -304,6 +309,7 @@ def queue_subtasks_for_query(
     # Calculate the number of tasks that will be created, and create a list of ids for each task.
     total_num_subtasks = _get_number_of_subtasks(total_num_items, items_per_task)
     subtask_id_list = [str(uuid4()) for _ in range(total_num_subtasks)]
+    tracked_subtask_id_list = subtask_id_list + ([reduce_subtask_id] if reduce_subtask_id else [])
 
     # Update the InstructorTask  with information about the subtasks we've defined.
     TASK_LOG.info(
@@ -315,7 +321,7 @@ def queue_subtasks_for_query(
     )
     # Make sure this is committed to database before handing off subtasks to celery.
     with outer_atomic():
-        progress = initialize_subtask_info(entry, action_name, total_num_items, subtask_id_list)
+        progress = initialize_subtask_info(entry, action_name, total_num_items, tracked_subtask_id_list)
 
     # Construct a generator that will return the recipients to use for each subtask.
     # Pass in the desired fields to fetch for each recipient.
@@ -353,6 +359,17 @@ def queue_subtasks_for_query(
     return progress
 
 
+def is_ready_to_reduce(entry_id):
+    """
+    Returns whether all subtasks of the InstructorTask, other than the subtask
+    passed as `reduce_subtask_id` to `queue_subtasks_for_query`, have completed.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    subtask_dict = json.loads(entry.subtasks)
+    num_remaining = subtask_dict['total'] - subtask_dict['succeeded'] - subtask_dict['failed']
+    return num_remaining == 1
+
+
 def _acquire_subtask_lock(task_id):
     """
     Mark the specified task_id as being in progress.
@@ -21,17 +21,33 @@ of the query for traversing StudentModule objects.
 """
 
 import logging
+import traceback
 from functools import partial
 
 from celery import shared_task
+from celery.states import FAILURE
 from django.utils.translation import ugettext_noop
 from edx_django_utils.monitoring import set_code_owner_attribute
 
 from lms.djangoapps.bulk_email.tasks import perform_delegate_email_batches
+from lms.djangoapps.instructor_task.models import InstructorTask
 from lms.djangoapps.instructor_task.tasks_base import BaseInstructorTask
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
 from lms.djangoapps.instructor_task.tasks_helper.enrollments import upload_may_enroll_csv, upload_students_csv
-from lms.djangoapps.instructor_task.tasks_helper.grades import CourseGradeReport, ProblemGradeReport, ProblemResponses
+from lms.djangoapps.instructor_task.subtasks import (
+    SubtaskStatus,
+    check_subtask_is_valid,
+    is_ready_to_reduce,
+    update_subtask_status
+)
+from lms.djangoapps.instructor_task.tasks_helper.grades import (
+    GRADE_REPORTS,
+    CourseGradeReport,
+    ProblemGradeReport,
+    ProblemResponses,
+    upload_merged_grade_report,
+    write_grade_report_part
+)
 from lms.djangoapps.instructor_task.tasks_helper.misc import (
     cohort_students_and_upload,
     upload_course_survey_report,
@@ -215,6 +231,86 @@ def calculate_problem_grade_report(entry_id, xmodule_instance_args):
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@shared_task
+@set_code_owner_attribute
+def generate_grade_report_part(
+    entry_id, xmodule_instance_args, report_name, part_index, user_id_range, subtask_status_dict, merge_subtask_id,
+):
+    """
+    Writes a part of a grade report generated by parallel subtasks.
+
+    Inputs are:
+      * `entry_id`: id of the InstructorTask object to which progress should be recorded.
+      * `xmodule_instance_args`: the xmodule instance args of the InstructorTask.
+      * `report_name`: name of the grade report class, e.g. 'CourseGradeReport'.
+      * `part_index`: index of the part of the report written by this subtask.
+      * `user_id_range`: inclusive (min, max) range of the ids of the users of the part.
+      * `subtask_status_dict`: dict containing values representing current status, as
+        described in send_course_email.
+      * `merge_subtask_id`: id of the subtask merging the parts into the report, which
+        is queued once all parts have been written.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    TASK_LOG.info(
+        "Grade report part %s of instructor task %s: writing users %s as subtask %s",
+        part_index, entry_id, user_id_range, current_task_id,
+    )
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+    try:
+        subtask_status = write_grade_report_part(
+            GRADE_REPORTS[report_name], entry_id, xmodule_instance_args, part_index, user_id_range, subtask_status,
+        )
+    except Exception:
+        TASK_LOG.exception(
+            "Grade report part %s of instructor task %s: failed unexpectedly!", part_index, entry_id,
+        )
+        subtask_status.increment(state=FAILURE)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        raise
+    else:
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+    finally:
+        # The last part to complete queues the merge, even if it failed, so that
+        # the parts which were written are reported.  Should several parts see
+        # themselves as the last one, the duplicate merges are rejected by
+        # check_subtask_is_valid.
+        if is_ready_to_reduce(entry_id):
+            merge_grade_report_parts.apply_async(
+                (entry_id, xmodule_instance_args, report_name, SubtaskStatus.create(merge_subtask_id).to_dict()),
+                task_id=merge_subtask_id,
+            )
+    return subtask_status.to_dict()
+
+
+@shared_task
+@set_code_owner_attribute
+def merge_grade_report_parts(entry_id, xmodule_instance_args, report_name, subtask_status_dict):
+    """
+    Merges the parts written by generate_grade_report_part into the grade report.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+    try:
+        subtask_status = upload_merged_grade_report(
+            GRADE_REPORTS[report_name], entry_id, xmodule_instance_args, subtask_status,
+        )
+    except Exception as exc:
+        TASK_LOG.exception("Merging grade report parts of instructor task %s: failed unexpectedly!", entry_id)
+        subtask_status.increment(state=FAILURE)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        # No report was uploaded, so the InstructorTask fails rather than
+        # succeeding along with its last subtask.
+        InstructorTask.objects.filter(pk=entry_id).update(
+            task_state=FAILURE,
+            task_output=InstructorTask.create_output_for_failure(exc, traceback.format_exc()),
+        )
+        raise
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    return subtask_status.to_dict()
+
+
 @shared_task(base=BaseInstructorTask)
 @set_code_owner_attribute
 def calculate_students_features_csv(entry_id, xmodule_instance_args):
@@ -2,13 +2,16 @@
 Functionality for generating grade reports.
 """
 
+import json
 import logging
 import re
 from collections import OrderedDict, defaultdict
 from datetime import datetime
 from itertools import chain
 from time import time
+from uuid import uuid4
 
+from celery.states import SUCCESS
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from lazy import lazy
@@ -19,20 +22,25 @@ from six.moves import zip_longest
 from common.djangoapps.course_modes.models import CourseMode
 from common.djangoapps.student.models import CourseEnrollment
 from common.djangoapps.student.roles import BulkRoleCache
-from lms.djangoapps.certificates import api as certs_api
-from lms.djangoapps.certificates.models import GeneratedCertificate, certificate_info_for_user
+from lms.djangoapps.certificates.models import (
+    CertificateWhitelist,
+    GeneratedCertificate,
+    certificate_info_for_user
+)
 from lms.djangoapps.course_blocks.api import get_course_blocks
 from lms.djangoapps.courseware.user_state_client import DjangoXBlockUserStateClient
 from lms.djangoapps.grades.api import CourseGradeFactory
 from lms.djangoapps.grades.api import context as grades_context
-from lms.djangoapps.grades.api import prefetch_course_and_subsection_grades
 from lms.djangoapps.instructor_analytics.basic import list_problem_responses
 from lms.djangoapps.instructor_analytics.csvs import format_dictlist
 from lms.djangoapps.instructor_task.config.waffle import (
     course_grade_report_verified_only,
     optimize_get_learners_switch_enabled,
+    parallel_grade_reports_enabled,
     problem_grade_report_verified_only
 )
+from lms.djangoapps.instructor_task.models import InstructorTask
+from lms.djangoapps.instructor_task.subtasks import queue_subtasks_for_query
 from lms.djangoapps.teams.models import CourseTeamMembership
 from lms.djangoapps.verify_student.services import IDVerificationService
 from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
@@ -45,7 +53,7 @@ from xmodule.partitions.partitions_service import PartitionService
 from xmodule.split_test_module import get_split_user_partitions
 
 from .runner import TaskProgress
-from .utils import upload_csv_to_report_store
+from .utils import CsvReportPartsWriter, MissingReportPartsError, upload_csv_to_report_store
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
@@ -73,6 +81,8 @@ class GradeReportBase:
     """
     Base class for grade reports (ProblemGradeReport and CourseGradeReport).
     """
+    # Batch size for chunking the list of enrollees in the course.
+    USER_BATCH_SIZE = 100
 
     def _get_enrolled_learner_count(self, context):
         """
@@ -123,7 +133,7 @@ class GradeReportBase:
         """
         Returns a generator of batches of users.
         """
-        def grouper(iterable, chunk_size=100, fillvalue=None):
+        def grouper(iterable, chunk_size=self.USER_BATCH_SIZE, fillvalue=None):
             args = [iter(iterable)] * chunk_size
             return zip_longest(*args, fillvalue=fillvalue)
 
@@ -217,6 +227,7 @@ class _CourseGradeReportContext:
             course_id=course_id,
             task_input=_task_input,
         )
+        self.entry_id = _entry_id
         self.action_name = action_name
         self.course_id = course_id
         self.task_progress = TaskProgress(self.action_name, total=None, start_time=time())
@@ -359,8 +370,13 @@ class _ProblemGradeReportContext:
 
 class _CertificateBulkContext:
     def __init__(self, context, users):
-        certificate_allowlist = certs_api.get_allowlist(context.course_id)
-        self.allowlisted_user_ids = [entry['user_id'] for entry in certificate_allowlist]
+        # Only fetch the allowlist entries of the given users, since the
+        # course's whole allowlist grows with the course.
+        self.allowlisted_user_ids = set(
+            CertificateWhitelist.objects.filter(
+                course_id=context.course_id, whitelist=True, user__in=users,
+            ).values_list('user_id', flat=True)
+        )
         self.certificates_by_user = {
             certificate.user.id: certificate
             for certificate in
@@ -394,7 +410,6 @@ class _CourseGradeBulkContext:  # lint-amnesty, pylint: disable=missing-class-do
         self.enrollments = _EnrollmentBulkContext(context, users)
         bulk_cache_cohorts(context.course_id, users)
         BulkRoleCache.prefetch(users)
-        prefetch_course_and_subsection_grades(context.course_id, users)
         BulkCourseTags.prefetch(context.course_id, users)
 
 
@@ -404,12 +419,20 @@ class CourseGradeReport:
     """
     # Batch size for chunking the list of enrollees in the course.
     USER_BATCH_SIZE = 100
+    CONTEXT_CLASS = _CourseGradeReportContext
+    CSV_NAME = 'grade_report'
 
     @classmethod
     def generate(cls, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
         """
         Public method to generate a grade report.
         """
+        if _entry_id is not None and parallel_grade_reports_enabled(course_id):
+            progress = queue_grade_report_subtasks(
+                cls, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name,
+            )
+            if progress is not None:
+                return progress
         with modulestore().bulk_operations(course_id):
             context = _CourseGradeReportContext(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
             return CourseGradeReport()._generate(context)  # lint-amnesty, pylint: disable=protected-access
@@ -417,17 +440,42 @@ class CourseGradeReport:
     def _generate(self, context):
         """
         Internal method for generating a grade report for the given context.
+
+        The rows of each batch of users are stored in the report store as
+        soon as they are produced, and the task's progress is checkpointed
+        after each batch, so that a retried task resumes after the last
+        completed batch instead of restarting.
         """
         context.update_status('Starting grades')
         success_headers = self._success_headers(context)
         error_headers = self._error_headers()
-        batched_rows = self._batched_rows(context)
+        checkpoint = self._read_checkpoint(context)
+        parts_key = context.entry_id if context.entry_id is not None else uuid4().hex
+        success_writer = CsvReportPartsWriter(
+            context.course_id, _report_parts_name(self.CSV_NAME, parts_key), checkpoint.get('parts', 0),
+        )
+        error_writer = CsvReportPartsWriter(
+            context.course_id, _report_parts_name(f'{self.CSV_NAME}_err', parts_key), checkpoint.get('parts', 0),
+        )
+        if checkpoint:
+            context.task_progress.succeeded = checkpoint['succeeded']
+            context.task_progress.failed = checkpoint['failed']
+            TASK_LOG.info(
+                '%s, Task type: %s, Resuming grades after user %s',
+                context.task_info_string, context.action_name, checkpoint['last_user_id'],
+            )
 
         context.update_status('Compiling grades')
-        success_rows, error_rows = self._compile(context, batched_rows)
+        for last_user_id, success_rows, error_rows in self._batched_rows(context, checkpoint.get('last_user_id')):
+            success_writer.write_rows(success_rows)
+            success_writer.end_part()
+            error_writer.write_rows(error_rows)
+            error_writer.end_part()
+            self._update_progress(context, len(success_rows), len(error_rows))
+            self._write_checkpoint(context, last_user_id, success_writer.num_parts)
 
         context.update_status('Uploading grades')
-        self._upload(context, success_headers, success_rows, error_headers, error_rows)
+        self._upload(context, success_headers, success_writer, error_headers, error_writer)
 
         return context.update_status('Completed grades')
 
@@ -452,40 +500,65 @@ class CourseGradeReport:
         """
         return ["Student ID", "Username", "Error"]
 
-    def _batched_rows(self, context):
+    def _batched_rows(self, context, after_user_id=None):
         """
-        A generator of batches of (success_rows, error_rows) for this report.
+        A generator of batches of (last_user_id, success_rows, error_rows)
+        for this report, for the users after the given user id.
         """
-        for users in self._batch_users(context):
+        for users in self._batch_users(context, after_user_id):
             users = [u for u in users if u is not None]
-            yield self._rows_for_users(context, users)
+            yield (max(user.id for user in users),) + self._rows_for_users(context, users)
 
-    def _compile(self, context, batched_rows):
+    def _update_progress(self, context, num_succeeded, num_failed):
         """
-        Compiles and returns the complete list of (success_rows, error_rows) for
-        the given batched_rows and context.
+        Updates the metrics on task status with the results of a batch of users.
         """
-        # partition and chain successes and errors
-        success_rows, error_rows = zip(*batched_rows)
-        success_rows = list(chain(*success_rows))
-        error_rows = list(chain(*error_rows))
-
-        # update metrics on task status
-        context.task_progress.succeeded = len(success_rows)
-        context.task_progress.failed = len(error_rows)
+        context.task_progress.succeeded += num_succeeded
+        context.task_progress.failed += num_failed
         context.task_progress.attempted = context.task_progress.succeeded + context.task_progress.failed
         context.task_progress.total = context.task_progress.attempted
-        return success_rows, error_rows
 
-    def _upload(self, context, success_headers, success_rows, error_headers, error_rows):
+    def _read_checkpoint(self, context):
         """
-        Creates and uploads a CSV for the given headers and rows.
+        Returns the checkpoint stored in the task's output by a previous
+        attempt of this task, or an empty dict.
+        """
+        if context.entry_id is None:
+            return {}
+        task_output = InstructorTask.objects.get(pk=context.entry_id).task_output
+        try:
+            return json.loads(task_output).get('checkpoint', {})
+        except (TypeError, ValueError, AttributeError):
+            return {}
+
+    def _write_checkpoint(self, context, last_user_id, num_parts):
+        """
+        Stores the task's progress, along with the last user whose rows are
+        stored, in the task's output.
+        """
+        if context.entry_id is None:
+            return
+        task_output = context.task_progress.state
+        task_output['checkpoint'] = {
+            'last_user_id': last_user_id,
+            'parts': num_parts,
+            'succeeded': context.task_progress.succeeded,
+            'failed': context.task_progress.failed,
+        }
+        InstructorTask.objects.filter(pk=context.entry_id).update(
+            task_output=InstructorTask.create_output_for_success(task_output),
+        )
+
+    def _upload(self, context, success_headers, success_writer, error_headers, error_writer):
+        """
+        Creates and uploads a CSV for the given headers and written rows.
         """
         date = datetime.now(UTC)
-        upload_csv_to_report_store([success_headers] + success_rows, 'grade_report', context.course_id, date)
-        if len(error_rows) > 0:
-            error_rows = [error_headers] + error_rows
-            upload_csv_to_report_store(error_rows, 'grade_report_err', context.course_id, date)
+        success_writer.upload(success_headers, self.CSV_NAME, date)
+        if context.task_progress.failed > 0:
+            error_writer.upload(error_headers, f'{self.CSV_NAME}_err', date)
+        else:
+            error_writer.delete_parts()
 
     def _grades_header(self, context):
         """
@@ -499,9 +572,10 @@ class CourseGradeReport:
             grades_header.append(assignment_info['average_header'])
         return grades_header
 
-    def _batch_users(self, context):
+    def _batch_users(self, context, after_user_id=None):
         """
-        Returns a generator of batches of users.
+        Returns a generator of batches of users, in the order of their ids,
+        starting after the given user id.
         """
 
         def grouper(iterable, chunk_size=self.USER_BATCH_SIZE, fillvalue=None):
@@ -534,7 +608,9 @@ class CourseGradeReport:
                 include_inactive=True,
                 verified_only=verified_only,
             )
-            users = users.select_related('profile')
+            if after_user_id is not None:
+                users = users.filter(id__gt=after_user_id)
+            users = users.select_related('profile').order_by('id')
             return grouper(users)
 
         def users_for_course_v2(course_id, verified_only=False):
@@ -550,6 +626,8 @@ class CourseGradeReport:
                 filter_kwargs['courseenrollment__mode'] = CourseMode.VERIFIED
 
             user_ids_list = get_user_model().objects.filter(**filter_kwargs).values_list('id', flat=True).order_by('id')
+            if after_user_id is not None:
+                user_ids_list = user_ids_list.filter(id__gt=after_user_id)
             user_chunks = grouper(user_ids_list)
             for user_ids in user_chunks:
                 user_ids = [user_id for user_id in user_ids if user_id is not None]
@@ -559,7 +637,7 @@ class CourseGradeReport:
                     id__gte=min_id,
                     id__lte=max_id,
                     **filter_kwargs
-                ).select_related('profile')
+                ).select_related('profile').order_by('id')
                 yield users
         course_id = context.course_id
         task_log_message = f'{context.task_info_string}, Task type: {context.action_name}'
@@ -685,6 +763,7 @@ class CourseGradeReport:
                 course=context.course,
                 collected_block_structure=context.course_structure,
                 course_key=context.course_id,
+                batch_size=self.USER_BATCH_SIZE,
             ):
                 if not course_grade:
                     # An empty gradeset means we failed to grade a student.
@@ -707,12 +786,20 @@ class ProblemGradeReport(GradeReportBase):
     """
     Class to encapsulate functionality related to generating Problem Grade Reports.
     """
+    CONTEXT_CLASS = _ProblemGradeReportContext
+    CSV_NAME = 'problem_grade_report'
 
     @classmethod
     def generate(cls, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
         """
         Public method to generate a grade report.
         """
+        if _entry_id is not None and parallel_grade_reports_enabled(course_id):
+            progress = queue_grade_report_subtasks(
+                cls, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name,
+            )
+            if progress is not None:
+                return progress
         with modulestore().bulk_operations(course_id):
             context = _ProblemGradeReportContext(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
             # pylint: disable=protected-access
@@ -768,6 +855,7 @@ class ProblemGradeReport(GradeReportBase):
             course=context.course,
             collected_block_structure=context.course_structure,
             course_key=context.course_id,
+            batch_size=self.USER_BATCH_SIZE,
         ):
             context.task_progress.attempted += 1
             if not course_grade:
@@ -815,6 +903,180 @@ class ProblemGradeReport(GradeReportBase):
             get_cache(CourseEnrollment.MODE_CACHE_NAMESPACE).clear()
 
 
+# Grade reports that can be generated by parallel subtasks, by name.
+GRADE_REPORTS = {report_class.__name__: report_class for report_class in (CourseGradeReport, ProblemGradeReport)}
+
+
+def queue_grade_report_subtasks(report_class, xmodule_instance_args, entry_id, course_id, task_input, action_name):
+    """
+    Queues the subtasks generating the given grade report for the given
+    InstructorTask, and returns the task's progress.
+
+    Each subtask writes the rows of a range of user ids as a part of the
+    report in the report store. Once all of them have completed, a final
+    subtask merges the parts into the report.
+
+    Returns None if no users are enrolled in the course, in which case the
+    report should be generated directly.
+    """
+    # Imported here to avoid a circular import, since the tasks generate grade reports.
+    from lms.djangoapps.instructor_task.tasks import generate_grade_report_part  # pylint: disable=import-outside-toplevel
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    if len(entry.subtasks) > 0:
+        # The task was requeued after its subtasks were queued.
+        TASK_LOG.warning('Task %s: subtasks of grade report already queued: %s', entry.task_id, entry)
+        return json.loads(entry.task_output)
+
+    context = report_class.CONTEXT_CLASS(xmodule_instance_args, entry_id, course_id, task_input, action_name)
+    users = _enrolled_users(course_id, verified_only=context.report_for_verified_only)
+    total_num_users = users.count()
+    if total_num_users == 0:
+        return None
+
+    merge_subtask_id = str(uuid4())
+    part_indices = iter(range(total_num_users))
+
+    def _create_part_subtask(user_list, initial_subtask_status):
+        """
+        Creates a subtask writing the part of the report of the users
+        whose ids are in the range of the given user list.
+        """
+        return generate_grade_report_part.subtask(
+            (
+                entry_id,
+                xmodule_instance_args,
+                report_class.__name__,
+                next(part_indices),
+                (user_list[0]['pk'], user_list[-1]['pk']),
+                initial_subtask_status.to_dict(),
+                merge_subtask_id,
+            ),
+            task_id=initial_subtask_status.task_id,
+        )
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_part_subtask,
+        [users],
+        [],
+        settings.GRADE_REPORT_USERS_PER_TASK,
+        total_num_users,
+        reduce_subtask_id=merge_subtask_id,
+    )
+
+
+def write_grade_report_part(report_class, entry_id, xmodule_instance_args, part_index, user_id_range, subtask_status):
+    """
+    Writes the rows of the enrolled users whose ids are in the given
+    (inclusive) range as the part of the given index of the grade report of
+    the given InstructorTask, and returns the updated subtask status.
+    """
+    context = _grade_report_subtask_context(report_class, entry_id, xmodule_instance_args)
+    report = report_class()
+    success_writer = CsvReportPartsWriter(
+        context.course_id, _report_parts_name(report_class.CSV_NAME, entry_id), part_index,
+    )
+    error_writer = CsvReportPartsWriter(
+        context.course_id, _report_parts_name(f'{report_class.CSV_NAME}_err', entry_id), part_index,
+    )
+    min_user_id, max_user_id = user_id_range
+    user_ids = list(
+        _enrolled_users(context.course_id, verified_only=context.report_for_verified_only).filter(
+            id__gte=min_user_id, id__lte=max_user_id,
+        ).values_list('id', flat=True)
+    )
+    with modulestore().bulk_operations(context.course_id):
+        for start in range(0, len(user_ids), report_class.USER_BATCH_SIZE):
+            users = list(
+                get_user_model().objects.filter(
+                    id__in=user_ids[start:start + report_class.USER_BATCH_SIZE],
+                ).select_related('profile').order_by('id')
+            )
+            success_rows, error_rows = report._rows_for_users(context, users)  # pylint: disable=protected-access
+            success_writer.write_rows(success_rows)
+            error_writer.write_rows(error_rows)
+            subtask_status.increment(succeeded=len(success_rows), failed=len(error_rows))
+            # Clear the CourseEnrollment caches after each batch of users has been processed
+            get_cache('get_enrollment').clear()
+            get_cache(CourseEnrollment.MODE_CACHE_NAMESPACE).clear()
+    success_writer.end_part()
+    error_writer.end_part()
+    subtask_status.increment(state=SUCCESS)
+    return subtask_status
+
+
+def upload_merged_grade_report(report_class, entry_id, xmodule_instance_args, subtask_status):
+    """
+    Merges the parts written by the subtasks of the grade report of the
+    given InstructorTask into the report, and returns the updated subtask
+    status.
+    """
+    context = _grade_report_subtask_context(report_class, entry_id, xmodule_instance_args)
+    report = report_class()
+    entry = InstructorTask.objects.get(pk=entry_id)
+    # All subtasks but this one wrote a part.
+    num_parts = json.loads(entry.subtasks)['total'] - 1
+    num_failed = json.loads(entry.task_output)['failed']
+
+    success_writer = CsvReportPartsWriter(
+        context.course_id, _report_parts_name(report_class.CSV_NAME, entry_id), num_parts,
+    )
+    error_writer = CsvReportPartsWriter(
+        context.course_id, _report_parts_name(f'{report_class.CSV_NAME}_err', entry_id), num_parts,
+    )
+    missing_parts = success_writer.missing_parts() + error_writer.missing_parts()
+    if missing_parts:
+        # A subtask failed: neither report is uploaded, as both would be incomplete.
+        success_writer.delete_parts()
+        error_writer.delete_parts()
+        raise MissingReportPartsError(
+            f'Grade report parts {missing_parts} of instructor task {entry_id} are missing'
+        )
+
+    date = datetime.now(UTC)
+    success_writer.upload(report._success_headers(context), report_class.CSV_NAME, date)  # pylint: disable=protected-access
+    if num_failed > 0:
+        error_writer.upload(report._error_headers(), f'{report_class.CSV_NAME}_err', date)  # pylint: disable=protected-access
+    else:
+        error_writer.delete_parts()
+    subtask_status.increment(state=SUCCESS)
+    return subtask_status
+
+
+def _grade_report_subtask_context(report_class, entry_id, xmodule_instance_args):
+    """
+    Returns the context of the given grade report, for a subtask of the given InstructorTask.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    action_name = json.loads(entry.task_output)['action_name']
+    return report_class.CONTEXT_CLASS(
+        xmodule_instance_args, entry_id, entry.course_id, json.loads(entry.task_input), action_name,
+    )
+
+
+def _enrolled_users(course_id, verified_only=False):
+    """
+    Returns a queryset of the users enrolled in the given course, including
+    inactive enrollments, ordered by id.
+    """
+    filter_kwargs = {
+        'courseenrollment__course_id': course_id,
+    }
+    if verified_only:
+        filter_kwargs['courseenrollment__mode'] = CourseMode.VERIFIED
+    return get_user_model().objects.filter(**filter_kwargs).order_by('id')
+
+
+def _report_parts_name(csv_name, key):
+    """
+    Returns the name of the directory of the parts of the CSV report
+    `csv_name` identified by the given key.
+    """
+    return f'{csv_name}_parts_{key}'
+
+
 class ProblemResponses:
     """
     Class to encapsulate functionality related to generating Problem Responses Reports.
@@ -3,11 +3,19 @@ Utility methods for instructor tasks
 """
 
 
+import csv
+import io
+import logging
+import shutil
+from tempfile import SpooledTemporaryFile
+
 from eventtracking import tracker
 
 from common.djangoapps.util.file import course_filename_prefix_generator
 from lms.djangoapps.instructor_task.models import ReportStore
 
+TASK_LOG = logging.getLogger('edx.celery.task')
+
 REPORT_REQUESTED_EVENT_NAME = 'edx.instructor.report.requested'
 
 # define value to use when no task_id is provided:
@@ -37,11 +45,7 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name
         report_name: string - Name of the generated report
     """
     report_store = ReportStore.from_config(config_name)
-    report_name = "{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
-        course_prefix=course_filename_prefix_generator(course_id),
-        csv_name=csv_name,
-        timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
-    )
+    report_name = _report_name(csv_name, course_id, timestamp)
 
     report_store.store_rows(course_id, report_name, rows)
     tracker_emit(csv_name)
@@ -65,6 +69,125 @@ def upload_zip_to_report_store(file, zip_name, course_id, timestamp, config_name
     return report_name
 
 
+class MissingReportPartsError(Exception):
+    """
+    Raised when a report is uploaded while some of its parts were not written.
+    """
+
+
+class CsvReportPartsWriter:
+    """
+    Writes the rows of a CSV report to the ReportStore in parts, as they
+    are produced, so that the rows of a large report are never all held
+    in memory. Once all parts are written, `upload` concatenates them into
+    the report.
+
+    Parts are stored under `parts_name` in the course's report directory,
+    so that an interrupted task can resume writing after its last part.
+    """
+    # Size above which the report being concatenated is spooled to disk.
+    MAX_MEMORY_SIZE = 5 * 1024 * 1024
+
+    def __init__(self, course_id, parts_name, num_parts=0, config_name='GRADES_DOWNLOAD'):
+        """
+        Arguments:
+            course_id: ID of the course of the report.
+            parts_name: Name of the directory of the parts.
+            num_parts: Number of parts already stored by a previous attempt.
+        """
+        self.report_store = ReportStore.from_config(config_name)
+        self.course_id = course_id
+        self.parts_name = parts_name
+        self.num_parts = num_parts
+        self.num_rows = 0
+        self._part = io.BytesIO()
+
+    def write_rows(self, rows):
+        """
+        Writes the given rows to the current part.
+        """
+        self._part.write(self._encode_rows(rows))
+        self.num_rows += len(rows)
+
+    def end_part(self):
+        """
+        Stores the rows written since the previous part as a new part.
+        """
+        part_name = self._part_name(self.num_parts)
+        # Remove any leftover of an interrupted attempt, which would
+        # otherwise make the storage pick another name.
+        self.report_store.delete(self.course_id, part_name)
+        self.report_store.store_file(self.course_id, part_name, self._part)
+        self.num_parts += 1
+        self._part = io.BytesIO()
+
+    def missing_parts(self):
+        """
+        Returns the names of the parts which were not stored, e.g. because
+        the task that was to write them failed.
+        """
+        return [
+            self._part_name(index) for index in range(self.num_parts)
+            if not self.report_store.exists(self.course_id, self._part_name(index))
+        ]
+
+    def upload(self, header, csv_name, timestamp):
+        """
+        Uploads a CSV of the given header followed by the rows of all parts,
+        deletes the parts and returns the name of the report.
+
+        Raises MissingReportPartsError, without uploading anything, if any
+        part is missing, rather than publishing an incomplete report.
+        """
+        missing_parts = self.missing_parts()
+        if missing_parts:
+            raise MissingReportPartsError(
+                f'Report parts {missing_parts} of course {self.course_id} are missing'
+            )
+
+        report_name = _report_name(csv_name, self.course_id, timestamp)
+        with SpooledTemporaryFile(max_size=self.MAX_MEMORY_SIZE) as report_file:
+            report_file.write(self._encode_rows([header]))
+            for index in range(self.num_parts):
+                part_name = self._part_name(index)
+                with self.report_store.open(self.course_id, part_name) as part:
+                    shutil.copyfileobj(part, report_file)
+            self.report_store.store_file(self.course_id, report_name, report_file)
+        self.delete_parts()
+        tracker_emit(csv_name)
+        return report_name
+
+    def delete_parts(self):
+        """
+        Deletes the stored parts.
+        """
+        for index in range(self.num_parts):
+            self.report_store.delete(self.course_id, self._part_name(index))
+
+    def _part_name(self, index):
+        return f'{self.parts_name}/{index:06d}.csv'
+
+    def _encode_rows(self, rows):
+        """
+        Returns the given rows as utf-8 encoded CSV, as ReportStore.store_rows writes them.
+        """
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(self.report_store._get_utf8_encoded_rows(rows))  # pylint: disable=protected-access
+        return buffer.getvalue().encode('utf-8')
+
+
+def _report_name(csv_name, course_id, timestamp):
+    """
+    Returns the name of the CSV report `csv_name` of the given course,
+    generated at `timestamp`.
+    """
+    return "{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
+        course_prefix=course_filename_prefix_generator(course_id),
+        csv_name=csv_name,
+        timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
+    )
+
+
 def tracker_emit(report_name):
     """
     Emits a 'report.requested' event for the given report.
@@ -7,6 +7,7 @@ Unit tests for LMS instructor-initiated background tasks helper functions.
 """
 
 
+import json
 import os
 import shutil
 import tempfile
@@ -18,6 +19,7 @@ from urllib.parse import quote
 
 import ddt
 import unicodecsv
+from celery.states import FAILURE, SUCCESS
 from django.conf import settings
 from django.test.utils import override_settings
 from edx_django_utils.cache import RequestCache
@@ -39,6 +41,7 @@ from lms.djangoapps.grades.models import PersistentCourseGrade, PersistentSubsec
 from lms.djangoapps.grades.subsection_grade import CreateSubsectionGrade
 from lms.djangoapps.grades.transformer import GradesTransformer
 from lms.djangoapps.instructor_analytics.basic import UNAVAILABLE, list_problem_responses
+from lms.djangoapps.instructor_task.config.waffle import PARALLEL_GRADE_REPORTS
 from lms.djangoapps.instructor_task.tasks_helper.certs import (
     generate_students_certificates,
     _invalidate_generated_certificates
@@ -49,7 +52,8 @@ from lms.djangoapps.instructor_task.tasks_helper.grades import (
     NOT_ENROLLED_IN_COURSE,
     CourseGradeReport,
     ProblemGradeReport,
-    ProblemResponses
+    ProblemResponses,
+    write_grade_report_part
 )
 from lms.djangoapps.instructor_task.tasks_helper.misc import (
     cohort_students_and_upload,
@@ -58,6 +62,7 @@ from lms.djangoapps.instructor_task.tasks_helper.misc import (
     upload_ora2_submission_files,
     upload_ora2_summary
 )
+from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
 from lms.djangoapps.instructor_task.tests.test_base import (
     InstructorTaskCourseTestCase,
     InstructorTaskModuleTestCase,
@@ -149,6 +154,116 @@ class TestInstructorGradeReport(InstructorGradeReportTestCase):
         report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
         assert any(('grade_report_err' in item[0]) for item in report_store.links_for(self.course.id))
 
+    def _report_usernames(self):
+        """
+        Returns the usernames of the rows of the last grade report.
+        """
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        report_csv_filename = report_store.links_for(self.course.id)[0][0]
+        report_path = report_store.path_to(self.course.id, report_csv_filename)
+        with report_store.storage.open(report_path) as csv_file:
+            return [row['Username'] for row in unicodecsv.DictReader(csv_file)]
+
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    def test_checkpoint(self, _mock_current_task):
+        """
+        Test that the report's progress is checkpointed in the task's output.
+        """
+        students = [self.create_student(f'student{index}') for index in range(3)]
+        entry = InstructorTaskFactory.create(course_id=self.course.id, task_type='grade_course')
+        with patch.object(CourseGradeReport, 'USER_BATCH_SIZE', 2):
+            result = CourseGradeReport.generate(None, entry.id, self.course.id, None, 'graded')
+        self.assertDictContainsSubset({'attempted': 3, 'succeeded': 3, 'failed': 0}, result)
+        assert self._report_usernames() == ['student0', 'student1', 'student2']
+
+        entry.refresh_from_db()
+        assert json.loads(entry.task_output)['checkpoint'] == {
+            'last_user_id': students[-1].id,
+            'parts': 2,
+            'succeeded': 3,
+            'failed': 0,
+        }
+
+        # The parts of the report are deleted once the report is uploaded.
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        parts_path = report_store.path_to(self.course.id, f'grade_report_parts_{entry.id}')
+        assert report_store.storage.listdir(parts_path)[1] == []
+
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    def test_resume_from_checkpoint(self, _mock_current_task):
+        """
+        Test that a retried report resumes after the last user of its checkpoint.
+        """
+        students = [self.create_student(f'student{index}') for index in range(3)]
+        entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_type='grade_course',
+            task_output=json.dumps({
+                'checkpoint': {'last_user_id': students[0].id, 'parts': 0, 'succeeded': 1, 'failed': 0},
+            }),
+        )
+        result = CourseGradeReport.generate(None, entry.id, self.course.id, None, 'graded')
+        self.assertDictContainsSubset({'attempted': 3, 'succeeded': 3, 'failed': 0}, result)
+        assert self._report_usernames() == ['student1', 'student2']
+
+    @ddt.data(1, 2, 5)
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    def test_parallel_grade_report(self, users_per_task, _mock_current_task):
+        """
+        Test that the report is merged from the parts written by its subtasks.
+        """
+        for index in range(3):
+            self.create_student(f'student{index}')
+        entry = InstructorTaskFactory.create(
+            course_id=self.course.id, task_type='grade_course', task_id='parallel-grade-report',
+        )
+        with override_waffle_flag(PARALLEL_GRADE_REPORTS, active=True):
+            with override_settings(GRADE_REPORT_USERS_PER_TASK=users_per_task):
+                CourseGradeReport.generate({}, entry.id, self.course.id, {}, 'graded')
+        assert self._report_usernames() == ['student0', 'student1', 'student2']
+
+        entry.refresh_from_db()
+        assert entry.task_state == SUCCESS
+        self.assertDictContainsSubset(
+            {'attempted': 3, 'succeeded': 3, 'failed': 0, 'total': 3},
+            json.loads(entry.task_output),
+        )
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        parts_path = report_store.path_to(self.course.id, f'grade_report_parts_{entry.id}')
+        assert report_store.storage.listdir(parts_path)[1] == []
+
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    def test_parallel_grade_report_failed_part(self, _mock_current_task):
+        """
+        Test that no report is uploaded, and that the task fails, when a part of the report couldn't be written.
+        """
+        for index in range(3):
+            self.create_student(f'student{index}')
+        entry = InstructorTaskFactory.create(
+            course_id=self.course.id, task_type='grade_course', task_id='parallel-grade-report-failure',
+        )
+
+        def write_part(report_class, entry_id, xmodule_instance_args, part_index, user_id_range, subtask_status):
+            """
+            Fails to write the second part of the report.
+            """
+            if part_index == 1:
+                raise Exception('Grading failed')
+            return write_grade_report_part(
+                report_class, entry_id, xmodule_instance_args, part_index, user_id_range, subtask_status,
+            )
+
+        with patch('lms.djangoapps.instructor_task.tasks.write_grade_report_part', side_effect=write_part):
+            with override_waffle_flag(PARALLEL_GRADE_REPORTS, active=True):
+                with override_settings(GRADE_REPORT_USERS_PER_TASK=1):
+                    CourseGradeReport.generate({}, entry.id, self.course.id, {}, 'graded')
+
+        entry.refresh_from_db()
+        assert entry.task_state == FAILURE
+        assert json.loads(entry.task_output)['exception'] == 'MissingReportPartsError'
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        assert report_store.links_for(self.course.id) == []
+
     def test_cohort_data_in_grading(self):
         """
         Test that cohort data is included in grades csv if cohort configuration is enabled for course.
@@ -1071,6 +1071,22 @@ CACHES = {
     },
 }
 
+# .. setting_name: COURSE_STRUCTURE_LRU_CACHE_MAX_BYTES
+# .. setting_default: 0
+# .. setting_description: Maximum estimated size, in bytes, of the process-local LRU cache of decoded
+#     split modulestore course structures that sits in front of the 'course_structure_cache' cache.
+#     Structures are immutable, so cached entries are only ever evicted, never invalidated. Set to 0
+#     to disable the process-local cache.
+COURSE_STRUCTURE_LRU_CACHE_MAX_BYTES = 0
+
+# .. setting_name: COURSE_DEFINITION_PREFETCH_MAX_BYTES
+# .. setting_default: 8 * 1024 * 1024
+# .. setting_description: Maximum estimated size, in bytes, of the definitions prefetched by a split
+#     modulestore runtime. When a subtree of a course is loaded lazily, the definitions of its blocks are
+#     fetched in batches the first time any of them is read, rather than one query per block. Set to 0
+#     to fetch each definition separately.
+COURSE_DEFINITION_PREFETCH_MAX_BYTES = 8 * 1024 * 1024
+
 ############################ OAUTH2 Provider ###################################
 OAUTH_EXPIRE_CONFIDENTIAL_CLIENT_DAYS = 365
 OAUTH_EXPIRE_PUBLIC_CLIENT_DAYS = 30
@@ -2083,6 +2099,8 @@ MIDDLEWARE = [
     # to redirected unenrolled students to the course info page
     'lms.djangoapps.courseware.middleware.CacheCourseIdMiddleware',
     'lms.djangoapps.courseware.middleware.RedirectMiddleware',
+    'lms.djangoapps.courseware.middleware.FlushUserStateMiddleware',
+    'lms.djangoapps.courseware.middleware.FieldOverrideMonitoringMiddleware',
 
     'lms.djangoapps.course_wiki.middleware.WikiAccessMiddleware',
 
@@ -3435,6 +3453,13 @@ BADGR_TIMEOUT = 10
 # the ones that contain information other than grades.
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
+# .. setting_name: GRADE_REPORT_USERS_PER_TASK
+# .. setting_default: 5000
+# .. setting_description: Number of users graded by each subtask of a grade report, when grade reports are
+#   generated by parallel subtasks.
+# .. setting_warning: Only used when the instructor_task.parallel_grade_reports course waffle flag is enabled.
+GRADE_REPORT_USERS_PER_TASK = 5000
+
 POLICY_CHANGE_GRADES_ROUTING_KEY = 'edx.lms.core.default'
 
 RECALCULATE_GRADES_ROUTING_KEY = 'edx.lms.core.default'
@@ -66,6 +66,55 @@ RAISE_ERROR_WHEN_NOT_FOUND = WaffleSwitch(
     "block_structure.raise_error_when_not_found", __name__
 )
 
+# .. toggle_name: block_structure.columnar_serialization
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, block structures are written to the cache and storage in
+#   the versioned columnar format, whose per-transformer sections are decoded lazily on read,
+#   instead of as a single compressed pickle. Data in either format can always be read, so
+#   toggling this switch does not require regenerating existing block structures.
+# .. toggle_warnings: Run the compare_block_structure_serialization management command on
+#   representative courses before enabling this switch.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2026-10-16
+# .. toggle_target_removal_date: 2027-01-16
+COLUMNAR_SERIALIZATION = WaffleSwitch(
+    "block_structure.columnar_serialization", __name__
+)
+
+# .. toggle_name: block_structure.incremental_collect
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, updating a course's stored block structure, e.g. after the
+#   course is published, only re-collects the data of the blocks that changed since the stored
+#   block structure was collected, for the transformers that support partial collection. All other
+#   transformers still collect their data for the whole course.
+# .. toggle_warnings: Block structures collected before this switch is enabled don't record the
+#   versions of their blocks, so their first update collects the whole course.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2026-10-16
+# .. toggle_target_removal_date: 2027-01-16
+INCREMENTAL_COLLECT = WaffleSwitch(
+    "block_structure.incremental_collect", __name__
+)
+
+# .. toggle_name: block_structure.profile_transformers
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, the wall time, removed blocks and collected data size of each
+#   transformer's collect and transform stage, and the hits and misses of collected block structures
+#   in the store, are recorded in the request's block structure profile and emitted as custom
+#   monitoring attributes.
+# .. toggle_warnings: Measuring the collected data size pickles each transformer's data again, and
+#   counting removed blocks wraps every block filter, so this switch slows down collection and
+#   transformation. Enable it only while investigating their performance.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2026-10-16
+# .. toggle_target_removal_date: 2027-01-16
+PROFILE_TRANSFORMERS = WaffleSwitch(
+    "block_structure.profile_transformers", __name__
+)
+
 
 def enable_storage_backing_for_cache_in_request():
     """
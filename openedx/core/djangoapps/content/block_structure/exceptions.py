@@ -40,3 +40,11 @@ class BlockStructureNotFound(BlockStructureException):
         super().__init__(
             f'Block structure not found; data_usage_key: {root_block_usage_key}'
         )
+
+
+class ColumnarFormatError(BlockStructureException):
+    """
+    Exception for when serialized data can't be decoded in the columnar
+    block structure format.
+    """
+    pass  # lint-amnesty, pylint: disable=unnecessary-pass
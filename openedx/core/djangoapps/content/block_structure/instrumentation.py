@@ -0,0 +1,187 @@
+"""
+Instrumentation of the collect and transform phases of the Block Structure
+framework.
+
+Each transformer's run within a phase is recorded as a TransformerStage,
+with its wall time, the number of blocks it removed and, when collecting,
+the size of the data it collected.  The stages run within a request are
+accumulated in the request's BlockStructureProfile, which also counts the
+hits and misses of collected block structures in the store.
+
+The totals of the profile are emitted as custom monitoring attributes as
+they are recorded.  Views may also attach the profile of the current
+request, as returned by get_request_profile().to_dict(), to debugging
+responses.
+
+Nothing is measured nor recorded unless the block_structure.profile_transformers
+waffle switch is enabled, in which case the profile of the request is enabled.
+"""
+
+
+import pickle
+from collections import defaultdict
+from contextlib import contextmanager
+from logging import getLogger
+from time import perf_counter
+
+from edx_django_utils.cache import RequestCache
+from edx_django_utils.monitoring import set_custom_attribute
+
+from .config import PROFILE_TRANSFORMERS
+
+logger = getLogger(__name__)  # pylint: disable=invalid-name
+
+COLLECT_PHASE = 'collect'
+TRANSFORM_PHASE = 'transform'
+
+REQUEST_CACHE_NAMESPACE = 'block_structure.profile'
+
+# Maximum number of stages kept by a profile, so that long running processes,
+# such as management commands, don't accumulate stages without bound.  The
+# totals emitted as custom attributes keep accounting for all stages.
+MAX_PROFILE_STAGES = 1000
+
+
+class TransformerStage:
+    """
+    The measurements of a single stage of a phase, usually the run of a
+    single transformer.
+    """
+    def __init__(self, phase, name):
+        self.phase = phase
+        self.name = name
+        self.duration_ms = 0.0
+        self.blocks_removed = 0
+        # Size in bytes of the data collected by the stage, if measured.
+        self.data_bytes = None
+
+    @contextmanager
+    def timed(self, block_structure):
+        """
+        A context manager adding the wall time of its body, and the number
+        of blocks it removed from the given block structure, to this stage.
+        """
+        num_blocks = len(block_structure)
+        start = perf_counter()
+        try:
+            yield self
+        finally:
+            self.duration_ms += (perf_counter() - start) * 1000
+            self.blocks_removed += max(num_blocks - len(block_structure), 0)
+
+    def to_dict(self):
+        """
+        Returns a JSON-serializable representation of this stage.
+        """
+        return {
+            'phase': self.phase,
+            'name': self.name,
+            'duration_ms': round(self.duration_ms, 3),
+            'blocks_removed': self.blocks_removed,
+            'data_bytes': self.data_bytes,
+        }
+
+
+class BlockStructureProfile:
+    """
+    The transformer stages and collected block structure lookups of a
+    request.  A disabled profile records nothing, and its stages yield None.
+    """
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stages = []
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._totals = defaultdict(float)
+
+    @contextmanager
+    def stage(self, phase, name, block_structure):
+        """
+        A context manager recording a stage timing its body on the given
+        block structure.  See TransformerStage.timed.
+        """
+        if not self.enabled:
+            yield None
+            return
+        stage = TransformerStage(phase, name)
+        with stage.timed(block_structure):
+            yield stage
+        self.record(stage)
+
+    def record(self, stage):
+        """
+        Records the given completed stage.
+        """
+        if not self.enabled:
+            return
+        if len(self.stages) < MAX_PROFILE_STAGES:
+            self.stages.append(stage)
+        prefix = f'block_structure.{stage.phase}.{stage.name}'
+        self._set_total(f'{prefix}.duration_ms', round(stage.duration_ms, 3))
+        self._set_total(f'{prefix}.blocks_removed', stage.blocks_removed)
+        if stage.data_bytes is not None:
+            self._set_total(f'{prefix}.data_bytes', stage.data_bytes)
+
+    def record_cache_lookup(self, hit):
+        """
+        Records whether a collected block structure was found in the store.
+        """
+        if not self.enabled:
+            return
+        if hit:
+            self.cache_hits += 1
+            set_custom_attribute('block_structure.cache_hits', self.cache_hits)
+        else:
+            self.cache_misses += 1
+            set_custom_attribute('block_structure.cache_misses', self.cache_misses)
+
+    def to_dict(self):
+        """
+        Returns a JSON-serializable representation of this profile.
+        """
+        return {
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'stages': [stage.to_dict() for stage in self.stages],
+        }
+
+    def _set_total(self, attribute_name, value):
+        """
+        Adds the given value to the request's total of the given custom attribute.
+        """
+        self._totals[attribute_name] += value
+        set_custom_attribute(attribute_name, self._totals[attribute_name])
+
+
+def get_request_profile():
+    """
+    Returns the BlockStructureProfile of the current request, enabled if
+    the block_structure.profile_transformers waffle switch is.
+    """
+    request_cache = RequestCache(REQUEST_CACHE_NAMESPACE)
+    cached_response = request_cache.get_cached_response('profile')
+    if cached_response.is_found:
+        return cached_response.value
+    profile = BlockStructureProfile(enabled=PROFILE_TRANSFORMERS.is_enabled())
+    request_cache.set('profile', profile)
+    return profile
+
+
+def transformer_data_bytes(block_structure, transformer):
+    """
+    Returns the size in bytes of the pickled data collected by the given
+    transformer in the given block structure.
+    """
+    transformer_name = transformer.name()
+    try:
+        return len(pickle.dumps(
+            (
+                block_structure.transformer_data.get(transformer_name),
+                [block_data.transformer_data.get(transformer_name) for block_data in block_structure.itervalues()],
+            ),
+            pickle.HIGHEST_PROTOCOL,
+        ))
+    except Exception:  # pylint: disable=broad-except
+        # Measuring the data must never fail its collection.
+        logger.exception('BlockStructure: Failed to measure the data of transformer %s.', transformer_name)
+        return None
@@ -0,0 +1,114 @@
+"""
+Command to compare the serialization formats of course block structures.
+"""
+
+
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+import openedx.core.djangoapps.content.block_structure.api as api
+import openedx.core.djangoapps.content.block_structure.serialization as serialization
+from openedx.core.lib.cache_utils import zpickle, zunpickle
+from openedx.core.lib.command_utils import parse_course_keys
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Benchmarks the compressed pickle format against the columnar format
+    for the collected block structures of the given courses, and
+    optionally rewrites the stored block structures in the format
+    selected by the block_structure.columnar_serialization switch.
+
+    Example usage:
+        $ ./manage.py lms compare_block_structure_serialization 'course-v1:edX+DemoX+Demo_Course' --settings=devstack
+        $ ./manage.py lms compare_block_structure_serialization 'course-v1:edX+DemoX+Demo_Course' \
+            --transformer grades --iterations 20 --settings=devstack
+    """
+    help = 'Compares the pickle and columnar serialization formats of course block structures.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'courses',
+            nargs='+',
+            help='Course keys of the block structures to compare.',
+        )
+        parser.add_argument(
+            '--iterations',
+            help='Number of times each serialization is timed.',
+            default=10,
+            type=int,
+        )
+        parser.add_argument(
+            '--transformer',
+            dest='transformers',
+            action='append',
+            default=[],
+            help='Name of a transformer whose block data is read after deserializing; may be repeated.',
+        )
+        parser.add_argument(
+            '--rewrite',
+            help='Rewrite the stored block structures using the currently enabled serialization format.',
+            action='store_true',
+            default=False,
+        )
+
+    def handle(self, *args, **options):
+        for course_key in parse_course_keys(options['courses']):
+            manager = api.get_block_structure_manager(course_key)
+            block_structure = manager.get_collected()
+            self._compare(course_key, block_structure, options['iterations'], options['transformers'])
+            if options['rewrite']:
+                manager.store.add(block_structure)
+                log.info('BlockStructure: Rewrote stored block structure for %s.', course_key)
+
+    def _compare(self, course_key, block_structure, iterations, transformer_names):
+        """
+        Times serializing and deserializing the given block structure in
+        both formats and writes the results to stdout.
+        """
+        data = (
+            block_structure._block_relations,  # pylint: disable=protected-access
+            block_structure.transformer_data,
+            block_structure._block_data_map,  # pylint: disable=protected-access
+        )
+
+        def read_transformer_data(block_data_map):
+            for block_data in block_data_map.values():
+                for transformer_name in transformer_names:
+                    block_data.transformer_data.get(transformer_name)
+
+        def pickle_read(serialized_data):
+            read_transformer_data(zunpickle(serialized_data)[2])
+
+        def columnar_read(serialized_data):
+            read_transformer_data(serialization.deserialize(serialized_data)[2])
+
+        pickled = zpickle(data)
+        columnar = serialization.serialize(*data)
+
+        self.stdout.write(f'{course_key}: {len(block_structure)} blocks, reading transformers {transformer_names}')
+        self.stdout.write('{:<10} {:>12} {:>16} {:>16}'.format('format', 'bytes', 'serialize (ms)', 'read (ms)'))
+        for name, serialized_data, serialize, read in (
+            ('pickle', pickled, lambda: zpickle(data), pickle_read),
+            ('columnar', columnar, lambda: serialization.serialize(*data), columnar_read),
+        ):
+            self.stdout.write('{:<10} {:>12} {:>16.2f} {:>16.2f}'.format(
+                name,
+                len(serialized_data),
+                self._time(serialize, iterations),
+                self._time(lambda: read(serialized_data), iterations),  # pylint: disable=cell-var-from-loop
+            ))
+
+    @staticmethod
+    def _time(func, iterations):
+        """
+        Returns the mean wall time in milliseconds of calling func.
+        """
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - start) * 1000 / max(iterations, 1)
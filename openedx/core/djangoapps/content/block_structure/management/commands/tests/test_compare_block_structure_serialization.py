@@ -0,0 +1,42 @@
+"""
+Tests for compare_block_structure_serialization management command.
+"""
+
+from io import StringIO
+
+from django.core.management import call_command
+from edx_toggles.toggles.testutils import override_waffle_switch
+
+from openedx.core.djangoapps.content.block_structure.config import COLUMNAR_SERIALIZATION, STORAGE_BACKING_FOR_CACHE
+from openedx.core.djangoapps.content.block_structure.models import BlockStructureModel
+from openedx.core.djangoapps.content.block_structure.serialization import is_columnar
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+
+class TestCompareBlockStructureSerialization(ModuleStoreTestCase):
+    """
+    Tests compare_block_structure_serialization management command.
+    """
+    def setUp(self):
+        super().setUp()
+        self.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=self.course, category='chapter')
+        ItemFactory.create(parent=chapter, category='sequential')
+
+    def test_compare(self):
+        out = StringIO()
+        call_command('compare_block_structure_serialization', str(self.course.id), '--iterations', '1', stdout=out)
+        output = out.getvalue()
+        assert 'pickle' in output
+        assert 'columnar' in output
+
+    def test_rewrite(self):
+        with override_waffle_switch(STORAGE_BACKING_FOR_CACHE, active=True):
+            with override_waffle_switch(COLUMNAR_SERIALIZATION, active=True):
+                call_command(
+                    'compare_block_structure_serialization', str(self.course.id), '--iterations', '1', '--rewrite',
+                    stdout=StringIO(),
+                )
+            course_usage_key = self.store.make_course_usage_key(self.course.id)
+            assert is_columnar(BlockStructureModel.get(course_usage_key).get_serialized_data())
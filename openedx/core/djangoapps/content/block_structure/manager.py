@@ -9,6 +9,7 @@ from contextlib import contextmanager
 from . import config
 from .exceptions import BlockStructureNotFound, TransformerDataIncompatible, UsageKeyNotInBlockStructure
 from .factory import BlockStructureFactory
+from .instrumentation import get_request_profile
 from .store import BlockStructureStore
 from .transformers import BlockStructureTransformers
 
@@ -62,6 +63,31 @@ class BlockStructureManager:
             BlockStructureBlockData - A transformed block structure,
                 starting at starting_block_usage_key.
         """
+        block_structure = self.get_untransformed(starting_block_usage_key, collected_block_structure)
+        try:
+            transformers.transform(block_structure)
+        except BlockStructureNotFound:
+            # The collected data of a transformer, which is decoded lazily,
+            # is corrupt, so it is collected again as at a cache miss.
+            if config.RAISE_ERROR_WHEN_NOT_FOUND.is_enabled():
+                raise
+            block_structure = self.get_untransformed(starting_block_usage_key, self._update_collected())
+            transformers.transform(block_structure)
+        return block_structure
+
+    def get_untransformed(self, starting_block_usage_key=None, collected_block_structure=None):
+        """
+        Returns the collected Block Structure for the root_block_usage_key,
+        starting at starting_block_usage_key, ready to be transformed.  The
+        given collected_block_structure, if any, is copied rather than
+        modified.
+
+        Arguments:
+            starting_block_usage_key (UsageKey) - See get_transformed.
+
+            collected_block_structure (BlockStructureBlockData) - See
+                get_transformed.
+        """
         block_structure = collected_block_structure.copy() if collected_block_structure else self.get_collected()
 
         if starting_block_usage_key:
@@ -75,7 +101,6 @@ class BlockStructureManager:
                     str(self.root_block_usage_key),
                 )
             block_structure.set_root_block(starting_block_usage_key)
-        transformers.transform(block_structure)
         return block_structure
 
     def get_collected(self):
@@ -100,9 +125,12 @@ class BlockStructureManager:
             BlockStructureTransformers.verify_versions(block_structure)
 
         except (BlockStructureNotFound, TransformerDataIncompatible):
+            get_request_profile().record_cache_lookup(hit=False)
             if config.RAISE_ERROR_WHEN_NOT_FOUND.is_enabled():
                 raise
             block_structure = self._update_collected()
+        else:
+            get_request_profile().record_cache_lookup(hit=True)
 
         return block_structure
 
@@ -113,22 +141,42 @@ class BlockStructureManager:
         """
         with self._bulk_operations():
             if not self.store.is_up_to_date(self.root_block_usage_key, self.modulestore):
-                self._update_collected()
+                self._update_collected(incremental=config.INCREMENTAL_COLLECT.is_enabled())
 
-    def _update_collected(self):
+    def _update_collected(self, incremental=False):
         """
         The store is updated with newly collected transformers data from
         the modulestore.
+
+        Arguments:
+            incremental (bool) - Whether to only re-collect the data of the
+                blocks that changed since the block structure in the store
+                was collected, if any.
         """
         with self._bulk_operations():
             block_structure = BlockStructureFactory.create_from_modulestore(
                 self.root_block_usage_key,
                 self.modulestore,
             )
-            BlockStructureTransformers.collect(block_structure)
+            if incremental:
+                BlockStructureTransformers.collect_incrementally(block_structure, self._get_previously_collected())
+            else:
+                BlockStructureTransformers.collect(block_structure)
             self.store.add(block_structure)
             return block_structure
 
+    def _get_previously_collected(self):
+        """
+        Returns the block structure in the store, or None if it isn't
+        found or can't be read by the current transformers.
+        """
+        try:
+            block_structure = BlockStructureFactory.create_from_store(self.root_block_usage_key, self.store)
+            BlockStructureTransformers.verify_versions(block_structure)
+        except (BlockStructureNotFound, TransformerDataIncompatible):
+            return None
+        return block_structure
+
     def clear(self):
         """
         Removes data for the block structure associated with the given
@@ -0,0 +1,436 @@
+"""
+Module for the columnar serialization format of BlockStructure objects.
+
+The legacy format zlib-compresses a single pickle of the structure's
+(block_relations, transformer_data, block_data_map) tuple, so every
+read has to decode all data of all transformers for all blocks.
+
+The columnar format instead splits the structure into independently
+encoded sections:
+
+    keys - The block usage keys, in a fixed order.  All other sections
+        refer to a block by its integer index into this list.
+    children, parents - The block relations, stored as CSR
+        (compressed sparse row) offset and index arrays.
+    transformer_data - The structure-wide (non-block) transformer data.
+    block_fields - The collected xBlock fields of each block.
+    transformer:<name> - One section per transformer with the
+        transformer's block-specific data for each block.
+
+The per-transformer sections are decoded lazily, on first access to the
+transformer's data, from slices of a memoryview over the serialized data,
+so that the sections are not copied before being decompressed.  A
+section that fails to decode raises BlockStructureNotFound, as data that
+fails to deserialize when read from the store does, so that the block
+structure is collected again.
+
+Layout of the serialized data:
+
+    MAGIC (4 bytes) | VERSION (2 bytes) | TOC length (4 bytes) | TOC | sections
+
+where the TOC (table of contents) is a JSON object mapping each section
+name to its [offset, length] relative to the end of the TOC.
+"""
+
+
+import json
+import struct
+import sys
+import zlib
+from array import array
+from copy import deepcopy
+from logging import getLogger
+
+from openedx.core.lib.cache_utils import zpickle, zunpickle
+
+from .block_structure import BlockData, TransformerData, TransformerDataMap, _BlockRelations
+from .exceptions import BlockStructureNotFound, ColumnarFormatError
+
+logger = getLogger(__name__)  # pylint: disable=invalid-name
+
+# Prefix identifying data serialized in the columnar format.  Data
+# serialized with zpickle always starts with a zlib header, which can
+# never collide with this value.
+MAGIC = b'BSCF'
+
+# The latest version of the columnar format.  Incrementally update this
+# value whenever the layout changes.
+VERSION = 1
+
+_HEADER = struct.Struct('>4sHI')
+
+_KEYS_SECTION = 'keys'
+_CHILDREN_OFFSETS_SECTION = 'children.offsets'
+_CHILDREN_INDICES_SECTION = 'children.indices'
+_PARENTS_OFFSETS_SECTION = 'parents.offsets'
+_PARENTS_INDICES_SECTION = 'parents.indices'
+_TRANSFORMER_DATA_SECTION = 'transformer_data'
+_BLOCK_FIELDS_SECTION = 'block_fields'
+_TRANSFORMER_SECTION_PREFIX = 'transformer:'
+
+# Typecode of the arrays used for the CSR sections; always serialized
+# as little-endian 32-bit unsigned integers.
+_INDEX_TYPECODE = 'I'
+
+
+def is_columnar(serialized_data):
+    """
+    Returns whether the given serialized data is in the columnar format.
+    """
+    return bytes(serialized_data[:len(MAGIC)]) == MAGIC
+
+
+def serialize(block_relations, transformer_data, block_data_map):
+    """
+    Returns the columnar serialization of the given block structure data.
+
+    Arguments:
+        block_relations (dict {UsageKey: _BlockRelations})
+        transformer_data (TransformerDataMap)
+        block_data_map (dict {UsageKey: BlockData})
+    """
+    block_keys = list(block_relations)
+    for usage_key in block_data_map:
+        if usage_key not in block_relations:
+            block_keys.append(usage_key)
+    key_index = {usage_key: index for index, usage_key in enumerate(block_keys)}
+
+    sections = {_KEYS_SECTION: zpickle(block_keys)}
+
+    for relation, offsets_section, indices_section in (
+        ('children', _CHILDREN_OFFSETS_SECTION, _CHILDREN_INDICES_SECTION),
+        ('parents', _PARENTS_OFFSETS_SECTION, _PARENTS_INDICES_SECTION),
+    ):
+        offsets, indices = _encode_csr(block_keys, block_relations, key_index, relation)
+        sections[offsets_section] = _compress_array(offsets)
+        sections[indices_section] = _compress_array(indices)
+
+    sections[_TRANSFORMER_DATA_SECTION] = zpickle(transformer_data)
+
+    block_fields = []
+    transformer_columns = {}
+    for index, usage_key in enumerate(block_keys):
+        block_data = block_data_map.get(usage_key)
+        if block_data is None:
+            block_fields.append(None)
+            continue
+        block_fields.append(block_data.fields)
+        for transformer_name, block_transformer_data in block_data.transformer_data.items():
+            column = transformer_columns.setdefault(transformer_name, [None] * len(block_keys))
+            column[index] = block_transformer_data.fields
+    sections[_BLOCK_FIELDS_SECTION] = zpickle(block_fields)
+
+    for transformer_name, column in transformer_columns.items():
+        sections[_TRANSFORMER_SECTION_PREFIX + transformer_name] = zpickle(column)
+
+    return _pack(sections)
+
+
+def deserialize(serialized_data, root_block_usage_key=None):
+    """
+    Returns the (block_relations, transformer_data, block_data_map) tuple
+    decoded from the given columnar serialization.  The block-specific
+    transformer data is only decoded once it is accessed.
+
+    Arguments:
+        serialized_data (bytes-like) - Data returned by serialize, or a
+            memoryview over such data.
+
+        root_block_usage_key (UsageKey) - The usage key of the root of
+            the block structure, reported by BlockStructureNotFound if
+            the block-specific transformer data fails to decode.
+
+    Raises:
+        ColumnarFormatError if the data is not in a supported version of
+        the columnar format.
+    """
+    reader = ColumnarReader(serialized_data, root_block_usage_key)
+
+    block_keys = reader.block_keys
+
+    # Blocks that have data but are not part of the relations (possible
+    # after transformers removed blocks) are ordered after those that are.
+    num_related_blocks = len(reader.array_section(_CHILDREN_OFFSETS_SECTION)) - 1
+    block_relations = {usage_key: _BlockRelations() for usage_key in block_keys[:num_related_blocks]}
+    for relation, offsets_section, indices_section in (
+        ('children', _CHILDREN_OFFSETS_SECTION, _CHILDREN_INDICES_SECTION),
+        ('parents', _PARENTS_OFFSETS_SECTION, _PARENTS_INDICES_SECTION),
+    ):
+        _decode_csr(
+            block_keys,
+            block_relations,
+            reader.array_section(offsets_section),
+            reader.array_section(indices_section),
+            relation,
+        )
+
+    block_data_map = {}
+    for index, (usage_key, fields) in enumerate(zip(block_keys, reader.pickled_section(_BLOCK_FIELDS_SECTION))):
+        if fields is None:
+            continue
+        block_data = BlockData(usage_key)
+        block_data.fields = fields
+        block_data.transformer_data = LazyTransformerDataMap(reader, index)
+        block_data_map[usage_key] = block_data
+
+    return block_relations, reader.pickled_section(_TRANSFORMER_DATA_SECTION), block_data_map
+
+
+class ColumnarReader:
+    """
+    Decodes the sections of columnar serialized data on demand,
+    memoizing each decoded section.
+    """
+    def __init__(self, serialized_data, root_block_usage_key=None):
+        self.root_block_usage_key = root_block_usage_key
+        self._buffer = memoryview(serialized_data)
+        try:
+            magic, version, toc_length = _HEADER.unpack_from(self._buffer)
+        except struct.error as error:
+            raise ColumnarFormatError('Truncated header') from error
+        if magic != MAGIC:
+            raise ColumnarFormatError('Not in the columnar format')
+        if version != VERSION:
+            raise ColumnarFormatError(f'Unsupported columnar format version: {version}')
+
+        toc_start = _HEADER.size
+        self._sections_start = toc_start + toc_length
+        self._toc = json.loads(bytes(self._buffer[toc_start:self._sections_start]))
+        self._decoded = {}
+
+        self.transformer_names = [
+            section[len(_TRANSFORMER_SECTION_PREFIX):]
+            for section in self._toc
+            if section.startswith(_TRANSFORMER_SECTION_PREFIX)
+        ]
+
+    def __deepcopy__(self, memo):
+        # The reader is immutable, so it can be shared among copies.
+        return self
+
+    @property
+    def block_keys(self):
+        """
+        Returns the list of block usage keys, in index order.
+        """
+        return self.pickled_section(_KEYS_SECTION)
+
+    def transformer_column(self, transformer_name):
+        """
+        Returns the list of block-specific field dicts for the given
+        transformer, in block index order, or None if the transformer
+        has no block-specific data.
+        """
+        section = _TRANSFORMER_SECTION_PREFIX + transformer_name
+        if section not in self._toc:
+            return None
+        return self.pickled_section(section)
+
+    def pickled_section(self, section):
+        """
+        Returns the decoded contents of the given pickled section.
+        """
+        return self._decode(section, zunpickle)
+
+    def array_section(self, section):
+        """
+        Returns the decoded contents of the given array section.
+        """
+        return self._decode(section, _decompress_array)
+
+    def _decode(self, section, decoder):
+        """
+        Returns the memoized result of decoding the raw bytes of the
+        given section with the given decoder.
+        """
+        try:
+            return self._decoded[section]
+        except KeyError:
+            pass
+        try:
+            offset, length = self._toc[section]
+        except KeyError as error:
+            raise ColumnarFormatError(f'Missing section: {section}') from error
+        start = self._sections_start + offset
+        decoded = decoder(self._buffer[start:start + length])
+        self._decoded[section] = decoded
+        return decoded
+
+
+class LazyTransformerDataMap(TransformerDataMap):
+    """
+    A TransformerDataMap for a single block whose entries are decoded from
+    the block's row of the corresponding transformer section the first
+    time they are accessed.
+
+    Copying or pickling the map materializes all of its entries into a
+    regular TransformerDataMap so the copy no longer refers to the
+    serialized data.
+    """
+    def __init__(self, reader, block_index):
+        super().__init__()
+        self._reader = reader
+        self._block_index = block_index
+        self._pending = set(reader.transformer_names)
+
+    def __getitem__(self, key):
+        self._load(self._translate_key(key))
+        return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        self._pending.discard(self._translate_key(key))
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._load(self._translate_key(key))
+        super().__delitem__(key)
+
+    def __contains__(self, key):
+        self._load(self._translate_key(key))
+        return dict.__contains__(self, self._translate_key(key))
+
+    def __iter__(self):
+        self._load_all()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self._load_all()
+        return dict.__len__(self)
+
+    def __eq__(self, other):
+        self._load_all()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        self._load_all()
+        return dict.keys(self)
+
+    def values(self):
+        self._load_all()
+        return dict.values(self)
+
+    def items(self):
+        self._load_all()
+        return dict.items(self)
+
+    def materialize(self):
+        """
+        Returns a regular TransformerDataMap with all entries of this map.
+        """
+        materialized = TransformerDataMap()
+        for name, value in self.items():
+            dict.__setitem__(materialized, name, value)
+        return materialized
+
+    def __reduce__(self):
+        return self.materialize().__reduce__()
+
+    def __deepcopy__(self, memo):
+        return deepcopy(self.materialize(), memo)
+
+    def _load(self, transformer_name):
+        """
+        Decodes this block's data for the given transformer, if not
+        already decoded.
+
+        Raises:
+            BlockStructureNotFound if the transformer's data fails to
+            decode, in which case it is assumed to be corrupt.
+        """
+        if transformer_name not in self._pending:
+            return
+        try:
+            column = self._reader.transformer_column(transformer_name)
+            fields = column[self._block_index] if column else None
+        except Exception:
+            logger.exception(
+                'BlockStructure: Failed to decode the data of transformer %s for %s',
+                transformer_name,
+                self._reader.root_block_usage_key,
+            )
+            raise BlockStructureNotFound(self._reader.root_block_usage_key)  # lint-amnesty, pylint: disable=raise-missing-from
+        self._pending.discard(transformer_name)
+        if fields is not None:
+            transformer_data = TransformerData()
+            transformer_data.fields = fields
+            dict.__setitem__(self, transformer_name, transformer_data)
+
+    def _load_all(self):
+        """
+        Decodes this block's data for all transformers.
+        """
+        for transformer_name in list(self._pending):
+            self._load(transformer_name)
+
+
+def _encode_csr(block_keys, block_relations, key_index, relation):
+    """
+    Returns the CSR (offsets, indices) arrays for the given relation
+    ('children' or 'parents') of the blocks in block_relations.
+    """
+    offsets = array(_INDEX_TYPECODE, [0])
+    indices = array(_INDEX_TYPECODE)
+    for usage_key in block_keys[:len(block_relations)]:
+        indices.extend(key_index[related_key] for related_key in getattr(block_relations[usage_key], relation))
+        offsets.append(len(indices))
+    return offsets, indices
+
+
+def _decode_csr(block_keys, block_relations, offsets, indices, relation):
+    """
+    Populates the given relation ('children' or 'parents') of the blocks
+    in block_relations from the given CSR arrays.
+    """
+    for index in range(len(offsets) - 1):
+        setattr(
+            block_relations[block_keys[index]],
+            relation,
+            [block_keys[related] for related in indices[offsets[index]:offsets[index + 1]]],
+        )
+
+
+def _compress_array(values):
+    """
+    Returns the zlib-compressed little-endian bytes of the given array.
+    """
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return zlib.compress(values.tobytes())
+
+
+def _decompress_array(raw):
+    """
+    Returns the array decoded from bytes returned by _compress_array.
+    """
+    values = array(_INDEX_TYPECODE)
+    values.frombytes(zlib.decompress(raw))
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def _pack(sections):
+    """
+    Returns the serialized data containing the given encoded sections.
+    """
+    toc = {}
+    offset = 0
+    for name, raw in sections.items():
+        toc[name] = [offset, len(raw)]
+        offset += len(raw)
+    encoded_toc = json.dumps(toc, separators=(',', ':')).encode('utf-8')
+    return b''.join(
+        [_HEADER.pack(MAGIC, VERSION, len(encoded_toc)), encoded_toc] + list(sections.values())
+    )
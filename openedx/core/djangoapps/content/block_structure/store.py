@@ -10,7 +10,7 @@ from django.utils.encoding import python_2_unicode_compatible
 
 from openedx.core.lib.cache_utils import zpickle, zunpickle
 
-from . import config
+from . import config, serialization
 from .block_structure import BlockStructureBlockData
 from .exceptions import BlockStructureNotFound
 from .factory import BlockStructureFactory
@@ -195,22 +195,32 @@ class BlockStructureStore:
 
     def _serialize(self, block_structure):
         """
-        Serializes the data for the given block_structure.
+        Serializes the data for the given block_structure, in the
+        columnar format if enabled, else as a compressed pickle.
         """
         data_to_cache = (
             block_structure._block_relations,
             block_structure.transformer_data,
             block_structure._block_data_map,
         )
+        if config.COLUMNAR_SERIALIZATION.is_enabled():
+            return serialization.serialize(*data_to_cache)
         return zpickle(data_to_cache)
 
     def _deserialize(self, serialized_data, root_block_usage_key):
         """
         Deserializes the given data and returns the parsed block_structure.
+        Data in either the columnar or the compressed pickle format is
+        accepted, regardless of the format currently used for writing.
         """
 
         try:
-            block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
+            if serialization.is_columnar(serialized_data):
+                block_relations, transformer_data, block_data_map = serialization.deserialize(
+                    serialized_data, root_block_usage_key,
+                )
+            else:
+                block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
         except Exception:
             # Somehow failed to de-serialized the data, assume it's corrupt.
             bs_model = self._get_model(root_block_usage_key)
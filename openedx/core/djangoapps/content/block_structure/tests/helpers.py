@@ -15,6 +15,7 @@ from ..api import get_cache
 from ..block_structure import BlockStructureBlockData
 from ..exceptions import BlockStructureNotFound
 from ..models import BlockStructureModel
+from ..serialization import ColumnarReader
 from ..store import BlockStructureStore
 from ..transformer import BlockStructureTransformer, FilteringTransformerMixin
 from ..transformer_registry import TransformerRegistry
@@ -213,6 +214,19 @@ def clear_registered_transformers_cache():
     TransformerRegistry.get_write_version_hash.cache.clear()  # lint-amnesty, pylint: disable=no-member
 
 
+def corrupt_transformer_section(serialized_data, transformer):
+    """
+    Returns a copy of the given columnar serialized data in which the
+    section of the given transformer's block-specific data is corrupt.
+    """
+    corrupt_data = bytearray(serialized_data)
+    reader = ColumnarReader(bytes(serialized_data))
+    offset, length = reader._toc['transformer:' + transformer.name()]  # pylint: disable=protected-access
+    start = reader._sections_start + offset  # pylint: disable=protected-access
+    corrupt_data[start:start + length] = b'\x00' * length
+    return bytes(corrupt_data)
+
+
 @contextmanager
 def mock_registered_transformers(transformers):
     """
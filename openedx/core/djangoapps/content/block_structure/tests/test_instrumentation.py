@@ -0,0 +1,121 @@
+"""
+Tests for instrumentation.py
+"""
+import json
+from unittest.mock import MagicMock, call, patch
+
+from django.test import TestCase
+from edx_django_utils.cache import RequestCache
+from edx_toggles.toggles.testutils import override_waffle_switch
+
+from ..block_structure import BlockStructureModulestoreData
+from ..config import PROFILE_TRANSFORMERS
+from ..instrumentation import COLLECT_PHASE, TRANSFORM_PHASE, get_request_profile
+from ..transformers import BlockStructureTransformers
+from .helpers import ChildrenMapTestMixin, MockFilteringTransformer, MockTransformer, mock_registered_transformers
+
+
+class RemovingFilteringTransformer(MockFilteringTransformer):
+    """
+    Mock filtering transformer removing block 1.
+    """
+    def transform_block_filters(self, usage_info, block_structure):
+        return [block_structure.create_removal_filter(lambda block_key: block_key == 1)]
+
+
+class RemovingTransformer(MockTransformer):
+    """
+    Mock transformer removing block 2, and collecting data for all blocks.
+    """
+    @classmethod
+    def collect(cls, block_structure):
+        for block_key in block_structure.topological_traversal():
+            block_structure.set_transformer_block_field(block_key, cls, 'data', 'x' * 100)
+
+    def transform(self, usage_info, block_structure):
+        block_structure.remove_block(2, keep_descendants=False)
+
+
+class TestBlockStructureProfile(ChildrenMapTestMixin, TestCase):
+    """
+    Test class for the instrumentation of BlockStructureTransformers.
+    """
+    def setUp(self):
+        super().setUp()
+        RequestCache.clear_all_namespaces()
+        self.registered_transformers = [RemovingFilteringTransformer(), RemovingTransformer()]
+        switch_override = override_waffle_switch(PROFILE_TRANSFORMERS, active=True)
+        switch_override.enable()
+        self.addCleanup(switch_override.disable)
+
+    def assert_stages(self, expected_stages):
+        """
+        Verifies the (phase, name, blocks_removed) of the stages of the request's profile.
+        """
+        assert [
+            (stage.phase, stage.name, stage.blocks_removed) for stage in get_request_profile().stages
+        ] == expected_stages
+
+    def test_transform(self):
+        block_structure = self.create_block_structure(self.SIMPLE_CHILDREN_MAP)
+        with mock_registered_transformers(self.registered_transformers):
+            transformers = BlockStructureTransformers(self.registered_transformers, usage_info=MagicMock())
+        with patch(
+            'openedx.core.djangoapps.content.block_structure.instrumentation.set_custom_attribute'
+        ) as mock_set_custom_attribute:
+            transformers.transform(block_structure)
+
+        self.assert_stages([
+            (TRANSFORM_PHASE, 'filters', 1),
+            (TRANSFORM_PHASE, 'RemovingFilteringTransformer', 1),
+            (TRANSFORM_PHASE, 'RemovingTransformer', 1),
+            (TRANSFORM_PHASE, 'prune_unreachable', 2),
+        ])
+        assert call('block_structure.transform.RemovingTransformer.blocks_removed', 1) in \
+            mock_set_custom_attribute.call_args_list
+
+    def test_collect(self):
+        block_structure = self.create_block_structure(self.SIMPLE_CHILDREN_MAP, BlockStructureModulestoreData)
+        with mock_registered_transformers(self.registered_transformers):
+            BlockStructureTransformers.collect(block_structure)
+
+        stages = {stage.name: stage for stage in get_request_profile().stages if stage.phase == COLLECT_PHASE}
+        assert set(stages) == {'RemovingFilteringTransformer', 'RemovingTransformer', 'xblock_fields', 'compile'}
+        assert stages['RemovingTransformer'].data_bytes > 5 * 100
+        assert stages['RemovingFilteringTransformer'].data_bytes < stages['RemovingTransformer'].data_bytes
+
+    def test_request_profile(self):
+        profile = get_request_profile()
+        profile.record_cache_lookup(hit=True)
+        assert get_request_profile() is profile
+
+        profile_dict = json.loads(json.dumps(profile.to_dict()))
+        assert profile_dict == {'cache_hits': 1, 'cache_misses': 0, 'stages': []}
+
+        RequestCache.clear_all_namespaces()
+        assert get_request_profile() is not profile
+
+    def test_disabled(self):
+        collected_block_structure = self.create_block_structure(
+            self.SIMPLE_CHILDREN_MAP, BlockStructureModulestoreData
+        )
+        block_structure = self.create_block_structure(self.SIMPLE_CHILDREN_MAP)
+        with override_waffle_switch(PROFILE_TRANSFORMERS, active=False):
+            with mock_registered_transformers(self.registered_transformers):
+                transformers = BlockStructureTransformers(self.registered_transformers, usage_info=MagicMock())
+                with patch(
+                    'openedx.core.djangoapps.content.block_structure.transformers.transformer_data_bytes'
+                ) as mock_data_bytes, patch(
+                    'openedx.core.djangoapps.content.block_structure.instrumentation.set_custom_attribute'
+                ) as mock_set_custom_attribute:
+                    BlockStructureTransformers.collect(collected_block_structure)
+                    transformers.transform(block_structure)
+                    get_request_profile().record_cache_lookup(hit=True)
+
+        assert 1 not in block_structure
+        assert 2 not in block_structure
+        profile = get_request_profile()
+        assert not profile.enabled
+        assert profile.to_dict() == {'cache_hits': 0, 'cache_misses': 0, 'stages': []}
+        mock_data_bytes.assert_not_called()
+        mock_set_custom_attribute.assert_not_called()
@@ -5,11 +5,18 @@ Tests for manager.py
 import pytest
 import ddt
 from django.test import TestCase
+from edx_django_utils.cache import RequestCache
 from edx_toggles.toggles.testutils import override_waffle_switch
 
 from ..block_structure import BlockStructureBlockData
-from ..config import RAISE_ERROR_WHEN_NOT_FOUND, STORAGE_BACKING_FOR_CACHE
+from ..config import (
+    COLUMNAR_SERIALIZATION,
+    PROFILE_TRANSFORMERS,
+    RAISE_ERROR_WHEN_NOT_FOUND,
+    STORAGE_BACKING_FOR_CACHE
+)
 from ..exceptions import BlockStructureNotFound, UsageKeyNotInBlockStructure
+from ..instrumentation import get_request_profile
 from ..manager import BlockStructureManager
 from ..transformers import BlockStructureTransformers
 from .helpers import (
@@ -18,6 +25,7 @@ from .helpers import (
     MockModulestoreFactory,
     MockTransformer,
     UsageKeyFactoryMixin,
+    corrupt_transformer_section,
     mock_registered_transformers
 )
 
@@ -167,6 +175,27 @@ class TestBlockStructureManager(UsageKeyFactoryMixin, ChildrenMapTestMixin, Test
             )
             self.assert_block_structure(block_structure, expected_structure, missing_blocks=expected_missing_blocks)
 
+    @ddt.data(True, False)
+    def test_get_transformed_with_corrupt_collected_data(self, raise_error_when_not_found):
+        with override_waffle_switch(COLUMNAR_SERIALIZATION, active=True):
+            self.collect_and_verify(expect_modulestore_called=True, expect_cache_updated=True)
+        cache_key = next(iter(self.cache.map))
+        self.cache.map[cache_key] = corrupt_transformer_section(self.cache.map[cache_key], TestTransformer1)
+
+        with override_waffle_switch(RAISE_ERROR_WHEN_NOT_FOUND, active=raise_error_when_not_found):
+            with mock_registered_transformers(self.registered_transformers):
+                if raise_error_when_not_found:
+                    with pytest.raises(BlockStructureNotFound):
+                        self.bs_manager.get_transformed(self.transformers)
+                    return
+                block_structure = self.bs_manager.get_transformed(self.transformers)
+
+        # The corrupt data was collected again, and replaced in the cache.
+        assert TestTransformer1.collect_call_count == 2
+        TestTransformer1.assert_collected(block_structure)
+        TestTransformer1.assert_transformed(block_structure)
+        self.collect_and_verify(expect_modulestore_called=False, expect_cache_updated=False)
+
     def test_get_transformed_with_nonexistent_starting_block(self):
         with mock_registered_transformers(self.registered_transformers):
             with pytest.raises(UsageKeyNotInBlockStructure):
@@ -177,6 +206,15 @@ class TestBlockStructureManager(UsageKeyFactoryMixin, ChildrenMapTestMixin, Test
         self.collect_and_verify(expect_modulestore_called=False, expect_cache_updated=False)
         assert TestTransformer1.collect_call_count == 1
 
+    @override_waffle_switch(PROFILE_TRANSFORMERS, active=True)
+    def test_get_collected_cache_lookups(self):
+        RequestCache.clear_all_namespaces()
+        self.collect_and_verify(expect_modulestore_called=True, expect_cache_updated=True)
+        self.collect_and_verify(expect_modulestore_called=False, expect_cache_updated=False)
+        profile = get_request_profile()
+        assert (profile.cache_hits, profile.cache_misses) == (1, 1)
+        assert [stage.name for stage in profile.stages] == ['TestTransformer1', 'xblock_fields']
+
     def test_get_collected_error_raised(self):
         with override_waffle_switch(RAISE_ERROR_WHEN_NOT_FOUND, active=True):
             with mock_registered_transformers(self.registered_transformers):
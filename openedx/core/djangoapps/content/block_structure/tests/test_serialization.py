@@ -0,0 +1,119 @@
+"""
+Tests for block_structure/serialization.py
+"""
+
+import pickle
+from copy import deepcopy
+from unittest import TestCase
+
+import ddt
+import pytest
+
+from ..block_structure import TransformerDataMap
+from ..exceptions import BlockStructureNotFound, ColumnarFormatError
+from ..serialization import LazyTransformerDataMap, deserialize, is_columnar, serialize
+from .helpers import ChildrenMapTestMixin, MockFilteringTransformer, MockTransformer, corrupt_transformer_section
+
+
+@ddt.ddt
+class TestColumnarSerialization(ChildrenMapTestMixin, TestCase):
+    """
+    Tests for the columnar serialization format.
+    """
+    def create_collected_structure(self, children_map):
+        """
+        Returns a block structure for the given children_map, with
+        xBlock fields and transformer data set on some of its blocks.
+        """
+        block_structure = self.create_block_structure(children_map)
+        for transformer in [MockTransformer, MockFilteringTransformer]:
+            block_structure._add_transformer(transformer)  # pylint: disable=protected-access
+        for block_key in range(len(children_map)):
+            block_structure.override_xblock_field(block_key, 'display_name', f'Block {block_key}')
+            if block_key % 2:
+                block_structure.set_transformer_block_field(block_key, MockTransformer, 'odd', block_key)
+        return block_structure
+
+    def serialize(self, block_structure):
+        """
+        Returns the columnar serialization of the given block structure.
+        """
+        serialized_data = serialize(
+            block_structure._block_relations,  # pylint: disable=protected-access
+            block_structure.transformer_data,
+            block_structure._block_data_map,  # pylint: disable=protected-access
+        )
+        assert is_columnar(serialized_data)
+        return serialized_data
+
+    def round_trip(self, block_structure):
+        """
+        Returns the block structure data decoded from the columnar
+        serialization of the given block structure.
+        """
+        return deserialize(memoryview(self.serialize(block_structure)))
+
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_round_trip(self, children_map):
+        block_structure = self.create_collected_structure(children_map)
+        block_relations, transformer_data, block_data_map = self.round_trip(block_structure)
+
+        for block_key, relations in block_relations.items():
+            assert relations.children == block_structure.get_children(block_key)
+            assert relations.parents == block_structure.get_parents(block_key)
+        assert set(block_relations) == set(block_structure)
+        assert transformer_data[MockTransformer].fields == block_structure.transformer_data[MockTransformer].fields
+        for block_key, block_data in block_data_map.items():
+            assert block_data.display_name == f'Block {block_key}'
+            odd = block_data.transformer_data.get(MockTransformer)
+            assert (odd.odd if odd else None) == (block_key if block_key % 2 else None)
+
+    def test_lazy_transformer_sections(self):
+        block_structure = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        _, _, block_data_map = self.round_trip(block_structure)
+        block_transformer_data = block_data_map[1].transformer_data
+        assert isinstance(block_transformer_data, LazyTransformerDataMap)
+        assert dict.__len__(block_transformer_data) == 0
+        assert block_transformer_data[MockTransformer].odd == 1
+        assert dict.__len__(block_transformer_data) == 1
+
+    def test_blocks_without_relations(self):
+        block_structure = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        block_structure._block_relations.pop(4)  # pylint: disable=protected-access
+        block_relations, _, block_data_map = self.round_trip(block_structure)
+        assert 4 not in block_relations
+        assert block_data_map[4].display_name == 'Block 4'
+
+    def test_copy_materializes(self):
+        block_structure = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        _, _, block_data_map = self.round_trip(block_structure)
+        block_transformer_data = block_data_map[3].transformer_data
+        for copied in (deepcopy(block_transformer_data), pickle.loads(pickle.dumps(block_transformer_data))):
+            assert type(copied) is TransformerDataMap  # pylint: disable=unidiomatic-typecheck
+            assert copied[MockTransformer].odd == 3
+
+    def test_set_overrides_pending(self):
+        block_structure = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        _, _, block_data_map = self.round_trip(block_structure)
+        block_transformer_data = block_data_map[1].transformer_data
+        block_transformer_data.get_or_create(MockTransformer).odd = 'new'
+        assert block_transformer_data[MockTransformer].odd == 'new'
+
+    @ddt.data(b'', b'BSCF', b'BSCF\x00\x63\x00\x00\x00\x00')
+    def test_invalid_data(self, serialized_data):
+        with pytest.raises(ColumnarFormatError):
+            deserialize(serialized_data)
+
+    def test_corrupt_transformer_section(self):
+        block_structure = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        serialized_data = corrupt_transformer_section(self.serialize(block_structure), MockTransformer)
+
+        # The corrupt section is only decoded once the transformer's data is accessed.
+        _, _, block_data_map = deserialize(serialized_data, 'root')
+        assert block_data_map[1].display_name == 'Block 1'
+        with pytest.raises(BlockStructureNotFound):
+            block_data_map[1].transformer_data.get(MockTransformer)
@@ -8,9 +8,10 @@ from edx_toggles.toggles.testutils import override_waffle_switch
 
 from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
 
-from ..config import STORAGE_BACKING_FOR_CACHE
+from ..config import COLUMNAR_SERIALIZATION, STORAGE_BACKING_FOR_CACHE
 from ..config.models import BlockStructureConfiguration
 from ..exceptions import BlockStructureNotFound
+from ..serialization import is_columnar
 from ..store import BlockStructureStore
 from .helpers import ChildrenMapTestMixin, MockCache, MockTransformer, UsageKeyFactoryMixin
 
@@ -91,3 +92,34 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
         assert self.mock_cache.timeout_from_last_call == 0
         self.store.add(self.block_structure)
         assert self.mock_cache.timeout_from_last_call == timeout
+
+    @ddt.data(True, False)
+    def test_add_and_get_columnar(self, with_storage_backing):
+        with override_waffle_switch(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
+            with override_waffle_switch(COLUMNAR_SERIALIZATION, active=True):
+                self.store.add(self.block_structure)
+            assert all(is_columnar(value) for value in self.mock_cache.map.values())
+            if with_storage_backing:
+                # Read the structure back from storage, which isn't cached.
+                self.mock_cache.map.clear()
+            stored_value = self.store.get(self.block_structure.root_block_usage_key)
+            self.assert_block_structure(stored_value, self.children_map)
+            assert stored_value.get_transformer_block_field(
+                self.block_key_factory(0), MockTransformer, 'test'
+            ) == f'{MockTransformer.name()} val'
+
+    @ddt.data(True, False)
+    def test_read_after_format_change(self, columnar_on_write):
+        with override_waffle_switch(COLUMNAR_SERIALIZATION, active=columnar_on_write):
+            self.store.add(self.block_structure)
+        with override_waffle_switch(COLUMNAR_SERIALIZATION, active=not columnar_on_write):
+            stored_value = self.store.get(self.block_structure.root_block_usage_key)
+        self.assert_block_structure(stored_value, self.children_map)
+
+    def test_corrupt_columnar_data(self):
+        with override_waffle_switch(COLUMNAR_SERIALIZATION, active=True):
+            self.store.add(self.block_structure)
+        for key, value in self.mock_cache.map.items():
+            self.mock_cache.map[key] = value[:20]
+        with pytest.raises(BlockStructureNotFound):
+            self.store.get(self.block_structure.root_block_usage_key)
@@ -4,12 +4,20 @@ Tests for transformers.py
 from unittest import TestCase
 from unittest.mock import MagicMock, patch
 
+import ddt
 import pytest
 
 from ..block_structure import BlockStructureModulestoreData
 from ..exceptions import TransformerDataIncompatible, TransformerException
+from ..factory import BlockStructureFactory
 from ..transformers import BlockStructureTransformers
-from .helpers import ChildrenMapTestMixin, MockFilteringTransformer, MockTransformer, mock_registered_transformers
+from .helpers import (
+    ChildrenMapTestMixin,
+    MockFilteringTransformer,
+    MockModulestoreFactory,
+    MockTransformer,
+    mock_registered_transformers
+)
 
 
 class TestBlockStructureTransformers(ChildrenMapTestMixin, TestCase):
@@ -51,9 +59,12 @@ class TestBlockStructureTransformers(ChildrenMapTestMixin, TestCase):
         with mock_registered_transformers(self.registered_transformers):
             with patch(
                 'openedx.core.djangoapps.content.block_structure.tests.helpers.MockTransformer.collect'
-            ) as mock_collect_call:
+            ) as mock_collect_call, patch(
+                'openedx.core.djangoapps.content.block_structure.tests.helpers.MockTransformer.compile'
+            ) as mock_compile_call:
                 BlockStructureTransformers.collect(block_structure=MagicMock())
                 assert mock_collect_call.called
+                assert mock_compile_call.called
 
     def test_transform(self):
         self.add_mock_transformer()
@@ -75,3 +86,130 @@ class TestBlockStructureTransformers(ChildrenMapTestMixin, TestCase):
                 self.transformers.verify_versions(block_structure)
             self.transformers.collect(block_structure)
             assert self.transformers.verify_versions(block_structure)
+
+
+class CollectingTransformer(MockTransformer):
+    """
+    Mock transformer recording the blocks it collected data for, whose data
+    for a block depends on the block's ancestors.
+    """
+    SUPPORTS_PARTIAL_COLLECT = False
+    collected_blocks = None
+
+    @classmethod
+    def collect(cls, block_structure):
+        cls.collected_blocks = set(block_structure)
+        block_structure.request_xblock_fields('field')
+        for block_key in block_structure.topological_traversal():
+            path = sorted(
+                block_structure.get_transformer_block_field(parent, cls, 'path')
+                for parent in block_structure.get_parents(block_key)
+            )
+            path.append(block_structure.get_xblock(block_key).field)
+            block_structure.set_transformer_block_field(block_key, cls, 'path', '/'.join(path))
+
+
+class PartialCollectingTransformer(CollectingTransformer):
+    """
+    Mock transformer supporting partial collection.
+    """
+    SUPPORTS_PARTIAL_COLLECT = True
+    collected_blocks = None
+
+
+@ddt.ddt
+class TestCollectIncrementally(ChildrenMapTestMixin, TestCase):
+    """
+    Test class for BlockStructureTransformers.collect_incrementally.
+    """
+    def setUp(self):
+        super().setUp()
+        self.registered_transformers = [CollectingTransformer(), PartialCollectingTransformer()]
+        self.modulestore = MockModulestoreFactory.create(self.DAG_CHILDREN_MAP, self.block_key_factory)
+        for block_key, xblock in self.modulestore.blocks.items():
+            xblock.field_map = {'update_version': 'v1', 'field': str(block_key)}
+
+    def collect(self, collected_block_structure=None):
+        """
+        Returns the block structure of the mock modulestore, collected
+        incrementally from the given collected block structure.
+        """
+        block_structure = BlockStructureFactory.create_from_modulestore(0, self.modulestore)
+        with mock_registered_transformers(self.registered_transformers):
+            BlockStructureTransformers.collect_incrementally(block_structure, collected_block_structure)
+        return block_structure
+
+    def assert_collected(self, block_structure):
+        """
+        Verifies that the data of both transformers equals that of a full collection.
+        """
+        expected_block_structure = BlockStructureFactory.create_from_modulestore(0, self.modulestore)
+        with mock_registered_transformers(self.registered_transformers):
+            BlockStructureTransformers.collect(expected_block_structure)
+        for block_key in expected_block_structure:
+            assert block_structure.get_xblock_field(block_key, 'field') == \
+                expected_block_structure.get_xblock_field(block_key, 'field')
+            for transformer in self.registered_transformers:
+                assert block_structure.get_transformer_block_field(block_key, transformer, 'path') == \
+                    expected_block_structure.get_transformer_block_field(block_key, transformer, 'path')
+
+    def test_without_collected(self):
+        block_structure = self.collect()
+        self.assert_collected(block_structure)
+        assert PartialCollectingTransformer.collected_blocks == set(range(7))
+        assert block_structure.get_xblock_field(3, 'update_version') == 'v1'
+
+    @ddt.data(
+        (3, {1, 2, 3, 5, 6, 0}),
+        (2, {2, 3, 4, 5, 6, 0, 1}),
+        (6, {6, 3, 1, 2, 0}),
+        (0, set(range(7))),
+    )
+    @ddt.unpack
+    def test_changed_block(self, changed_block, expected_collected_blocks):
+        collected_block_structure = self.collect()
+        self.modulestore.blocks[changed_block].field_map.update({'update_version': 'v2', 'field': 'changed'})
+
+        block_structure = self.collect(collected_block_structure)
+        assert CollectingTransformer.collected_blocks == set(range(7))
+        assert PartialCollectingTransformer.collected_blocks == expected_collected_blocks
+        self.assert_collected(block_structure)
+
+    def test_changed_block_after_full_collection(self):
+        collected_block_structure = BlockStructureFactory.create_from_modulestore(0, self.modulestore)
+        with mock_registered_transformers(self.registered_transformers):
+            BlockStructureTransformers.collect(collected_block_structure)
+        self.modulestore.blocks[3].field_map.update({'update_version': 'v2', 'field': 'changed'})
+
+        block_structure = self.collect(collected_block_structure)
+        assert PartialCollectingTransformer.collected_blocks == {1, 2, 3, 5, 6, 0}
+        self.assert_collected(block_structure)
+
+    def test_unchanged(self):
+        collected_block_structure = self.collect()
+        PartialCollectingTransformer.collected_blocks = None
+        block_structure = self.collect(collected_block_structure)
+        assert PartialCollectingTransformer.collected_blocks is None
+        self.assert_collected(block_structure)
+
+    def test_changed_children(self):
+        collected_block_structure = self.collect()
+        self.modulestore.blocks[4].children = [self.block_key_factory(6)]
+
+        block_structure = self.collect(collected_block_structure)
+        assert PartialCollectingTransformer.collected_blocks == {0, 1, 2, 3, 4, 6}
+        assert block_structure.get_parents(6) == [3, 4]
+        self.assert_collected(block_structure)
+
+    def test_transformer_version_changed(self):
+        collected_block_structure = self.collect()
+        self.modulestore.blocks[4].field_map['update_version'] = 'v2'
+        with patch.object(PartialCollectingTransformer, 'WRITE_VERSION', 2):
+            self.collect(collected_block_structure)
+        assert PartialCollectingTransformer.collected_blocks == set(range(7))
+
+    def test_unversioned_blocks(self):
+        collected_block_structure = self.collect()
+        del self.modulestore.blocks[4].field_map['update_version']
+        self.collect(collected_block_structure)
+        assert PartialCollectingTransformer.collected_blocks == set(range(7))
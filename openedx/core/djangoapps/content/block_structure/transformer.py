@@ -58,6 +58,19 @@ class BlockStructureTransformer:
     WRITE_VERSION = 0
     READ_VERSION = 0
 
+    # Whether the transformer's collected data may be re-collected for only
+    # the blocks of a course that changed since its last collection.  See
+    # BlockStructureTransformers.collect_incrementally.
+    #
+    # A transformer may only set this to True if the data it collects for a
+    # block, as well as its non-block-specific data, depend solely on the
+    # block and its ancestors.  Its collect method is then given a block
+    # structure containing only the changed blocks, their descendants and
+    # all of their ancestors.  Transformers that aggregate data from
+    # descendants or siblings must leave this False, so that they are
+    # always given the whole course.
+    SUPPORTS_PARTIAL_COLLECT = False
+
     @classmethod
     def name(cls):
         """
@@ -108,6 +121,28 @@ class BlockStructureTransformer:
         """
         pass  # lint-amnesty, pylint: disable=unnecessary-pass
 
+    @classmethod
+    def compile(cls, block_structure):
+        """
+        Compiles the data collected by the transformer's collect method
+        into a form that is cheaper to evaluate in the transform phase.
+        Transformers typically use it to precompute the user-independent
+        parts of their per-block checks, so that only the user-specific
+        parts are evaluated for each request.
+
+        Unlike collect, this is always called with the whole block
+        structure, after the data of all transformers and all requested
+        xBlock fields have been collected, even when the structure was
+        collected incrementally.  The compiled data may therefore depend
+        on any block of the structure.
+
+        Arguments:
+            block_structure (BlockStructureModulestoreData) - A mutable
+                block structure, with already collected data for the
+                transformer, that is to be modified with the compiled data.
+        """
+        pass  # lint-amnesty, pylint: disable=unnecessary-pass
+
     @abstractmethod
     def transform(self, usage_info, block_structure):
         """
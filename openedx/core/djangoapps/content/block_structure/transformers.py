@@ -3,12 +3,24 @@ Module for a collection of BlockStructureTransformers.
 """
 from logging import getLogger
 
+from .block_structure import BlockStructureModulestoreData
 from .exceptions import TransformerDataIncompatible, TransformerException
+from .instrumentation import (
+    COLLECT_PHASE,
+    TRANSFORM_PHASE,
+    TransformerStage,
+    get_request_profile,
+    transformer_data_bytes
+)
 from .transformer import FilteringTransformerMixin, combine_filters
 from .transformer_registry import TransformerRegistry
 
 logger = getLogger(__name__)  # pylint: disable=C0103
 
+# The xBlock field recording the version of the course in which a block was
+# last changed, used to find the blocks changed since a prior collection.
+UPDATE_VERSION_FIELD = 'update_version'
+
 
 class BlockStructureTransformers:
     """
@@ -73,12 +85,99 @@ class BlockStructureTransformers:
         """
         Collects data for each registered transformer.
         """
+        profile = get_request_profile()
+        for transformer in TransformerRegistry.get_registered_transformers():
+            with profile.stage(COLLECT_PHASE, transformer.name(), block_structure) as stage:
+                block_structure._add_transformer(transformer)  # pylint: disable=protected-access
+                transformer.collect(block_structure)
+                if stage is not None:
+                    stage.data_bytes = transformer_data_bytes(block_structure, transformer)
+
+        # Collect all fields that were requested by the transformers, and the
+        # version of each block, to find the blocks that changed at the next
+        # incremental collection.
+        with profile.stage(COLLECT_PHASE, 'xblock_fields', block_structure):
+            block_structure.request_xblock_fields(UPDATE_VERSION_FIELD)
+            block_structure._collect_requested_xblock_fields()  # pylint: disable=protected-access
+
+        cls._compile(block_structure)
+
+    @classmethod
+    def collect_incrementally(cls, block_structure, collected_block_structure):
+        """
+        Collects data for each registered transformer, reusing the data of
+        the given previously collected block structure for the blocks that
+        haven't changed since, when possible.
+
+        Blocks are considered changed if their update version or their
+        children differ from those recorded in the previously collected
+        structure.  Transformers that support partial collection only
+        collect data for the changed blocks and their descendants, the
+        data of all other blocks being copied from the previously collected
+        structure.  All other transformers collect data for the whole
+        structure, as done by collect.
+
+        Arguments:
+            block_structure (BlockStructureModulestoreData) - The block
+                structure to collect data for.
+
+            collected_block_structure (BlockStructureBlockData) - The block
+                structure previously collected for the same root block, or
+                None if there is none.
+        """
+        profile = get_request_profile()
+        affected_blocks = _affected_block_keys(block_structure, collected_block_structure)
+        partial_block_structure = None
         for transformer in TransformerRegistry.get_registered_transformers():
-            block_structure._add_transformer(transformer)  # pylint: disable=protected-access
-            transformer.collect(block_structure)
+            with profile.stage(COLLECT_PHASE, transformer.name(), block_structure) as stage:
+                block_structure._add_transformer(transformer)  # pylint: disable=protected-access
+                if not _can_collect_partially(transformer, collected_block_structure, affected_blocks):
+                    transformer.collect(block_structure)
+                else:
+                    if partial_block_structure is None:
+                        partial_block_structure = _create_partial_block_structure(block_structure, affected_blocks)
+                    if affected_blocks:
+                        partial_block_structure._add_transformer(transformer)  # pylint: disable=protected-access
+                        transformer.collect(partial_block_structure)
+                        source_of_transformer_data = partial_block_structure
+                    else:
+                        source_of_transformer_data = collected_block_structure
+                    block_structure.transformer_data[transformer] = (
+                        source_of_transformer_data.transformer_data[transformer]
+                    )
+                    _copy_transformer_block_data(
+                        transformer, block_structure, partial_block_structure, collected_block_structure,
+                        affected_blocks,
+                    )
+                if stage is not None:
+                    stage.data_bytes = transformer_data_bytes(block_structure, transformer)
+
+        with profile.stage(COLLECT_PHASE, 'xblock_fields', block_structure):
+            if partial_block_structure is not None:
+                block_structure.request_xblock_fields(
+                    *partial_block_structure._requested_xblock_fields  # pylint: disable=protected-access
+                )
+            # Record the version of each block, to find the blocks that changed at the next collection.
+            block_structure.request_xblock_fields(UPDATE_VERSION_FIELD)
+            block_structure._collect_requested_xblock_fields()  # pylint: disable=protected-access
+
+        cls._compile(block_structure)
 
-        # Collect all fields that were requested by the transformers.
-        block_structure._collect_requested_xblock_fields()  # pylint: disable=protected-access
+        logger.info(
+            'BlockStructure: Collected incrementally for %s; %s of %d blocks affected.',
+            block_structure.root_block_usage_key,
+            'all' if affected_blocks is None else len(affected_blocks),
+            len(block_structure),
+        )
+
+    @classmethod
+    def _compile(cls, block_structure):
+        """
+        Compiles the collected data of each registered transformer.
+        """
+        with get_request_profile().stage(COLLECT_PHASE, 'compile', block_structure):
+            for transformer in TransformerRegistry.get_registered_transformers():
+                transformer.compile(block_structure)
 
     @classmethod
     def verify_versions(cls, block_structure):
@@ -103,38 +202,186 @@ class BlockStructureTransformers:
             )
         return True
 
-    def transform(self, block_structure):
+    def get_steps(self):
+        """
+        Returns the ordered list of the steps in which the transformers of
+        the collection are run by transform, each step being a list of
+        transformers.  The transformers with filters, if any, make up the
+        first step, as they are run together in a single traversal.  Each
+        remaining transformer makes up its own step, in the order that
+        they were added.
+        """
+        steps = [list(self._transformers['supports_filter'])] if self._transformers['supports_filter'] else []
+        steps.extend([transformer] for transformer in self._transformers['no_filter'])
+        return steps
+
+    def transform(self, block_structure, start_step=0):
         """
         The given block structure is transformed by each transformer in the
         collection. Tranformers with filters are combined and run first in a
         single course tree traversal, then remaining transformers are run in
         the order that they were added.
+
+        Arguments:
+            block_structure (BlockStructureBlockData) - The block structure
+                to transform in place.
+
+            start_step (int) - The index of the first step, as returned by
+                get_steps, to run.  Earlier steps are assumed to have already
+                been run on the given block structure, e.g. by
+                transform_steps.
         """
-        self._transform_with_filters(block_structure)
-        self._transform_without_filters(block_structure)
+        self.transform_steps(block_structure, start_step)
 
         # Prune the block structure to remove any unreachable blocks.
-        block_structure._prune_unreachable()  # pylint: disable=protected-access
+        with get_request_profile().stage(TRANSFORM_PHASE, 'prune_unreachable', block_structure):
+            block_structure._prune_unreachable()  # pylint: disable=protected-access
 
-    def _transform_with_filters(self, block_structure):
+    def transform_steps(self, block_structure, start_step=0, stop_step=None):
+        """
+        Transforms the given block structure by the steps, as returned by
+        get_steps, from start_step up to but excluding stop_step, without
+        pruning the blocks that become unreachable.
+        """
+        for step in self.get_steps()[start_step:stop_step]:
+            if isinstance(step[0], FilteringTransformerMixin):
+                self._transform_with_filters(block_structure, step)
+            else:
+                self._transform_without_filters(block_structure, step)
+
+    def _transform_with_filters(self, block_structure, transformers):
         """
         Transforms the given block_structure using the transform_block_filters
         method from the given transformers.
         """
-        if not self._transformers['supports_filter']:
+        # The filters of all transformers are applied in a single traversal,
+        # so each transformer's stage measures the creation of its filters,
+        # which is where most of them query user-specific data, and counts
+        # the blocks its filters rejected.
+        profile = get_request_profile()
+        if not profile.enabled:
+            filters = []
+            for transformer in transformers:
+                filters.extend(transformer.transform_block_filters(self.usage_info, block_structure))
+            block_structure.filter_topological_traversal(combine_filters(block_structure, filters))
             return
 
         filters = []
-        for transformer in self._transformers['supports_filter']:
-            filters.extend(transformer.transform_block_filters(self.usage_info, block_structure))
+        stages = []
+        for transformer in transformers:
+            stage = TransformerStage(TRANSFORM_PHASE, transformer.name())
+            with stage.timed(block_structure):
+                transformer_filters = transformer.transform_block_filters(self.usage_info, block_structure)
+            filters.extend(_counting_filter(block_filter, stage) for block_filter in transformer_filters)
+            stages.append(stage)
 
         combined_filters = combine_filters(block_structure, filters)
-        block_structure.filter_topological_traversal(combined_filters)
+        with profile.stage(TRANSFORM_PHASE, 'filters', block_structure):
+            block_structure.filter_topological_traversal(combined_filters)
+        for stage in stages:
+            profile.record(stage)
 
-    def _transform_without_filters(self, block_structure):
+    def _transform_without_filters(self, block_structure, transformers):
         """
         Transforms the given block_structure using the transform
         method from the given transformers.
         """
-        for transformer in self._transformers['no_filter']:
-            transformer.transform(self.usage_info, block_structure)
+        profile = get_request_profile()
+        for transformer in transformers:
+            with profile.stage(TRANSFORM_PHASE, transformer.name(), block_structure):
+                transformer.transform(self.usage_info, block_structure)
+
+
+def _counting_filter(block_filter, stage):
+    """
+    Returns the given block filter, counting the blocks it rejects as
+    removed by the given stage.
+    """
+    def _filter(block_key):
+        retained = block_filter(block_key)
+        if not retained:
+            stage.blocks_removed += 1
+        return retained
+    return _filter
+
+
+def _affected_block_keys(block_structure, collected_block_structure):
+    """
+    Returns the set of keys of the blocks of the given block structure that
+    changed since the given collected block structure was collected, along
+    with their descendants.
+
+    Returns None if the changed blocks can't be determined, in which case
+    all blocks should be considered affected.
+    """
+    if collected_block_structure is None:
+        return None
+
+    affected_blocks = set()
+    for block_key in block_structure.topological_traversal():
+        update_version = getattr(block_structure.get_xblock(block_key), UPDATE_VERSION_FIELD, None)
+        if update_version is None:
+            # The modulestore doesn't version its blocks.
+            return None
+        changed = (
+            block_key not in collected_block_structure or
+            collected_block_structure.get_xblock_field(block_key, UPDATE_VERSION_FIELD) != update_version or
+            collected_block_structure.get_children(block_key) != block_structure.get_children(block_key)
+        )
+        if changed or any(parent in affected_blocks for parent in block_structure.get_parents(block_key)):
+            affected_blocks.add(block_key)
+    return affected_blocks
+
+
+def _can_collect_partially(transformer, collected_block_structure, affected_blocks):
+    """
+    Returns whether the given transformer's data can be collected for only
+    the given affected blocks.
+    """
+    return (
+        transformer.SUPPORTS_PARTIAL_COLLECT and
+        affected_blocks is not None and
+        # The previously collected data must have been written by the current version of the transformer.
+        collected_block_structure._get_transformer_data_version(transformer) == transformer.WRITE_VERSION  # pylint: disable=protected-access
+    )
+
+
+def _create_partial_block_structure(block_structure, affected_blocks):
+    """
+    Returns a block structure with the given affected blocks of the given
+    block structure along with all of their ancestors, so that each of its
+    blocks has all of its parents.
+    """
+    included_blocks = set()
+    for block_key in reversed(list(block_structure.topological_traversal())):
+        if block_key in affected_blocks or any(
+            child in included_blocks for child in block_structure.get_children(block_key)
+        ):
+            included_blocks.add(block_key)
+
+    partial_block_structure = BlockStructureModulestoreData(block_structure.root_block_usage_key)
+    for block_key in block_structure.topological_traversal():
+        if block_key not in included_blocks:
+            continue
+        partial_block_structure._add_xblock(block_key, block_structure.get_xblock(block_key))  # pylint: disable=protected-access
+        for child_key in block_structure.get_children(block_key):
+            if child_key in included_blocks:
+                partial_block_structure._add_relation(block_key, child_key)  # pylint: disable=protected-access
+    return partial_block_structure
+
+
+def _copy_transformer_block_data(
+        transformer, block_structure, partial_block_structure, collected_block_structure, affected_blocks,
+):
+    """
+    Copies the given transformer's data of each block of the given block
+    structure, from the partial block structure for the affected blocks and
+    from the previously collected block structure for all other blocks.
+    """
+    for block_key in block_structure:
+        source = partial_block_structure if block_key in affected_blocks else collected_block_structure
+        try:
+            transformer_block_data = source.get_transformer_block_data(block_key, transformer)
+        except KeyError:
+            continue
+        block_structure._get_or_create_block(block_key).transformer_data[transformer] = transformer_block_data  # pylint: disable=protected-access
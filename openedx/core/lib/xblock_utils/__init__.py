@@ -18,6 +18,7 @@ from django.contrib.auth.models import User  # lint-amnesty, pylint: disable=imp
 from django.contrib.staticfiles.storage import staticfiles_storage
 from django.urls import reverse
 from django.utils.html import escape
+from edx_django_utils.cache import RequestCache
 from edx_django_utils.plugins import pluggable_override
 from lxml import etree, html
 from opaque_keys.edx.asides import AsideUsageKeyV1, AsideUsageKeyV2
@@ -274,6 +275,28 @@ def replace_static_urls(data_dir, block, view, frag, context, course_id=None, st
     ))
 
 
+def replace_urls(course_id, jump_to_id_base_url, data_dir, block, view, frag, context, static_asset_path=''):  # pylint: disable=unused-argument
+    """
+    Updates the supplied module with a new get_html function that wraps
+    the old get_html function and applies replace_static_urls, replace_course_urls
+    and replace_jump_to_id_urls in a single pass over its content.
+
+    The urls that static paths are resolved to are memoized for the rest of the
+    request, per course, data directory and static asset path.
+    """
+    resolved_static_urls = RequestCache('static_replace.resolved_static_urls').data.setdefault(
+        (str(course_id), data_dir, static_asset_path), {}
+    )
+    return wrap_fragment(frag, static_replace.replace_urls(
+        frag.content,
+        course_id,
+        jump_to_id_base_url,
+        data_directory=data_dir,
+        static_asset_path=static_asset_path,
+        resolved_static_urls=resolved_static_urls,
+    ))
+
+
 def grade_histogram(module_id):
     '''
     Print out a histogram of grades on a given problem in staff member debug info.
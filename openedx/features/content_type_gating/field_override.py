@@ -65,6 +65,9 @@ class ContentTypeGatingFieldOverride(FieldOverrideProvider):
 
         return original_group_access
 
+    def get_overridable_fields(self, course_key):
+        return {'group_access': None}
+
     @classmethod
     def enabled_for(cls, course):
         """Check our stackable config for this specific course"""
@@ -37,6 +37,9 @@ class ShowAnswerFieldOverride(FieldOverrideProvider):
 
         return mapping.get(current_show_answer_value, default)
 
+    def get_overridable_fields(self, course_key):
+        return {'showanswer': None}
+
     @classmethod
     def enabled_for(cls, course):
         """ Enabled only for Self-Paced courses using Personalized User Schedules. """